@@ -0,0 +1,331 @@
+# audit_index.py - Indexed query store for audit logs
+"""
+HVDC 감사 로그 조회 인덱스 (SQLite WAL)
+
+- CSV/NDJSON 감사 로그를 파일별 오프셋 기준으로 증분 수집
+  (writer 커밋 직후 전용 스레드에서 + 조회 직전 - 다른 프로세스가 쓴 레코드도 따라잡음)
+- 커밋 후 수집은 writer 스레드를 막지 않음 (경로별 요청을 합쳐 audit-index 스레드가 처리),
+  밀린 양이 SCAN_THRESHOLD 를 넘으면 건너뜀 - 콜드 백필은 CLI / get_audit_stats 스캔 경로 담당
+- ts/action/actor/risk_level/태그 인덱스로 요청된 시간 창만 집계
+- 원본은 로그 파일, 인덱스는 언제든 삭제 후 재생성 가능한 파생 데이터
+- 밀린 구간은 mmap 개행 경계 청크 단위로 수집 (전체를 메모리에 올리지 않음, audit_scan)
+- 로테이션(파일 교체) 감지 시 generation 증가, 이전 파일 이벤트는 이력으로 유지
+
+환경 변수:
+  HVDC_AUDIT_INDEX      1 (기본) / 0 이면 커밋 시 수집 비활성화 (조회 시에는 수집)
+  HVDC_AUDIT_INDEX_DB   인덱스 경로 (기본 artifacts/audit_index.sqlite)
+"""
+
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from audit_scan import SCAN_THRESHOLD, chunk_spans, loads, read_span
+
+INDEX_DB = Path(os.environ.get("HVDC_AUDIT_INDEX_DB", "artifacts/audit_index.sqlite"))
+INDEX_ON_COMMIT = os.environ.get("HVDC_AUDIT_INDEX", "1") != "0"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    inode INTEGER,
+    offset INTEGER NOT NULL DEFAULT 0,
+    generation INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    log_id INTEGER NOT NULL,
+    generation INTEGER NOT NULL,
+    ts TEXT,
+    ts_epoch REAL,
+    action TEXT,
+    actor TEXT,
+    risk_level TEXT,
+    severity TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_events_ts ON events(log_id, ts_epoch);
+CREATE INDEX IF NOT EXISTS idx_events_action ON events(log_id, action, ts_epoch);
+CREATE INDEX IF NOT EXISTS idx_events_actor ON events(log_id, actor, ts_epoch);
+CREATE INDEX IF NOT EXISTS idx_events_risk ON events(log_id, risk_level, ts_epoch);
+CREATE TABLE IF NOT EXISTS event_tags (
+    event_id INTEGER NOT NULL,
+    log_id INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    ts_epoch REAL
+);
+CREATE INDEX IF NOT EXISTS idx_event_tags ON event_tags(log_id, tag, ts_epoch);
+"""
+
+# (ts, action, actor, risk_level, severity, tags) - 파싱 실패 라인은 action=None
+EventRow = Tuple[Optional[str], Optional[str], Optional[str], Optional[str], Optional[str], List[str]]
+
+def parse_ts(ts: Optional[str]) -> Optional[float]:
+    """ISO 8601 -> epoch (timezone 없는 값은 UTC 로 간주), 실패 시 None"""
+    if not ts:
+        return None
+    try:
+        dt = datetime.fromisoformat(ts.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+def parse_csv_chunk(text: str, at_start: bool) -> List[EventRow]:
+    reader = csv.reader(io.StringIO(text, newline=''))
+    if at_start:
+        next(reader, None)  # 헤더
+    rows = []
+    for values in reader:
+        if not values:
+            continue
+        row = dict(zip(["ts", "action", "actor", "detail", "risk_level", "compliance_tags"], values))
+        tags = [t.strip() for t in row.get("compliance_tags", "").split(",") if t.strip()]
+        rows.append((row.get("ts"), row.get("action", "unknown"), row.get("actor", "unknown"),
+                     (row.get("risk_level") or "LOW").upper(), None, tags))
+    return rows
+
+def parse_ndjson_chunk(text: str, at_start: bool) -> List[EventRow]:
+    rows = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            event = loads(line)
+        except ValueError:
+            rows.append((None, None, None, None, None, []))  # 라인 수에는 포함
+            continue
+        tags = event.get("tags") or []
+        rows.append((event.get("ts"), event.get("action", "unknown"), event.get("actor", "unknown"),
+                     event.get("risk_level"), event.get("severity", "unknown"),
+                     [str(t) for t in tags] if isinstance(tags, list) else []))
+    return rows
+
+PARSERS: Dict[str, Callable[[str, bool], List[EventRow]]] = {
+    "csv": parse_csv_chunk,
+    "ndjson": parse_ndjson_chunk,
+}
+
+class AuditIndex:
+    """SQLite(WAL) 감사 이벤트 인덱스 - 스레드별 연결"""
+
+    def __init__(self, db_path: Path = INDEX_DB):
+        self.db_path = Path(db_path)
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def ingest(self, path: Path, fmt: str) -> int:
+        """
+        로그 파일에서 마지막 수집 오프셋 이후의 완성된 라인만 수집
+        Returns: 새로 수집한 이벤트 수
+        """
+        path = Path(path)
+        if not path.exists():
+            return 0
+        st = path.stat()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")  # 프로세스 간 오프셋 갱신 직렬화
+        try:
+            key = str(path.resolve())
+            row = conn.execute("SELECT id, inode, offset, generation FROM logs WHERE path=?", (key,)).fetchone()
+            if row is None:
+                log_id = conn.execute("INSERT INTO logs(path, inode) VALUES (?, ?)", (key, st.st_ino)).lastrowid
+                offset, generation = 0, 0
+            else:
+                log_id, inode, offset, generation = row
+                if inode != st.st_ino or st.st_size < offset:
+                    # 로테이션/교체된 파일 - 처음부터 새 generation 으로
+                    offset, generation = 0, generation + 1
+
+            added = 0
+            # 기록 중인 마지막 라인은 제외, 청크 단위로 파싱/삽입
+            for start, end in chunk_spans(path, offset, st.st_size):
+                events = PARSERS[fmt](read_span(path, start, end).decode("utf-8", "replace"), start == 0)
+                added += self._insert(conn, log_id, generation, events)
+                offset = end
+
+            conn.execute("UPDATE logs SET inode=?, offset=?, generation=? WHERE id=?",
+                         (st.st_ino, offset, generation, log_id))
+            conn.execute("COMMIT")
+            return added
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def pending_bytes(self, path: Path) -> int:
+        """아직 수집되지 않은 바이트 수 (교체된 파일은 전체 크기)"""
+        path = Path(path)
+        st = path.stat()
+        row = self._conn().execute("SELECT inode, offset FROM logs WHERE path=?",
+                                   (str(path.resolve()),)).fetchone()
+        if row is None or row[0] != st.st_ino or st.st_size < row[1]:
+            return st.st_size
+        return st.st_size - row[1]
+
+    def _insert(self, conn: sqlite3.Connection, log_id: int, generation: int,
+                events: List[EventRow]) -> int:
+        next_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0] + 1
+        event_rows = []
+        tag_rows = []
+        for i, (ts, action, actor, risk_level, severity, tags) in enumerate(events):
+            ts_epoch = parse_ts(ts)
+            event_rows.append((next_id + i, log_id, generation, ts, ts_epoch, action, actor, risk_level, severity))
+            tag_rows.extend((next_id + i, log_id, tag, ts_epoch) for tag in tags)
+        conn.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", event_rows)
+        conn.executemany("INSERT INTO event_tags VALUES (?, ?, ?, ?)", tag_rows)
+        return len(event_rows)
+
+    def summarize(self, path: Path, since_epoch: Optional[float] = None,
+                  current_generation_only: bool = False, actor: Optional[str] = None,
+                  action: Optional[str] = None, risk_level: Optional[str] = None,
+                  tag: Optional[str] = None) -> Dict[str, Any]:
+        """필터 조건의 이벤트 집계 (인덱스 범위 조회)"""
+        conn = self._conn()
+        row = conn.execute("SELECT id, generation FROM logs WHERE path=?", (str(Path(path).resolve()),)).fetchone()
+        result = {"total": 0, "parsed": 0, "actions": {}, "actors": {}, "risk_levels": {},
+                  "severities": {}, "tags": {}, "earliest": None, "latest": None}
+        if row is None:
+            return result
+        log_id, generation = row
+
+        where = ["e.log_id = ?"]
+        params: List[Any] = [log_id]
+        if current_generation_only:
+            where.append("e.generation = ?")
+            params.append(generation)
+        if since_epoch is not None:
+            where.append("e.ts_epoch >= ?")
+            params.append(since_epoch)
+        for column, value in (("actor", actor), ("action", action), ("risk_level", risk_level)):
+            if value:
+                where.append(f"e.{column} = ?")
+                params.append(value.upper() if column == "risk_level" else value)
+        if tag:
+            where.append("e.id IN (SELECT event_id FROM event_tags WHERE log_id = ? AND tag = ?"
+                         + (" AND ts_epoch >= ?)" if since_epoch is not None else ")"))
+            params.extend([log_id, tag] + ([since_epoch] if since_epoch is not None else []))
+        clause = " AND ".join(where)
+
+        total, parsed, earliest, latest = conn.execute(
+            f"SELECT COUNT(*), COUNT(e.action), MIN(e.ts), MAX(e.ts) FROM events e WHERE {clause}", params).fetchone()
+        result.update(total=total, parsed=parsed, earliest=earliest, latest=latest)
+        for key, column in (("actions", "action"), ("actors", "actor"),
+                            ("risk_levels", "risk_level"), ("severities", "severity")):
+            result[key] = dict(conn.execute(
+                f"SELECT e.{column}, COUNT(*) AS n FROM events e WHERE {clause} AND e.action IS NOT NULL "
+                f"GROUP BY e.{column} ORDER BY n DESC", params).fetchall())
+        result["tags"] = dict(conn.execute(
+            f"SELECT t.tag, COUNT(*) AS n FROM event_tags t JOIN events e ON e.id = t.event_id "
+            f"WHERE {clause} GROUP BY t.tag ORDER BY n DESC", params).fetchall())
+        return result
+
+_default_index: Optional[AuditIndex] = None
+_default_lock = threading.Lock()
+
+def default_index() -> AuditIndex:
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            _default_index = AuditIndex()
+        return _default_index
+
+class _CommitIndexer:
+    """커밋 후 수집 전용 스레드 - 같은 파일의 요청은 하나로 합쳐 한 번만 수집"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Tuple[Path, str]] = {}
+        self._wake = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    def submit(self, path: Path, fmt: str) -> None:
+        with self._lock:
+            self._pending[str(path)] = (Path(path), fmt)
+            self._idle.clear()
+            if self._thread is None or self._pid != os.getpid():
+                # fork 이후 자식 프로세스에는 스레드가 없으므로 새로 시작
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="audit-index", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """대기 중인 수집이 끝날 때까지 대기 (테스트/종료 전)"""
+        return self._idle.wait(timeout)
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            with self._lock:
+                jobs, self._pending = list(self._pending.values()), {}
+            for path, fmt in jobs:
+                _ingest_bounded(path, fmt)
+            with self._lock:
+                if not self._pending:
+                    self._idle.set()
+
+def _ingest_bounded(path: Path, fmt: str) -> None:
+    """인덱스 실패나 대량 백로그가 감사 로그 기록 경로에 영향을 주면 안 됨"""
+    try:
+        index = default_index()
+        if path.exists() and index.pending_bytes(path) > SCAN_THRESHOLD:
+            logging.info(f"Audit index backlog for {path} exceeds scan threshold - "
+                         f"skipping commit-time ingest (run audit_index CLI to backfill)")
+            return
+        index.ingest(path, fmt)
+    except Exception as e:
+        logging.warning(f"Audit index update failed for {path}: {e}")
+
+_commit_indexer = _CommitIndexer()
+
+def index_after_commit(path: Path, fmt: str) -> None:
+    """writer 커밋 직후 호출 - 수집은 audit-index 스레드에 넘기고 즉시 반환"""
+    if INDEX_ON_COMMIT:
+        _commit_indexer.submit(path, fmt)
+
+def wait_for_index(timeout: Optional[float] = None) -> bool:
+    return _commit_indexer.wait(timeout)
+
+def main():
+    parser = argparse.ArgumentParser(description="HVDC Audit Index")
+    parser.add_argument("--db", type=str, default=str(INDEX_DB), help="Index database path")
+    parser.add_argument("--csv", type=str, default="artifacts/audit_log.csv", help="CSV audit log")
+    parser.add_argument("--ndjson", type=str, default="artifacts/audit.ndjson", help="NDJSON audit log")
+    parser.add_argument("--summary", type=float, default=None, metavar="HOURS", help="Summarize CSV log window")
+    args = parser.parse_args()
+
+    index = AuditIndex(Path(args.db))
+    start = time.perf_counter()
+    added = index.ingest(Path(args.csv), "csv") + index.ingest(Path(args.ndjson), "ndjson")
+    print(f"✅ Indexed {added} new events in {(time.perf_counter() - start) * 1000:.1f}ms")
+    if args.summary is not None:
+        summary = index.summarize(Path(args.csv), since_epoch=time.time() - args.summary * 3600)
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -2,40 +2,97 @@
 from datetime import datetime, timezone
 import csv
 import hashlib
+import io
 import json
 import os
+import time
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 import logging
 
+from audit_writer import LineFileSink, file_lock, get_writer, flush_audit
+from audit_merkle import MerkleCheckpoints, map_blocks
+from audit_rotation import SegmentRotator
+from audit_index import default_index, index_after_commit
+from audit_scan import chunk_spans, read_span
+from pii_sanitizer import PII_PATTERNS, csv_sanitizer
+
 # 보안 강화된 감사 로그 설정
 AUDIT_CSV = Path("artifacts/audit_log.csv")
 AUDIT_CSV.parent.mkdir(parents=True, exist_ok=True)
+AUDIT_FIELDNAMES = ["ts", "action", "actor", "detail", "risk_level", 
+                    "compliance_tags", "session_id", "source_ip", "integrity_hash"]
+
+def _csv_line(values: List[Any]) -> str:
+    buf = io.StringIO()
+    csv.writer(buf).writerow(values)
+    return buf.getvalue()
+
+def _single_line(value: str) -> str:
+    """
+    CR/LF 이스케이프 - CSV 레코드 하나 = 물리 라인 하나
+    (Merkle 블록/스캔 청크/인덱스 수집이 라인 경계에서 잘라도 레코드가 쪼개지지 않도록)
+    """
+    return value.replace("\r", "\\r").replace("\n", "\\n")
+
+def _csv_ts(raw_line: bytes) -> str:
+    return raw_line.split(b",", 1)[0].decode("utf-8")
+
+def _csv_merkle(path: Path) -> MerkleCheckpoints:
+    """CSV 체크포인트 - 블록은 헤더 다음 라인부터"""
+    header_bytes = len(_csv_line(AUDIT_FIELDNAMES).encode("utf-8"))
+    if path.exists():
+        with open(path, "rb") as f:
+            header_bytes = len(f.readline()) or header_bytes
+    return MerkleCheckpoints(path, base_line=1, base_offset=header_bytes, ts_of=_csv_ts)
+
+class MerkleCsvSink(LineFileSink):
+    """
+    배치 기록 후 완성된 블록을 Merkle 체크포인트로 봉인하고 조회 인덱스에 수집하는 CSV sink
+    정책(크기/일자)에 따라 기록 직전에 세그먼트로 로테이션 (audit_rotation)
+    """
+    def __init__(self, path: Path, header: str):
+        super().__init__(path, header)
+        self.merkle = _csv_merkle(self.path)
+        self.rotator = SegmentRotator(self.path, ts_of=_csv_ts)
+        self.rotator.resume_pending()
+
+    def write_batch(self, records: List[Any], fsync: bool) -> None:
+        # 로테이션 판단, 헤더 확인, 기록, 블록 봉인을 하나의 프로세스 간 잠금 안에서
+        with file_lock(self.path):
+            if self.rotator.due(self.path.stat().st_size if self.path.exists() else 0):
+                self.rotator.rotate(self._freeze)
+            self.append(records, fsync)
+            self.merkle.seal()
+        index_after_commit(self.path, "csv")
 
-# PII/NDA 민감 정보 패턴 (MACHO-GPT 보안 표준)
-SENSITIVE_PATTERNS = [
-    r'\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b',  # 카드번호
-    r'\b\d{3}-\d{2}-\d{4}\b',  # SSN
-    r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',  # 이메일
-    r'\bpassword\s*[:=]\s*\S+\b',  # 패스워드
-    r'\bapi[_-]?key\s*[:=]\s*\S+\b',  # API 키
-]
+    def _freeze(self, segment: Path) -> Dict[str, Any]:
+        """활성 CSV 와 Merkle 사이드카를 세그먼트로 이동, 세그먼트 메타 반환"""
+        self.merkle.seal()
+        entries = self.merkle.load()
+        self.path.rename(segment)
+        if self.merkle.sidecar.exists():
+            self.merkle.sidecar.rename(segment.with_name(segment.name + ".checkpoints.ndjson"))
+        self.merkle.reset()
+        self.merkle.base_offset = len(self.header.encode("utf-8"))
+        return {
+            "method": "sha256",
+            "merkle_root": entries[-1]["root"] if entries else None,
+            "merkle_blocks": len(entries),
+            "ts": datetime.now(timezone.utc).isoformat()
+        }
+
+# 헤더는 writer 스레드가 빈 파일에 기록할 때만 추가
+_csv_sink = MerkleCsvSink(AUDIT_CSV, header=_csv_line(AUDIT_FIELDNAMES))
+
+# PII/NDA 민감 정보 패턴 (MACHO-GPT 보안 표준) - 공용 pii_sanitizer 에서 단일 정규식으로 컴파일
+SENSITIVE_PATTERNS = list(PII_PATTERNS.values())
 
 def sanitize_sensitive_data(data: Any) -> Any:
     """
     PII/NDA 민감 정보 마스킹 (MACHO-GPT 보안 표준)
     """
-    if isinstance(data, dict):
-        return {k: sanitize_sensitive_data(v) for k, v in data.items()}
-    elif isinstance(data, list):
-        return [sanitize_sensitive_data(item) for item in data]
-    elif isinstance(data, str):
-        import re
-        sanitized = data
-        for pattern in SENSITIVE_PATTERNS:
-            sanitized = re.sub(pattern, '[REDACTED]', sanitized, flags=re.IGNORECASE)
-        return sanitized
-    return data
+    return csv_sanitizer.sanitize(data)
 
 def calculate_integrity_hash(row_data: Dict[str, Any]) -> str:
     """
@@ -71,31 +128,26 @@ def write_audit(action: str, actor: str, detail: Dict[str, Any],
     # 감사 로그 엔트리 생성
     row = {
         "ts": timestamp,
-        "action": action,
-        "actor": str(sanitized_actor),
+        "action": _single_line(str(action)),
+        "actor": _single_line(str(sanitized_actor)),
         "detail": json.dumps(sanitized_detail, default=str, ensure_ascii=False),
-        "risk_level": risk_level.upper(),
-        "compliance_tags": ",".join(compliance_tags or []),
-        "session_id": os.environ.get("HVDC_SESSION_ID", "system"),
-        "source_ip": os.environ.get("REMOTE_ADDR", "localhost"),
+        "risk_level": _single_line(risk_level.upper()),
+        "compliance_tags": _single_line(",".join(compliance_tags or [])),
+        "session_id": _single_line(os.environ.get("HVDC_SESSION_ID", "system")),
+        "source_ip": _single_line(os.environ.get("REMOTE_ADDR", "localhost")),
     }
     
     # 무결성 해시 추가
     row["integrity_hash"] = calculate_integrity_hash(row)
     
+    high_risk = risk_level.upper() in ["HIGH", "CRITICAL"]
+    
     try:
-        # 파일 잠금과 함께 원자적 쓰기
-        write_mode = "a" if AUDIT_CSV.exists() else "w"
-        with open(AUDIT_CSV, write_mode, newline='', encoding='utf-8') as f:
-            fieldnames = ["ts", "action", "actor", "detail", "risk_level", 
-                         "compliance_tags", "session_id", "source_ip", "integrity_hash"]
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            if write_mode == "w":
-                writer.writeheader()
-            writer.writerow(row)
+        # 백그라운드 writer 로 group commit - 고위험 작업은 기록(fsync) 완료까지 대기
+        get_writer().submit(_csv_sink, _csv_line([row[k] for k in AUDIT_FIELDNAMES]), wait=high_risk)
             
         # 고위험 작업은 별도 로그도 기록
-        if risk_level.upper() in ["HIGH", "CRITICAL"]:
+        if high_risk:
             logging.warning(f"HIGH-RISK AUDIT: {action} by {sanitized_actor} - {risk_level}")
             
     except Exception as e:
@@ -105,59 +157,107 @@ def write_audit(action: str, actor: str, detail: Dict[str, Any],
     
     return row
 
-def verify_audit_integrity(audit_file: Optional[Path] = None) -> Dict[str, Any]:
+def _check_rows(target_file: str, start: int, end: int, fieldnames: List[str]) -> Dict[str, Any]:
+    """
+    [start, end) 바이트 구간의 행별 integrity_hash 검증 (프로세스 풀 작업 단위)
+    손상 행 번호는 구간 내 상대 번호 (1부터), lines 는 구간의 라인 수
+    """
+    data = read_span(target_file, start, end)
+    reader = csv.DictReader(io.StringIO(data.decode('utf-8'), newline=''), fieldnames=fieldnames)
+    verified = 0
+    corrupted = []
+    for row_num, row in enumerate(reader, start=1):
+        stored_hash = row.pop('integrity_hash', None)
+        if stored_hash and stored_hash == calculate_integrity_hash(row):
+            verified += 1
+        else:
+            corrupted.append({
+                "row": row_num,
+                "timestamp": row.get("ts"),
+                "action": row.get("action")
+            })
+    return {"verified": verified, "corrupted": corrupted, "lines": data.count(b"\n")}
+
+def verify_audit_integrity(audit_file: Optional[Path] = None, since: Optional[str] = None,
+                           until: Optional[str] = None, workers: Optional[int] = None,
+                           include_segments: bool = False) -> Dict[str, Any]:
     """
     감사 로그 무결성 검증
+    - 봉인된 블록은 Merkle root 로 병렬 검증, 손상 블록과 미봉인 꼬리만 행 단위 검증
+    - since/until (ISO) 지정 시 해당 시간 범위 블록만 검증
+    - include_segments: 로테이션된 압축 세그먼트도 하나씩 스트리밍해 SHA-256 검증
     """
+    flush_audit()
     target_file = audit_file or AUDIT_CSV
     if not target_file.exists():
         return {"status": "ERROR", "message": "Audit log not found"}
     
-    verified_count = 0
-    corrupted_count = 0
-    corrupted_entries = []
-    
     try:
-        with open(target_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row_num, row in enumerate(reader, start=2):  # 헤더 다음부터
-                if 'integrity_hash' not in row:
-                    corrupted_count += 1
-                    continue
-                    
-                stored_hash = row.pop('integrity_hash')
-                calculated_hash = calculate_integrity_hash(row)
-                
-                if stored_hash == calculated_hash:
-                    verified_count += 1
-                else:
-                    corrupted_count += 1
-                    corrupted_entries.append({
-                        "row": row_num,
-                        "timestamp": row.get("ts"),
-                        "action": row.get("action")
-                    })
+        merkle = _csv_sink.merkle if target_file == AUDIT_CSV else _csv_merkle(target_file)
+        with open(target_file, 'r', encoding='utf-8', newline='') as f:
+            fieldnames = next(csv.reader(f), AUDIT_FIELDNAMES)
+        block_result = merkle.verify(since, until, workers)
+        entries = merkle.load()
+        
+        verified_count = block_result["sealed_lines"]
+        # 행 단위 검증 구간: 손상 블록 + 미봉인 꼬리 (mmap 개행 경계 청크로 나눠 병렬 검증)
+        spans = []  # (시작 라인 번호 - 꼬리 청크는 None, start, end)
+        for block in block_result["bad_blocks"]:
+            start_line, start, end = merkle.block_span(entries, block["block"])
+            verified_count -= block["last_line"] - start_line
+            spans.append((start_line, start, end))
+        if not until:
+            tail_line = entries[-1]["line"] if entries else merkle.base_line
+            tail_offset = entries[-1]["offset"] if entries else merkle.base_offset
+            for i, (start, end) in enumerate(chunk_spans(target_file, tail_offset, complete_only=False)):
+                spans.append((tail_line if i == 0 else None, start, end))
+        
+        checked = map_blocks(_check_rows, [(str(target_file), start, end, fieldnames)
+                                           for _, start, end in spans], workers)
+        corrupted_entries = []
+        line = 0
+        for (start_line, _, _), part in zip(spans, checked):
+            line = line if start_line is None else start_line
+            verified_count += part["verified"]
+            corrupted_entries.extend(dict(bad, row=line + bad["row"]) for bad in part["corrupted"])
+            line += part["lines"]
     except Exception as e:
         return {"status": "ERROR", "message": f"Verification failed: {e}"}
     
-    return {
-        "status": "SUCCESS" if corrupted_count == 0 else "COMPROMISED",
+    segment_result = None
+    if include_segments:
+        rotator = _csv_sink.rotator if target_file == AUDIT_CSV else SegmentRotator(target_file)
+        segment_result = rotator.verify_segments()
+    
+    corrupted_count = len(corrupted_entries)
+    compromised = (corrupted_count > 0 or block_result["status"] != "SUCCESS"
+                   or (segment_result is not None and segment_result["status"] != "SUCCESS"))
+    result = {
+        "status": "COMPROMISED" if compromised else "SUCCESS",
         "verified_entries": verified_count,
         "corrupted_entries": corrupted_count,
         "corrupted_details": corrupted_entries[:10],  # 최대 10개만 반환
-        "total_entries": verified_count + corrupted_count
+        "total_entries": verified_count + corrupted_count,
+        "blocks_verified": block_result["blocks_verified"],
+        "bad_blocks": block_result["bad_blocks"][:10],
+        "messages": block_result["messages"]
     }
+    if segment_result is not None:
+        result["segments"] = segment_result["segments"]
+    return result
 
-def get_audit_summary(hours: int = 24) -> Dict[str, Any]:
+def get_audit_summary(hours: int = 24, actor: Optional[str] = None, action: Optional[str] = None,
+                      risk_level: Optional[str] = None, compliance_tag: Optional[str] = None,
+                      audit_file: Optional[Path] = None) -> Dict[str, Any]:
     """
     지정 시간 내 감사 로그 요약 (KPI 모니터링용)
+    SQLite 인덱스에서 요청된 시간 창/필터만 조회 (audit_index)
     """
-    if not AUDIT_CSV.exists():
+    flush_audit()
+    target_file = audit_file or AUDIT_CSV
+    if not target_file.exists():
         return {"error": "No audit log found"}
     
-    from datetime import timedelta
-    cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours)
-    
     summary = {
         "total_actions": 0,
         "risk_levels": {"LOW": 0, "MEDIUM": 0, "HIGH": 0, "CRITICAL": 0},
@@ -166,40 +266,23 @@ def get_audit_summary(hours: int = 24) -> Dict[str, Any]:
         "compliance_tags": {},
         "time_range": f"Last {hours} hours"
     }
+    filters = {k: v for k, v in (("actor", actor), ("action", action), ("risk_level", risk_level),
+                                 ("compliance_tag", compliance_tag)) if v}
+    if filters:
+        summary["filters"] = filters
     
     try:
-        with open(AUDIT_CSV, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # 시간 필터링
-                try:
-                    entry_time = datetime.fromisoformat(row.get("ts", "").replace('Z', '+00:00'))
-                    if entry_time < cutoff_time:
-                        continue
-                except:
-                    continue  # 잘못된 타임스탬프 스킵
-                
-                summary["total_actions"] += 1
-                
-                # 위험도별 집계
-                risk = row.get("risk_level", "LOW").upper()
-                if risk in summary["risk_levels"]:
-                    summary["risk_levels"][risk] += 1
-                
-                # 액션별 집계
-                action = row.get("action", "unknown")
-                summary["top_actions"][action] = summary["top_actions"].get(action, 0) + 1
-                
-                # 사용자별 집계
-                actor = row.get("actor", "unknown")
-                summary["top_actors"][actor] = summary["top_actors"].get(actor, 0) + 1
-                
-                # 규제 태그별 집계
-                tags = row.get("compliance_tags", "").split(",")
-                for tag in tags:
-                    if tag.strip():
-                        summary["compliance_tags"][tag.strip()] = summary["compliance_tags"].get(tag.strip(), 0) + 1
-                        
+        index = default_index()
+        index.ingest(target_file, "csv")
+        result = index.summarize(target_file, since_epoch=time.time() - hours * 3600,
+                                 actor=actor, action=action, risk_level=risk_level, tag=compliance_tag)
+        summary["total_actions"] = result["total"]
+        for risk, count in result["risk_levels"].items():
+            if risk in summary["risk_levels"]:
+                summary["risk_levels"][risk] = count
+        summary["top_actions"] = result["actions"]
+        summary["top_actors"] = result["actors"]
+        summary["compliance_tags"] = result["tags"]
     except Exception as e:
         summary["error"] = str(e)
     
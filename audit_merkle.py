@@ -0,0 +1,260 @@
+# audit_merkle.py - Merkle block checkpoints for append-only audit logs
+"""
+HVDC 감사 로그 Merkle 체크포인트
+
+- 로그를 N 라인 블록으로 나누고 블록별 Merkle root 를 사이드카(<log>.checkpoints.ndjson)에 기록
+- 각 체크포인트는 누적 root (지금까지 모든 블록 root 에 대한 Merkle root) 와 블록 시간 범위 포함
+- 시간 범위 검증: 해당 블록만 읽어 재계산 + 증명 경로로 누적 root 포함 여부 확인
+  (블록 root 트리는 검증마다 한 번 O(n) 구성, 블록별 증명은 그 트리에서 O(log n))
+- 전체 검증: 블록 단위로 프로세스 풀에서 병렬 재계산, 변조된 블록 위치 보고
+
+환경 변수:
+  HVDC_AUDIT_CHECKPOINT_EVERY  블록 크기 (라인 수, 기본 1000)
+  HVDC_AUDIT_VERIFY_WORKERS    병렬 검증 프로세스 수 (기본 CPU 수)
+"""
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BLOCK_LINES = int(os.environ.get("HVDC_AUDIT_CHECKPOINT_EVERY", "1000"))
+VERIFY_WORKERS = int(os.environ.get("HVDC_AUDIT_VERIFY_WORKERS", str(os.cpu_count() or 1)))
+
+def leaf_hash(line: bytes) -> bytes:
+    """라인(개행 포함 원본 바이트) 리프 해시 - 내부 노드와 도메인 분리"""
+    return hashlib.sha256(b"\x00" + line).digest()
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+def _next_level(level: List[bytes]) -> List[bytes]:
+    # 짝이 없는 마지막 노드는 그대로 위로 올림
+    parents = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+    if len(level) % 2:
+        parents.append(level[-1])
+    return parents
+
+def merkle_root(leaves: List[bytes]) -> bytes:
+    if not leaves:
+        return hashlib.sha256(b"").digest()
+    level = list(leaves)
+    while len(level) > 1:
+        level = _next_level(level)
+    return level[0]
+
+class MerkleTree:
+    """리프 목록의 전체 레벨 - 한 번 O(n) 구성 후 root 와 리프별 증명(O(log n))을 재사용"""
+
+    def __init__(self, leaves: List[bytes]):
+        self.levels = [list(leaves)]
+        while len(self.levels[-1]) > 1:
+            self.levels.append(_next_level(self.levels[-1]))
+
+    @property
+    def root(self) -> bytes:
+        return self.levels[-1][0] if self.levels[0] else hashlib.sha256(b"").digest()
+
+    def proof(self, index: int) -> List[Tuple[str, str]]:
+        """index 리프의 증명 경로 [(sibling 위치 L/R, sibling hex)] - O(log n)"""
+        proof = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                proof.append(("L" if sibling < index else "R", level[sibling].hex()))
+            index //= 2
+        return proof
+
+def merkle_proof(leaves: List[bytes], index: int) -> List[Tuple[str, str]]:
+    """단일 증명 (트리 전체 구성 O(n)) - 여러 리프를 증명할 때는 MerkleTree 하나를 재사용"""
+    return MerkleTree(leaves).proof(index)
+
+def verify_proof(leaf: bytes, proof: List[Tuple[str, str]], root: bytes) -> bool:
+    h = leaf
+    for side, sibling in proof:
+        h = node_hash(bytes.fromhex(sibling), h) if side == "L" else node_hash(h, bytes.fromhex(sibling))
+    return h == root
+
+def block_root(path: str, start: int, end: int) -> str:
+    """파일 [start, end) 바이트 구간의 블록 Merkle root (프로세스 풀 작업 단위)"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return merkle_root([leaf_hash(line) for line in data.splitlines(keepends=True)]).hex()
+
+def map_blocks(func: Callable, jobs: List[tuple], workers: Optional[int] = None) -> List[Any]:
+    """블록 작업을 순서대로 실행 - 2개 이상이고 workers > 1 이면 프로세스 풀 사용"""
+    workers = VERIFY_WORKERS if workers is None else workers
+    if workers <= 1 or len(jobs) < 2:
+        return [func(*job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        return list(pool.map(func, *zip(*jobs)))
+
+class MerkleCheckpoints:
+    """
+    append-only 라인 로그의 블록 체크포인트 사이드카
+    블록 경계는 base (헤더/레거시 앵커 끝) 이후 block_lines 라인마다
+    """
+    def __init__(self, log_path: Path, sidecar: Optional[Path] = None,
+                 block_lines: Optional[int] = None, base_line: int = 0, base_offset: int = 0,
+                 ts_of: Optional[Callable[[bytes], Optional[str]]] = None):
+        self.log_path = Path(log_path)
+        self.sidecar = sidecar or self.log_path.with_name(self.log_path.name + ".checkpoints.ndjson")
+        self.block_lines = block_lines or BLOCK_LINES
+        self.base_line = base_line
+        self.base_offset = base_offset
+        self.ts_of = ts_of
+        self._lock = threading.Lock()
+        self._entries: List[Dict[str, Any]] = []
+        self._entries_key: Optional[Tuple[int, int]] = None
+        # 아직 봉인되지 않은 꼬리 블록 스캔 상태 (매 배치마다 전체 꼬리를 다시 읽지 않도록)
+        self._partial: Optional[Dict[str, Any]] = None
+
+    def reset(self) -> None:
+        """로그 교체(로테이션/재앵커링) 후 캐시 초기화"""
+        with self._lock:
+            self._entries, self._entries_key, self._partial = [], None, None
+
+    def load(self) -> List[Dict[str, Any]]:
+        """체크포인트 목록 (사이드카 크기/mtime 기준 캐시)"""
+        try:
+            st = self.sidecar.stat()
+        except FileNotFoundError:
+            self._entries, self._entries_key = [], None
+            return []
+        key = (st.st_size, st.st_mtime_ns)
+        if key != self._entries_key:
+            with self.sidecar.open("r", encoding="utf-8") as f:
+                self._entries = [json.loads(line) for line in f if line.strip()]
+            self._entries_key = key
+        return self._entries
+
+    def block_span(self, entries: List[Dict[str, Any]], index: int) -> Tuple[int, int, int]:
+        """블록 index 의 (시작 라인 번호, 시작 오프셋, 끝 오프셋)"""
+        if index == 0:
+            return self.base_line, self.base_offset, entries[0]["offset"]
+        prev = entries[index - 1]
+        return prev["line"], prev["offset"], entries[index]["offset"]
+
+    def _ts(self, line: Optional[bytes]) -> Optional[str]:
+        if line is None or self.ts_of is None:
+            return None
+        try:
+            return self.ts_of(line)
+        except Exception:
+            return None
+
+    def seal(self, annotate: Optional[Callable[[int], Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """
+        마지막 체크포인트 이후 완성된 블록을 봉인해 사이드카에 추가
+        annotate(line) 은 블록 마지막 라인 번호에 대한 추가 필드 (예: 체인 head)
+        """
+        with self._lock:
+            entries = self.load()
+            last = entries[-1] if entries else {"line": self.base_line, "offset": self.base_offset}
+            inode = self.log_path.stat().st_ino
+            partial = self._partial
+            # 다른 프로세스가 봉인/로테이션했으면 마지막 체크포인트부터 다시 스캔
+            if (not partial or partial["entries"] != len(entries) or partial["inode"] != inode
+                    or partial["sealed_offset"] != last["offset"]):
+                partial = {"entries": len(entries), "sealed_offset": last["offset"], "inode": inode,
+                           "line": last["line"], "offset": last["offset"],
+                           "leaves": [], "first": None, "last": None}
+
+            roots = [bytes.fromhex(e["block_root"]) for e in entries]
+            new_entries = []
+            with self.log_path.open("rb") as f:
+                f.seek(partial["offset"])
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break  # 기록 중인 마지막 라인은 다음 봉인 때
+                    partial["leaves"].append(leaf_hash(raw))
+                    partial["line"] += 1
+                    partial["offset"] += len(raw)
+                    if partial["first"] is None:
+                        partial["first"] = raw
+                    partial["last"] = raw
+                    if len(partial["leaves"]) == self.block_lines:
+                        root = merkle_root(partial["leaves"])
+                        roots.append(root)
+                        entry = {
+                            "block": len(roots) - 1,
+                            "line": partial["line"],
+                            "offset": partial["offset"],
+                            "block_root": root.hex(),
+                            "root": merkle_root(roots).hex(),
+                            "first_ts": self._ts(partial["first"]),
+                            "last_ts": self._ts(partial["last"])
+                        }
+                        if annotate:
+                            entry.update(annotate(partial["line"]) or {})
+                        new_entries.append(entry)
+                        partial.update(leaves=[], first=None, last=None, sealed_offset=partial["offset"])
+
+            if new_entries:
+                with self.sidecar.open("a", encoding="utf-8") as f:
+                    for entry in new_entries:
+                        f.write(json.dumps(entry, separators=(',', ':')) + "\n")
+                    f.flush()
+                self.load()
+            partial["entries"] = len(self._entries)
+            self._partial = partial
+            return new_entries
+
+    def select(self, since: Optional[str] = None, until: Optional[str] = None) -> List[int]:
+        """ISO 시간 범위와 겹치는 블록 index"""
+        selected = []
+        for i, e in enumerate(self.load()):
+            if since and e.get("last_ts") and e["last_ts"] < since:
+                continue
+            if until and e.get("first_ts") and e["first_ts"] > until:
+                continue
+            selected.append(i)
+        return selected
+
+    def verify(self, since: Optional[str] = None, until: Optional[str] = None,
+               workers: Optional[int] = None, expected_root: Optional[str] = None) -> Dict[str, Any]:
+        """
+        블록 데이터를 재계산해 봉인된 root 와 비교
+        - 범위 지정 시 선택 블록만 읽고, 블록 root 트리를 한 번 구성해 블록별 O(log n) 증명으로 누적 root 포함 확인
+        - 범위 미지정 시 전체 블록 병렬 검증 + 누적 root 재계산
+        """
+        entries = self.load()
+        result: Dict[str, Any] = {"blocks_total": len(entries), "blocks_verified": 0,
+                                  "bad_blocks": [], "sealed_lines": 0, "messages": []}
+        if not entries:
+            result["status"] = "SUCCESS"
+            return result
+
+        roots = [bytes.fromhex(e["block_root"]) for e in entries]
+        trusted = bytes.fromhex(expected_root or entries[-1]["root"])
+        indexes = self.select(since, until) if (since or until) else list(range(len(entries)))
+
+        if since or until:
+            tree = MerkleTree(roots)
+            for i in indexes:
+                if not verify_proof(roots[i], tree.proof(i), trusted):
+                    result["messages"].append(f"Checkpoint {i} not covered by Merkle root")
+        elif merkle_root(roots) != trusted:
+            result["messages"].append("Checkpoint sidecar does not match Merkle root")
+
+        jobs = [(str(self.log_path),) + self.block_span(entries, i)[1:] for i in indexes]
+        computed = map_blocks(block_root, jobs, workers)
+        for i, root in zip(indexes, computed):
+            start_line = self.block_span(entries, i)[0]
+            if root != entries[i]["block_root"]:
+                result["bad_blocks"].append({
+                    "block": i,
+                    "first_line": start_line + 1,
+                    "last_line": entries[i]["line"],
+                    "first_ts": entries[i].get("first_ts"),
+                    "last_ts": entries[i].get("last_ts")
+                })
+            result["sealed_lines"] += entries[i]["line"] - start_line
+
+        result["blocks_verified"] = len(indexes)
+        result["status"] = "SUCCESS" if not result["bad_blocks"] and not result["messages"] else "COMPROMISED"
+        return result
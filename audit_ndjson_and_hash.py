@@ -5,46 +5,378 @@ NIST SP800-92 and OWASP logging compliant audit trail system
 """
 
 import json
+import logging
+import os
+import threading
 from pathlib import Path
 from datetime import datetime, timezone
 import hashlib
 import argparse
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
+
+from audit_writer import AuditWriterFailed, LineFileSink, file_lock, get_writer, flush_audit
+from audit_index import default_index, index_after_commit
+from audit_merkle import BLOCK_LINES, MerkleCheckpoints, MerkleTree, leaf_hash, map_blocks, merkle_root, verify_proof
+from audit_rotation import SegmentRotator
+from audit_scan import SCAN_THRESHOLD, ndjson_stats
+from pii_sanitizer import event_sanitizer
 
 AUDIT_PATH = Path("artifacts/audit.ndjson")
 HASH_META = Path("artifacts/audit.ndjson.hash.json")
 
-def append_event(event: Dict[str, Any], path: Path = AUDIT_PATH) -> bool:
+# Hash chain: every event carries prev_hash and its own hash = sha256(prev_hash + body)
+CHAIN_VERSION = "2.0"
+GENESIS_HASH = "0" * 64
+CHECKPOINT_EVERY = BLOCK_LINES  # Merkle block size (see audit_merkle)
+_HASH_KEY = b',"hash":"'
+_HASH_SUFFIX_LEN = len(_HASH_KEY) + 64 + 2  # ,"hash":"<64 hex>"}
+
+def meta_path_for(path: Path) -> Path:
+    """audit.ndjson -> audit.ndjson.hash.json"""
+    return path.with_name(path.name + ".hash.json")
+
+def checkpoints_path_for(path: Path) -> Path:
+    """audit.ndjson -> audit.ndjson.checkpoints.ndjson"""
+    return path.with_name(path.name + ".checkpoints.ndjson")
+
+def chain_entry(prev_hash: str, event: Dict[str, Any]) -> Tuple[str, str]:
+    """
+    Serialize an event linked to prev_hash.
+    Returns (line without newline, entry hash); the hash is always the last key.
+    """
+    body_event = {k: v for k, v in event.items() if k != "hash"}
+    body_event["prev_hash"] = prev_hash
+    body = json.dumps(body_event, ensure_ascii=False, separators=(',', ':'))
+    entry_hash = hashlib.sha256((prev_hash + body).encode("utf-8")).hexdigest()
+    return f'{body[:-1]},"hash":"{entry_hash}"}}', entry_hash
+
+def next_chain_head(head: str, raw_line: bytes) -> Tuple[str, bool]:
+    """
+    Advance the chain over one raw line (newline stripped).
+    Returns (new head, True if the line is a valid chained entry for this head).
+    Lines that are not valid entries (legacy/foreign/tampered) are folded in
+    as sha256(head + line), so any change still alters every later head.
+    """
+    if len(raw_line) > _HASH_SUFFIX_LEN and raw_line.endswith(b'"}'):
+        cut = len(raw_line) - _HASH_SUFFIX_LEN
+        if raw_line[cut:cut + len(_HASH_KEY)] == _HASH_KEY:
+            stored = raw_line[cut + len(_HASH_KEY):-2].decode("ascii", "replace")
+            body = raw_line[:cut] + b"}"
+            if hashlib.sha256(head.encode("ascii") + body).hexdigest() == stored:
+                return stored, True
+    return hashlib.sha256(head.encode("ascii") + raw_line).hexdigest(), False
+
+def _event_ts(raw_line: bytes) -> Optional[str]:
+    return json.loads(raw_line).get("ts")
+
+def _chain_base(meta: Dict[str, Any]) -> Tuple[int, int]:
+    """(line, offset) where the chain starts - after anchored legacy content"""
+    anchor = meta.get("anchor")
+    return (anchor["line_count"], anchor["file_size_bytes"]) if anchor else (0, 0)
+
+def _replay_range(path: str, start: int, end: Optional[int], head: str) -> Dict[str, Any]:
+    """
+    Replay the chain over bytes [start, end) (end=None: to EOF).
+    Process-pool unit for parallel verification; also returns the block Merkle root.
     """
-    Append audit event to NDJSON file (atomic operation)
+    leaves = []
+    lines = unchained = 0
+    first_invalid = None
+    offset = start
+    with open(path, "rb") as f:
+        f.seek(start)
+        for raw in f:
+            if end is not None and offset >= end:
+                break
+            offset += len(raw)
+            lines += 1
+            leaves.append(leaf_hash(raw))
+            head, chained = next_chain_head(head, raw.rstrip(b"\r\n"))
+            if not chained:
+                unchained += 1
+                if first_invalid is None:
+                    first_invalid = lines
+    return {"head": head, "lines": lines, "end": offset, "unchained": unchained,
+            "first_invalid": first_invalid, "block_root": merkle_root(leaves).hex()}
+
+def _read_json(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_json_atomic(path: Path, data: Dict[str, Any], fsync: bool = False) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + f".{os.getpid()}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        if fsync:
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class ChainedNdjsonSink(LineFileSink):
+    """
+    NDJSON sink that serializes events at commit time, links each one to the
+    previous entry hash and keeps the chain head, line count and size in the
+    meta file - O(batch) per commit instead of re-hashing the whole file.
+    """
+    def __init__(self, path: Path, meta_path: Optional[Path] = None):
+        super().__init__(path)
+        self.meta_path = meta_path or meta_path_for(self.path)
+        self.checkpoints_path = checkpoints_path_for(self.path)
+        self.merkle = MerkleCheckpoints(self.path, self.checkpoints_path,
+                                        block_lines=CHECKPOINT_EVERY, ts_of=_event_ts)
+        self.rotator = SegmentRotator(self.path, ts_of=_event_ts)
+        self.rotator.resume_pending()
+        self._lock = threading.Lock()
+        self._heads: Dict[int, str] = {}
+
+    def ensure_state(self) -> Dict[str, Any]:
+        """Current chain meta, bootstrapping or catching up if needed"""
+        with self._lock, file_lock(self.path):
+            return self._load_state()
+
+    def write_batch(self, records: List[Any], fsync: bool) -> None:
+        # The chain state is reloaded from the meta under the cross-process lock,
+        # so workers appending to the same log extend one chain
+        with self._lock, file_lock(self.path):
+            self._heads = {}
+            state = self._load_state()
+            if self.rotator.due(state["file_size_bytes"]):
+                state = self._rotate_locked()
+            head = state["chain_head"]
+            count = state["line_count"]
+            size = state["file_size_bytes"]
+            chunks: List[str] = []
+            for event in records:
+                line, head = chain_entry(head, event)
+                data = line + "\n"
+                chunks.append(data)
+                count += 1
+                size += len(data.encode("utf-8"))
+                self._heads[count] = head
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                f.write("".join(chunks))
+                f.flush()
+                if fsync:
+                    os.fsync(f.fileno())
+
+            # Seal completed Merkle blocks; each checkpoint also records the chain head
+            heads = self._heads
+            self.merkle.base_line, self.merkle.base_offset = _chain_base(state)
+            sealed = self.merkle.seal(lambda line: {"head": heads[line]} if line in heads else {})
+            if sealed:
+                state["merkle_root"] = sealed[-1]["root"]
+                state["merkle_blocks"] = sealed[-1]["block"] + 1
+            self._heads = {}
+
+            state.update({
+                "chain_head": head,
+                "digest": head,
+                "line_count": count,
+                "file_size_bytes": size,
+                "ts": datetime.now(timezone.utc).isoformat()
+            })
+            _write_json_atomic(self.meta_path, state, fsync)
+        index_after_commit(self.path, "ndjson")
+
+    def rotate_segment(self, background: bool = True) -> Dict[str, Any]:
+        """Close the active file as a compressed, hash-sealed segment now; returns the new chain meta"""
+        with self._lock, file_lock(self.path):
+            self._load_state()
+            return self._rotate_locked(background)
+
+    def _rotate_locked(self, background: bool = True) -> Dict[str, Any]:
+        """
+        Move the log (and its checkpoints) to a segment, freeze its chain meta
+        as the segment meta and start a new chain whose genesis is the old head.
+        Only renames happen here; compression runs in the background.
+        """
+        final: Dict[str, Any] = {}
+
+        def freeze(segment: Path) -> Dict[str, Any]:
+            final.update(self._load_state())
+            self.path.rename(segment)
+            if self.checkpoints_path.exists():
+                self.checkpoints_path.rename(checkpoints_path_for(segment))
+            self.merkle.reset()
+            return final
+
+        entry = self.rotator.rotate(freeze, background)
+        state = {
+            "artifact": str(self.path),
+            "method": "sha256-chain",
+            "integrity_version": CHAIN_VERSION,
+            "genesis": final["chain_head"],
+            "anchor": None,
+            "chain_head": final["chain_head"],
+            "digest": final["chain_head"],
+            "line_count": 0,
+            "file_size_bytes": 0,
+            "unchained_lines": 0,
+            "previous_segment": entry["file"],
+            "ts": datetime.now(timezone.utc).isoformat()
+        }
+        if final.get("reanchored"):
+            # 미확인 재앵커링 기록은 새 세그먼트로 넘어가도 유지
+            state["reanchored"] = final["reanchored"]
+        _write_json_atomic(self.meta_path, state)
+        return state
+
+    def _load_state(self) -> Dict[str, Any]:
+        meta = _read_json(self.meta_path)
+        file_size = self.path.stat().st_size if self.path.exists() else 0
+        if not meta or meta.get("integrity_version") != CHAIN_VERSION:
+            incident = None
+            if file_size and self._has_chain_evidence():
+                # 체인 기록이 있는데 메타가 없거나 교체됨 - 조용한 재앵커링 금지
+                reason = "meta_missing" if not meta else "meta_replaced"
+                logging.critical(f"AUDIT CHAIN: {self.path} has chained entries but its hash meta is "
+                                 f"{reason.split('_')[1]} - re-anchoring, marked compromised")
+                incident = {"reason": reason}
+            return self._bootstrap(file_size, incident)
+        if meta["file_size_bytes"] == file_size:
+            return meta
+        if file_size > meta["file_size_bytes"]:
+            return self._catch_up(meta)
+        logging.critical(f"AUDIT CHAIN: {self.path} shrank below its hash meta - re-anchoring, marked compromised")
+        incident = {"reason": "truncated", "previous_chain_head": meta["chain_head"],
+                    "previous_line_count": meta["line_count"],
+                    "previous_file_size_bytes": meta["file_size_bytes"]}
+        return self._bootstrap(file_size, incident, meta.get("reanchored", []))
+
+    def _has_chain_evidence(self) -> bool:
+        """Checkpoints sidecar or chained entries exist - the log had a v2 meta before"""
+        if self.checkpoints_path.exists():
+            return True
+        with self.path.open("rb") as f:
+            return any(b'"prev_hash":"' in raw for raw in f)
+
+    def _bootstrap(self, file_size: int, incident: Optional[Dict[str, Any]] = None,
+                   reanchored: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Start a chain. Existing (legacy) content is anchored by one full-file
+        SHA-256 - a one-time O(n) cost - and the chain continues from it.
+        incident (truncation, lost meta) is recorded in "reanchored" and stays
+        there - verify_hash reports COMPROMISED until acknowledge_reanchor().
+        """
+        anchor = None
+        genesis = GENESIS_HASH
+        # 기존 체크포인트는 새 앵커 기준과 맞지 않으므로 폐기
+        if self.checkpoints_path.exists():
+            self.checkpoints_path.unlink()
+        self.merkle.reset()
+        if file_size:
+            line_count = sum(1 for _ in self.path.open("rb"))
+            genesis = sha256_of_file(self.path)
+            anchor = {"file_size_bytes": file_size, "line_count": line_count, "digest": genesis}
+        state = {
+            "artifact": str(self.path),
+            "method": "sha256-chain",
+            "integrity_version": CHAIN_VERSION,
+            "genesis": genesis,
+            "anchor": anchor,
+            "chain_head": genesis,
+            "digest": genesis,
+            "line_count": anchor["line_count"] if anchor else 0,
+            "file_size_bytes": file_size,
+            "unchained_lines": 0,
+            "ts": datetime.now(timezone.utc).isoformat()
+        }
+        reanchored = list(reanchored or [])
+        if incident:
+            incident.update({"file_size_bytes": file_size, "line_count": state["line_count"],
+                             "detected_at": state["ts"]})
+            reanchored.append(incident)
+        if reanchored:
+            state["reanchored"] = reanchored
+        _write_json_atomic(self.meta_path, state)
+        return state
+
+    def acknowledge_reanchor(self, note: Optional[str] = None) -> Dict[str, Any]:
+        """Move recorded re-anchor incidents to "acknowledged_reanchors" (after investigation)"""
+        with self._lock, file_lock(self.path):
+            state = self._load_state()
+            incidents = state.pop("reanchored", [])
+            if incidents:
+                acked_at = datetime.now(timezone.utc).isoformat()
+                state.setdefault("acknowledged_reanchors", []).extend(
+                    {**incident, "acknowledged_at": acked_at, "note": note} for incident in incidents)
+                _write_json_atomic(self.meta_path, state)
+            return state
+
+    def _catch_up(self, meta: Dict[str, Any]) -> Dict[str, Any]:
+        """Fold lines written after the last meta update (crash, foreign writer) into the chain"""
+        head = meta["chain_head"]
+        count = meta["line_count"]
+        size = meta["file_size_bytes"]
+        unchained = meta.get("unchained_lines", 0)
+        with self.path.open("rb") as f:
+            f.seek(size)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    # 중단된 마지막 줄 - 다음 배치가 같은 줄에 이어 쓰지 않도록 개행 보정
+                    with self.path.open("ab") as out:
+                        out.write(b"\n")
+                    raw += b"\n"
+                head, chained = next_chain_head(head, raw.rstrip(b"\r\n"))
+                unchained += 0 if chained else 1
+                count += 1
+                size += len(raw)
+                self._heads[count] = head
+        if unchained != meta.get("unchained_lines", 0):
+            logging.warning(f"AUDIT CHAIN: folded {unchained - meta.get('unchained_lines', 0)} unchained lines into {self.path}")
+        meta.update({"chain_head": head, "digest": head, "line_count": count,
+                     "file_size_bytes": size, "unchained_lines": unchained})
+        _write_json_atomic(self.meta_path, meta)
+        return meta
+
+_sinks: Dict[str, ChainedNdjsonSink] = {}
+_sinks_lock = threading.Lock()
+
+def _sink_for(path: Path) -> ChainedNdjsonSink:
+    """경로별 sink 하나 (같은 파일은 같은 sink 로 묶여 group commit)"""
+    key = str(path.resolve())
+    with _sinks_lock:
+        sink = _sinks.get(key)
+        if sink is None:
+            sink = _sinks[key] = ChainedNdjsonSink(path)
+        return sink
+
+def append_event(event: Dict[str, Any], path: Path = AUDIT_PATH, wait: bool = False) -> bool:
+    """
+    Append audit event to NDJSON file (buffered group commit, see audit_writer)
     
     Args:
         event: Audit event dictionary
         path: Target NDJSON file path
+        wait: Block until the event is written (and fsynced per policy)
         
     Returns:
         bool: Success status
+    
+    Raises:
+        AuditWriterFailed: earlier records are held after a write failure (audit is fail-closed)
     """
     try:
-        path.parent.mkdir(parents=True, exist_ok=True)
-        
         # Ensure required fields
         if "ts" not in event:
             event["ts"] = datetime.now(timezone.utc).isoformat()
-        if "hash" not in event:
-            event["hash"] = None  # Will be calculated later for file integrity
         
         # Sanitize sensitive data (basic PII patterns)
         event = sanitize_event(event)
         
-        event_line = json.dumps(event, ensure_ascii=False, separators=(',', ':'))
-        
-        # Atomic append operation
-        with path.open("a", encoding="utf-8") as f:
-            f.write(event_line + "\n")
-            f.flush()  # Ensure immediate write
+        # Queued append; the writer thread serializes, chains (prev_hash/hash)
+        # and commits batches per file, updating the hash meta incrementally
+        get_writer().submit(_sink_for(path), event, wait=wait)
         
         return True
+    except AuditWriterFailed:
+        raise
     except Exception as e:
         print(f"Error appending event: {e}")
         return False
@@ -52,32 +384,9 @@ def append_event(event: Dict[str, Any], path: Path = AUDIT_PATH) -> bool:
 def sanitize_event(event: Dict[str, Any]) -> Dict[str, Any]:
     """
     Sanitize sensitive information in audit events
-    Following OWASP logging guidelines
+    Following OWASP logging guidelines (shared precompiled rules, see pii_sanitizer)
     """
-    import re
-    
-    sensitive_patterns = {
-        r'\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b': '[CARD_REDACTED]',  # Credit cards
-        r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b': '[EMAIL_REDACTED]',  # Emails
-        r'\bpassword\s*[:=]\s*\S+\b': 'password=[REDACTED]',  # Passwords
-        r'\bapi[_-]?key\s*[:=]\s*\S+\b': 'api_key=[REDACTED]',  # API keys
-    }
-    
-    def sanitize_string(text: str) -> str:
-        for pattern, replacement in sensitive_patterns.items():
-            text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
-        return text
-    
-    def sanitize_recursive(obj):
-        if isinstance(obj, dict):
-            return {k: sanitize_recursive(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [sanitize_recursive(item) for item in obj]
-        elif isinstance(obj, str):
-            return sanitize_string(obj)
-        return obj
-    
-    return sanitize_recursive(event)
+    return event_sanitizer.sanitize(event)
 
 def sha256_of_file(path: Path) -> str:
     """Calculate SHA-256 hash of file"""
@@ -93,44 +402,43 @@ def sha256_of_file(path: Path) -> str:
 
 def write_hash_meta(path: Path = AUDIT_PATH, meta_out: Path = HASH_META) -> Dict[str, Any]:
     """
-    Calculate and write hash metadata for audit file
+    Return (and write) hash chain metadata for audit file.
+    The writer keeps the meta current on every commit, so this is O(1) except
+    for the first call on a legacy file, which anchors its content once.
     
     Returns:
         Dict containing hash metadata
     """
+    flush_audit()
     if not path.exists():
         return {"error": "Audit file does not exist"}
     
     try:
-        digest = sha256_of_file(path)
-        file_size = path.stat().st_size
-        line_count = sum(1 for _ in path.open('r', encoding='utf-8'))
-        
-        meta = {
-            "artifact": str(path),
-            "digest": digest,
-            "method": "sha256",
-            "ts": datetime.now(timezone.utc).isoformat(),
-            "file_size_bytes": file_size,
-            "line_count": line_count,
-            "integrity_version": "1.0"
-        }
-        
-        meta_out.parent.mkdir(parents=True, exist_ok=True)
-        with meta_out.open("w", encoding="utf-8") as f:
-            json.dump(meta, f, ensure_ascii=False, indent=2)
-        
+        sink = _sink_for(path)
+        meta = sink.ensure_state()
+        if meta_out.resolve() != sink.meta_path.resolve():
+            _write_json_atomic(meta_out, meta)
         return meta
     except Exception as e:
         return {"error": f"Failed to write hash meta: {e}"}
 
-def verify_hash(path: Path = AUDIT_PATH, meta_path: Path = HASH_META) -> Dict[str, Any]:
+def verify_hash(path: Path = AUDIT_PATH, meta_path: Path = HASH_META,
+                checkpoint: Optional[int] = None, since: Optional[str] = None,
+                until: Optional[str] = None, workers: Optional[int] = None) -> Dict[str, Any]:
     """
     Verify audit file integrity against stored hash
     
+    For chained logs (integrity_version 2.0):
+    - full verify replays sealed Merkle blocks in parallel (workers processes)
+      and reports the tampered blocks/lines
+    - checkpoint: index into the checkpoints file (-1 = latest), verify the tail only
+    - since/until: ISO timestamps, verify only the blocks covering that range,
+      each proven against the Merkle root in the meta
+    
     Returns:
         Dict containing verification results
     """
+    flush_audit()
     if not path.exists():
         return {"status": "ERROR", "message": "Audit file not found"}
     
@@ -145,6 +453,9 @@ def verify_hash(path: Path = AUDIT_PATH, meta_path: Path = HASH_META) -> Dict[st
         if not expected_hash:
             return {"status": "ERROR", "message": "No hash in metadata"}
         
+        if meta.get("integrity_version") == CHAIN_VERSION:
+            return _verify_chain(path, meta, checkpoint, since, until, workers)
+        
         current_hash = sha256_of_file(path)
         if not current_hash:
             return {"status": "ERROR", "message": "Failed to calculate current hash"}
@@ -167,52 +478,168 @@ def verify_hash(path: Path = AUDIT_PATH, meta_path: Path = HASH_META) -> Dict[st
     except Exception as e:
         return {"status": "ERROR", "message": f"Verification failed: {e}"}
 
-def get_audit_stats(path: Path = AUDIT_PATH) -> Dict[str, Any]:
-    """Get statistics about audit log file"""
+def _verify_anchor(path: Path, anchor: Dict[str, Any]) -> bool:
+    h = hashlib.sha256()
+    remaining = anchor["file_size_bytes"]
+    with path.open("rb") as f:
+        while remaining > 0:
+            chunk = f.read(min(1024 * 1024, remaining))
+            if not chunk:
+                break
+            h.update(chunk)
+            remaining -= len(chunk)
+    return h.hexdigest() == anchor["digest"]
+
+def _verify_chain(path: Path, meta: Dict[str, Any], checkpoint: Optional[int],
+                  since: Optional[str], until: Optional[str], workers: Optional[int]) -> Dict[str, Any]:
+    """Replay the hash chain (sealed blocks in parallel) and compare with the meta"""
+    merkle = MerkleCheckpoints(path, checkpoints_path_for(path), ts_of=_event_ts)
+    merkle.base_line, merkle.base_offset = _chain_base(meta)
+    entries = merkle.load()
+    messages = []
+    
+    if entries and meta.get("merkle_root") and meta["merkle_root"] != entries[-1]["root"]:
+        messages.append("Checkpoint sidecar does not match hash meta")
+    roots = [bytes.fromhex(e["block_root"]) for e in entries]
+    
+    partial = checkpoint is not None or since or until
+    if checkpoint is not None:
+        try:
+            cp = entries[checkpoint]
+        except IndexError:
+            return {"status": "ERROR", "message": f"Checkpoint {checkpoint} not found"}
+        blocks: List[int] = []
+        tail_line, tail_offset, tail_head = cp["line"], cp["offset"], cp["head"]
+    else:
+        if since or until:
+            blocks = merkle.select(since, until)
+            trusted = bytes.fromhex(meta.get("merkle_root") or entries[-1]["root"]) if entries else b""
+            tree = MerkleTree(roots)  # 검증당 한 번 구성, 블록별 증명은 O(log n)
+            for i in blocks:
+                if not verify_proof(roots[i], tree.proof(i), trusted):
+                    messages.append(f"Checkpoint {i} not covered by Merkle root")
+        else:
+            blocks = list(range(len(entries)))
+            if entries and merkle_root(roots).hex() != entries[-1]["root"]:
+                messages.append("Checkpoint sidecar does not match Merkle root")
+            if meta.get("anchor") and not _verify_anchor(path, meta["anchor"]):
+                messages.append("Anchored legacy content modified")
+        if any("head" not in entries[i] for i in blocks):
+            # 체인 head 가 없는 체크포인트 - 처음부터 순차 재생
+            blocks = []
+            tail_line, tail_offset = _chain_base(meta)
+            tail_head = meta["genesis"]
+        elif entries:
+            tail_line, tail_offset, tail_head = entries[-1]["line"], entries[-1]["offset"], entries[-1]["head"]
+        else:
+            tail_line, tail_offset = _chain_base(meta)
+            tail_head = meta["genesis"]
+    
+    jobs = []
+    for i in blocks:
+        start_line, start_offset, end_offset = merkle.block_span(entries, i)
+        start_head = entries[i - 1]["head"] if i else meta["genesis"]
+        jobs.append((str(path), start_offset, end_offset, start_head))
+    replayed = map_blocks(_replay_range, jobs, workers)
+    
+    bad_blocks = []
+    first_invalid = None
+    unchained = 0
+    lines_verified = 0
+    for i, block in zip(blocks, replayed):
+        start_line = merkle.block_span(entries, i)[0]
+        lines_verified += block["lines"]
+        unchained += block["unchained"]
+        if block["first_invalid"] and first_invalid is None:
+            first_invalid = start_line + block["first_invalid"]
+        if block["head"] != entries[i]["head"] or block["block_root"] != entries[i]["block_root"]:
+            bad_blocks.append({"block": i, "first_line": start_line + 1, "last_line": entries[i]["line"],
+                               "first_ts": entries[i].get("first_ts"), "last_ts": entries[i].get("last_ts")})
+    
+    # 봉인되지 않은 꼬리 (범위 검증에서는 until 이 없을 때만)
+    head = tail_head
+    line_no = tail_line
+    offset = tail_offset
+    verify_tail = not until
+    if verify_tail:
+        tail = _replay_range(str(path), tail_offset, None, tail_head)
+        head, line_no, offset = tail["head"], tail_line + tail["lines"], tail["end"]
+        lines_verified += tail["lines"]
+        unchained += tail["unchained"]
+        if tail["first_invalid"] and first_invalid is None:
+            first_invalid = tail_line + tail["first_invalid"]
+        if head != meta["chain_head"]:
+            messages.append("Chain head mismatch")
+        if line_no != meta["line_count"] or offset != meta["file_size_bytes"]:
+            messages.append(f"Expected {meta['line_count']} lines / {meta['file_size_bytes']} bytes, "
+                            f"found {line_no} / {offset}")
+    if bad_blocks:
+        messages.append(f"{len(bad_blocks)} Merkle block(s) modified")
+    for incident in meta.get("reanchored", []):
+        messages.append(f"Chain re-anchored ({incident['reason']}) at {incident['detected_at']}"
+                        + (f", previous head {incident['previous_chain_head'][:16]}... / "
+                           f"{incident['previous_line_count']} lines" if "previous_chain_head" in incident else "")
+                        + " - unacknowledged")
+    # 메타에 기록된 것보다 많은 비체인 라인 = 변조된 엔트리
+    if not partial and unchained > meta.get("unchained_lines", 0):
+        messages.append(f"Invalid chain entry at line {first_invalid}")
+    
+    result = {
+        "status": "SUCCESS" if not messages else "COMPROMISED",
+        "expected_hash": meta["chain_head"],
+        "current_hash": head,
+        "file_size": path.stat().st_size,
+        "meta_timestamp": meta.get("ts"),
+        "verification_timestamp": datetime.now(timezone.utc).isoformat(),
+        "verified_from_line": merkle.block_span(entries, blocks[0])[0] if blocks else tail_line,
+        "lines_verified": lines_verified,
+        "blocks_verified": len(blocks),
+        "bad_blocks": bad_blocks,
+        "first_invalid_line": first_invalid,
+        "reanchored": meta.get("reanchored", [])
+    }
+    if messages:
+        result["message"] = "File integrity compromised - " + "; ".join(messages)
+    return result
+
+def get_audit_stats(path: Path = AUDIT_PATH, include_segments: bool = False,
+                    workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Get statistics about audit log file (aggregated from the SQLite audit index)
+    When the index lags far behind (cold start, large backlog) the file is
+    aggregated directly by the parallel mmap scanner instead (see audit_scan)
+    include_segments adds closed segments from the manifest (no decompression)
+    """
+    flush_audit()
     if not path.exists():
         return {"error": "Audit file not found"}
     
     try:
+        st = path.stat()
+        index = default_index()
+        if index.pending_bytes(path) > SCAN_THRESHOLD:
+            result = ndjson_stats(path, workers=workers)
+        else:
+            index.ingest(path, "ndjson")
+            # Only the current file generation - rotated segments stay queryable in the index
+            result = index.summarize(path, current_generation_only=True)
         stats = {
-            "file_size_bytes": path.stat().st_size,
-            "file_size_mb": round(path.stat().st_size / 1024 / 1024, 2),
-            "last_modified": datetime.fromtimestamp(path.stat().st_mtime, tz=timezone.utc).isoformat(),
-            "line_count": 0,
-            "event_types": {},
-            "risk_levels": {},
-            "actors": {},
-            "time_range": {"earliest": None, "latest": None}
+            "file_size_bytes": st.st_size,
+            "file_size_mb": round(st.st_size / 1024 / 1024, 2),
+            "last_modified": datetime.fromtimestamp(st.st_mtime, tz=timezone.utc).isoformat(),
+            "line_count": result["total"],
+            "event_types": result["actions"],
+            "risk_levels": result["severities"],
+            "actors": result["actors"],
+            "time_range": {"earliest": result["earliest"], "latest": result["latest"]}
         }
-        
-        with path.open("r", encoding="utf-8") as f:
-            for line in f:
-                if line.strip():
-                    stats["line_count"] += 1
-                    try:
-                        event = json.loads(line)
-                        
-                        # Count event types
-                        action = event.get("action", "unknown")
-                        stats["event_types"][action] = stats["event_types"].get(action, 0) + 1
-                        
-                        # Count risk levels
-                        severity = event.get("severity", "unknown")
-                        stats["risk_levels"][severity] = stats["risk_levels"].get(severity, 0) + 1
-                        
-                        # Count actors
-                        actor = event.get("actor", "unknown")
-                        stats["actors"][actor] = stats["actors"].get(actor, 0) + 1
-                        
-                        # Track time range
-                        ts = event.get("ts")
-                        if ts:
-                            if not stats["time_range"]["earliest"] or ts < stats["time_range"]["earliest"]:
-                                stats["time_range"]["earliest"] = ts
-                            if not stats["time_range"]["latest"] or ts > stats["time_range"]["latest"]:
-                                stats["time_range"]["latest"] = ts
-                    except json.JSONDecodeError:
-                        continue  # Skip malformed lines
-        
+        if include_segments:
+            segments = [{k: e.get(k) for k in ("file", "state", "lines", "stored_size", "first_ts", "last_ts")}
+                        for e in _sink_for(path).rotator.segments()]
+            stats["segments"] = segments
+            stats["total_line_count"] = stats["line_count"] + sum(e["lines"] or 0 for e in segments)
+            if segments and segments[0]["first_ts"]:
+                stats["time_range"]["earliest"] = segments[0]["first_ts"]
         return stats
     except Exception as e:
         return {"error": f"Failed to get stats: {e}"}
@@ -220,8 +647,9 @@ def get_audit_stats(path: Path = AUDIT_PATH) -> Dict[str, Any]:
 def rotate_audit_log(path: Path = AUDIT_PATH, max_size_mb: int = 100) -> bool:
     """
     Rotate audit log if it exceeds size limit
-    Creates backup with timestamp and starts new log
+    The writer also rotates automatically (see audit_rotation); this forces it
     """
+    flush_audit()
     if not path.exists():
         return True
     
@@ -230,28 +658,79 @@ def rotate_audit_log(path: Path = AUDIT_PATH, max_size_mb: int = 100) -> bool:
         return True
     
     try:
-        timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-        backup_path = path.with_suffix(f".{timestamp}.ndjson")
-        
-        # Create final hash for rotated file
-        hash_backup_path = backup_path.with_suffix(".hash.json")
-        meta = write_hash_meta(path, hash_backup_path)
-        
-        # Move current file to backup
-        path.rename(backup_path)
+        # Freeze the final chain meta for the segment, compress it and
+        # continue the chain in a new file (genesis = old head)
+        state = _sink_for(path).rotate_segment(background=False)
         
-        print(f"Rotated audit log: {backup_path} ({size_mb:.1f}MB)")
+        print(f"Rotated audit log: {state['previous_segment']} ({size_mb:.1f}MB)")
         return True
     except Exception as e:
         print(f"Failed to rotate audit log: {e}")
         return False
 
+def acknowledge_reanchor(path: Path = AUDIT_PATH, note: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Acknowledge recorded re-anchor incidents (truncation / lost meta) after they
+    were investigated, so verify_hash can report SUCCESS for the new chain again.
+    """
+    flush_audit()
+    if not path.exists():
+        return {"error": "Audit file does not exist"}
+    try:
+        return _sink_for(path).acknowledge_reanchor(note)
+    except Exception as e:
+        return {"error": f"Failed to acknowledge re-anchor: {e}"}
+
+def verify_segments(path: Path = AUDIT_PATH) -> Dict[str, Any]:
+    """
+    Verify closed segments one at a time (streamed from their compressed
+    files): digest, line count, hash chain replay and chain continuity
+    between segments and into the active file.
+    """
+    flush_audit()
+    sink = _sink_for(path)
+    previous_head: List[Optional[str]] = [None]
+
+    def replay(meta: Dict[str, Any], lines) -> List[str]:
+        messages = []
+        if previous_head[0] is not None and meta.get("genesis") != previous_head[0]:
+            messages.append("Chain break between segments")
+        head = meta.get("genesis", GENESIS_HASH)
+        anchor = meta.get("anchor")
+        anchor_hash = hashlib.sha256() if anchor else None
+        for n, raw in enumerate(lines, start=1):
+            if anchor and n <= anchor["line_count"]:
+                anchor_hash.update(raw)
+                continue
+            head, _ = next_chain_head(head, raw.rstrip(b"\r\n"))
+        if anchor and anchor_hash.hexdigest() != anchor["digest"]:
+            messages.append("Anchored legacy content modified")
+        if head != meta.get("chain_head"):
+            messages.append("Chain head mismatch")
+        previous_head[0] = meta.get("chain_head")
+        return messages
+
+    result = sink.rotator.verify_segments(replay)
+    active = _read_json(sink.meta_path)
+    if previous_head[0] is not None and active and active.get("genesis") != previous_head[0]:
+        result["status"] = "COMPROMISED"
+        result["message"] = "Active log does not continue the last segment's chain"
+    return result
+
 # CLI interface
 def main():
     parser = argparse.ArgumentParser(description="HVDC Audit NDJSON Management")
     parser.add_argument("--append", type=str, help="JSON string to append as event")
     parser.add_argument("--write-hash", action="store_true", help="Calculate and write hash metadata")
     parser.add_argument("--verify", action="store_true", help="Verify file integrity")
+    parser.add_argument("--from-checkpoint", type=int, default=None,
+                        help="Verify only from checkpoint index (-1 = latest)")
+    parser.add_argument("--since", type=str, help="Verify only blocks at/after this ISO timestamp")
+    parser.add_argument("--until", type=str, help="Verify only blocks at/before this ISO timestamp")
+    parser.add_argument("--workers", type=int, default=None, help="Parallel verification/stats scan processes")
+    parser.add_argument("--verify-segments", action="store_true", help="Verify closed (compressed) segments")
+    parser.add_argument("--acknowledge-reanchor", type=str, metavar="NOTE",
+                        help="Acknowledge recorded chain re-anchor incidents (truncation / lost meta)")
     parser.add_argument("--stats", action="store_true", help="Show audit log statistics")
     parser.add_argument("--rotate", action="store_true", help="Rotate log if needed")
     parser.add_argument("--max-size", type=int, default=100, help="Max size in MB for rotation")
@@ -283,28 +762,52 @@ def main():
             print(f"   Size: {meta['file_size_bytes']} bytes")
             print(f"   Lines: {meta['line_count']}")
     
+    if args.acknowledge_reanchor:
+        meta = acknowledge_reanchor(note=args.acknowledge_reanchor)
+        if "error" in meta:
+            print(f"❌ {meta['error']}")
+            return 1
+        print(f"✅ {len(meta.get('acknowledged_reanchors', []))} re-anchor incident(s) acknowledged")
+    
     if args.verify:
-        result = verify_hash()
+        result = verify_hash(checkpoint=args.from_checkpoint, since=args.since,
+                             until=args.until, workers=args.workers)
         if result["status"] == "SUCCESS":
             print("✅ File integrity verified - no tampering detected")
         elif result["status"] == "COMPROMISED":
             print("🔴 File integrity COMPROMISED - hash mismatch detected!")
             print(f"   Expected: {result['expected_hash'][:16]}...")
             print(f"   Current:  {result['current_hash'][:16]}...")
+            if result.get("first_invalid_line"):
+                print(f"   First invalid line: {result['first_invalid_line']}")
+            for block in result.get("bad_blocks", [])[:10]:
+                print(f"   Tampered block {block['block']}: lines {block['first_line']}-{block['last_line']} "
+                      f"({block['first_ts']} ~ {block['last_ts']})")
             return 2
         else:
             print(f"❌ Verification error: {result['message']}")
             return 1
     
+    if args.verify_segments:
+        result = verify_segments()
+        for segment in result["segments"]:
+            icon = "✅" if segment["status"] == "SUCCESS" else "🔴"
+            print(f"{icon} {segment['segment']}: {segment['lines']} lines {'; '.join(segment['messages'])}")
+        if result["status"] != "SUCCESS":
+            print(f"🔴 Segment verification failed {result.get('message', '')}")
+            return 2
+        print(f"✅ {len(result['segments'])} segments verified")
+    
     if args.stats:
-        stats = get_audit_stats()
+        stats = get_audit_stats(include_segments=True, workers=args.workers)
         if "error" in stats:
             print(f"❌ {stats['error']}")
             return 1
         else:
             print("📊 Audit Log Statistics:")
             print(f"   File size: {stats['file_size_mb']} MB ({stats['file_size_bytes']} bytes)")
-            print(f"   Total events: {stats['line_count']}")
+            print(f"   Total events: {stats['line_count']} (all segments: {stats['total_line_count']}, "
+                  f"{len(stats['segments'])} closed segments)")
             print(f"   Time range: {stats['time_range']['earliest']} to {stats['time_range']['latest']}")
             print(f"   Event types: {dict(list(stats['event_types'].items())[:5])}")
             print(f"   Risk levels: {stats['risk_levels']}")
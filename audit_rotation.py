@@ -0,0 +1,327 @@
+# audit_rotation.py - Size/day based segment rotation for audit logs
+"""
+HVDC 감사 로그 세그먼트 로테이션
+
+- writer 가 배치 기록 직전에 정책(크기/일자)을 확인하고 활성 파일을 세그먼트로 교체
+  (rename 만 writer 스레드에서 - 압축은 백그라운드 스레드, 활성 파일은 항상 작게 유지)
+- 닫힌 세그먼트는 gzip (zstandard 설치 시 zstd 선택 가능) 으로 압축하고
+  원본 SHA-256/라인 수/시간 범위를 세그먼트 해시 메타(<segment>.hash.json)에 기록
+- 매니페스트(<log>.segments.json)로 검증/통계가 세그먼트를 순서대로 지연 순회
+
+환경 변수:
+  HVDC_AUDIT_ROTATE_MB     활성 파일 최대 크기 (MB, 기본 100, 0 이면 크기 로테이션 끔)
+  HVDC_AUDIT_ROTATE_DAILY  1 이면 UTC 날짜가 바뀔 때 로테이션 (기본 0)
+  HVDC_AUDIT_COMPRESS      gzip (기본) / zstd / none
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, IO, Iterator, List, Optional
+
+from audit_writer import file_lock
+
+try:
+    import zstandard
+except ImportError:  # 선택 의존성
+    zstandard = None
+
+COMPRESSIONS = ("gzip", "zstd", "none")
+_SEAL_FIELDS = ("state", "stored_as", "sha256", "lines", "raw_size", "stored_size", "first_ts", "last_ts")
+_SUFFIXES = {"gzip": ".gz", "zstd": ".zst", "none": ""}
+
+class RotationPolicy:
+    """로테이션 조건 (크기/일자)과 압축 방식"""
+
+    def __init__(self, max_bytes: Optional[int] = None, daily: bool = False, compression: str = "gzip"):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"compression must be one of {COMPRESSIONS}")
+        if compression == "zstd" and zstandard is None:
+            logging.warning("zstandard not installed - audit segments fall back to gzip")
+            compression = "gzip"
+        self.max_bytes = max_bytes
+        self.daily = daily
+        self.compression = compression
+
+    @classmethod
+    def from_env(cls) -> "RotationPolicy":
+        max_mb = float(os.environ.get("HVDC_AUDIT_ROTATE_MB", "100"))
+        return cls(max_bytes=int(max_mb * 1024 * 1024) if max_mb > 0 else None,
+                   daily=os.environ.get("HVDC_AUDIT_ROTATE_DAILY", "0") == "1",
+                   compression=os.environ.get("HVDC_AUDIT_COMPRESS", "gzip"))
+
+def manifest_path_for(path: Path) -> Path:
+    """audit.ndjson -> audit.ndjson.segments.json"""
+    return path.with_name(path.name + ".segments.json")
+
+def segment_meta_path(segment: Path) -> Path:
+    """audit.20250101_000000.ndjson -> audit.20250101_000000.hash.json"""
+    return segment.with_suffix(".hash.json")
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+def _write_json_atomic(path: Path, data: Dict[str, Any]) -> None:
+    tmp_path = path.with_name(path.name + f".{os.getpid()}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+class SegmentRotator:
+    """
+    활성 로그 파일 하나의 세그먼트 매니페스트와 로테이션/압축
+    rotate() 는 sink 의 잠금 안에서 호출 (rename + 매니페스트 갱신만 수행)
+    """
+    def __init__(self, log_path: Path, policy: Optional[RotationPolicy] = None,
+                 ts_of: Optional[Callable[[bytes], Optional[str]]] = None):
+        self.log_path = Path(log_path)
+        self.policy = policy or RotationPolicy.from_env()
+        self.manifest_path = manifest_path_for(self.log_path)
+        # 봉인 잠금 (<log>.seal.lock) - 세그먼트마다 잠금 파일이 쌓이지 않도록 로그당 하나
+        self.seal_lock_path = self.log_path.with_name(self.log_path.name + ".seal")
+        self.ts_of = ts_of
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    # 매니페스트 ------------------------------------------------------------
+    def load(self) -> Dict[str, Any]:
+        try:
+            with self.manifest_path.open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"log": self.log_path.name, "active_since": None, "segments": []}
+
+    def segments(self) -> List[Dict[str, Any]]:
+        return self.load()["segments"]
+
+    def _update(self, mutate: Callable[[Dict[str, Any]], None]) -> None:
+        # 백그라운드 압축 스레드와 다른 프로세스의 로테이션이 매니페스트를 함께 갱신
+        with self._lock, file_lock(self.manifest_path):
+            manifest = self.load()
+            mutate(manifest)
+            _write_json_atomic(self.manifest_path, manifest)
+
+    # 로테이션 ---------------------------------------------------------------
+    def due(self, current_size: int) -> bool:
+        """활성 파일을 교체해야 하는지 (배치 기록 직전에 확인)"""
+        if current_size <= 0:
+            return False
+        if self.policy.max_bytes and current_size >= self.policy.max_bytes:
+            return True
+        if self.policy.daily:
+            since = self.load().get("active_since")
+            if since is None:
+                self._update(lambda m: m.update(active_since=_now().isoformat()))
+                return False
+            return since[:10] < _now().date().isoformat()
+        return False
+
+    def next_segment_path(self) -> Path:
+        stamp = _now().strftime("%Y%m%d_%H%M%S")
+        stem, suffix = self.log_path.stem, self.log_path.suffix
+        candidate = self.log_path.with_name(f"{stem}.{stamp}{suffix}")
+        n = 1
+        while candidate.exists() or segment_meta_path(candidate).exists():
+            candidate = self.log_path.with_name(f"{stem}.{stamp}_{n}{suffix}")
+            n += 1
+        return candidate
+
+    def rotate(self, freeze: Callable[[Path], Dict[str, Any]], background: bool = True) -> Dict[str, Any]:
+        """
+        freeze(segment_path) 가 활성 파일(+사이드카)을 segment_path 로 옮기고
+        세그먼트 해시 메타에 넣을 정보를 반환. 압축은 백그라운드에서 진행.
+        """
+        segment = self.next_segment_path()
+        meta = freeze(segment)
+        entry = {
+            "file": segment.name,
+            "meta": segment_meta_path(segment).name,
+            "rotated_at": _now().isoformat(),
+            "state": "pending",
+            "compression": self.policy.compression,
+        }
+        _write_json_atomic(segment_meta_path(segment), dict(meta, artifact=segment.name))
+
+        def add(manifest):
+            manifest["segments"].append(entry)
+            manifest["active_since"] = _now().isoformat()
+        self._update(add)
+
+        if background:
+            thread = threading.Thread(target=self._seal_safely, args=(entry["file"],),
+                                      name="audit-segment-compress", daemon=True)
+            self._threads = [t for t in self._threads if t.is_alive()] + [thread]
+            thread.start()
+        else:
+            self.seal(entry["file"])
+        return entry
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """진행 중인 백그라운드 압축 완료 대기 (검증 전)"""
+        for thread in list(self._threads):
+            thread.join(timeout)
+
+    def resume_pending(self) -> None:
+        """이전 프로세스에서 중단된 압축을 백그라운드로 재개"""
+        if any(e.get("state") == "pending" for e in self.segments()):
+            thread = threading.Thread(target=self.seal_pending, name="audit-segment-compress", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def seal_pending(self) -> None:
+        """중단된(pending) 세그먼트 압축 재시도"""
+        for entry in self.segments():
+            if entry.get("state") == "pending" and (self.log_path.parent / entry["file"]).exists():
+                self.seal(entry["file"])
+
+    def _seal_safely(self, name: str) -> None:
+        try:
+            self.seal(name)
+        except Exception as e:
+            logging.critical(f"AUDIT SEGMENT SEAL FAILED: {name}: {e}")
+
+    def seal(self, name: str) -> Dict[str, Any]:
+        """
+        원본 세그먼트를 압축하고 SHA-256/라인 수/시간 범위를 메타와 매니페스트에 봉인
+        여러 워커가 import 시 resume_pending() 으로 같은 세그먼트를 봉인하려 할 수 있으므로
+        프로세스 간 잠금 안에서 pending 상태를 다시 확인 (이미 봉인됐으면 그 결과 반환)
+        """
+        with file_lock(self.seal_lock_path):
+            entry = next((e for e in self.segments() if e["file"] == name), None)
+            if entry is not None and entry.get("state") == "sealed":
+                return {k: entry.get(k) for k in _SEAL_FIELDS}
+            return self._seal_locked(name)
+
+    def _seal_locked(self, name: str) -> Dict[str, Any]:
+        raw = self.log_path.parent / name
+        compression = self.policy.compression
+        target = raw.with_name(raw.name + _SUFFIXES[compression])
+        digest = hashlib.sha256()
+        lines = 0
+        first = last = None
+
+        tmp = target.with_name(target.name + f".{os.getpid()}.tmp")
+        with raw.open("rb") as src, (_open_write(tmp, compression) if compression != "none" else nullcontext()) as dst:
+            for line in src:
+                digest.update(line)
+                lines += 1
+                if first is None:
+                    first = line
+                last = line
+                if dst is not None:
+                    dst.write(line)
+        if compression != "none":
+            os.replace(tmp, target)
+
+        sealed = {
+            "state": "sealed",
+            "stored_as": target.name,
+            "sha256": digest.hexdigest(),
+            "lines": lines,
+            "raw_size": raw.stat().st_size,
+            "stored_size": target.stat().st_size,
+            "first_ts": self._ts(first),
+            "last_ts": self._ts(last),
+        }
+        meta_path = self.log_path.parent / segment_meta_path(raw).name
+        meta = {}
+        if meta_path.exists():
+            with meta_path.open("r", encoding="utf-8") as f:
+                meta = json.load(f)
+        meta["segment"] = sealed
+        _write_json_atomic(meta_path, meta)
+
+        def mark(manifest):
+            for entry in manifest["segments"]:
+                if entry["file"] == name:
+                    entry.update(sealed)
+        self._update(mark)
+        if compression != "none":
+            raw.unlink()
+        return sealed
+
+    def _ts(self, line: Optional[bytes]) -> Optional[str]:
+        if line is None or self.ts_of is None:
+            return None
+        try:
+            return self.ts_of(line)
+        except Exception:
+            return None
+
+    # 지연 순회 --------------------------------------------------------------
+    def open_segment(self, entry: Dict[str, Any]) -> IO[bytes]:
+        """세그먼트 원본 바이트 스트림 (압축 해제, pending 이면 원본 파일)"""
+        directory = self.log_path.parent
+        if entry.get("state") != "sealed" or entry.get("compression") == "none":
+            path = directory / entry["file"]
+            if path.exists():
+                return path.open("rb")
+        stored = directory / entry.get("stored_as", entry["file"])
+        if entry.get("compression") == "zstd":
+            if zstandard is None:
+                raise RuntimeError(f"zstandard required to read {stored}")
+            return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(stored.open("rb"), closefd=True))
+        return gzip.open(stored, "rb")
+
+    def iter_segment_lines(self, entry: Dict[str, Any]) -> Iterator[bytes]:
+        with self.open_segment(entry) as f:
+            yield from f
+
+    def iter_lines(self, include_active: bool = True) -> Iterator[bytes]:
+        """모든 세그먼트(오래된 순) + 활성 파일의 라인"""
+        for entry in self.segments():
+            yield from self.iter_segment_lines(entry)
+        if include_active and self.log_path.exists():
+            with self.log_path.open("rb") as f:
+                yield from f
+
+    def verify_segments(self, replay: Optional[Callable[[Dict[str, Any], Iterator[bytes]], List[str]]] = None) -> Dict[str, Any]:
+        """
+        봉인된 세그먼트를 하나씩 스트리밍하며 SHA-256/라인 수 확인
+        replay(meta, lines) 는 포맷별 추가 검증 (예: 해시 체인), 문제 메시지 목록 반환
+        """
+        self.wait()
+        results = []
+        for entry in self.segments():
+            messages = []
+            meta_path = self.log_path.parent / entry["meta"]
+            with meta_path.open("r", encoding="utf-8") as f:
+                meta = json.load(f)
+            digest = hashlib.sha256()
+            lines = 0
+
+            def counted() -> Iterator[bytes]:
+                nonlocal lines
+                for line in self.iter_segment_lines(entry):
+                    digest.update(line)
+                    lines += 1
+                    yield line
+
+            if replay:
+                messages.extend(replay(meta, counted()))
+            else:
+                for _ in counted():
+                    pass
+            if entry.get("state") == "sealed":
+                if digest.hexdigest() != entry["sha256"] or digest.hexdigest() != meta.get("segment", {}).get("sha256"):
+                    messages.append("Segment digest mismatch")
+                if lines != entry["lines"]:
+                    messages.append(f"Expected {entry['lines']} lines, found {lines}")
+            results.append({"segment": entry["file"], "status": "SUCCESS" if not messages else "COMPROMISED",
+                            "lines": lines, "messages": messages})
+        return {
+            "status": "SUCCESS" if all(r["status"] == "SUCCESS" for r in results) else "COMPROMISED",
+            "segments": results
+        }
+
+def _open_write(path: Path, compression: str) -> IO[bytes]:
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=3).stream_writer(open(path, "wb"), closefd=True)
+    return gzip.open(path, "wb", compresslevel=6)
@@ -0,0 +1,122 @@
+# audit_scan.py - Memory-mapped parallel scanners for audit logs
+"""
+HVDC 감사 로그 병렬 스캐너
+
+- 파일을 mmap 으로 열어 개행 경계에 맞춘 청크로 분할 (기본: 기록 중인 마지막 라인 제외)
+- 청크별 작업을 프로세스 풀에서 실행하고 부분 집계를 마지막에 병합 (audit_merkle.map_blocks)
+- orjson 이 설치되어 있으면 JSON 파싱에 사용 (선택 의존성, 없으면 표준 json)
+
+환경 변수:
+  HVDC_AUDIT_SCAN_CHUNK_MB      청크 크기 (기본 64)
+  HVDC_AUDIT_SCAN_THRESHOLD_MB  인덱스 미수집분이 이보다 크면 통계를 직접 스캔 (기본 64)
+"""
+
+import json
+import mmap
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from audit_merkle import map_blocks
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CHUNK_BYTES = int(float(os.environ.get("HVDC_AUDIT_SCAN_CHUNK_MB", "64")) * 1024 * 1024)
+SCAN_THRESHOLD = int(float(os.environ.get("HVDC_AUDIT_SCAN_THRESHOLD_MB", "64")) * 1024 * 1024)
+
+def loads(data: Union[bytes, str]) -> Any:
+    """JSON 파싱 - 실패 시 ValueError (orjson.JSONDecodeError 도 ValueError 하위 클래스)"""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+def chunk_spans(path: Union[str, Path], start: int = 0, end: Optional[int] = None,
+                chunk_bytes: Optional[int] = None, complete_only: bool = True) -> List[Tuple[int, int]]:
+    """
+    [start, end) 바이트 구간을 개행 경계에서 끝나는 (start, end) 청크 목록으로 분할
+    complete_only: 마지막 개행 이후(기록 중인 라인)는 제외
+    """
+    chunk_bytes = chunk_bytes or CHUNK_BYTES
+    size = os.path.getsize(path)
+    end = size if end is None else min(end, size)
+    if end <= start:
+        return []
+    spans = []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        last_nl = mm.rfind(b"\n", start, end)
+        if complete_only and last_nl < 0:
+            return []
+        stop = last_nl + 1 if complete_only else end
+        pos = start
+        while pos < stop:
+            cut = pos + chunk_bytes
+            if cut >= stop:
+                cut = stop
+            else:
+                nl = mm.find(b"\n", cut - 1, stop)
+                cut = stop if nl < 0 else nl + 1
+            spans.append((pos, cut))
+            pos = cut
+    return spans
+
+def read_span(path: Union[str, Path], start: int, end: int) -> bytes:
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return mm[start:end]
+
+def scan(func: Callable, path: Union[str, Path], start: int = 0, end: Optional[int] = None,
+         workers: Optional[int] = None, chunk_bytes: Optional[int] = None,
+         complete_only: bool = True, extra: tuple = ()) -> List[Any]:
+    """func(path, start, end, *extra) 를 청크별로 실행 - 청크 순서대로 부분 결과 반환"""
+    spans = chunk_spans(path, start, end, chunk_bytes, complete_only)
+    return map_blocks(func, [(str(path), s, e) + extra for s, e in spans], workers)
+
+def ndjson_stats_chunk(path: str, start: int, end: int) -> Dict[str, Any]:
+    """NDJSON 청크 부분 집계 (audit_index.parse_ndjson_chunk 와 같은 필드 규칙)"""
+    total = 0
+    actions, actors, severities = Counter(), Counter(), Counter()
+    earliest = latest = None
+    for raw in read_span(path, start, end).splitlines():
+        if not raw.strip():
+            continue
+        total += 1
+        try:
+            event = loads(raw)
+        except ValueError:
+            continue  # 라인 수에는 포함
+        if not isinstance(event, dict):
+            continue
+        action = event.get("action", "unknown")
+        if action is None:
+            continue
+        actions[action] += 1
+        actors[event.get("actor", "unknown")] += 1
+        severities[event.get("severity", "unknown")] += 1
+        ts = event.get("ts")
+        if isinstance(ts, str) and ts:
+            earliest = ts if earliest is None or ts < earliest else earliest
+            latest = ts if latest is None or ts > latest else latest
+    return {"total": total, "actions": actions, "actors": actors, "severities": severities,
+            "earliest": earliest, "latest": latest}
+
+def merge_stats(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """청크별 부분 집계 병합 - AuditIndex.summarize 와 같은 키, 빈도 내림차순"""
+    merged: Dict[str, Any] = {"total": 0, "actions": Counter(), "actors": Counter(),
+                              "severities": Counter(), "earliest": None, "latest": None}
+    for part in parts:
+        merged["total"] += part["total"]
+        for key in ("actions", "actors", "severities"):
+            merged[key].update(part[key])
+        if part["earliest"] and (merged["earliest"] is None or part["earliest"] < merged["earliest"]):
+            merged["earliest"] = part["earliest"]
+        if part["latest"] and (merged["latest"] is None or part["latest"] > merged["latest"]):
+            merged["latest"] = part["latest"]
+    for key in ("actions", "actors", "severities"):
+        merged[key] = dict(merged[key].most_common())
+    return merged
+
+def ndjson_stats(path: Union[str, Path], workers: Optional[int] = None,
+                 chunk_bytes: Optional[int] = None) -> Dict[str, Any]:
+    """NDJSON 로그 전체 통계 - 청크 병렬 집계 후 병합"""
+    return merge_stats(scan(ndjson_stats_chunk, path, workers=workers, chunk_bytes=chunk_bytes))
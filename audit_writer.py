@@ -0,0 +1,329 @@
+# audit_writer.py - Buffered, group-committed audit writer
+"""
+HVDC 감사 로그 백그라운드 writer
+
+- write_audit / append_event 는 레코드를 큐에 넣고 즉시 반환 (요청 hot path에서 파일 I/O 제거)
+- writer 스레드가 flush 간격/배치 크기 단위로 모아서 파일별로 한 번에 기록 (group commit)
+- 큐가 가득 차면 호출자가 대기 (backpressure), 종료 시 atexit 에서 동기 flush
+- wait=True 로 제출하면 해당 배치가 기록(+fsync)될 때까지 대기 - 고위험 이벤트용
+- 배치 기록은 파일별 잠금(<file>.lock, fcntl/msvcrt)으로 프로세스 간 직렬화
+  (gunicorn 다중 worker 에서도 라인 섞임/CSV 헤더 중복 없음, 잠금은 배치당 1회)
+- 기록 실패는 백오프로 재시도, 끝내 실패한 (기다리는 호출자가 없는) 레코드는 버리지 않고 보류 -
+  writer 는 실패 상태가 되어 이후 제출을 AuditWriterFailed 로 거부, recover() 로 보류분 기록 후 복귀
+
+환경 변수:
+  HVDC_AUDIT_ASYNC           1 (기본) / 0 이면 호출 스레드에서 즉시 기록
+  HVDC_AUDIT_FLUSH_INTERVAL  group commit 최대 지연 (초, 기본 0.05)
+  HVDC_AUDIT_BATCH_SIZE      배치당 최대 레코드 수 (기본 256)
+  HVDC_AUDIT_QUEUE_SIZE      큐 최대 길이 (기본 10000)
+  HVDC_AUDIT_FSYNC           batch (기본, 배치마다 fsync) / never (OS 버퍼에 맡김)
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+FSYNC_POLICIES = ("batch", "never")
+COMMIT_RETRIES = 3  # 배치 기록 재시도 횟수 (첫 시도 제외)
+RETRY_BACKOFF = 0.05  # 재시도 대기 (초, 시도마다 2배)
+RECOVER_INTERVAL = 5.0  # 실패 상태에서 제출 시 자동 복구를 다시 시도하는 최소 간격 (초)
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """
+    프로세스 간 배타 잠금 - 대상 파일 옆의 <file>.lock 에 건다
+    (로테이션으로 대상 파일이 rename 되어도 잠금 파일은 유지)
+    """
+    path = Path(path)
+    lock_path = path.with_name(path.name + ".lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        elif msvcrt is not None:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue  # LK_LOCK 은 약 10초 후 포기 - 계속 대기
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            yield
+
+class LineFileSink:
+    """
+    직렬화된 라인을 파일 하나에 append (CSV 헤더 옵션)
+    레코드는 이미 개행까지 포함된 문자열
+    """
+    def __init__(self, path: Path, header: Optional[str] = None):
+        self.path = Path(path)
+        self.header = header
+
+    def format_batch(self, records: List[Any]) -> str:
+        return "".join(records)
+
+    def write_batch(self, records: List[Any], fsync: bool) -> None:
+        with file_lock(self.path):
+            self.append(records, fsync)
+
+    def append(self, records: List[Any], fsync: bool) -> None:
+        """잠금을 이미 잡은 상태에서 호출 - 헤더 확인과 기록이 같은 잠금 안에서 수행"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            if self.header and f.tell() == 0:
+                f.write(self.header)
+            f.write(self.format_batch(records))
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+
+class _Commit:
+    """wait=True 제출자가 기다리는 커밋 결과"""
+    __slots__ = ("event", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.error: Optional[BaseException] = None
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        if not self.event.wait(timeout):
+            raise TimeoutError("audit commit timed out")
+        if self.error is not None:
+            raise self.error
+
+class AuditWriterFailed(RuntimeError):
+    """재시도 후에도 기록하지 못한 감사 레코드가 보류 중 - 복구 전까지 제출 거부"""
+
+_FLUSH = object()
+
+class AuditWriter:
+    """큐 + 단일 writer 스레드 기반 group commit"""
+
+    def __init__(self, flush_interval: float = 0.05, batch_size: int = 256,
+                 max_queue: int = 10000, fsync: str = "batch", async_mode: bool = True):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync policy must be one of {FSYNC_POLICIES}")
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self.fsync = fsync
+        self.async_mode = async_mode
+        self._start_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        # 보류된 (sink, records) - 실패한 순서대로 recover() 가 다시 기록
+        self._held_lock = threading.Lock()
+        self._held: List[Tuple[LineFileSink, List[Any]]] = []
+        self._failure: Optional[BaseException] = None
+        self._failed_at = 0.0
+        self.stats = {"records": 0, "batches": 0, "errors": 0, "held": 0}
+
+    def submit(self, sink: LineFileSink, record: Any, wait: bool = False,
+               timeout: Optional[float] = None) -> None:
+        """
+        레코드 제출. 큐가 가득 차면 빈 자리가 날 때까지 대기 (backpressure).
+        wait=True 면 기록 완료(fsync 정책 포함)까지 대기하고 실패 시 예외 전파.
+        보류된 레코드가 있으면 (RECOVER_INTERVAL 마다 복구 시도 후) AuditWriterFailed.
+        """
+        if self._failure is not None:
+            self._recover_or_raise()
+        if not self.async_mode or self._closed:
+            with self._sync_lock:
+                error = self._commit([(sink, record, _Commit())])
+            if error is not None:
+                raise error
+            return
+        self._ensure_started()
+        commit = _Commit() if wait else None
+        self._queue.put((sink, record, commit))
+        if commit is not None:
+            commit.wait(timeout)
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """지금까지 제출된 모든 레코드가 기록될 때까지 대기"""
+        if not self.async_mode or self._thread is None or self._pid != os.getpid():
+            return
+        commit = _Commit()
+        self._queue.put((_FLUSH, None, commit))
+        commit.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """종료 시 동기 flush 후 writer 스레드 정리"""
+        if self._closed:
+            return
+        try:
+            self.flush(timeout)
+            if self._failure is not None:
+                self.recover()
+        except Exception as e:
+            logging.critical(f"AUDIT FLUSH ON SHUTDOWN FAILED: {e} - {self.stats['held']} records not written")
+        self._closed = True
+
+    @property
+    def failed(self) -> bool:
+        return self._failure is not None
+
+    def recover(self) -> None:
+        """보류된 레코드를 순서대로 다시 기록 - 모두 성공하면 정상 상태로 복귀, 아니면 AuditWriterFailed"""
+        with self._held_lock:
+            while self._held:
+                sink, records = self._held[0]
+                error = self._write(sink, records)
+                if error is not None:
+                    self._failure, self._failed_at = error, time.monotonic()
+                    raise AuditWriterFailed(f"{self.stats['held']} audit records still held: {error}") from error
+                self._held.pop(0)
+                self.stats["held"] -= len(records)
+            self._failure = None
+        logging.warning("AUDIT WRITER RECOVERED - held records written")
+
+    def _recover_or_raise(self) -> None:
+        if time.monotonic() - self._failed_at >= RECOVER_INTERVAL:
+            self.recover()
+        elif self._failure is not None:
+            raise AuditWriterFailed(f"{self.stats['held']} audit records held after write failure: "
+                                    f"{self._failure}") from self._failure
+
+    def _ensure_started(self) -> None:
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid:
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == pid:
+                return
+            # fork 이후 자식 프로세스에는 writer 스레드가 없으므로 새로 시작
+            self._queue = queue.Queue(maxsize=self.max_queue)
+            self._pid = pid
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            items = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(items) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._commit(items)
+
+    def _commit(self, items: List[Tuple[Any, Any, Optional[_Commit]]]) -> Optional[BaseException]:
+        # sink 별로 순서를 유지하며 묶어서 한 번에 기록 (레코드마다 기다리는 호출자 여부)
+        groups: Dict[int, Tuple[LineFileSink, List[Any], List[bool]]] = {}
+        waiters: List[_Commit] = []
+        for sink, record, commit in items:
+            if commit is not None:
+                waiters.append(commit)
+            if sink is _FLUSH:
+                continue
+            group = groups.setdefault(id(sink), (sink, [], []))
+            group[1].append(record)
+            group[2].append(commit is not None)
+
+        error: Optional[BaseException] = None
+        with self._held_lock:
+            for sink, records, waited in groups.values():
+                if self._failure is not None:
+                    # 보류 중 - 순서가 뒤바뀌지 않도록 이후 배치도 기록하지 않고 보류
+                    failure = AuditWriterFailed(f"audit writer failed earlier: {self._failure}")
+                    self._hold(sink, records, waited)
+                    error = error or failure
+                    continue
+                failure = self._write(sink, records)
+                if failure is None:
+                    continue
+                # 감사 로그 실패는 치명적 - 시스템 로그에 기록하고 대기 중인 호출자에게 전파,
+                # 기다리는 호출자가 없는 레코드는 보류 (실패 상태)
+                logging.critical(f"AUDIT LOG FAILURE: {failure} - {len(records)} records for {getattr(sink, 'path', sink)}")
+                if self._hold(sink, records, waited):
+                    self._failure, self._failed_at = failure, time.monotonic()
+                error = failure
+
+        for commit in waiters:
+            commit.error = error
+            commit.event.set()
+        return error
+
+    def _write(self, sink: LineFileSink, records: List[Any]) -> Optional[BaseException]:
+        """배치 기록 + 백오프 재시도, 마지막 실패 예외 반환 (성공 시 None)"""
+        delay = RETRY_BACKOFF
+        for attempt in range(COMMIT_RETRIES + 1):
+            try:
+                sink.write_batch(records, self.fsync == "batch")
+                self.stats["records"] += len(records)
+                self.stats["batches"] += 1
+                return None
+            except Exception as e:
+                self.stats["errors"] += 1
+                error = e
+                if attempt < COMMIT_RETRIES:
+                    logging.error(f"AUDIT WRITE RETRY {attempt + 1}/{COMMIT_RETRIES}: {e}")
+                    time.sleep(delay)
+                    delay *= 2
+        return error
+
+    def _hold(self, sink: LineFileSink, records: List[Any], waited: List[bool]) -> bool:
+        """기다리는 호출자가 없는 레코드 보류 (호출자는 예외를 받으므로 제외), 보류했으면 True"""
+        held = [record for record, w in zip(records, waited) if not w]
+        if held:
+            self._held.append((sink, held))
+            self.stats["held"] += len(held)
+        return bool(held)
+
+def _env_writer() -> AuditWriter:
+    return AuditWriter(
+        flush_interval=float(os.environ.get("HVDC_AUDIT_FLUSH_INTERVAL", "0.05")),
+        batch_size=int(os.environ.get("HVDC_AUDIT_BATCH_SIZE", "256")),
+        max_queue=int(os.environ.get("HVDC_AUDIT_QUEUE_SIZE", "10000")),
+        fsync=os.environ.get("HVDC_AUDIT_FSYNC", "batch"),
+        async_mode=os.environ.get("HVDC_AUDIT_ASYNC", "1") != "0",
+    )
+
+_writer: Optional[AuditWriter] = None
+_writer_lock = threading.Lock()
+
+def get_writer() -> AuditWriter:
+    """프로세스 공용 writer (환경 변수 설정 적용)"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = _env_writer()
+            atexit.register(_writer.close)
+        return _writer
+
+def flush_audit(timeout: Optional[float] = None) -> None:
+    """대기 중인 감사 레코드를 모두 기록 (검증/통계 전, 종료 전)"""
+    if _writer is not None:
+        _writer.flush(timeout)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+감사 로그 다중 프로세스 스트레스 벤치마크 (gunicorn 다중 worker 모사)
+
+여러 프로세스가 같은 CSV/NDJSON 감사 로그에 동시에 기록한 뒤
+- CSV: 헤더 1회, 모든 행 무결성 해시 정상, 행 수 일치
+- NDJSON: 해시 체인 끊김/비체인 라인 없음, 라인 수 일치
+를 확인하고 처리량을 출력
+
+사용법: python benchmarks/bench_audit_multiprocess.py [--procs 8] [--events 2000] [--dir /tmp/x]
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+def worker(csv_path: str, ndjson_path: str, events: int, worker_id: int) -> None:
+    os.environ["HVDC_AUDIT_INDEX"] = "0"  # 인덱스 수집은 측정 대상 아님
+    sys.path.insert(0, str(ROOT))
+    from audit_logger import AUDIT_FIELDNAMES, MerkleCsvSink, _csv_line, calculate_integrity_hash
+    from audit_ndjson_and_hash import append_event
+    from audit_writer import flush_audit, get_writer
+
+    sink = MerkleCsvSink(Path(csv_path), header=_csv_line(AUDIT_FIELDNAMES))
+    writer = get_writer()
+    for i in range(events):
+        row = {"ts": f"2025-01-01T00:00:00.{i:06d}+00:00", "action": "stress", "actor": f"worker{worker_id}",
+               "detail": json.dumps({"seq": i}), "risk_level": "LOW", "compliance_tags": "",
+               "session_id": str(worker_id), "source_ip": "localhost"}
+        row["integrity_hash"] = calculate_integrity_hash(row)
+        writer.submit(sink, _csv_line([row[k] for k in AUDIT_FIELDNAMES]))
+        append_event({"action": "stress", "actor": f"worker{worker_id}", "seq": i}, path=Path(ndjson_path))
+    flush_audit()
+
+def run(procs: int, events: int, directory: Path) -> dict:
+    csv_path = directory / "audit_log.csv"
+    ndjson_path = directory / "audit.ndjson"
+    ctx = mp.get_context("spawn")
+    start = time.perf_counter()
+    workers = [ctx.Process(target=worker, args=(str(csv_path), str(ndjson_path), events, n)) for n in range(procs)]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join()
+    elapsed = time.perf_counter() - start
+
+    os.environ["HVDC_AUDIT_INDEX"] = "0"
+    from audit_logger import verify_audit_integrity
+    from audit_ndjson_and_hash import meta_path_for, verify_hash
+
+    csv_text = csv_path.read_text(encoding="utf-8")
+    csv_result = verify_audit_integrity(csv_path, workers=1)
+    ndjson_result = verify_hash(ndjson_path, meta_path_for(ndjson_path), workers=1)
+    meta = json.loads(meta_path_for(ndjson_path).read_text(encoding="utf-8"))
+    return {
+        "elapsed": elapsed,
+        "total": procs * events,
+        "csv_headers": csv_text.count("ts,action,actor"),
+        "csv_status": csv_result["status"],
+        "csv_rows": csv_result["total_entries"],
+        "ndjson_status": ndjson_result["status"],
+        "ndjson_lines": meta["line_count"],
+        "ndjson_unchained": meta.get("unchained_lines", 0),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-process audit append stress benchmark")
+    parser.add_argument("--procs", type=int, default=8, help="Concurrent writer processes")
+    parser.add_argument("--events", type=int, default=2000, help="Events per process (each to CSV and NDJSON)")
+    parser.add_argument("--dir", type=str, default=None, help="Output directory (default: temp dir)")
+    args = parser.parse_args()
+
+    directory = Path(args.dir or tempfile.mkdtemp(prefix="hvdc_audit_stress_"))
+    directory.mkdir(parents=True, exist_ok=True)
+    r = run(args.procs, args.events, directory)
+
+    print(f"📊 {args.procs} processes x {args.events} events -> {directory}")
+    print(f"  elapsed            {r['elapsed']:.2f}s ({r['total'] * 2 / r['elapsed']:.0f} records/s incl. spawn)")
+    print(f"  CSV                {r['csv_status']} rows={r['csv_rows']} headers={r['csv_headers']}")
+    print(f"  NDJSON             {r['ndjson_status']} lines={r['ndjson_lines']} unchained={r['ndjson_unchained']}")
+    ok = (r["csv_status"] == r["ndjson_status"] == "SUCCESS" and r["csv_headers"] == 1
+          and r["csv_rows"] == r["ndjson_lines"] == r["total"] and r["ndjson_unchained"] == 0)
+    print("✅ no interleaving detected" if ok else "🔴 interleaving/corruption detected")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+감사 로그 통계 스캔 벤치마크 - 단일 스레드 json.loads 라인 루프 (기존) vs mmap 청크 병렬 스캐너
+
+사용법: python benchmarks/bench_audit_scan.py [--mb 256] [--workers 8] [--file /tmp/x.ndjson]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import audit_scan  # noqa: E402
+
+def generate(path: Path, mb: int) -> None:
+    line = json.dumps({"event_type": "integration", "action": "ingest", "actor": "system",
+                       "severity": "info", "ts": "2025-01-01T00:00:00+00:00",
+                       "details": {"rows": 1234, "source": "warehouse"}}) + "\n"
+    block = (line * 10000).encode("utf-8")
+    with path.open("wb") as f:
+        for _ in range(max(1, mb * 1024 * 1024 // len(block))):
+            f.write(block)
+
+def legacy_stats(path: Path) -> int:
+    lines = 0
+    event_types, severities = Counter(), Counter()
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            lines += 1
+            event = json.loads(line)
+            event_types[event.get("action", "unknown")] += 1
+            severities[event.get("severity", "unknown")] += 1
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit stats scanner benchmark")
+    parser.add_argument("--mb", type=int, default=256, help="Generated log size in MB")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Scanner processes")
+    parser.add_argument("--file", type=str, default=None, help="Existing NDJSON log (skip generation)")
+    args = parser.parse_args()
+
+    path = Path(args.file) if args.file else Path(tempfile.mkdtemp(prefix="hvdc_scan_")) / "audit.ndjson"
+    if not args.file:
+        generate(path, args.mb)
+    size_mb = path.stat().st_size / 1024 / 1024
+    print(f"📊 {path} ({size_mb:.0f} MB, orjson={'yes' if audit_scan.orjson else 'no'})")
+
+    start = time.perf_counter()
+    legacy_lines = legacy_stats(path)
+    legacy = time.perf_counter() - start
+    print(f"  legacy line loop   {legacy:7.2f}s  {size_mb / legacy:7.1f} MB/s")
+
+    for workers in sorted({1, args.workers}):
+        start = time.perf_counter()
+        result = audit_scan.ndjson_stats(path, workers=workers)
+        elapsed = time.perf_counter() - start
+        assert result["total"] == legacy_lines
+        print(f"  scanner x{workers:<3}       {elapsed:7.2f}s  {size_mb / elapsed:7.1f} MB/s  "
+              f"({legacy / elapsed:.1f}x)")
+
+if __name__ == "__main__":
+    main()
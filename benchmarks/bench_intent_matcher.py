@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+NLQ 의도 분류 벤치마크 - substring 규칙 체인 (기존) vs 컴파일된 IntentMatcher (detect_intent / detect_intents)
+
+- 템플릿 질의 + 동의어/오타 변형을 섞은 N 개 질의의 처리량 (queries/s) 과 정확도 비교
+- 고유 질의 비율(--unique) 로 배치 API 의 중복 제거 효과 확인
+
+사용법: python benchmarks/bench_intent_matcher.py [--queries 20000] [--unique 0.5]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from nlq_to_sparql import IntentMatcher, detect_intent, detect_intents  # noqa: E402
+
+TEMPLATES = [
+    ("Show invoices where BOE != CIPL for SHPT NO {n}", "boe_cipl_mismatch"),
+    ("BOE vs CIPL discrepancy for SHPT NO {n}", "boe_cipl_mismatch"),
+    ("List all HVDC codes for site {n}", "list_hvdc_codes"),
+    ("Invoice risk analysis for week {n}", "invoice_risk_analysis"),
+    ("invocie problems in batch {n}", "invoice_risk_analysis"),
+    ("Container stowage analysis for heavy cargo {n}", "container_stowage_analysis"),
+    ("contaner presure check {n}", "container_stowage_analysis"),
+    ("Cost deviation analysis for case {n}", "cost_analysis"),
+    ("price varaince report {n}", "cost_analysis"),
+    ("HS Code risk analysis for controlled items {n}", "hs_code_risk"),
+    ("What is the weather {n}", "unknown"),
+]
+
+def legacy_detect_intent(nlq: str) -> str:
+    """기존 방식: 질의마다 substring 검사 체인"""
+    q = nlq.lower()
+    if ("boe" in q and "cipl" in q) and ("!=" in q or "mismatch" in q or "different" in q):
+        return "boe_cipl_mismatch"
+    if "show hvdc codes" in q or "list hvdc" in q or "hvdc codes" in q:
+        return "list_hvdc_codes"
+    if ("invoice" in q and ("risk" in q or "alert" in q or "problem" in q)) or ("high-risk" in q and "invoice" in q):
+        return "invoice_risk_analysis"
+    if ("container" in q or "stowage" in q) and ("pressure" in q or "weight" in q):
+        return "container_stowage_analysis"
+    if ("cost" in q or "price" in q) and ("analysis" in q or "deviation" in q or "alert" in q):
+        return "cost_analysis"
+    if ("hs code" in q or "hs-code" in q) and ("risk" in q or "controlled" in q):
+        return "hs_code_risk"
+    return "unknown"
+
+def make_queries(count: int, unique_ratio: float):
+    rng = random.Random(7)
+    distinct = max(1, int(count * unique_ratio))
+    pool = [(template.format(n=i), intent) for i, (template, intent) in
+            ((i, rng.choice(TEMPLATES)) for i in range(distinct))]
+    return [rng.choice(pool) for _ in range(count)]
+
+def run(label: str, func, queries, labels) -> None:
+    start = time.perf_counter()
+    intents = func(queries)
+    elapsed = time.perf_counter() - start
+    accuracy = sum(a == b for a, b in zip(intents, labels)) / len(labels)
+    print(f"  {label:<24} {elapsed:7.3f}s  {len(queries) / elapsed:12,.0f} queries/s  accuracy {accuracy:.1%}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Intent matcher benchmark")
+    parser.add_argument("--queries", type=int, default=20_000)
+    parser.add_argument("--unique", type=float, default=0.5, help="Share of distinct queries")
+    args = parser.parse_args()
+
+    data = make_queries(args.queries, args.unique)
+    queries = [q for q, _ in data]
+    labels = [intent for _, intent in data]
+    detect_intent("warm up")  # 기본 matcher 컴파일
+    print(f"📊 {len(queries):,} queries ({len(set(queries)):,} distinct)")
+
+    run("legacy substring chain", lambda qs: [legacy_detect_intent(q) for q in qs], queries, labels)
+    run("detect_intent loop", lambda qs: [detect_intent(q) for q in qs], queries, labels)
+    run("detect_intents batch", detect_intents, queries, labels)
+    run("exact only (no fuzzy)", IntentMatcher(fuzzy=False).classify_many, queries, labels)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+PII 마스킹 벤치마크 - 패턴별 re.sub (기존) vs 공용 단일 패스 Sanitizer
+
+사용법: python benchmarks/bench_pii_sanitizer.py [--checks 500] [--repeat 20]
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pii_sanitizer import PII_PATTERNS, csv_sanitizer, event_sanitizer  # noqa: E402
+
+LEGACY_EVENT_PATTERNS = {
+    PII_PATTERNS["card"]: '[CARD_REDACTED]',
+    PII_PATTERNS["email"]: '[EMAIL_REDACTED]',
+    PII_PATTERNS["password"]: 'password=[REDACTED]',
+    PII_PATTERNS["api_key"]: 'api_key=[REDACTED]',
+}
+
+def legacy_csv(data):
+    if isinstance(data, dict):
+        return {k: legacy_csv(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [legacy_csv(item) for item in data]
+    if isinstance(data, str):
+        for pattern in PII_PATTERNS.values():
+            data = re.sub(pattern, '[REDACTED]', data, flags=re.IGNORECASE)
+    return data
+
+def legacy_event(data):
+    if isinstance(data, dict):
+        return {k: legacy_event(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [legacy_event(item) for item in data]
+    if isinstance(data, str):
+        for pattern, replacement in LEGACY_EVENT_PATTERNS.items():
+            data = re.sub(pattern, replacement, data, flags=re.IGNORECASE)
+    return data
+
+def validation_payload(checks: int) -> dict:
+    """staging 검증 결과 + 룰 결과 형태의 detail"""
+    return {
+        "validation": {
+            "status": "PASS",
+            "graph": "http://samsung.com/graph/STAGING",
+            "checks": [{
+                "name": f"check_{i}",
+                "status": "PASS" if i % 7 else "WARN",
+                "message": "cardinality within expected bounds" if i % 3 else f"{i} cases missing hasHVDCCode",
+                "case": f"HVDC-ADOPT-SCT-{i:04d}",
+                "source_file": f"HVDC_Invoice_{i % 12:02d}.xlsx",
+            } for i in range(checks)],
+        },
+        "rules": [{"rule": "costguard", "status": "OK", "note": "no deviation"} for _ in range(checks // 5)],
+        "submitted_by": "ops.lead@samsung.com",
+        "trace": "api_key=xyz123 password=hunter2",
+    }
+
+def bench(label: str, func, payload, repeat: int) -> float:
+    func(payload)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(payload)
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    print(f"  {label:<28} {elapsed:8.2f} ms/payload")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="PII sanitizer benchmark")
+    parser.add_argument("--checks", type=int, default=500, help="Validation checks per payload")
+    parser.add_argument("--repeat", type=int, default=20, help="Iterations per measurement")
+    args = parser.parse_args()
+
+    payload = validation_payload(args.checks)
+    assert csv_sanitizer.sanitize(payload) == legacy_csv(payload)
+    assert event_sanitizer.sanitize(payload) == legacy_event(payload)
+
+    print(f"📊 payload: {args.checks} checks")
+    old = bench("legacy CSV (re.sub x5)", legacy_csv, payload, args.repeat)
+    new = bench("shared CSV sanitizer", csv_sanitizer.sanitize, payload, args.repeat)
+    print(f"  → {old / new:.1f}x")
+    old = bench("legacy NDJSON (re.sub x4)", legacy_event, payload, args.repeat)
+    new = bench("shared NDJSON sanitizer", event_sanitizer.sanitize, payload, args.repeat)
+    print(f"  → {old / new:.1f}x")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
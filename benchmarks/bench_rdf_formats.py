@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+RDF 업로드 형식 벤치마크 - Turtle vs N-Triples vs gzip N-Triples
+
+- 생성 시간, 파일 크기, 전송 바이트 (gzip Content-Encoding 포함) 비교
+- --fuseki 지정 시 임시 그래프에 업로드해 서버 수신+파싱 시간 측정 후 DROP
+
+사용법: python benchmarks/bench_rdf_formats.py [--rows 200000] [--fuseki http://localhost:3030]
+"""
+
+import argparse
+import importlib.util
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from fuseki_swap_verify import FusekiSwapManager  # noqa: E402
+from rdf_stream import RDF_FORMATS  # noqa: E402
+
+SCRATCH_GRAPH = "http://samsung.com/graph/BENCH_FORMATS"
+
+def load_engine():
+    spec = importlib.util.spec_from_file_location("hvdc_integration_demo", ROOT / "hvdc-integration-demo.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.HVDCIntegrationEngine()
+
+def make_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    codes = np.array([f"HVDC-ADOPT-SCT-{i:04d}" for i in range(5000)])
+    return pd.DataFrame({
+        "HVDC_CODE": codes[rng.integers(0, len(codes), rows)],
+        "SOURCE_FILE": "C:\\data\\OFCO_2025.xlsx",
+        "EXTRACT_METHOD": np.array(["regex", "fuzzy", "column"])[rng.integers(0, 3, rows)],
+        "CONF": np.array([0.95, 0.8, 0.6])[rng.integers(0, 3, rows)],
+        "LOGICAL_SOURCE": "OFCO",
+    })
+
+def gzip_size(path: Path) -> int:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    size = 0
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            size += len(compressor.compress(chunk))
+    return size + len(compressor.flush())
+
+def main():
+    parser = argparse.ArgumentParser(description="RDF upload format benchmark")
+    parser.add_argument("--rows", type=int, default=200_000, help="Extraction frame rows")
+    parser.add_argument("--fuseki", type=str, default=None, help="Fuseki base URL for upload timing")
+    args = parser.parse_args()
+
+    engine = load_engine()
+    df = make_frame(args.rows)
+    codes = set(df["HVDC_CODE"])
+    manager = FusekiSwapManager(args.fuseki) if args.fuseki else None
+    workdir = Path(tempfile.mkdtemp(prefix="hvdc_formats_"))
+    print(f"📊 {args.rows:,} extraction rows -> {workdir}")
+    print(f"  {'format':<14} {'write':>8} {'file MB':>9} {'wire MB':>9} {'upload':>8}")
+
+    for fmt in ("turtle", "ntriples", "ntriples-gzip"):
+        path = workdir / f"bench{RDF_FORMATS[fmt].suffix}"
+        start = time.perf_counter()
+        engine.write_rdf(path, codes, {"OFCO": df}, fmt)
+        write = time.perf_counter() - start
+        size = path.stat().st_size
+        # gzip 형식은 파일 그대로, 그 외는 --gzip (Content-Encoding) 전송 시 바이트
+        wire = size if RDF_FORMATS[fmt].gzip else gzip_size(path)
+
+        upload = ""
+        if manager:
+            start = time.perf_counter()
+            ok = manager.upload_ttl_file_to_graph(path, SCRATCH_GRAPH, compress=True)
+            upload = f"{time.perf_counter() - start:7.2f}s" if ok else "FAILED"
+            manager.execute_sparql_update(f"DROP SILENT GRAPH <{SCRATCH_GRAPH}>")
+        print(f"  {fmt:<14} {write:7.2f}s {size / 1e6:9.1f} {wire / 1e6:9.1f} {upload:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -10,11 +10,40 @@ import json
 import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Callable, Iterator, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 import logging
+import zlib
+
+from rdf_stream import RDF_FORMATS, format_for_path
+from sparql_cache import bump_graph_versions
+from sparql_guard import QUERY_TIMEOUT
+from sparql_stream import DEFAULT_PAGE_SIZE, SelectStream, fetch_page, stream_select
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 
+# Streaming upload defaults (large TTL / N-Triples files)
+STREAM_CHUNK_BYTES = 1024 * 1024
+DEFAULT_BATCH_TRIPLES = 50000
+UPLOAD_STATE_SUFFIX = ".upload-state.json"
+
+EX_NAMESPACE = "http://samsung.com/project-logistics#"
+
+ProgressCallback = Callable[[int, int], None]
+
+def _gzip_bytes(payload: bytes) -> bytes:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    return compressor.compress(payload) + compressor.flush()
+
+def _gzip_chunks(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """gzip-compress a byte stream incrementally (Content-Encoding: gzip bodies)"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
 class FusekiSwapManager:
     """Manages safe staging, validation, and swapping of HVDC data in Fuseki"""
     
@@ -36,6 +65,18 @@ class FusekiSwapManager:
         ]
         self.backup_graph = "http://samsung.com/graph/BACKUP"
         
+        # Read timeout for a single upload request (whole file or one batch)
+        self.upload_timeout = 600
+        
+        # Upper bound for concurrent per-graph operations (backup, batch upload)
+        self.max_workers = 4
+        
+        # Triple counts cached for the duration of one deployment (None = disabled)
+        self._count_cache: Optional[Dict[Optional[str], int]] = None
+        
+        # Graphs written since the last publish_graph_changes() (SPARQL result cache versions)
+        self._changed_graphs: set = set()
+        
     def check_fuseki_health(self) -> bool:
         """Verify Fuseki server is running and accessible"""
         try:
@@ -50,13 +91,13 @@ class FusekiSwapManager:
             logging.error(f"❌ Fuseki server not accessible: {e}")
             return False
     
-    def execute_sparql_query(self, query: str) -> Dict[str, Any]:
-        """Execute SPARQL SELECT query"""
+    def execute_sparql_query(self, query: str, timeout: float = QUERY_TIMEOUT) -> Dict[str, Any]:
+        """Execute SPARQL SELECT query (timeout is also sent as Fuseki's server-side "timeout")"""
         try:
             headers = {"Accept": "application/sparql-results+json"}
-            data = {"query": query}
+            data = {"query": query, "timeout": f"{timeout:g}"}
             
-            response = requests.post(self.sparql_url, data=data, headers=headers, timeout=30)
+            response = requests.post(self.sparql_url, data=data, headers=headers, timeout=timeout + 5)
             
             if response.status_code == 200:
                 return response.json()
@@ -67,6 +108,15 @@ class FusekiSwapManager:
             logging.error(f"SPARQL query error: {e}")
             return {"error": str(e)}
     
+    def execute_sparql_page(self, query: str, cursor: Optional[str] = None,
+                            page_size: int = DEFAULT_PAGE_SIZE) -> Dict[str, Any]:
+        """One page of a SELECT (LIMIT/OFFSET window); pass page['next_cursor'] back for the next page"""
+        return fetch_page(query, self.execute_sparql_query, cursor, page_size)
+    
+    def stream_sparql_query(self, query: str, fmt: str = "json", timeout: float = 300) -> SelectStream:
+        """SELECT rows read incrementally (json or tsv) - for exports larger than memory"""
+        return stream_select(self.sparql_url, query, fmt=fmt, timeout=timeout + 5, server_timeout=timeout)
+    
     def execute_sparql_update(self, update: str) -> bool:
         """Execute SPARQL UPDATE operation"""
         try:
@@ -86,6 +136,7 @@ class FusekiSwapManager:
     
     def upload_ttl_to_graph(self, ttl_content: str, graph_uri: str) -> bool:
         """Upload TTL data to specific named graph"""
+        self._invalidate_count(graph_uri)
         try:
             url = f"{self.data_url}?graph={graph_uri}"
             headers = {"Content-Type": "text/turtle; charset=utf-8"}
@@ -103,8 +154,226 @@ class FusekiSwapManager:
             logging.error(f"❌ TTL upload error: {e}")
             return False
     
+    def _iter_file_chunks(self, path: Path, progress: Optional[ProgressCallback] = None) -> Iterator[bytes]:
+        """Yield file content in fixed-size chunks, reporting bytes sent"""
+        total = path.stat().st_size
+        sent = 0
+        with path.open("rb") as f:
+            for chunk in iter(lambda: f.read(STREAM_CHUNK_BYTES), b""):
+                sent += len(chunk)
+                if progress:
+                    progress(sent, total)
+                yield chunk
+    
+    def _iter_ntriples_batches(self, path: Path, batch_size: int) -> Iterator[Tuple[int, bytes]]:
+        """Split an N-Triples file into (batch_index, payload) pairs of batch_size triples"""
+        batch: List[bytes] = []
+        index = 0
+        with path.open("rb") as f:
+            for line in f:
+                stripped = line.strip()
+                if not stripped or stripped.startswith(b"#"):
+                    continue
+                batch.append(stripped + b"\n")
+                if len(batch) >= batch_size:
+                    yield index, b"".join(batch)
+                    batch = []
+                    index += 1
+        if batch:
+            yield index, b"".join(batch)
+    
+    def _has_blank_nodes(self, path: Path) -> bool:
+        """True if an N-Triples file uses blank-node labels (_:x) as subject or object"""
+        with path.open("rb") as f:
+            for line in f:
+                stripped = line.strip()
+                # " _:" inside a literal is a false positive, which only costs a single PUT
+                if stripped.startswith(b"_:") or b" _:" in stripped:
+                    return True
+        return False
+    
+    def _load_upload_state(self, state_path: Path, fingerprint: Dict[str, Any]) -> List[int]:
+        """Return completed batch indices if the saved state matches this upload"""
+        if not state_path.exists():
+            return []
+        try:
+            state = json.loads(state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return []
+        if state.get("fingerprint") != fingerprint:
+            return []
+        return list(state.get("completed", []))
+    
+    def _save_upload_state(self, state_path: Path, fingerprint: Dict[str, Any], completed: List[int]) -> None:
+        """Persist completed batch indices so a failed upload can resume"""
+        state = {
+            "fingerprint": fingerprint,
+            "completed": sorted(completed),
+            "updated": datetime.now(timezone.utc).isoformat()
+        }
+        tmp_path = state_path.with_name(state_path.name + ".tmp")
+        tmp_path.write_text(json.dumps(state), encoding="utf-8")
+        tmp_path.replace(state_path)
+    
+    def _post_batch(self, url: str, payload: bytes, compress: bool = False) -> bool:
+        """POST (append) one N-Triples batch to a graph, optionally gzip-encoded on the wire"""
+        try:
+            headers = {"Content-Type": "application/n-triples"}
+            if compress:
+                payload = _gzip_bytes(payload)
+                headers["Content-Encoding"] = "gzip"
+            response = requests.post(url, data=payload, headers=headers, timeout=self.upload_timeout)
+            if response.status_code in [200, 201, 204]:
+                return True
+            logging.error(f"❌ Batch upload failed: {response.status_code} - {response.text}")
+            return False
+        except Exception as e:
+            logging.error(f"❌ Batch upload error: {e}")
+            return False
+    
+    def upload_ttl_file_to_graph(self, ttl_path: Union[str, Path], graph_uri: str,
+                                 batch_size: int = DEFAULT_BATCH_TRIPLES, workers: int = 1,
+                                 progress: Optional[ProgressCallback] = None,
+                                 resume: bool = True, compress: bool = False) -> bool:
+        """
+        Upload an RDF file to a named graph without loading it into memory.
+        
+        The format follows the file suffix (see rdf_stream.RDF_FORMATS):
+        Turtle (.ttl), gzip files (.nt.gz/.ttl.gz) and RDF-Thrift (.trdf) are
+        streamed as a single PUT with a generator body; gzip files are sent
+        as-is with Content-Encoding: gzip.
+        N-Triples files (.nt) are split into batches of batch_size triples and
+        POSTed sequentially (workers=1) or in parallel; completed batches are
+        recorded beside the file so a failed upload resumes from the last
+        successful batch. Blank-node labels are scoped to one request body, so
+        N-Triples files that use them are streamed as a single PUT instead.
+        compress gzip-encodes uncompressed bodies on the wire.
+        """
+        path = Path(ttl_path)
+        self._invalidate_count(graph_uri)
+        if not path.exists():
+            logging.error(f"❌ RDF file not found: {path}")
+            return False
+        
+        fmt = format_for_path(path)
+        if fmt != "ntriples":
+            return self._stream_file_to_graph(path, graph_uri, progress, fmt, compress)
+        if self._has_blank_nodes(path):
+            # 배치마다 별도 문서로 파싱되어 같은 _:x 가 배치 수만큼 다른 노드가 됨
+            logging.info(f"📄 {path.name} uses blank nodes; streaming as a single PUT")
+            return self._stream_file_to_graph(path, graph_uri, progress, fmt, compress)
+        
+        stat = path.stat()
+        fingerprint = {
+            "file": str(path.resolve()),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "graph": graph_uri,
+            "batch_size": batch_size
+        }
+        state_path = path.with_name(path.name + UPLOAD_STATE_SUFFIX)
+        completed = self._load_upload_state(state_path, fingerprint) if resume else []
+        
+        if completed:
+            logging.info(f"🔁 Resuming upload of {path.name}: {len(completed)} batches already loaded")
+        else:
+            # Fresh upload replaces the graph, like PUT does for Turtle
+            if not self.execute_sparql_update(f"DROP SILENT GRAPH <{graph_uri}>"):
+                return False
+        
+        url = f"{self.data_url}?graph={graph_uri}"
+        done = set(completed)
+        total_bytes = stat.st_size
+        sent_bytes = 0
+        failed = False
+        
+        def report(index: int, size: int) -> None:
+            nonlocal sent_bytes
+            done.add(index)
+            sent_bytes += size
+            self._save_upload_state(state_path, fingerprint, list(done))
+            if progress:
+                progress(sent_bytes, total_bytes)
+            logging.info(f"📤 Batch {index} uploaded ({len(done)} batches, "
+                         f"{sent_bytes / max(total_bytes, 1):.0%} of new data sent)")
+        
+        try:
+            if workers <= 1:
+                for index, payload in self._iter_ntriples_batches(path, batch_size):
+                    if index in done:
+                        continue
+                    if not self._post_batch(url, payload, compress):
+                        failed = True
+                        break
+                    report(index, len(payload))
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    pending = {}
+                    for index, payload in self._iter_ntriples_batches(path, batch_size):
+                        if index in done:
+                            continue
+                        # Bound in-flight batches so memory stays at ~2x workers batches
+                        while len(pending) >= workers * 2:
+                            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                            for future in finished:
+                                idx, size = pending.pop(future)
+                                if future.result():
+                                    report(idx, size)
+                                else:
+                                    failed = True
+                        if failed:
+                            break
+                        pending[pool.submit(self._post_batch, url, payload, compress)] = (index, len(payload))
+                    for future in list(pending):
+                        idx, size = pending.pop(future)
+                        if future.result():
+                            report(idx, size)
+                        else:
+                            failed = True
+        except Exception as e:
+            logging.error(f"❌ Batch upload error: {e}")
+            failed = True
+        
+        if failed:
+            logging.error(f"❌ Upload of {path.name} stopped after {len(done)} batches; rerun to resume")
+            return False
+        
+        state_path.unlink(missing_ok=True)
+        logging.info(f"✅ N-Triples uploaded to graph: {graph_uri} ({len(done)} batches)")
+        return True
+    
+    def _stream_file_to_graph(self, path: Path, graph_uri: str,
+                              progress: Optional[ProgressCallback] = None,
+                              fmt: str = "turtle", compress: bool = False) -> bool:
+        """PUT an RDF file to a named graph as a chunked generator body"""
+        try:
+            url = f"{self.data_url}?graph={graph_uri}"
+            spec = RDF_FORMATS[fmt]
+            headers = {"Content-Type": spec.content_type}
+            body = self._iter_file_chunks(path, progress)
+            if spec.gzip:
+                headers["Content-Encoding"] = "gzip"
+            elif compress:
+                headers["Content-Encoding"] = "gzip"
+                body = _gzip_chunks(body)
+            
+            response = requests.put(url, data=body, headers=headers, timeout=(10, self.upload_timeout))
+            
+            if response.status_code in [200, 201, 204]:
+                logging.info(f"✅ {fmt} streamed to graph: {graph_uri} ({path.stat().st_size:,} bytes)")
+                return True
+            else:
+                logging.error(f"❌ RDF upload failed: {response.status_code} - {response.text}")
+                return False
+        except Exception as e:
+            logging.error(f"❌ RDF upload error: {e}")
+            return False
+    
     def get_triple_count(self, graph_uri: Optional[str] = None) -> int:
         """Get triple count for specific graph or entire dataset"""
+        if self._count_cache is not None and graph_uri in self._count_cache:
+            return self._count_cache[graph_uri]
+        
         if graph_uri:
             query = f"""
             SELECT (COUNT(*) AS ?count) WHERE {{
@@ -122,25 +391,148 @@ class FusekiSwapManager:
         try:
             bindings = result.get("results", {}).get("bindings", [])
             if bindings:
-                return int(bindings[0]["count"]["value"])
+                count = int(bindings[0]["count"]["value"])
+                if self._count_cache is not None:
+                    self._count_cache[graph_uri] = count
+                return count
         except (KeyError, ValueError, IndexError):
             pass
         
         return -1
     
-    def validate_staging_data(self) -> Dict[str, Any]:
+    def get_graph_counts(self, graph_uris: Optional[List[str]] = None) -> Dict[str, int]:
+        """
+        Triple counts for several named graphs in one GROUP BY query.
+        Graphs without triples are reported as 0; every graph is -1 on error.
+        """
+        values = ""
+        if graph_uris:
+            values = "VALUES ?g { " + " ".join(f"<{g}>" for g in graph_uris) + " }"
+        query = f"""
+        SELECT ?g (COUNT(*) AS ?n) WHERE {{
+            {values}
+            GRAPH ?g {{ ?s ?p ?o }}
+        }} GROUP BY ?g
+        """
+        
+        result = self.execute_sparql_query(query)
+        if "error" in result:
+            return {g: -1 for g in graph_uris or []}
+        
+        counts = {g: 0 for g in graph_uris or []}
+        try:
+            for binding in result.get("results", {}).get("bindings", []):
+                counts[binding["g"]["value"]] = int(binding["n"]["value"])
+        except (KeyError, ValueError):
+            return {g: -1 for g in graph_uris or []}
+        
+        if self._count_cache is not None:
+            self._count_cache.update(counts)
+        return counts
+    
+    def _invalidate_count(self, graph_uri: str) -> None:
+        """Forget cached counts for a graph that is about to change"""
+        self._changed_graphs.add(graph_uri)
+        if self._count_cache is not None:
+            self._count_cache.pop(graph_uri, None)
+            self._count_cache.pop(None, None)
+    
+    def _validation_subqueries(self) -> Dict[str, str]:
+        """Aggregate sub-selects for each staging check, one result row each"""
+        graph = self.staging_graph
+        return {
+            "triple_count": f"""
+            SELECT (COUNT(*) AS ?triples) WHERE {{
+                GRAPH <{graph}> {{ ?s ?p ?o }}
+            }}""",
+            "required_classes": f"""
+            SELECT (SUM(IF(?class = ex:Case, 1, 0)) AS ?Case)
+                   (SUM(IF(?class = ex:CargoItem, 1, 0)) AS ?CargoItem)
+                   (SUM(IF(?class = ex:Invoice, 1, 0)) AS ?Invoice)
+                   (SUM(IF(?class = ex:HSCode, 1, 0)) AS ?HSCode) WHERE {{
+                GRAPH <{graph}> {{
+                    ?instance a ?class .
+                    FILTER(?class IN (ex:Case, ex:CargoItem, ex:Invoice, ex:HSCode))
+                }}
+            }}""",
+            "hvdc_format": f"""
+            SELECT (COUNT(?code) AS ?total)
+                   (SUM(IF(REGEX(STR(?code), "^HVDC-[A-Z0-9-]+$"), 1, 0)) AS ?valid) WHERE {{
+                GRAPH <{graph}> {{ ?entity ex:hvdcCode ?code . }}
+            }}""",
+            "referential_integrity": f"""
+            SELECT (COUNT(DISTINCT ?case) AS ?cases) (COUNT(DISTINCT ?cargo) AS ?cargoItems) WHERE {{
+                GRAPH <{graph}> {{
+                    ?case a ex:Case .
+                    OPTIONAL {{ ?cargo ex:belongsToCase ?case . }}
+                }}
+            }}"""
+        }
+    
+    def _run_aggregate(self, body: str) -> Optional[Dict[str, int]]:
+        """Run one aggregate SELECT and return its single row as integers"""
+        result = self.execute_sparql_query(f"PREFIX ex: <{EX_NAMESPACE}>\n{body}")
+        if "error" in result:
+            return None
+        bindings = result.get("results", {}).get("bindings", [])
+        if not bindings:
+            return None
+        row = {}
+        for name, value in bindings[0].items():
+            try:
+                row[name] = int(float(value["value"]))
+            except (KeyError, ValueError):
+                continue
+        return row
+    
+    def validate_staging_data(self, bundle: bool = False) -> Dict[str, Any]:
         """
         Comprehensive validation of staging data
         Returns validation results with pass/fail status
+        
+        Every check is a single aggregate sub-select. By default the checks run
+        concurrently (one query each, timed per check); bundle=True joins them
+        into one SELECT so validation costs a single round trip.
         """
         validation_results = {
             "overall_status": "PASS",
             "timestamp": datetime.now(timezone.utc).isoformat(),
-            "checks": {}
+            "checks": {},
+            "timings_ms": {}
         }
         
+        subqueries = self._validation_subqueries()
+        cached_count = None
+        if self._count_cache is not None and self.staging_graph in self._count_cache:
+            cached_count = self._count_cache[self.staging_graph]
+            subqueries.pop("triple_count")
+        
+        rows: Dict[str, Optional[Dict[str, int]]] = {}
+        if bundle:
+            joined = "\n".join(f"{{ {body} }}" for body in subqueries.values())
+            started = time.perf_counter()
+            row = self._run_aggregate(f"SELECT * WHERE {{\n{joined}\n}}")
+            validation_results["timings_ms"]["bundle"] = round((time.perf_counter() - started) * 1000, 1)
+            rows = {name: row for name in subqueries}
+        else:
+            def timed(body: str) -> Tuple[Optional[Dict[str, int]], float]:
+                started = time.perf_counter()
+                row = self._run_aggregate(body)
+                return row, round((time.perf_counter() - started) * 1000, 1)
+            
+            with ThreadPoolExecutor(max_workers=len(subqueries)) as pool:
+                futures = {name: pool.submit(timed, body) for name, body in subqueries.items()}
+                for name, future in futures.items():
+                    rows[name], validation_results["timings_ms"][name] = future.result()
+        
         # Check 1: Triple count
-        staging_count = self.get_triple_count(self.staging_graph)
+        if cached_count is not None:
+            staging_count = cached_count
+        else:
+            row = rows.get("triple_count")
+            staging_count = row.get("triples", -1) if row else -1
+            if staging_count >= 0 and self._count_cache is not None:
+                self._count_cache[self.staging_graph] = staging_count
         validation_results["checks"]["triple_count"] = {
             "status": "PASS" if staging_count > 0 else "FAIL",
             "count": staging_count,
@@ -151,27 +543,9 @@ class FusekiSwapManager:
             validation_results["overall_status"] = "FAIL"
         
         # Check 2: Required classes exist
-        required_classes_query = f"""
-        PREFIX ex: <http://samsung.com/project-logistics#>
-        SELECT ?class (COUNT(?instance) AS ?count) WHERE {{
-            GRAPH <{self.staging_graph}> {{
-                ?instance a ?class .
-                FILTER(?class IN (ex:Case, ex:CargoItem, ex:Invoice, ex:HSCode))
-            }}
-        }} GROUP BY ?class
-        """
-        
-        class_result = self.execute_sparql_query(required_classes_query)
-        class_counts = {}
-        
-        if "error" not in class_result:
-            for binding in class_result.get("results", {}).get("bindings", []):
-                class_uri = binding["class"]["value"]
-                count = int(binding["count"]["value"])
-                class_name = class_uri.split("#")[-1]
-                class_counts[class_name] = count
-        
         required_classes = ["Case", "CargoItem", "Invoice", "HSCode"]
+        row = rows.get("required_classes") or {}
+        class_counts = {cls: row[cls] for cls in required_classes if row.get(cls, 0) > 0}
         missing_classes = [cls for cls in required_classes if class_counts.get(cls, 0) == 0]
         
         validation_results["checks"]["required_classes"] = {
@@ -182,57 +556,30 @@ class FusekiSwapManager:
         }
         
         # Check 3: Data integrity - HVDC codes format
-        hvdc_format_query = f"""
-        PREFIX ex: <http://samsung.com/project-logistics#>
-        SELECT (COUNT(?code) AS ?total) (COUNT(?validCode) AS ?valid) WHERE {{
-            GRAPH <{self.staging_graph}> {{
-                ?entity ex:hvdcCode ?code .
-                OPTIONAL {{
-                    ?entity ex:hvdcCode ?validCode .
-                    FILTER(REGEX(?validCode, "^HVDC-[A-Z0-9-]+$"))
-                }}
-            }}
-        }}
-        """
-        
-        format_result = self.execute_sparql_query(hvdc_format_query)
-        if "error" not in format_result:
-            bindings = format_result.get("results", {}).get("bindings", [])
-            if bindings:
-                total = int(bindings[0]["total"]["value"])
-                valid = int(bindings[0]["valid"]["value"])
-                
-                validation_results["checks"]["hvdc_format"] = {
-                    "status": "PASS" if valid == total and total > 0 else "WARN",
-                    "total_codes": total,
-                    "valid_codes": valid,
-                    "message": f"{valid}/{total} HVDC codes have valid format"
-                }
+        row = rows.get("hvdc_format")
+        if row and "total" in row:
+            total = row["total"]
+            valid = row.get("valid", 0)
+            
+            validation_results["checks"]["hvdc_format"] = {
+                "status": "PASS" if valid == total and total > 0 else "WARN",
+                "total_codes": total,
+                "valid_codes": valid,
+                "message": f"{valid}/{total} HVDC codes have valid format"
+            }
         
         # Check 4: Referential integrity - Cases have cargo items
-        referential_query = f"""
-        PREFIX ex: <http://samsung.com/project-logistics#>
-        SELECT (COUNT(DISTINCT ?case) AS ?cases) (COUNT(DISTINCT ?cargo) AS ?cargoItems) WHERE {{
-            GRAPH <{self.staging_graph}> {{
-                ?case a ex:Case .
-                OPTIONAL {{ ?cargo ex:belongsToCase ?case . }}
-            }}
-        }}
-        """
-        
-        ref_result = self.execute_sparql_query(referential_query)
-        if "error" not in ref_result:
-            bindings = ref_result.get("results", {}).get("bindings", [])
-            if bindings:
-                cases = int(bindings[0]["cases"]["value"])
-                cargo_items = int(bindings[0]["cargoItems"]["value"])
-                
-                validation_results["checks"]["referential_integrity"] = {
-                    "status": "PASS" if cargo_items > 0 and cases > 0 else "WARN",
-                    "cases": cases,
-                    "cargo_items": cargo_items,
-                    "message": f"Found {cases} cases with {cargo_items} cargo items"
-                }
+        row = rows.get("referential_integrity")
+        if row and "cases" in row:
+            cases = row["cases"]
+            cargo_items = row.get("cargoItems", 0)
+            
+            validation_results["checks"]["referential_integrity"] = {
+                "status": "PASS" if cargo_items > 0 and cases > 0 else "WARN",
+                "cases": cases,
+                "cargo_items": cargo_items,
+                "message": f"Found {cases} cases with {cargo_items} cargo items"
+            }
         
         # Determine overall status
         failed_checks = [name for name, check in validation_results["checks"].items() 
@@ -249,13 +596,15 @@ class FusekiSwapManager:
         logging.info("🔄 Creating backup of production data...")
         
         try:
+            self._invalidate_count(self.backup_graph)
+            
             # Clear backup graph first
             clear_backup = f"DROP SILENT GRAPH <{self.backup_graph}>"
             if not self.execute_sparql_update(clear_backup):
                 return False
             
-            # Copy all production graphs to backup
-            for graph in self.production_graphs:
+            # Copy all production graphs to backup (independent updates, bounded pool)
+            def copy_graph(graph: str) -> bool:
                 copy_query = f"""
                 INSERT {{
                     GRAPH <{self.backup_graph}> {{ ?s ?p ?o }}
@@ -263,10 +612,17 @@ class FusekiSwapManager:
                     GRAPH <{graph}> {{ ?s ?p ?o }}
                 }}
                 """
-                
-                if not self.execute_sparql_update(copy_query):
+                return self.execute_sparql_update(copy_query)
+            
+            workers = max(1, min(self.max_workers, len(self.production_graphs)))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                copied = dict(zip(self.production_graphs, pool.map(copy_graph, self.production_graphs)))
+            
+            failed = [graph for graph, ok in copied.items() if not ok]
+            if failed:
+                for graph in failed:
                     logging.error(f"Failed to backup graph: {graph}")
-                    return False
+                return False
             
             backup_count = self.get_triple_count(self.backup_graph)
             logging.info(f"✅ Backup created with {backup_count} triples")
@@ -281,6 +637,8 @@ class FusekiSwapManager:
         logging.info(f"🔄 Swapping staging data to production: {target_graph}")
         
         try:
+            self._invalidate_count(target_graph)
+            
             # Clear target production graph
             clear_prod = f"DROP SILENT GRAPH <{target_graph}>"
             if not self.execute_sparql_update(clear_prod):
@@ -318,6 +676,8 @@ class FusekiSwapManager:
         logging.info(f"🔄 Rolling back {target_graph} from backup...")
         
         try:
+            self._invalidate_count(target_graph)
+            
             # Clear target graph
             clear_target = f"DROP SILENT GRAPH <{target_graph}>"
             if not self.execute_sparql_update(clear_target):
@@ -343,15 +703,33 @@ class FusekiSwapManager:
             logging.error(f"❌ Rollback failed: {e}")
             return False
     
+    def publish_graph_changes(self) -> Dict[str, int]:
+        """
+        Bump the version of every graph written since the last call, so SPARQL
+        results cached against the old data are no longer served.
+        Called after the writes complete (end of deploy_with_validation / CLI ops).
+        """
+        if not self._changed_graphs:
+            return {}
+        changed, self._changed_graphs = self._changed_graphs, set()
+        try:
+            return bump_graph_versions(sorted(changed))
+        except OSError as e:
+            logging.error(f"❌ Failed to bump graph versions: {e}")
+            return {}
+    
     def clear_staging(self) -> bool:
         """Clear staging graph after successful deployment"""
+        self._invalidate_count(self.staging_graph)
         clear_query = f"DROP SILENT GRAPH <{self.staging_graph}>"
         return self.execute_sparql_update(clear_query)
     
-    def deploy_with_validation(self, ttl_content: str, target_graph: str) -> Dict[str, Any]:
+    def deploy_with_validation(self, ttl_content: Union[str, Path], target_graph: str,
+                               batch_size: int = DEFAULT_BATCH_TRIPLES, workers: int = 1,
+                               compress: bool = False) -> Dict[str, Any]:
         """
         Complete deployment workflow:
-        1. Upload to staging
+        1. Upload to staging (a Path is streamed/batched from disk)
         2. Validate staging data
         3. Create backup
         4. Swap to production
@@ -364,6 +742,9 @@ class FusekiSwapManager:
             "steps": {}
         }
         
+        # Each graph count is computed once per deployment and reused by later steps
+        self._count_cache = {}
+        
         try:
             # Step 1: Health check
             if not self.check_fuseki_health():
@@ -374,7 +755,13 @@ class FusekiSwapManager:
             
             # Step 2: Upload to staging
             logging.info("📤 Uploading data to staging...")
-            if not self.upload_ttl_to_graph(ttl_content, self.staging_graph):
+            if isinstance(ttl_content, Path):
+                uploaded = self.upload_ttl_file_to_graph(ttl_content, self.staging_graph,
+                                                         batch_size=batch_size, workers=workers,
+                                                         compress=compress)
+            else:
+                uploaded = self.upload_ttl_to_graph(ttl_content, self.staging_graph)
+            if not uploaded:
                 deployment_result["steps"]["staging_upload"] = {"status": "FAILED", "error": "Upload failed"}
                 return deployment_result
             
@@ -454,20 +841,32 @@ class FusekiSwapManager:
             self.clear_staging()
             
             return deployment_result
+        finally:
+            self._count_cache = None
+            self.publish_graph_changes()
 
 def main():
     """CLI interface for Fuseki swap operations"""
     import argparse
     
     parser = argparse.ArgumentParser(description="HVDC Fuseki Staging & Deployment Manager")
-    parser.add_argument("--deploy", type=str, help="Deploy TTL file to production")
+    parser.add_argument("--deploy", type=str,
+                       help="Deploy RDF file to production (.ttl, .nt, .nt.gz, .ttl.gz, .trdf)")
     parser.add_argument("--target-graph", type=str, default="http://samsung.com/graph/EXTRACTED",
                        help="Target production graph URI")
     parser.add_argument("--validate-only", action="store_true", help="Only validate staging data")
+    parser.add_argument("--bundle", action="store_true",
+                       help="Run all validation checks as one aggregate query")
     parser.add_argument("--backup", action="store_true", help="Create backup of production data")
     parser.add_argument("--rollback", type=str, help="Rollback specified graph from backup")
     parser.add_argument("--clear-staging", action="store_true", help="Clear staging graph")
     parser.add_argument("--stats", action="store_true", help="Show graph statistics")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_TRIPLES,
+                       help="Triples per batch when deploying N-Triples (.nt) files")
+    parser.add_argument("--workers", type=int, default=1,
+                       help="Parallel batch uploads when deploying N-Triples (.nt) files")
+    parser.add_argument("--gzip", action="store_true",
+                       help="Send uncompressed files gzip-encoded (Content-Encoding: gzip)")
     
     args = parser.parse_args()
     
@@ -483,8 +882,9 @@ def main():
             print(f"❌ TTL file not found: {ttl_file}")
             return 1
         
-        ttl_content = ttl_file.read_text(encoding='utf-8')
-        result = manager.deploy_with_validation(ttl_content, args.target_graph)
+        result = manager.deploy_with_validation(ttl_file, args.target_graph,
+                                                batch_size=args.batch_size, workers=args.workers,
+                                                compress=args.gzip)
         
         print(f"📊 Deployment Result: {result['status']}")
         for step, details in result["steps"].items():
@@ -499,24 +899,29 @@ def main():
         return 0 if result["status"] == "SUCCESS" else 1
     
     elif args.validate_only:
-        validation = manager.validate_staging_data()
+        validation = manager.validate_staging_data(bundle=args.bundle)
         print(f"🔍 Validation Result: {validation['overall_status']}")
         for check, details in validation["checks"].items():
             status_emoji = "✅" if details["status"] == "PASS" else "⚠️" if details["status"] == "WARN" else "❌"
             print(f"  {status_emoji} {check}: {details['message']}")
+        for check, elapsed_ms in validation["timings_ms"].items():
+            print(f"  ⏱️  {check}: {elapsed_ms} ms")
         
         return 0 if validation["overall_status"] == "PASS" else 1
     
     elif args.backup:
         success = manager.create_backup()
+        manager.publish_graph_changes()
         return 0 if success else 1
     
     elif args.rollback:
         success = manager.rollback_from_backup(args.rollback)
+        manager.publish_graph_changes()
         return 0 if success else 1
     
     elif args.clear_staging:
         success = manager.clear_staging()
+        manager.publish_graph_changes()
         print("✅ Staging cleared" if success else "❌ Failed to clear staging")
         return 0 if success else 1
     
@@ -526,9 +931,10 @@ def main():
             manager.backup_graph
         ] + manager.production_graphs
         
+        counts = manager.get_graph_counts(graphs)
         print("📊 Graph Statistics:")
         for graph in graphs:
-            count = manager.get_triple_count(graph)
+            count = counts.get(graph, -1)
             graph_name = graph.split("/")[-1]
             print(f"  {graph_name}: {count:,} triples")
         
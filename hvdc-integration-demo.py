@@ -4,28 +4,58 @@ HVDC Integration Demo - hvdc_one_line() + Fuseki SPARQL 연동
 OFCO/DSV/PKGS/기성 → HVDC CODE 추출 → TTL 생성 → Fuseki 업로드
 """
 
+import gzip
+import io
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urljoin
 import pandas as pd
 from pathlib import Path
 import json
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set, Union
 from hvdc_one_line import hvdc_one_line, test_patterns, create_sample_excel
+from rdf_iri_index import IriIndex
+from sparql_cache import bump_graph_versions
+from rdf_stream import (FRAME_BATCH_ROWS, RDF_FORMATS, TurtleStreamWriter, decimal_literal, digest_column,
+                        escape_iri, format_for_path, iri_column, literal, literal_column, mapped_column, open_rdf,
+                        stream_writer)
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 
+PIPELINE_QUEUE_SIZE = 4  # 파이프라인 단계 사이 큐 크기 (항목 수) - 메모리 상한
+HTTP_POOL_SIZE = 8  # 공유 세션 커넥션 풀 크기 (동시 검증 쿼리, API 동시 요청)
+DEFAULT_GRAPH_IRI = "urn:x-arq:DefaultGraph"  # 기본 그래프 캐시 버전 키 (tdb_bulk_load 와 동일)
+
 class HVDCIntegrationEngine:
     """HVDC CODE 추출 → 온톨로지 생성 → Fuseki 연동"""
     
-    def __init__(self, fuseki_base_url: str = "http://localhost:3030"):
+    def __init__(self, fuseki_base_url: str = "http://localhost:3030", rdf_format: str = "turtle",
+                 iri_index: Optional[IriIndex] = None):
         self.fuseki_base_url = fuseki_base_url
         self.dataset = "hvdc"
         self.namespace = "http://samsung.com/project-logistics#"
         
+        # 추출 결과 파일/업로드 형식 (turtle, ntriples, ntriples-gzip ... - rdf_stream.RDF_FORMATS)
+        self.rdf_format = rdf_format
+        
+        # 이미 적재된 Case/DataSource 노드 인덱스 (None 이면 매번 전체 생성)
+        self.iri_index = iri_index
+        
         # Fuseki 엔드포인트들
         self.ping_url = f"{fuseki_base_url}/$/ping"
         self.sparql_url = f"{fuseki_base_url}/{self.dataset}/sparql"  
         self.update_url = f"{fuseki_base_url}/{self.dataset}/update"
         self.data_url = f"{fuseki_base_url}/{self.dataset}/data"
         
+        # 공유 HTTP 세션 - keep-alive 커넥션 풀을 쿼리/업로드가 같이 사용 (스레드 간 공유)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
     def check_fuseki_health(self) -> bool:
         """Fuseki 서버 상태 확인"""
         try:
@@ -42,114 +72,149 @@ class HVDCIntegrationEngine:
     
     def extract_hvdc_codes_from_sources(self, data_paths: Dict[str, str]) -> Dict[str, pd.DataFrame]:
         """다양한 소스에서 HVDC CODE 추출"""
-        results = {}
-        
-        for source_name, path_pattern in data_paths.items():
-            print(f"\n--- Processing {source_name} ---")
-            try:
-                df = hvdc_one_line(path_pattern)
-                if not df.empty:
-                    print(f"✅ Extracted {len(df)} HVDC codes from {source_name}")
-                    print(f"   Unique codes: {df['HVDC_CODE'].nunique()}")
-                    print(f"   Methods: {df['EXTRACT_METHOD'].unique()}")
-                    results[source_name] = df
-                else:
-                    print(f"⚠️  No HVDC codes found in {source_name}")
-                    results[source_name] = df
-            except Exception as e:
-                print(f"❌ Error processing {source_name}: {e}")
-                results[source_name] = pd.DataFrame()
-        
-        return results
+        return {source_name: self._extract_source(source_name, path_pattern)
+                for source_name, path_pattern in data_paths.items()}
     
-    def generate_case_triples(self, hvdc_codes: Set[str]) -> str:
-        """HVDC CODE들로부터 Case 트리플 생성"""
-        triples = []
-        
-        # 네임스페이스 선언
-        triples.append("@prefix ex: <http://samsung.com/project-logistics#> .")
-        triples.append("@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .")
-        triples.append("@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .")
-        triples.append("@prefix owl: <http://www.w3.org/2002/07/owl#> .")
-        triples.append("")
-        
-        # Case 클래스 정의 (기본 온톨로지)
-        triples.append("ex:Case a owl:Class ;")
-        triples.append('    rdfs:label "Project Case" .')
-        triples.append("")
-        triples.append("ex:caseNumber a owl:DatatypeProperty ;")
-        triples.append("    rdfs:domain ex:Case ;")
-        triples.append("    rdfs:range xsd:string .")
-        triples.append("")
-        
-        # 각 HVDC CODE에 대한 Case 인스턴스 생성
-        for code in sorted(hvdc_codes):
-            if code and code != 'nan':
-                # URI 안전 변환
-                safe_code = code.replace('-', '_').replace(' ', '_')
-                case_uri = f"<ex:Case/{safe_code}>"
-                
-                triples.append(f"{case_uri} a ex:Case ;")
-                triples.append(f'    ex:caseNumber "{code}" ;')
-                triples.append(f'    rdfs:label "Case {code}" ;')
-                triples.append(f'    ex:extractedDate "{datetime.now().isoformat()}"^^xsd:dateTime ;')
-                triples.append(f'    ex:status "EXTRACTED" .')
-                triples.append("")
-        
-        return "\n".join(triples)
+    def _extract_source(self, source_name: str, path_pattern: str) -> pd.DataFrame:
+        print(f"\n--- Processing {source_name} ---")
+        try:
+            df = hvdc_one_line(path_pattern)
+            if not df.empty:
+                print(f"✅ Extracted {len(df)} HVDC codes from {source_name}")
+                print(f"   Unique codes: {df['HVDC_CODE'].nunique()}")
+                print(f"   Methods: {df['EXTRACT_METHOD'].unique()}")
+            else:
+                print(f"⚠️  No HVDC codes found in {source_name}")
+            return df
+        except Exception as e:
+            print(f"❌ Error processing {source_name}: {e}")
+            return pd.DataFrame()
     
-    def generate_source_link_triples(self, extraction_results: Dict[str, pd.DataFrame]) -> str:
-        """소스별 데이터 링크 트리플 생성"""
-        triples = []
+    def write_case_triples(self, writer: TurtleStreamWriter, hvdc_codes: Set[str], schema: bool = True) -> None:
+        """HVDC CODE들로부터 Case 트리플을 writer 로 스트리밍"""
+        # Case 클래스 정의 (기본 온톨로지)
+        if schema:
+            writer.subject("ex:Case", [("a", "owl:Class"), ("rdfs:label", literal("Project Case"))])
+            writer.subject("ex:caseNumber", [("a", "owl:DatatypeProperty"), ("rdfs:domain", "ex:Case"),
+                                             ("rdfs:range", "xsd:string")])
         
+        # 각 HVDC CODE에 대한 Case 인스턴스 생성 (배치 단위 벡터화, 추출 시각은 배치당 1회)
+        codes = pd.Series(sorted(c for c in hvdc_codes if c and c != 'nan'), dtype=object)
+        for start in range(0, len(codes), FRAME_BATCH_ROWS):
+            batch = codes.iloc[start:start + FRAME_BATCH_ROWS]
+            uris = self._case_uris(batch)
+            if self.iri_index is not None:
+                new = self.iri_index.claim_new(uris)
+                batch, uris = batch[new], uris[new]
+            extracted = literal(datetime.now().isoformat(), "xsd:dateTime")
+            writer.write_blocks(uris, [
+                ("a", "ex:Case"),
+                ("ex:caseNumber", literal_column(batch)),
+                ("rdfs:label", literal_column("Case " + batch.astype(str))),
+                ("ex:extractedDate", extracted),
+                ("ex:status", '"EXTRACTED"')
+            ])
+    
+    def write_source_link_triples(self, writer: TurtleStreamWriter,
+                                  extraction_results: Dict[str, pd.DataFrame], schema: bool = True) -> None:
+        """소스별 데이터 링크 트리플을 writer 로 스트리밍 (컬럼 배치 단위 벡터화)"""
         # DataSource 클래스 정의
-        triples.append("ex:DataSource a owl:Class ;")
-        triples.append('    rdfs:label "Data Source" .')
-        triples.append("")
-        triples.append("ex:belongsToCase a owl:ObjectProperty ;")
-        triples.append("    rdfs:range ex:Case .")
-        triples.append("")
+        if schema:
+            writer.subject("ex:DataSource", [("a", "owl:Class"), ("rdfs:label", literal("Data Source"))])
+            writer.subject("ex:belongsToCase", [("a", "owl:ObjectProperty"), ("rdfs:range", "ex:Case")])
         
         for source_name, df in extraction_results.items():
             if df.empty:
                 continue
+            
+            codes = df['HVDC_CODE']
+            df = df[codes.notna() & (codes.astype(str) != '') & (codes.astype(str) != 'nan')]
+            for start in range(0, len(df), FRAME_BATCH_ROWS):
+                batch = df.iloc[start:start + FRAME_BATCH_ROWS]
+                uris, rows = self._source_uris(source_name, batch)
+                if self.iri_index is not None:
+                    new = self.iri_index.claim_new(uris)
+                    batch, uris, rows = batch[new], uris[new], rows[new]
                 
-            for idx, row in df.iterrows():
-                hvdc_code = row['HVDC_CODE']
-                if not hvdc_code or hvdc_code == 'nan':
-                    continue
-                    
-                # 소스 인스턴스 URI
-                safe_code = hvdc_code.replace('-', '_').replace(' ', '_')
-                source_uri = f"<ex:DataSource/{source_name}_{idx}>"
-                case_uri = f"<ex:Case/{safe_code}>"
+                def column(name: str, default: object = "") -> pd.Series:
+                    return batch[name] if name in batch else pd.Series(default, index=batch.index)
                 
-                triples.append(f"{source_uri} a ex:DataSource ;")
-                triples.append(f'    rdfs:label "{source_name} extraction {idx}" ;')
-                triples.append(f"    ex:belongsToCase {case_uri} ;")
-                # Windows 경로의 백슬래시를 슬래시로 변경 (TTL 호환)
-                source_file = str(row.get("SOURCE_FILE", "")).replace("\\", "/")
-                triples.append(f'    ex:sourceFile "{source_file}" ;')
-                triples.append(f'    ex:extractMethod "{row.get("EXTRACT_METHOD", "")}" ;')
-                triples.append(f'    ex:confidence "{row.get("CONF", 0.0)}"^^xsd:decimal ;')
-                triples.append(f'    ex:logicalSource "{row.get("LOGICAL_SOURCE", "")}" .')
-                triples.append("")
-        
-        return "\n".join(triples)
+                # Windows 경로의 백슬래시를 슬래시로 변경
+                source_file = column("SOURCE_FILE").astype(str).str.replace("\\", "/", regex=False)
+                writer.write_blocks(uris, [
+                    ("a", "ex:DataSource"),
+                    ("rdfs:label", literal_column(f"{source_name} extraction " + rows)),
+                    ("ex:belongsToCase", self._case_uris(batch['HVDC_CODE'])),
+                    ("ex:sourceFile", literal_column(source_file)),
+                    ("ex:extractMethod", mapped_column(column("EXTRACT_METHOD"), literal)),
+                    ("ex:confidence", mapped_column(column("CONF", 0.0), decimal_literal)),
+                    ("ex:logicalSource", mapped_column(column("LOGICAL_SOURCE"), literal))
+                ])
+    
+    def write_rdf(self, path: Union[str, Path], hvdc_codes: Set[str],
+                  extraction_results: Dict[str, pd.DataFrame], rdf_format: Optional[str] = None) -> int:
+        """Case + 소스 링크 트리플을 RDF 파일로 스트리밍 기록 (형식 미지정 시 확장자) - 트리플 수 반환"""
+        with open_rdf(path, rdf_format) as writer:
+            self.write_case_triples(writer, hvdc_codes)
+            self.write_source_link_triples(writer, extraction_results)
+        return writer.triples
+    
+    def write_ttl(self, path: Union[str, Path], hvdc_codes: Set[str],
+                  extraction_results: Dict[str, pd.DataFrame]) -> int:
+        """Case + 소스 링크 트리플을 TTL 파일로 스트리밍 기록 - 기록한 트리플 수 반환"""
+        return self.write_rdf(path, hvdc_codes, extraction_results, "turtle")
+    
+    def generate_case_triples(self, hvdc_codes: Set[str]) -> str:
+        """HVDC CODE들로부터 Case 트리플 생성 (문자열 - 소량 데이터용)"""
+        buf = io.BytesIO()
+        with TurtleStreamWriter(buf) as writer:
+            self.write_case_triples(writer, hvdc_codes)
+        return buf.getvalue().decode("utf-8")
+    
+    def generate_source_link_triples(self, extraction_results: Dict[str, pd.DataFrame]) -> str:
+        """소스별 데이터 링크 트리플 생성 (문자열 - 소량 데이터용)"""
+        buf = io.BytesIO()
+        with TurtleStreamWriter(buf) as writer:
+            self.write_source_link_triples(writer, extraction_results)
+        return buf.getvalue().decode("utf-8")
+    
+    @staticmethod
+    def _case_uris(codes: pd.Series) -> pd.Series:
+        # URI 안전 변환 (코드는 반복이 많으므로 고유값만 변환)
+        return mapped_column(codes, lambda code: f"<ex:Case/{escape_iri(code.replace('-', '_').replace(' ', '_'))}>")
+    
+    @staticmethod
+    def _source_uris(source_name: str, batch: pd.DataFrame):
+        """
+        결정적 DataSource IRI - (LOGICAL_SOURCE, SOURCE_FILE, SHEET_NAME, ROW_INDEX, HVDC_CODE) 해시
+        같은 파일을 다시 수집하면 같은 IRI (DataFrame 인덱스와 무관), ROW_INDEX 컬럼이 없으면 인덱스 사용
+        Returns: (IRI Series, 행 표시 Series - 라벨용)
+        """
+        def text(name: str) -> pd.Series:
+            if name not in batch:
+                return pd.Series("", index=batch.index)
+            return batch[name].astype(str).where(batch[name].notna(), "")
+        
+        if "ROW_INDEX" in batch:
+            rows = pd.to_numeric(batch["ROW_INDEX"], errors="coerce").astype("Int64").astype(str)
+            rows = rows.where(batch["ROW_INDEX"].notna(), "")
+        else:
+            rows = pd.Series(batch.index.astype(str), index=batch.index)
+        logical = text("LOGICAL_SOURCE").where(text("LOGICAL_SOURCE") != "", source_name)
+        source_file = text("SOURCE_FILE").str.replace("\\", "/", regex=False)
+        key = source_file + "\x1f" + text("SHEET_NAME") + "\x1f" + rows + "\x1f" + batch["HVDC_CODE"].astype(str)
+        return "<ex:DataSource/" + iri_column(logical) + "_" + digest_column(key) + ">", rows
     
     def upload_ttl_to_fuseki(self, ttl_content: str, graph_name: str = "default") -> bool:
         """TTL 데이터를 Fuseki에 업로드"""
         try:
-            if graph_name == "default":
-                url = f"{self.data_url}?default"
-            else:
-                url = f"{self.data_url}?graph={graph_name}"
-            
+            url = self._graph_url(graph_name)
             headers = {"Content-Type": "text/turtle; charset=utf-8"}
             response = requests.post(url, data=ttl_content.encode('utf-8'), headers=headers)
             
             if response.status_code in [200, 201, 204]:
                 print(f"✅ TTL uploaded successfully to {graph_name}")
+                self._bump_graph(graph_name)
                 return True
             else:
                 print(f"❌ TTL upload failed: {response.status_code} - {response.text}")
@@ -159,13 +224,67 @@ class HVDCIntegrationEngine:
             print(f"❌ TTL upload error: {e}")
             return False
     
-    def query_fuseki(self, sparql_query: str) -> Dict:
-        """Fuseki에서 SPARQL 쿼리 실행"""
+    def upload_rdf_file_to_fuseki(self, rdf_path: Union[str, Path], graph_name: str = "default") -> bool:
+        """
+        RDF 파일을 메모리에 올리지 않고 Fuseki에 스트리밍 업로드
+        Content-Type 은 확장자로 결정, gzip 파일은 압축된 그대로 Content-Encoding: gzip 으로 전송
+        """
+        try:
+            url = self._graph_url(graph_name)
+            headers = self._upload_headers(format_for_path(rdf_path))
+            with open(rdf_path, "rb") as f:
+                response = self.session.post(url, data=f, headers=headers)
+            
+            if response.status_code in [200, 201, 204]:
+                print(f"✅ RDF uploaded successfully to {graph_name}")
+                self._bump_graph(graph_name)
+                return True
+            else:
+                print(f"❌ RDF upload failed: {response.status_code} - {response.text}")
+                return False
+                
+        except Exception as e:
+            print(f"❌ RDF upload error: {e}")
+            return False
+    
+    def graph_iri(self, graph_name: str) -> str:
+        """
+        그래프 이름 -> Fuseki 가 저장하는 named graph IRI (IRI 는 그대로)
+        상대 이름("extracted")은 Fuseki 가 GSP 요청 URL 기준으로 해석 - 검증 쿼리도 같은 IRI 로 범위 지정.
+        운영 그래프(FusekiSwapManager 의 http://samsung.com/graph/*)에는 직접 쓰지 않음 - 운영 반영은 deploy_with_validation
+        """
+        return graph_name if "://" in graph_name else urljoin(self.data_url, graph_name)
+    
+    def _bump_graph(self, graph_name: str) -> None:
+        """업로드된 그래프의 버전 증가 - 해당 그래프의 캐시된 SPARQL 결과 무효화"""
+        bump_graph_versions([DEFAULT_GRAPH_IRI if graph_name == "default" else self.graph_iri(graph_name)])
+    
+    def _graph_url(self, graph_name: str) -> str:
+        if graph_name == "default":
+            return f"{self.data_url}?default"
+        if "://" not in graph_name:
+            return f"{self.data_url}?graph={graph_name}"
+        return f"{self.data_url}?graph={quote(graph_name, safe='')}"
+    
+    @staticmethod
+    def _upload_headers(rdf_format: str) -> Dict[str, str]:
+        spec = RDF_FORMATS[rdf_format]
+        headers = {"Content-Type": spec.content_type}
+        if spec.gzip:
+            headers["Content-Encoding"] = "gzip"
+        return headers
+    
+    def query_fuseki(self, sparql_query: str, timeout: Optional[float] = None) -> Dict:
+        """Fuseki에서 SPARQL 쿼리 실행 (timeout: Fuseki 서버측 타임아웃 초, 클라이언트 대기는 +5초)"""
         try:
             headers = {"Accept": "application/sparql-results+json"}
             data = {"query": sparql_query}
+            limits = {}
+            if timeout:
+                data["timeout"] = f"{timeout:g}"
+                limits["timeout"] = timeout + 5
             
-            response = requests.post(self.sparql_url, data=data, headers=headers)
+            response = self.session.post(self.sparql_url, data=data, headers=headers, **limits)
             
             if response.status_code == 200:
                 return response.json()
@@ -177,44 +296,78 @@ class HVDCIntegrationEngine:
             print(f"❌ SPARQL query error: {e}")
             return {}
     
-    def validate_integration(self) -> Dict:
-        """통합 결과 검증"""
-        validation_queries = {
-            "total_triples": "SELECT (COUNT(*) AS ?count) WHERE { ?s ?p ?o }",
-            "case_count": """
-                PREFIX ex: <http://samsung.com/project-logistics#>
-                SELECT (COUNT(?case) AS ?count) WHERE { ?case a ex:Case }
-            """,
-            "data_source_count": """
-                PREFIX ex: <http://samsung.com/project-logistics#>
-                SELECT (COUNT(?ds) AS ?count) WHERE { ?ds a ex:DataSource }
-            """,
-            "hvdc_codes": """
-                PREFIX ex: <http://samsung.com/project-logistics#>
-                SELECT DISTINCT ?code WHERE { 
-                    ?case a ex:Case ; ex:caseNumber ?code 
-                }
-                ORDER BY ?code
-            """
-        }
+    def validate_integration(self, graph_name: str = "extracted", stats_only: bool = False) -> Dict:
+        """
+        통합 결과 검증 - 대상 그래프 범위의 집계 쿼리 1개 + HVDC CODE 목록을 공유 세션으로 동시 실행
+        stats_only=True 면 카운트 쿼리 없이 Fuseki 데이터셋 통계(/$/stats)만 조회
+        """
+        if stats_only:
+            return self.dataset_stats()
         
-        results = {}
-        for name, query in validation_queries.items():
-            result = self.query_fuseki(query)
-            if result and 'results' in result:
-                if name == "hvdc_codes":
-                    codes = [binding['code']['value'] for binding in result['results']['bindings']]
-                    results[name] = codes
-                else:
-                    count = result['results']['bindings'][0]['count']['value'] if result['results']['bindings'] else 0
-                    results[name] = int(count)
-            else:
-                results[name] = None
+        graph = None if graph_name == "default" else self.graph_iri(graph_name)
+        
+        def scoped(pattern: str) -> str:
+            return f"GRAPH <{graph}> {{ {pattern} }}" if graph else pattern
         
+        # 세 카운트를 한 쿼리로 - 각 sub-select 는 자기 인덱스(SPO / POS)만 사용
+        counts_query = f"""
+            PREFIX ex: <{self.namespace}>
+            SELECT ?total_triples ?case_count ?data_source_count WHERE {{
+                {{ SELECT (COUNT(*) AS ?total_triples) WHERE {{ {scoped("?s ?p ?o")} }} }}
+                {{ SELECT (COUNT(?case) AS ?case_count) WHERE {{ {scoped("?case a ex:Case")} }} }}
+                {{ SELECT (COUNT(?ds) AS ?data_source_count) WHERE {{ {scoped("?ds a ex:DataSource")} }} }}
+            }}
+        """
+        codes_query = f"""
+            PREFIX ex: <{self.namespace}>
+            SELECT DISTINCT ?code WHERE {{ {scoped("?case a ex:Case ; ex:caseNumber ?code")} }}
+            ORDER BY ?code
+        """
+        
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            counts_future = pool.submit(self.query_fuseki, counts_query)
+            codes_future = pool.submit(self.query_fuseki, codes_query)
+            counts, codes = counts_future.result(), codes_future.result()
+        
+        results = {"graph": graph or "default"}
+        rows = counts.get("results", {}).get("bindings", []) if counts else []
+        for name in ("total_triples", "case_count", "data_source_count"):
+            value = rows[0].get(name, {}).get("value") if rows else None
+            results[name] = int(float(value)) if value is not None else None
+        if codes and "results" in codes:
+            results["hvdc_codes"] = [binding["code"]["value"] for binding in codes["results"]["bindings"]]
+        else:
+            results["hvdc_codes"] = None
+        results["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
         return results
     
-    def run_full_integration(self, data_paths: Dict[str, str]) -> Dict:
-        """전체 통합 프로세스 실행"""
+    def dataset_stats(self) -> Dict:
+        """
+        Fuseki 데이터셋 통계 (/$/stats/{dataset}) - 쿼리 실행 없이 서버 카운터만 조회
+        요청/성공/실패 수와 엔드포인트별 요청 수 (Fuseki 통계에는 트리플 수가 없음)
+        """
+        try:
+            response = self.session.get(f"{self.fuseki_base_url}/$/stats/{self.dataset}", timeout=5)
+            response.raise_for_status()
+            stats = response.json().get("datasets", {}).get(f"/{self.dataset}", {})
+        except (requests.RequestException, ValueError) as e:
+            print(f"❌ Fuseki stats error: {e}")
+            return {"mode": "stats", "error": str(e)}
+        
+        return {
+            "mode": "stats",
+            "requests": stats.get("Requests"),
+            "requests_good": stats.get("RequestsGood"),
+            "requests_bad": stats.get("RequestsBad"),
+            "endpoints": {name: endpoint.get("Requests")
+                          for name, endpoint in stats.get("endpoints", {}).items()}
+        }
+    
+    def run_full_integration(self, data_paths: Dict[str, str], pipelined: bool = False) -> Dict:
+        """전체 통합 프로세스 실행 (pipelined=True 면 단계별 스레드 파이프라인)"""
+        if pipelined:
+            return self.run_pipelined_integration(data_paths)
         print("=== HVDC Integration Process ===")
         
         # 1. Fuseki 상태 확인
@@ -235,25 +388,29 @@ class HVDCIntegrationEngine:
         print(f"\n✅ Total unique HVDC codes found: {len(all_hvdc_codes)}")
         print(f"   Codes: {sorted(list(all_hvdc_codes))}")
         
-        # 4. Case 트리플 생성
-        print("\n=== Step 2: Generate Case Triples ===")
-        case_ttl = self.generate_case_triples(all_hvdc_codes)
-        
-        # 5. 소스 링크 트리플 생성  
-        print("\n=== Step 3: Generate Source Link Triples ===")
-        link_ttl = self.generate_source_link_triples(extraction_results)
-        
-        # 6. TTL 파일 저장
-        full_ttl = case_ttl + "\n\n" + link_ttl
-        ttl_filename = f"hvdc_extracted_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ttl"
+        # 4-6. Case + 소스 링크 트리플을 TTL 파일로 스트리밍 기록
+        print("\n=== Step 2-3: Generate Case & Source Link Triples ===")
+        suffix = RDF_FORMATS[self.rdf_format].suffix
+        claimed, skipped = (self.iri_index.claimed, self.iri_index.skipped) if self.iri_index else (0, 0)
+        ttl_filename = f"hvdc_extracted_{datetime.now().strftime('%Y%m%d_%H%M%S')}{suffix}"
+        triple_count = self.write_rdf(ttl_filename, all_hvdc_codes, extraction_results, self.rdf_format)
+        print(f"✅ RDF saved: {ttl_filename} ({self.rdf_format}, {triple_count} triples)")
         
-        with open(ttl_filename, 'w', encoding='utf-8') as f:
-            f.write(full_ttl)
-        print(f"✅ TTL saved: {ttl_filename}")
-        
-        # 7. Fuseki 업로드
+        # 7. Fuseki 업로드 (파일 스트리밍)
         print("\n=== Step 4: Upload to Fuseki ===")
-        upload_success = self.upload_ttl_to_fuseki(full_ttl, "extracted")
+        upload_success = self.upload_rdf_file_to_fuseki(ttl_filename, "extracted")
+        
+        # 업로드된 노드만 인덱스에 반영 (실패 시 다음 실행에서 다시 생성)
+        index_stats = None
+        if self.iri_index is not None:
+            if upload_success:
+                self.iri_index.commit()
+            else:
+                self.iri_index.rollback()
+            index_stats = {"new_nodes": self.iri_index.claimed - claimed,
+                           "skipped_nodes": self.iri_index.skipped - skipped}
+            print(f"✅ IRI index: {index_stats['new_nodes']} new nodes, "
+                  f"{index_stats['skipped_nodes']} already loaded")
         
         # 8. 검증
         print("\n=== Step 5: Validate Integration ===")
@@ -263,7 +420,167 @@ class HVDCIntegrationEngine:
             "extraction_results": extraction_results,
             "hvdc_codes": list(all_hvdc_codes),
             "ttl_filename": ttl_filename,
+            "triple_count": triple_count,
+            "upload_success": upload_success,
+            "iri_index": index_stats,
+            "validation": validation_results
+        }
+
+    def run_pipelined_integration(self, data_paths: Dict[str, str], graph_name: str = "extracted",
+                                  queue_size: int = PIPELINE_QUEUE_SIZE) -> Dict:
+        """
+        파이프라인 통합 실행 - 추출 / 트리플 생성 / 업로드 단계를 스레드로 분리, 제한 큐로 연결
+        소스별 추출 결과를 FRAME_BATCH_ROWS 배치마다 직렬화해 바로 POST (그래프에 누적)
+        전체 시간 ≈ 가장 느린 단계, 단계별 처리량 출력. 생성한 배치는 RDF 파일에도 이어서 기록
+        """
+        print("=== HVDC Integration Process (pipelined) ===")
+        if not self.check_fuseki_health():
+            return {"error": "Fuseki server not available"}
+        
+        spec = RDF_FORMATS[self.rdf_format]
+        payload_format = self.rdf_format[:-len("-gzip")] if spec.gzip else self.rdf_format
+        url = self._graph_url(graph_name)
+        headers = self._upload_headers(self.rdf_format)
+        rdf_filename = f"hvdc_extracted_{datetime.now().strftime('%Y%m%d_%H%M%S')}{spec.suffix}"
+        claimed, skipped = (self.iri_index.claimed, self.iri_index.skipped) if self.iri_index else (0, 0)
+        
+        frames: queue.Queue = queue.Queue(maxsize=queue_size)
+        payloads: queue.Queue = queue.Queue(maxsize=queue_size)
+        stop = threading.Event()  # 한 단계라도 실패하면 나머지는 큐만 비우고 종료
+        errors: List[str] = []
+        extraction_results: Dict[str, pd.DataFrame] = {}
+        stages = {name: {"items": 0, "rows": 0, "triples": 0, "bytes": 0, "busy_s": 0.0}
+                  for name in ("extract", "serialize", "upload")}
+        
+        def record(stage: str, started: float, rows: int = 0, triples: int = 0, size: int = 0) -> None:
+            stats = stages[stage]
+            stats["items"] += 1
+            stats["rows"] += rows
+            stats["triples"] += triples
+            stats["bytes"] += size
+            stats["busy_s"] += time.perf_counter() - started
+        
+        def extract() -> None:
+            try:
+                for source_name, path_pattern in data_paths.items():
+                    if stop.is_set():
+                        break
+                    started = time.perf_counter()
+                    df = self._extract_source(source_name, path_pattern)
+                    record("extract", started, rows=len(df))
+                    extraction_results[source_name] = df
+                    frames.put((source_name, df))
+            except Exception as e:
+                errors.append(f"extract: {e}")
+                stop.set()
+            finally:
+                frames.put(None)
+        
+        def serialize() -> None:
+            emitted_codes: Set[str] = set()
+            schema = True
+            item = ()
+            try:
+                with open(rdf_filename, "wb") as rdf_file:
+                    while (item := frames.get()) is not None:
+                        source_name, df = item
+                        if stop.is_set() or df.empty:
+                            continue
+                        for start in range(0, len(df), FRAME_BATCH_ROWS):
+                            if stop.is_set():
+                                break
+                            started = time.perf_counter()
+                            batch = df.iloc[start:start + FRAME_BATCH_ROWS]
+                            codes = set(batch['HVDC_CODE'].dropna().astype(str)) - emitted_codes
+                            emitted_codes |= codes
+                            buf = io.BytesIO()
+                            with stream_writer(buf, payload_format) as writer:
+                                self.write_case_triples(writer, codes, schema)
+                                self.write_source_link_triples(writer, {source_name: batch}, schema)
+                            schema = False
+                            # gzip 형식은 배치마다 gzip 멤버 - 파일은 멀티 멤버 gzip 으로 그대로 유효
+                            payload = gzip.compress(buf.getvalue(), 6) if spec.gzip else buf.getvalue()
+                            rdf_file.write(payload)
+                            record("serialize", started, rows=len(batch), triples=writer.triples, size=len(payload))
+                            if writer.triples:
+                                payloads.put((payload, writer.triples))
+            except Exception as e:
+                errors.append(f"serialize: {e}")
+                stop.set()
+            finally:
+                # 실패로 중단해도 추출 단계의 put 이 막히지 않도록 종료 표시까지 큐를 비움
+                while item is not None:
+                    item = frames.get()
+                payloads.put(None)
+        
+        print(f"\n=== Pipeline: extract → {payload_format} → upload ({graph_name}) ===")
+        wall_start = time.perf_counter()
+        workers = [threading.Thread(target=extract, name="hvdc-extract", daemon=True),
+                   threading.Thread(target=serialize, name="hvdc-serialize", daemon=True)]
+        for worker in workers:
+            worker.start()
+        
+        # 업로드 단계는 호출 스레드에서 (공유 keep-alive 세션)
+        while (item := payloads.get()) is not None:
+            if stop.is_set():
+                continue
+            payload, triples = item
+            started = time.perf_counter()
+            try:
+                response = self.session.post(url, data=payload, headers=headers)
+                if response.status_code not in [200, 201, 204]:
+                    errors.append(f"upload: {response.status_code} - {response.text[:200]}")
+            except requests.RequestException as e:
+                errors.append(f"upload: {e}")
+            if errors:
+                stop.set()
+                continue
+            record("upload", started, triples=triples, size=len(payload))
+        for worker in workers:
+            worker.join()
+        wall_s = time.perf_counter() - wall_start
+        upload_success = not errors
+        if stages["upload"]["items"]:
+            # 일부 배치만 올라간 경우에도 그래프 내용은 바뀌었으므로 캐시 무효화
+            self._bump_graph(graph_name)
+        
+        print("\n=== Pipeline Throughput ===")
+        for name, stats in stages.items():
+            busy = stats["busy_s"]
+            unit, count = ("triples", stats["triples"]) if name == "upload" else ("rows", stats["rows"])
+            stats[f"{unit}_per_s"] = round(count / busy, 1) if busy else 0.0
+            print(f"   {name:<9} {stats['items']:>4} items  {stats['rows']:>10,} rows  {stats['triples']:>10,} triples  "
+                  f"{stats['bytes'] / 1e6:8.1f} MB  busy {busy:6.2f}s  ({stats[f'{unit}_per_s']:,.0f} {unit}/s)")
+        print(f"   wall {wall_s:.2f}s (sequential sum {sum(s['busy_s'] for s in stages.values()):.2f}s)")
+        for error in errors:
+            print(f"❌ {error}")
+        
+        # 업로드가 끝까지 성공한 경우에만 인덱스 반영 (실패 시 다음 실행에서 전체 재생성 - POST 누적은 멱등)
+        index_stats = None
+        if self.iri_index is not None:
+            if upload_success:
+                self.iri_index.commit()
+            else:
+                self.iri_index.rollback()
+            index_stats = {"new_nodes": self.iri_index.claimed - claimed,
+                           "skipped_nodes": self.iri_index.skipped - skipped}
+        
+        all_hvdc_codes = set()
+        for df in extraction_results.values():
+            if not df.empty:
+                all_hvdc_codes.update(df['HVDC_CODE'].dropna().unique())
+        
+        print("\n=== Validate Integration ===")
+        validation_results = self.validate_integration(graph_name)
+        
+        return {
+            "extraction_results": extraction_results,
+            "hvdc_codes": list(all_hvdc_codes),
+            "ttl_filename": rdf_filename,
+            "triple_count": stages["serialize"]["triples"],
             "upload_success": upload_success,
+            "iri_index": index_stats,
+            "pipeline": {"stages": stages, "wall_s": round(wall_s, 3), "errors": errors},
             "validation": validation_results
         }
 
@@ -273,8 +590,8 @@ def demo_integration():
     print("=== Creating Sample Data ===")
     create_sample_excel()
     
-    # 통합 엔진 초기화
-    engine = HVDCIntegrationEngine()
+    # 통합 엔진 초기화 (재실행 시 이미 업로드된 노드는 건너뜀)
+    engine = HVDCIntegrationEngine(iri_index=IriIndex(scope="hvdc/extracted"))
     
     # 데이터 소스 경로 설정
     data_paths = {
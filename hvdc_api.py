@@ -1,5 +1,5 @@
 # hvdc_api.py
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from hvdc_one_line import hvdc_one_line  # 기존 패치된 함수 사용
 # 자동 HVDCIntegrationEngine import (프로젝트 구조 적응형)
 HVDCIntegrationEngine = None
@@ -32,13 +32,21 @@ except ImportError:
 
 from hvdc_rules import run_all_rules
 from audit_logger import write_audit
-from audit_ndjson_and_hash import append_event, write_hash_meta
+from audit_ndjson_and_hash import append_event
 from fuseki_swap_verify import FusekiSwapManager
+from sparql_cache import GraphVersions, cached_query, default_cache
+from sparql_guard import ClientLimiter, QueryRejected, TooManyQueries, client_key, guard_query, timeout_for
+from sparql_stream import DEFAULT_PAGE_SIZE, fetch_page, ndjson_lines, stream_select
+from rdf_stream import literal
 import pandas as pd
+import requests
 import os
 import json
 import logging
+import threading
+import time
 from datetime import datetime, timezone
+from typing import Optional
 
 logging.basicConfig(level=logging.INFO)
 
@@ -61,6 +69,118 @@ STD_RATE_TABLE = {
 HS_PREFIXES = ["85","73","84"]
 REQUIRED_CERTS = ["MOIAT","FANR"]
 
+# SPARQL 조회 보호 - 클라이언트별 동시 쿼리 제한, NDJSON 내보내기 서버측 타임아웃 (초)
+sparql_limiter = ClientLimiter()
+EXPORT_TIMEOUT = float(os.environ.get("SPARQL_EXPORT_TIMEOUT", "300"))
+
+# /fuseki/stats 캐시 TTL (초) - 대시보드 폴링이 매번 COUNT(*)를 돌리지 않도록
+FUSEKI_STATS_TTL = float(os.environ.get("HVDC_FUSEKI_STATS_TTL", "60"))
+
+class FusekiUnavailable(Exception):
+    """Fuseki ping 실패 (503으로 응답)"""
+
+class StatsCache:
+    """
+    TTL + stale-while-revalidate 캐시 (신선도 = TTL + 공유 그래프 버전 etag)
+    - 값마다 로드 시작 시점의 sparql_cache.GraphVersions etag 를 기록 - 배포/스왑/적재가
+      어느 프로세스에서 버전을 올려도 모든 워커가 다음 요청에서 stale 로 판단
+    - 로드는 프로세스당 한 번에 하나: 콜드 스타트 동시 요청은 진행 중인 로드를 기다리고,
+      이후에는 만료되어도 기존 값을 즉시 반환하며 백그라운드 스레드 하나가 갱신
+    """
+    def __init__(self, loader, ttl: float, versions: Optional[GraphVersions] = None):
+        self.loader = loader
+        self.ttl = ttl
+        self.versions = versions or default_cache().versions
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._value = None
+        self._etag = None
+        self._loaded_at = 0.0
+        self._stale = False
+        self._refreshing = False
+
+    def get(self):
+        etag = self.versions.etag(None)
+        with self._lock:
+            value = self._value
+            age = time.monotonic() - self._loaded_at
+            expired = self._stale or self._etag != etag or age > self.ttl
+            if value is not None and expired and not self._refreshing:
+                self._refreshing = True
+                threading.Thread(target=self._refresh, daemon=True).start()
+        if value is None:
+            # 콜드 스타트: 돌려줄 값이 없으므로 동기 계산 (동시 요청은 한 번의 로드를 공유)
+            return self._load(cold=True), {"age_seconds": 0.0, "stale": False}
+        return value, {"age_seconds": round(age, 1), "stale": expired}
+
+    def invalidate(self):
+        """
+        배포/스왑 완료 후 호출 - 이 워커는 바로 백그라운드 갱신 시작
+        (다른 워커는 배포가 올린 그래프 버전 etag 로 만료를 감지)
+        """
+        with self._lock:
+            self._stale = True
+            start = self._value is not None and not self._refreshing
+            if start:
+                self._refreshing = True
+        if start:
+            threading.Thread(target=self._refresh, daemon=True).start()
+
+    def _load(self, cold: bool = False):
+        with self._load_lock:
+            if cold:
+                with self._lock:
+                    if self._value is not None:
+                        return self._value  # 먼저 끝난 콜드 로드 결과 공유
+            # 로드 중에 버전이 올라가면 기록된 etag 가 달라 다음 요청에서 다시 갱신
+            etag = self.versions.etag(None)
+            value = self.loader()
+            with self._lock:
+                self._value = value
+                self._etag = etag
+                self._loaded_at = time.monotonic()
+                self._stale = False
+            return value
+
+    def _refresh(self):
+        try:
+            self._load()
+        except Exception as e:
+            logging.warning("Fuseki stats refresh failed, serving stale value: %s", e)
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+def _collect_fuseki_stats():
+    fuseki_manager = FusekiSwapManager()
+    
+    if not fuseki_manager.check_fuseki_health():
+        raise FusekiUnavailable("Fuseki server not available")
+    
+    graphs = {
+        "staging": fuseki_manager.staging_graph,
+        "backup": fuseki_manager.backup_graph,
+        **{f"production_{i}": graph for i, graph in enumerate(fuseki_manager.production_graphs)}
+    }
+    
+    counts = fuseki_manager.get_graph_counts(list(graphs.values()))
+    stats = {}
+    for name, graph_uri in graphs.items():
+        count = counts.get(graph_uri, -1)
+        stats[name] = {
+            "graph_uri": graph_uri,
+            "triple_count": count,
+            "status": "OK" if count >= 0 else "ERROR"
+        }
+    
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "graphs": stats,
+        "total_triples": sum(s["triple_count"] for s in stats.values() if s["triple_count"] > 0)
+    }
+
+fuseki_stats_cache = StatsCache(_collect_fuseki_stats, FUSEKI_STATS_TTL)
+
 @app.route("/health")
 def health():
     ok = True
@@ -122,8 +242,7 @@ def ingest():
     # Append to NDJSON audit log
     append_success = append_event(ndjson_event)
     if append_success:
-        # Update hash metadata for integrity
-        write_hash_meta()
+        # Hash chain/meta are maintained by the audit writer on commit
         logging.info("✅ NDJSON audit event recorded with hash integrity")
 
     # Enhanced Fuseki staging deployment with validation
@@ -138,6 +257,7 @@ def ingest():
             
             logging.info("🚀 Starting safe Fuseki deployment...")
             deployment_result = fuseki_manager.deploy_with_validation(ttl_content, target_graph)
+            fuseki_stats_cache.invalidate()
             
             # Enhanced audit logging for deployment
             deployment_event = {
@@ -155,8 +275,7 @@ def ingest():
                 "risk_level": "HIGH"
             }
             
-            append_event(deployment_event)
-            write_hash_meta()
+            append_event(deployment_event, wait=True)
             
             # Traditional audit log
             write_audit("ingest_upload", actor, {
@@ -183,8 +302,7 @@ def ingest():
             "tags": ["fuseki", "deployment", "error"],
             "risk_level": "CRITICAL"
         }
-        append_event(failure_event)
-        write_hash_meta()
+        append_event(failure_event, wait=True)
 
     # Return small summary + link to trace log path
     return jsonify({"rows": len(df), "trace_log": trace_log})
@@ -193,7 +311,40 @@ def ingest():
 def evidence(case_id):
     """
     Return extraction traces for a logical source (case_id), plus optional SPARQL triple summary
+    ?page_size=N&cursor=... pages the triples, ?format=ndjson streams all triples (no traces)
     """
+    # DataSource 노드를 ex:logicalSource 로 찾은 뒤 그 주어의 트리플만 조회
+    # (전체 트리플을 CONTAINS(STR(?s)) 로 훑던 방식은 sparql_guard 비용 한도 초과)
+    sparql = f"""
+            PREFIX ex: <http://samsung.com/project-logistics#>
+            SELECT ?s ?p ?o WHERE {{ GRAPH ?g {{ ?s ex:logicalSource {literal(case_id)} . ?s ?p ?o }} }}
+            """
+    client = client_key(request.remote_addr, request.headers.get("X-Client-Id"))
+    if request.args.get("format") == "ndjson":
+        if not (engine and hasattr(engine, 'sparql_url')):
+            return jsonify({"error":"SPARQL engine not available"}), 500
+        try:
+            query, cost = guard_query(sparql)
+            sparql_limiter.acquire(client)
+        except QueryRejected as e:
+            return jsonify({"error": str(e)}), 422
+        except TooManyQueries as e:
+            return jsonify({"error": str(e)}), 429
+        # 슬롯은 응답 종료 시 반환 - Response 생성 전 어떤 예외든 여기서 반환
+        try:
+            timeout = timeout_for(cost, EXPORT_TIMEOUT)
+            stream = stream_select(engine.sparql_url, query, session=getattr(engine, 'session', None),
+                                   timeout=timeout + 5, server_timeout=timeout)
+            response = Response(stream_with_context(ndjson_lines(stream)), mimetype="application/x-ndjson")
+            response.call_on_close(lambda: sparql_limiter.release(client))
+        except requests.RequestException as e:
+            sparql_limiter.release(client)
+            return jsonify({"error": str(e)}), 502
+        except BaseException:
+            sparql_limiter.release(client)
+            raise
+        return response
+
     # Read latest extraction traces (simple CSV scan)
     traces = []
     if os.path.isdir("artifacts"):
@@ -206,10 +357,24 @@ def evidence(case_id):
     triples = None
     if engine and hasattr(engine, 'query_fuseki'):
         try:
-            sparql = f"""
-            SELECT ?s ?p ?o WHERE {{ GRAPH ?g {{ ?s ?p ?o . FILTER(CONTAINS(STR(?s), \"{case_id}\")) }} }} LIMIT 500
-            """
-            triples = engine.query_fuseki(sparql)
+            cursor = request.args.get("cursor")
+            paged = bool(cursor or request.args.get("page_size"))
+            # LIMIT/OFFSET 페이지는 고정 순서가 있어야 페이지 사이에 중복/누락이 없음
+            query, cost = guard_query(f"{sparql.rstrip()}\n            ORDER BY ?s ?p ?o" if paged else sparql, 500)
+            timeout = timeout_for(cost)
+            execute = lambda q: engine.query_fuseki(q, timeout=timeout)  # noqa: E731
+            with sparql_limiter.slot(client):
+                if paged:
+                    page_size = max(1, min(int(request.args.get("page_size") or DEFAULT_PAGE_SIZE), 500))
+                    triples = fetch_page(query, lambda q: cached_query(q, execute), cursor, page_size)
+                else:
+                    triples = cached_query(query, execute)
+        except TooManyQueries as e:
+            return jsonify({"error": str(e)}), 429
+        except QueryRejected as e:
+            triples = {"error": str(e)}
+        except ValueError as e:
+            return jsonify({"error": f"invalid pagination request: {e}"}), 400
         except Exception as e:
             triples = {"error": str(e)}
 
@@ -279,7 +444,7 @@ def nlq():
         } LIMIT 200
         """
         if engine and hasattr(engine, 'query_fuseki'):
-            res = engine.query_fuseki(sparql)
+            res = cached_query(sparql, engine.query_fuseki)
             return jsonify(res)
         else:
             return jsonify({"error":"SPARQL engine not available"}), 500
@@ -289,23 +454,29 @@ def nlq():
 def audit_summary():
     """
     감사 로그 요약 정보 조회
-    Query params: hours (기본 24시간)
+    Query params: hours (기본 24시간), actor, action, risk_level, compliance_tag
     """
     from audit_logger import get_audit_summary
     
     hours = int(request.args.get("hours", 24))
-    summary = get_audit_summary(hours)
+    summary = get_audit_summary(hours,
+                                actor=request.args.get("actor"),
+                                action=request.args.get("action"),
+                                risk_level=request.args.get("risk_level"),
+                                compliance_tag=request.args.get("compliance_tag"))
     return jsonify(summary)
 
 @app.route("/audit/verify", methods=["POST"])
 def audit_verify():
     """
     감사 로그 무결성 검증
+    JSON body: actor, since/until (ISO, 해당 시간 범위 블록만 검증)
     """
     from audit_logger import verify_audit_integrity
     
-    actor = request.json.get("actor", "system") if request.is_json else "system"
-    verification_result = verify_audit_integrity()
+    body = request.json if request.is_json else {}
+    actor = body.get("actor", "system")
+    verification_result = verify_audit_integrity(since=body.get("since"), until=body.get("until"))
     
     # 검증 작업도 감사 로그에 기록
     write_audit("audit_verify", actor, verification_result, 
@@ -330,6 +501,7 @@ def fuseki_deploy():
         # Deploy with validation
         fuseki_manager = FusekiSwapManager()
         result = fuseki_manager.deploy_with_validation(ttl_content, target_graph)
+        fuseki_stats_cache.invalidate()
         
         # Audit the deployment request
         write_audit("fuseki_deploy_api", actor, {
@@ -346,35 +518,14 @@ def fuseki_deploy():
 @app.route("/fuseki/stats", methods=["GET"])
 def fuseki_stats():
     """
-    Get Fuseki graph statistics
+    Get Fuseki graph statistics (cached, see FUSEKI_STATS_TTL)
     """
     try:
-        fuseki_manager = FusekiSwapManager()
-        
-        if not fuseki_manager.check_fuseki_health():
-            return jsonify({"error": "Fuseki server not available"}), 503
-        
-        graphs = {
-            "staging": fuseki_manager.staging_graph,
-            "backup": fuseki_manager.backup_graph,
-            **{f"production_{i}": graph for i, graph in enumerate(fuseki_manager.production_graphs)}
-        }
-        
-        stats = {}
-        for name, graph_uri in graphs.items():
-            count = fuseki_manager.get_triple_count(graph_uri)
-            stats[name] = {
-                "graph_uri": graph_uri,
-                "triple_count": count,
-                "status": "OK" if count >= 0 else "ERROR"
-            }
-        
-        return jsonify({
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "graphs": stats,
-            "total_triples": sum(s["triple_count"] for s in stats.values() if s["triple_count"] > 0)
-        })
+        stats, cache_info = fuseki_stats_cache.get()
+        return jsonify({**stats, "cache": cache_info})
         
+    except FusekiUnavailable as e:
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -1,53 +1,81 @@
 #!/usr/bin/env python3
 # nlq_query_wrapper_flask.py
 # Flask wrapper exposing /nlq-query endpoint that uses nlq_to_sparql.generate_sparql and safe execution flow.
+# Payload options: {"page_size": N, "cursor": "..."} for pagination, {"stream": true} (or Accept:
+# application/x-ndjson) to stream rows as NDJSON with bounded memory.
+# Every query passes the sparql_guard cost check, runs with a Fuseki server-side timeout and
+# counts against a per-client concurrency limit (remote address; X-Client-Id only from proxies
+# listed in SPARQL_TRUSTED_PROXIES).
 import os
 import json
+import time
 import requests
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from nlq_to_sparql import generate_sparql
+from sparql_cache import TemplateResultCache, cached_query
+from sparql_guard import ClientLimiter, QueryRejected, TooManyQueries, client_key, guard_query, timeout_for
+from sparql_stream import DEFAULT_PAGE_SIZE, decode_cursor, fetch_page, ndjson_lines, stream_select
 
 app = Flask(__name__)
 
 SPARQL_ENDPOINT = os.environ.get("SPARQL_ENDPOINT", "http://localhost:3030/hvdc/sparql")
 TIMEOUT = int(os.environ.get("SPARQL_TIMEOUT", "30"))
 MAX_ROWS = int(os.environ.get("SPARQL_MAX_ROWS", "1000"))
+PREFLIGHT_TTL = float(os.environ.get("NLQ_PREFLIGHT_TTL", "300"))
+STREAM_FORMAT = os.environ.get("SPARQL_STREAM_FORMAT", "json")  # json | tsv
+EXPORT_TIMEOUT = float(os.environ.get("SPARQL_EXPORT_TIMEOUT", "300"))  # NDJSON 스트리밍 서버측 타임아웃
 
-def run_sparql(query: str):
+def _post_sparql(query: str, timeout: float = TIMEOUT):
     headers = {"Accept":"application/sparql-results+json"}
-    resp = requests.post(SPARQL_ENDPOINT, data={'query': query}, headers=headers, timeout=TIMEOUT)
+    # Fuseki 'timeout' = 서버측 쿼리 타임아웃(초) - 클라이언트는 응답 대기 여유를 조금 더 둠
+    data = {'query': query, 'timeout': f"{timeout:g}"}
+    resp = requests.post(SPARQL_ENDPOINT, data=data, headers=headers, timeout=timeout + 5)
     resp.raise_for_status()
     return resp.json()
 
-def ensure_limit(query: str) -> str:
-    if "LIMIT" in query.upper():
-        return query
-    return query + f"\nLIMIT {MAX_ROWS}"
+# 템플릿(intent)별 결과 캐시 - 같은 파라미터의 반복 질문은 메모리에서 응답
+template_cache = TemplateResultCache()
+# intent -> (graph version etag, monotonic time of the last positive ASK)
+_preflight_ok = {}
+limiter = ClientLimiter()
+
+def run_sparql(query: str):
+    # 동일 쿼리는 그래프 버전이 바뀌기 전까지 캐시에서 응답 (sparql_cache)
+    return cached_query(query, _post_sparql)
+
+def run_template(gen: dict, query: str, timeout: float = TIMEOUT):
+    return template_cache.get_or_execute(gen["intent"], gen["params"], query,
+                                         lambda q: _post_sparql(q, timeout), gen["graphs"])
+
+def stream_sparql(query: str, timeout: float = EXPORT_TIMEOUT):
+    return stream_select(SPARQL_ENDPOINT, query, fmt=STREAM_FORMAT, timeout=timeout + 5, server_timeout=timeout)
+
+def wants_stream(payload: dict) -> bool:
+    return bool(payload.get("stream")) or request.accept_mimetypes.best == "application/x-ndjson"
+
+def client_id() -> str:
+    return client_key(request.remote_addr, request.headers.get("X-Client-Id"))
 
-def ask_dry_run_from_select(select_query: str) -> bool:
-    # Simple ASK query to check if any data exists
+def preflight(gen: dict) -> bool:
+    """
+    ASK on the template's core basic graph pattern (does any data match this intent at all).
+    Positive answers are cached per (intent, graph version) for PREFLIGHT_TTL seconds,
+    so repeat questions make one round trip (the SELECT) instead of two.
+    """
+    intent = gen["intent"]
+    etag = template_cache.versions.etag(gen["graphs"])
+    cached = _preflight_ok.get(intent)
+    if cached and cached[0] == etag and time.monotonic() - cached[1] < PREFLIGHT_TTL:
+        return True
     try:
-        # Extract basic graph pattern for ASK query
-        if "GRAPH ?g" in select_query:
-            # For graph-based queries, just check if any triples exist in graphs
-            ask_q = """
-            PREFIX ex: <http://samsung.com/project-logistics#>
-            ASK WHERE {
-                GRAPH ?g { ?s ?p ?o }
-            }
-            """
-        else:
-            # For simple queries, check if any triples exist
-            ask_q = "ASK WHERE { ?s ?p ?o }"
-        
-        app.logger.info(f"Running ASK query: {ask_q}")
-        res = run_sparql(ask_q)
-        result = res.get("boolean", False)
-        app.logger.info(f"ASK query result: {result}")
-        return result
+        ok = bool(_post_sparql(gen["ask"]).get("boolean", False))
     except Exception as e:
-        app.logger.error("ASK dry-run error: %s", e)
+        app.logger.error("ASK preflight error: %s", e)
         return False
+    app.logger.info(f"ASK preflight {intent}: {ok}")
+    if ok:
+        _preflight_ok[intent] = (etag, time.monotonic())
+    return ok
 
 @app.route("/nlq-query", methods=["POST"])
 def nlq_query():
@@ -64,16 +92,55 @@ def nlq_query():
     if gen.get("error"):
         return jsonify({"error":"unsupported intent", "details": gen}), 400
     sparql = gen["sparql"]
-    sparql_checked = ensure_limit(sparql)
-    # ASK dry-run
-    ok = ask_dry_run_from_select(sparql_checked)
-    if not ok:
-        return jsonify({"error":"dry-run failed or no matching data"}), 422
+    streaming = wants_stream(payload)
+    try:
+        # 스트리밍은 템플릿 자체 LIMIT 만, 그 외는 LIMIT 없으면 MAX_ROWS 추가
+        sparql_checked, cost = guard_query(sparql, None if streaming else MAX_ROWS)
+    except QueryRejected as e:
+        return jsonify({"error":"query too expensive","detail": str(e), "cost": e.cost.features}), 422
+    page_size = cursor = None
+    if payload.get("page_size") or payload.get("cursor"):
+        try:
+            page_size = max(1, min(int(payload.get("page_size") or DEFAULT_PAGE_SIZE), MAX_ROWS))
+            cursor = payload.get("cursor")
+            if cursor:
+                decode_cursor(cursor, sparql_checked)
+        except (TypeError, ValueError) as e:
+            return jsonify({"error":"invalid pagination request","detail": str(e)}), 400
+    client = client_id()
     try:
-        res = run_sparql(sparql_checked)
+        limiter.acquire(client)
+    except TooManyQueries as e:
+        return jsonify({"error":"too many concurrent queries","detail": str(e)}), 429
+    released_by_stream = False
+    try:
+        # ASK preflight (cached positive -> no extra round trip)
+        ok = preflight(gen)
+        if not ok:
+            return jsonify({"error":"dry-run failed or no matching data"}), 422
+        if streaming:
+            # 행 단위로 읽어 바로 전달 (전체 결과를 메모리에 두지 않음) - 슬롯은 응답 종료 시 반환
+            stream = stream_sparql(sparql_checked, timeout_for(cost, EXPORT_TIMEOUT))
+            response = Response(stream_with_context(ndjson_lines(stream)), mimetype="application/x-ndjson")
+            response.call_on_close(lambda: limiter.release(client))
+            released_by_stream = True
+            return response
+        timeout = timeout_for(cost, TIMEOUT)
+        if page_size:
+            page_gen = {**gen, "params": {**gen["params"], "_cursor": cursor or "", "_page_size": str(page_size)}}
+            res = fetch_page(sparql_checked, lambda query: run_template(page_gen, query, timeout), cursor, page_size)
+        else:
+            res = run_template(gen, sparql_checked, timeout)
         return jsonify({"status":"ok","data":res})
-    except requests.HTTPError as e:
+    except requests.RequestException as e:
         return jsonify({"error":"sparql execution failed","detail": str(e)}), 500
+    finally:
+        if not released_by_stream:
+            limiter.release(client)
+
+@app.route("/nlq-cache", methods=["GET"])
+def nlq_cache():
+    return jsonify({"templates": template_cache.info(), "active_queries": limiter.active()})
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=int(os.environ.get("NLQ_PORT", "5010")))
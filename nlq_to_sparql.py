@@ -1,88 +1,275 @@
 # nlq_to_sparql.py
 """
 POC: NLQ -> SPARQL template mapping for HVDC logistics queries.
-- Uses a simple rule-based intent matcher (safe) for known intents like "BOE != CIPL".
+- Uses a compiled rule-based intent matcher (safe) for known intents like "BOE != CIPL"
+  (synonyms, plural/typo tolerance via rapidfuzz, batch API detect_intents).
+- Each intent is a SparqlTemplate compiled once; parameters are bound as VALUES rows
+  (escaped literals, no string formatting) and rendered queries are cached per parameter tuple.
+- Each template also carries an ASK preflight built from its core basic graph pattern.
 - For production, wrap LLM-generated SPARQL with validation and ASK/DRY-RUN before executing.
 References: Ontotext NLQ patterns, academic NLQ->SPARQL research.
 """
 
 import re
-from typing import Dict, List
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from rdf_stream import literal
+from sparql_cache import graphs_in_query
+from sparql_guard import COST_REJECT, COST_WARN, estimate_cost
+
+try:
+    from rapidfuzz import process as fuzz_process
+    from rapidfuzz.distance import DamerauLevenshtein
+except ImportError:  # typo tolerance disabled, exact/synonym matching still works
+    fuzz_process = None
+    DamerauLevenshtein = None
+
+# Intent rules in priority order: every concept group must match (AND), any term of a group (OR).
+# Multi-word terms are matched against token bigrams ("hs code").
+INTENT_RULES: List[Tuple[str, List[Sequence[str]]]] = [
+    ("boe_cipl_mismatch", [
+        ("boe",), ("cipl",),
+        ("!=", "<>", "mismatch", "mismatched", "different", "differ", "differs", "difference",
+         "discrepancy", "inconsistent", "not equal"),
+    ]),
+    ("list_hvdc_codes", [
+        ("hvdc",), ("code", "list", "listing"),
+    ]),
+    ("invoice_risk_analysis", [
+        ("invoice", "inv"),
+        ("risk", "risky", "alert", "problem", "issue", "anomaly", "flagged"),
+    ]),
+    ("container_stowage_analysis", [
+        ("container", "stowage", "cntr"), ("pressure", "weight", "heavy", "overweight"),
+    ]),
+    ("cost_analysis", [
+        ("cost", "price", "spend"), ("analysis", "deviation", "alert", "variance", "overrun"),
+    ]),
+    ("hs_code_risk", [
+        ("hs code", "hs-code", "hscode", "hs"), ("risk", "controlled", "restricted"),
+    ]),
+]
+
+FUZZY_MIN_LENGTH = 5       # shorter tokens must match exactly ("most" must not become "cost")
+FUZZY_CUTOFF = 0.8         # normalized Damerau-Levenshtein similarity (1 edit / transposition in 5 chars)
+
+_TOKEN_RX = re.compile(r"!=|<>|[a-z0-9]+(?:-[a-z0-9]+)*")
+
+class IntentMatcher:
+    """
+    Compiled keyword matcher: each rule term maps to a concept id, a query is reduced once to
+    the set of concepts it mentions, and rules are checked against that set.
+    Unknown tokens are resolved by plural stripping, then (rapidfuzz) closest vocabulary term
+    within one edit - resolutions are cached per token, so repeated vocabularies are O(1).
+    """
+
+    def __init__(self, rules: List[Tuple[str, List[Sequence[str]]]] = INTENT_RULES,
+                 fuzzy: bool = True, cache_size: int = 65536):
+        self.rules: List[Tuple[str, List[FrozenSet[int]]]] = []
+        self.vocabulary: Dict[str, FrozenSet[int]] = {}
+        concept = 0
+        for intent, groups in rules:
+            compiled = []
+            for terms in groups:
+                compiled.append(frozenset([concept]))
+                for term in terms:
+                    self.vocabulary[term] = self.vocabulary.get(term, frozenset()) | {concept}
+                concept += 1
+            self.rules.append((intent, compiled))
+        self._fuzzy_terms = [t for t in self.vocabulary if " " not in t and len(t) >= FUZZY_MIN_LENGTH - 1]
+        self.fuzzy = fuzzy and fuzz_process is not None
+        self._resolve = lru_cache(maxsize=cache_size)(self._resolve_token)
+
+    def _resolve_token(self, token: str) -> FrozenSet[int]:
+        if token in self.vocabulary:
+            return self.vocabulary[token]
+        if token.endswith("s") and token[:-1] in self.vocabulary:
+            return self.vocabulary[token[:-1]]
+        if "-" in token:
+            # "high-risk", "hs-code" parts
+            found: FrozenSet[int] = frozenset()
+            for part in token.split("-"):
+                found |= self._resolve(part)
+            return found
+        if self.fuzzy and len(token) >= FUZZY_MIN_LENGTH:
+            match = fuzz_process.extractOne(token, self._fuzzy_terms, scorer=DamerauLevenshtein.normalized_similarity,
+                                            score_cutoff=FUZZY_CUTOFF)
+            if match is None and token.endswith("s"):
+                match = fuzz_process.extractOne(token[:-1], self._fuzzy_terms,
+                                                scorer=DamerauLevenshtein.normalized_similarity,
+                                                score_cutoff=FUZZY_CUTOFF)
+            if match is not None:
+                return self.vocabulary[match[0]]
+        return frozenset()
+
+    def concepts(self, nlq: str) -> FrozenSet[int]:
+        """Concept ids mentioned by the query (unigrams + bigrams)"""
+        tokens = _TOKEN_RX.findall(nlq.lower())
+        found: FrozenSet[int] = frozenset()
+        for token in tokens:
+            found |= self._resolve(token)
+        for first, second in zip(tokens, tokens[1:]):
+            bigram = self.vocabulary.get(f"{first} {second}")
+            if bigram:
+                found |= bigram
+        return found
+
+    def classify(self, nlq: str) -> str:
+        found = self.concepts(nlq)
+        for intent, groups in self.rules:
+            if all(group & found for group in groups):
+                return intent
+        return "unknown"
+
+    def classify_many(self, queries: Iterable[str]) -> List[str]:
+        """Batch classification - identical queries are classified once"""
+        memo: Dict[str, str] = {}
+        results = []
+        for nlq in queries:
+            intent = memo.get(nlq)
+            if intent is None:
+                intent = memo[nlq] = self.classify(nlq)
+            results.append(intent)
+        return results
+
+_default_matcher: Optional[IntentMatcher] = None
+
+def default_matcher() -> IntentMatcher:
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = IntentMatcher()
+    return _default_matcher
 
 def detect_intent(nlq: str) -> str:
-    """Intent detection based on keywords and patterns"""
-    q = nlq.lower()
-    
-    # BOE vs CIPL mismatch queries
-    if ("boe" in q and "cipl" in q) and ("!=" in q or "mismatch" in q or "different" in q):
-        return "boe_cipl_mismatch"
-    
-    # HVDC code listing
-    if "show hvdc codes" in q or "list hvdc" in q or "hvdc codes" in q:
-        return "list_hvdc_codes"
-    
-    # Invoice risk analysis
-    if ("invoice" in q and ("risk" in q or "alert" in q or "problem" in q)) or ("high-risk" in q and "invoice" in q) or ("show" in q and "high-risk" in q and "invoice" in q):
-        return "invoice_risk_analysis"
-    
-    # Container stowage queries
-    if ("container" in q or "stowage" in q) and ("pressure" in q or "weight" in q):
-        return "container_stowage_analysis"
-    
-    # Cost analysis
-    if ("cost" in q or "price" in q) and ("analysis" in q or "deviation" in q or "alert" in q):
-        return "cost_analysis"
-    
-    # HS Code risk
-    if ("hs code" in q or "hs-code" in q) and ("risk" in q or "controlled" in q):
-        return "hs_code_risk"
-    
-    return "unknown"
+    """Intent detection based on keywords, synonyms and typo-tolerant token matching"""
+    return default_matcher().classify(nlq)
+
+def detect_intents(queries: Iterable[str]) -> List[str]:
+    """Batch intent detection (same results as detect_intent per query)"""
+    return default_matcher().classify_many(queries)
 
 def sanitize_identifier(s: str) -> str:
     """Safe parameter sanitizer - allow alphanum, dash, underscore only"""
     return re.sub(r'[^A-Za-z0-9_\-]', '', s.strip())
 
+_SHPT_RX = re.compile(r'SHPT\s+NO\.?\s*(\d+)', re.IGNORECASE)
+_CASE_RX = re.compile(r'case\s+(\w+[-\w]*)', re.IGNORECASE)
+_INVOICE_RX = re.compile(r'invoice\s+(\w+[-\w]*)', re.IGNORECASE)
+
 def extract_parameters(nlq: str) -> Dict[str, str]:
     """Extract parameters from natural language query"""
     params = {}
     
     # Extract SHPT numbers
-    shpt_match = re.search(r'SHPT\s+NO\.?\s*(\d+)', nlq, re.IGNORECASE)
+    shpt_match = _SHPT_RX.search(nlq)
     if shpt_match:
         params['shpt_no'] = sanitize_identifier(shpt_match.group(1))
     
     # Extract case numbers
-    case_match = re.search(r'case\s+(\w+[-\w]*)', nlq, re.IGNORECASE)
+    case_match = _CASE_RX.search(nlq)
     if case_match:
         params['case_id'] = sanitize_identifier(case_match.group(1))
     
     # Extract invoice numbers
-    inv_match = re.search(r'invoice\s+(\w+[-\w]*)', nlq, re.IGNORECASE)
+    inv_match = _INVOICE_RX.search(nlq)
     if inv_match:
         params['invoice_no'] = sanitize_identifier(inv_match.group(1))
     
     return params
 
-def generate_sparql(nlq: str, params: Dict[str, str] = None) -> Dict[str, str]:
-    """Generate SPARQL query from natural language input"""
-    intent = detect_intent(nlq)
-    params = params or extract_parameters(nlq)
-    
-    if intent == "boe_cipl_mismatch":
-        # Find invoices with BOE and CIPL mismatch or missing counterpart
-        filter_clause = ""
-        if params.get('shpt_no'):
-            filter_clause = f'FILTER(CONTAINS(STR(?invoiceNo), "{params["shpt_no"]}"))'
-        
-        sparql = f"""
-PREFIX ex: <http://samsung.com/project-logistics#>
-SELECT ?invoice ?invoiceNo ?boe ?cipl ?mismatchType WHERE {{
-  GRAPH ?g {{
+SPARQL_PREFIXES = ("PREFIX ex: <http://samsung.com/project-logistics#>\n"
+                   "PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>")
+BINDINGS_SLOT = "{bindings}"
+
+_CORE_END_RX = re.compile(r"^(?:OPTIONAL|BIND|FILTER|VALUES|MINUS|\{|\}|#)", re.IGNORECASE)
+
+def core_pattern(body: str) -> str:
+    """
+    Leading triple patterns of the query's (graph) group - the basic graph pattern every
+    result row must match. Stops at the first OPTIONAL/BIND/FILTER/sub-group.
+    """
+    start = body.index("GRAPH ?g {") + len("GRAPH ?g {") if "GRAPH ?g {" in body else body.index("{") + 1
+    lines = []
+    for line in body[start:].splitlines():
+        line = line.strip()
+        if not line or line == BINDINGS_SLOT:
+            if lines:
+                break
+            continue
+        if _CORE_END_RX.match(line):
+            break
+        lines.append(line)
+    return " ".join(lines)
+
+def ask_query(body: str) -> str:
+    """Cheap preflight: ASK whether any data matches the core basic graph pattern"""
+    core = core_pattern(body)
+    if "GRAPH ?g {" in body:
+        core = f"GRAPH ?g {{ {core} }}"
+    return f"{SPARQL_PREFIXES}\nASK {{ {core} }}"
+
+class SparqlTemplate:
+    """
+    Intent query compiled once. Parameter values are never formatted into the query text:
+    each bound parameter adds a VALUES row (escaped literal) and the clause that uses the variable,
+    at the BINDINGS_SLOT position. Unbound parameters leave the slot empty.
+    """
+
+    def __init__(self, intent: str, description: str, body: str,
+                 params: Optional[Dict[str, Tuple[str, str]]] = None):
+        # params: name -> (SPARQL variable, clause applied when the parameter is bound)
+        self.intent = intent
+        self.description = description
+        self.body = f"\n{SPARQL_PREFIXES}\n{body.strip()}"
+        self.params = params or {}
+        self.graphs = graphs_in_query(self.body)
+        self.ask = ask_query(self.body)
+
+    def bind(self, params: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+        """Declared, non-empty parameters as a hashable sorted tuple (the render cache key)"""
+        return tuple(sorted((name, str(value)) for name, value in params.items()
+                            if name in self.params and value))
+
+    def render(self, bound: Tuple[Tuple[str, str], ...]) -> str:
+        lines = []
+        for name, value in bound:
+            variable, clause = self.params[name]
+            lines.append(f"VALUES ?{variable} {{ {literal(value)} }}")
+            if clause:
+                lines.append(clause)
+        return self.body.replace(BINDINGS_SLOT, "\n    ".join(lines))
+
+class TemplateRegistry:
+    """Intent -> SparqlTemplate, with rendered queries cached per (intent, bound parameters)"""
+
+    def __init__(self, templates: Iterable[SparqlTemplate], cache_size: int = 4096):
+        self.templates: Dict[str, SparqlTemplate] = {t.intent: t for t in templates}
+        self._render = lru_cache(maxsize=cache_size)(self._render_uncached)
+
+    def _render_uncached(self, intent: str, bound: Tuple[Tuple[str, str], ...]) -> str:
+        return self.templates[intent].render(bound)
+
+    def render(self, intent: str, params: Dict[str, str]) -> Optional[Dict[str, object]]:
+        template = self.templates.get(intent)
+        if template is None:
+            return None
+        bound = template.bind(params)
+        return {"sparql": self._render(intent, bound), "intent": intent, "description": template.description,
+                "params": dict(bound), "graphs": template.graphs, "ask": template.ask}
+
+    def cache_info(self):
+        return self._render.cache_info()
+
+SPARQL_TEMPLATES = TemplateRegistry([
+    SparqlTemplate("boe_cipl_mismatch", "BOE vs CIPL mismatch analysis", """
+SELECT ?invoice ?invoiceNo ?boe ?cipl ?mismatchType WHERE {
+  GRAPH ?g {
+    {bindings}
     ?invoice a ex:Invoice ;
              ex:invoiceNumber ?invoiceNo .
-    OPTIONAL {{ ?boe ex:relatedInvoice ?invoice . }}
-    OPTIONAL {{ ?cipl ex:relatedInvoice ?invoice . }}
+    OPTIONAL { ?boe ex:relatedInvoice ?invoice . }
+    OPTIONAL { ?cipl ex:relatedInvoice ?invoice . }
     
     BIND(
       IF(BOUND(?boe) && BOUND(?cipl) && ?boe != ?cipl, "VALUE_MISMATCH",
@@ -92,15 +279,10 @@ SELECT ?invoice ?invoiceNo ?boe ?cipl ?mismatchType WHERE {{
     )
     
     FILTER(?mismatchType != "UNKNOWN")
-    {filter_clause}
-  }}
-}} LIMIT 100"""
-        
-        return {"sparql": sparql, "intent": intent, "description": "BOE vs CIPL mismatch analysis"}
-    
-    elif intent == "list_hvdc_codes":
-        sparql = """
-PREFIX ex: <http://samsung.com/project-logistics#>
+  }
+} LIMIT 100""", params={"shpt_no": ("shptNo", "FILTER(CONTAINS(STR(?invoiceNo), ?shptNo))")}),
+
+    SparqlTemplate("list_hvdc_codes", "List all HVDC codes with case info", """
 SELECT DISTINCT ?code ?caseNumber ?status WHERE {
   GRAPH ?g {
     ?case a ex:Case ;
@@ -109,13 +291,9 @@ SELECT DISTINCT ?code ?caseNumber ?status WHERE {
     ?entity ex:belongsToCase ?case ;
             ex:hvdcCode ?code .
   }
-} ORDER BY ?code LIMIT 200"""
-        
-        return {"sparql": sparql, "intent": intent, "description": "List all HVDC codes with case info"}
-    
-    elif intent == "invoice_risk_analysis":
-        sparql = """
-PREFIX ex: <http://samsung.com/project-logistics#>
+} ORDER BY ?code LIMIT 200"""),
+
+    SparqlTemplate("invoice_risk_analysis", "Invoice risk analysis (VAT/Duty/Amount)", """
 SELECT ?invoice ?invoiceNo ?riskType ?severity ?amount WHERE {
   GRAPH ?g {
     ?invoice a ex:Invoice ;
@@ -142,13 +320,9 @@ SELECT ?invoice ?invoiceNo ?riskType ?severity ?amount WHERE {
     BIND(COALESCE(?totalAmount, 0) AS ?amount)
     FILTER(?riskType != "OTHER")
   }
-} ORDER BY DESC(?severity) LIMIT 100"""
-        
-        return {"sparql": sparql, "intent": intent, "description": "Invoice risk analysis (VAT/Duty/Amount)"}
-    
-    elif intent == "container_stowage_analysis":
-        sparql = """
-PREFIX ex: <http://samsung.com/project-logistics#>
+} ORDER BY DESC(?severity) LIMIT 100"""),
+
+    SparqlTemplate("container_stowage_analysis", "Container stowage analysis (weight/pressure)", """
 SELECT ?cargo ?cargoLabel ?grossWeightKg ?pressure ?riskLevel WHERE {
   GRAPH ?g {
     ?cargo a ex:CargoItem ;
@@ -165,13 +339,9 @@ SELECT ?cargo ?cargoLabel ?grossWeightKg ?pressure ?riskLevel WHERE {
       (BOUND(?riskLevel) && ?riskLevel IN ("HIGH", "CRITICAL"))
     )
   }
-} ORDER BY DESC(?grossWeightKg) LIMIT 50"""
-        
-        return {"sparql": sparql, "intent": intent, "description": "Container stowage analysis (weight/pressure)"}
-    
-    elif intent == "cost_analysis":
-        sparql = """
-PREFIX ex: <http://samsung.com/project-logistics#>
+} ORDER BY DESC(?grossWeightKg) LIMIT 50"""),
+
+    SparqlTemplate("cost_analysis", "Cost deviation analysis (>5%)", """
 SELECT ?case ?caseNumber ?budgetAmount ?actualAmount ?deviation ?deviationPct WHERE {
   GRAPH ?g {
     ?case a ex:Case ;
@@ -186,13 +356,9 @@ SELECT ?case ?caseNumber ?budgetAmount ?actualAmount ?deviation ?deviationPct WH
     FILTER(BOUND(?budgetAmount) && BOUND(?actualAmount))
     FILTER(ABS(?deviationPct) > 5.0)  # Only significant deviations
   }
-} ORDER BY DESC(ABS(?deviationPct)) LIMIT 50"""
-        
-        return {"sparql": sparql, "intent": intent, "description": "Cost deviation analysis (>5%)"}
-    
-    elif intent == "hs_code_risk":
-        sparql = """
-PREFIX ex: <http://samsung.com/project-logistics#>
+} ORDER BY DESC(ABS(?deviationPct)) LIMIT 50"""),
+
+    SparqlTemplate("hs_code_risk", "HS Code risk analysis (controlled/high-risk)", """
 SELECT ?hsCode ?hsLabel ?riskCategory ?dutyRate ?vatRate ?cargoCount WHERE {
   GRAPH ?g {
     ?hsCodeEntity a ex:HSCode ;
@@ -211,16 +377,22 @@ SELECT ?hsCode ?hsLabel ?riskCategory ?dutyRate ?vatRate ?cargoCount WHERE {
     
     FILTER(?riskCategory IN ("CONTROLLED", "HIGH_RISK"))
   }
-} ORDER BY DESC(?cargoCount) ?riskCategory LIMIT 30"""
-        
-        return {"sparql": sparql, "intent": intent, "description": "HS Code risk analysis (controlled/high-risk)"}
+} ORDER BY DESC(?cargoCount) ?riskCategory LIMIT 30"""),
+])
+
+def generate_sparql(nlq: str, params: Dict[str, str] = None) -> Dict[str, str]:
+    """Generate SPARQL query from natural language input (rendered from the compiled template registry)"""
+    intent = detect_intent(nlq)
+    params = params or extract_parameters(nlq)
     
-    else:
-        return {
-            "error": f"Unsupported intent: {intent}",
-            "intent": intent,
-            "suggestion": "Try queries like: 'Show invoices where BOE != CIPL', 'List HVDC codes', 'Invoice risk analysis'"
-        }
+    result = SPARQL_TEMPLATES.render(intent, params)
+    if result is not None:
+        return result
+    return {
+        "error": f"Unsupported intent: {intent}",
+        "intent": intent,
+        "suggestion": "Try queries like: 'Show invoices where BOE != CIPL', 'List HVDC codes', 'Invoice risk analysis'"
+    }
 
 def validate_sparql(sparql: str) -> Dict[str, any]:
     """Basic SPARQL validation (syntax and safety checks)"""
@@ -254,6 +426,15 @@ def validate_sparql(sparql: str) -> Dict[str, any]:
     if not re.search(r'\bLIMIT\b', sparql, re.IGNORECASE):
         validation_result["warnings"].append("Consider adding LIMIT clause for performance")
     
+    # Static cost estimate (full scans, string filters over GRAPH ?g, deep OPTIONALs ...)
+    cost = estimate_cost(sparql)
+    validation_result["cost"] = cost.score
+    if cost.score >= COST_REJECT:
+        validation_result["errors"].append(f"Query too expensive (cost {cost.score}): {', '.join(cost.reasons)}")
+        validation_result["valid"] = False
+    elif cost.score >= COST_WARN:
+        validation_result["warnings"].append(f"Expensive query (cost {cost.score}): {', '.join(cost.reasons)}")
+    
     return validation_result
 
 def safe_execute_workflow(nlq: str, execute_fn=None) -> Dict[str, any]:
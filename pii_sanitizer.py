@@ -0,0 +1,69 @@
+# pii_sanitizer.py - Shared precompiled PII/NDA sanitizer for audit logs
+"""
+HVDC 감사 로그 민감 정보 마스킹 (MACHO-GPT 보안 표준, OWASP logging)
+
+- 모든 패턴을 이름 있는 그룹의 단일 alternation 정규식으로 미리 컴파일 → 문자열당 1회 스캔
+- 빠른 경로: 연속 숫자/'@'/키워드(password, api)가 없는 문자열은 정규식 치환 없이 그대로 반환
+- 감사 경로별 치환 토큰 유지
+  - CSV (audit_logger): 모든 패턴 '[REDACTED]', SSN 포함
+  - NDJSON (audit_ndjson_and_hash): 유형별 토큰, SSN 제외
+"""
+
+import re
+from typing import Any, Dict
+
+# 패턴 순서 = 같은 위치에서 겹칠 때의 우선순위
+PII_PATTERNS: Dict[str, str] = {
+    "card": r'\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b',  # 카드번호
+    "ssn": r'\b\d{3}-\d{2}-\d{4}\b',  # SSN
+    "email": r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',  # 이메일
+    "password": r'\bpassword\s*[:=]\s*\S+\b',  # 패스워드
+    "api_key": r'\bapi[_-]?key\s*[:=]\s*\S+\b',  # API 키
+}
+
+# 각 패턴이 매칭되려면 반드시 포함해야 하는 부분 (빠른 경로 판정용 - 전체 패턴보다 훨씬 싼 검색)
+_TRIGGERS: Dict[str, str] = {
+    "card": r'\d{4}[-\s]?\d{4}',
+    "ssn": r'\d{3}-\d{2}-',
+    "email": r'@',
+    "password": r'password',
+    "api_key": r'api',
+}
+
+class Sanitizer:
+    """이름 → 치환 토큰 매핑으로 구성되는 단일 패스 마스킹기"""
+
+    def __init__(self, replacements: Dict[str, str]):
+        names = [name for name in PII_PATTERNS if name in replacements]
+        self.replacements = {name: replacements[name] for name in names}
+        self._pattern = re.compile(
+            "|".join(f"(?P<{name}>{PII_PATTERNS[name]})" for name in names), re.IGNORECASE)
+        self._trigger = re.compile(
+            "|".join(sorted({_TRIGGERS[name] for name in names})), re.IGNORECASE)
+        self._replace = lambda m: self.replacements[m.lastgroup]
+
+    def sanitize_string(self, text: str) -> str:
+        if not self._trigger.search(text):
+            return text
+        return self._pattern.sub(self._replace, text)
+
+    def sanitize(self, obj: Any) -> Any:
+        """dict/list 는 재귀, 문자열은 마스킹, 그 외 값은 그대로"""
+        if isinstance(obj, str):
+            return self.sanitize_string(obj)
+        if isinstance(obj, dict):
+            return {k: self.sanitize(v) for k, v in obj.items()}
+        if isinstance(obj, list):
+            return [self.sanitize(item) for item in obj]
+        return obj
+
+# CSV 감사 로그 (audit_logger.write_audit)
+csv_sanitizer = Sanitizer({name: '[REDACTED]' for name in PII_PATTERNS})
+
+# NDJSON 감사 이벤트 (audit_ndjson_and_hash.append_event)
+event_sanitizer = Sanitizer({
+    "card": '[CARD_REDACTED]',
+    "email": '[EMAIL_REDACTED]',
+    "password": 'password=[REDACTED]',
+    "api_key": 'api_key=[REDACTED]',
+})
@@ -0,0 +1,138 @@
+# rdf_iri_index.py - Persistent index of RDF node IRIs already loaded into Fuseki
+"""
+HVDC RDF 노드 IRI 인덱스 (SQLite WAL)
+
+- 결정적 IRI 로 발급한 Case/DataSource 노드 중 이미 적재된 것을 대상(scope)별로 기록
+- 재수집 시 기존 노드의 트리플은 생성하지 않음 (같은 파일 반복 수집 = 신규 트리플 ~0)
+- IRI 대신 64-bit blake2b 키만 저장 (WITHOUT ROWID - 천만 노드도 수백 MB 이하)
+- claim_new() 는 PK IN (...) 청크 조회, 새 키는 메모리 pending 에만 보관
+  업로드 성공 후 commit() 해야 영구 반영 (정렬 후 한 트랜잭션으로 삽입)
+  (업로드 실패 시 rollback() - 다음 실행에서 다시 생성)
+- 대상 그래프를 DROP/재구축하면 clear() 로 해당 scope 를 비워야 함
+
+환경 변수:
+  HVDC_IRI_INDEX_DB   인덱스 경로 (기본 artifacts/iri_index.sqlite)
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+from pathlib import Path
+from typing import Iterable, List, Set
+
+import pandas as pd
+
+IRI_INDEX_DB = Path(os.environ.get("HVDC_IRI_INDEX_DB", "artifacts/iri_index.sqlite"))
+LOOKUP_CHUNK = 900  # IN (...) 파라미터 수 (SQLITE_MAX_VARIABLE_NUMBER 999 이하)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    scope TEXT NOT NULL,
+    key INTEGER NOT NULL,
+    PRIMARY KEY (scope, key)
+) WITHOUT ROWID;
+"""
+
+def iri_keys(iris: Iterable[str]) -> List[int]:
+    """IRI -> 부호 있는 64-bit 키 (SQLite INTEGER 범위)"""
+    return [int.from_bytes(hashlib.blake2b(iri.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+            for iri in iris]
+
+class IriIndex:
+    """scope(예: dataset/graph) 별 적재된 노드 IRI 집합 - 인스턴스당 연결 1개 (한 번에 한 스레드만 사용)"""
+
+    def __init__(self, db_path: Path = IRI_INDEX_DB, scope: str = "hvdc/default"):
+        self.db_path = Path(db_path)
+        self.scope = scope
+        self.claimed = 0
+        self.skipped = 0
+        self._pending: Set[int] = set()
+        self._conn_obj = None
+        self._pid = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._conn_obj is None or self._pid != os.getpid():
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn_obj, self._pid = conn, os.getpid()
+        return self._conn_obj
+
+    def claim_new(self, iris: pd.Series) -> pd.Series:
+        """
+        아직 적재되지 않은(또는 이번 실행에서 처음 나온) IRI 위치만 True 인 마스크 반환
+        True 인 IRI 는 pending 에 보관 - commit() 전까지는 이 인스턴스에서만 보임
+        """
+        keys = iri_keys(iris.astype(str))
+        conn = self._conn()
+        seen: Set[int] = set()
+        for start in range(0, len(keys), LOOKUP_CHUNK):
+            chunk = keys[start:start + LOOKUP_CHUNK]
+            seen.update(k for (k,) in conn.execute(
+                f"SELECT key FROM nodes WHERE scope = ? AND key IN ({','.join('?' * len(chunk))})",
+                (self.scope, *chunk)))
+
+        mask = []
+        pending = self._pending
+        for k in keys:
+            is_new = k not in seen and k not in pending
+            mask.append(is_new)
+            if is_new:
+                pending.add(k)
+        claimed = sum(mask)
+        self.claimed += claimed
+        self.skipped += len(keys) - claimed
+        return pd.Series(mask, index=iris.index, dtype=bool)
+
+    def commit(self) -> int:
+        """pending 노드를 영구 반영 (업로드 성공 후 호출) - 반영한 노드 수 반환"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO nodes(scope, key) VALUES (?, ?)",
+                             ((self.scope, k) for k in sorted(self._pending)))
+            added = conn.total_changes - before
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._pending.clear()
+        return added
+
+    def rollback(self) -> None:
+        """이번 실행에서 claim 한 노드 폐기 (업로드 실패 시)"""
+        self._pending.clear()
+
+    def clear(self) -> int:
+        """scope 전체 삭제 (대상 그래프 DROP/재구축 후)"""
+        self._pending.clear()
+        return self._conn().execute("DELETE FROM nodes WHERE scope = ?", (self.scope,)).rowcount
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM nodes WHERE scope = ?", (self.scope,)).fetchone()[0]
+
+    def close(self) -> None:
+        if self._conn_obj is not None:
+            self._conn_obj.close()
+            self._conn_obj = None
+
+def main():
+    parser = argparse.ArgumentParser(description="HVDC RDF node IRI index")
+    parser.add_argument("--db", type=str, default=str(IRI_INDEX_DB))
+    parser.add_argument("--scope", type=str, default="hvdc/default", help="dataset/graph scope")
+    parser.add_argument("--clear", action="store_true", help="Forget all nodes of the scope (after DROP GRAPH)")
+    args = parser.parse_args()
+
+    index = IriIndex(Path(args.db), args.scope)
+    if args.clear:
+        print(f"🧹 {args.scope}: {index.clear():,} nodes removed")
+    else:
+        print(f"📊 {args.scope}: {len(index):,} nodes")
+
+if __name__ == "__main__":
+    main()
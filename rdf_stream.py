@@ -0,0 +1,288 @@
+# rdf_stream.py - Streaming Turtle serializer
+"""
+HVDC 온톨로지 스트리밍 TTL 직렬화
+
+- 트리플을 문자열 리스트로 모으지 않고 파일/업로드 스트림에 청크 단위로 바로 기록
+  (버퍼가 chunk_bytes 를 넘으면 UTF-8 로 인코딩해 flush → 메모리는 행 수와 무관)
+- 리터럴은 Turtle/N-Triples STRING_LITERAL_QUOTE 규칙으로 escape (따옴표, 역슬래시, 개행, 제어 문자)
+- IRI 로컬 부분은 IRIREF 에 허용되지 않는 문자를 percent-encode
+- DataFrame 은 행 단위 f-string 대신 컬럼 배치 단위로 pandas 문자열 연산으로 블록 생성 (write_blocks)
+- 출력 형식: Turtle / N-Triples / N-Quads (+ gzip) (open_rdf, 파일 확장자로 판단)
+  N-Triples 는 prefixed name 을 전체 IRI 로 펼쳐 라인 단위 트리플로 기록 (Fuseki 파서가 더 빠름)
+  RDF-Thrift 는 생성하지 않음 - Jena 로 변환된 기존 .trdf 파일 업로드만 지원
+"""
+
+import gzip
+import hashlib
+import math
+import re
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+STREAM_CHUNK_BYTES = 1024 * 1024
+FRAME_BATCH_ROWS = 50000  # 벡터화 블록 생성 배치 크기 (행)
+
+PREFIXES: Dict[str, str] = {
+    "ex": "http://samsung.com/project-logistics#",
+    "xsd": "http://www.w3.org/2001/XMLSchema#",
+    "rdfs": "http://www.w3.org/2000/01/rdf-schema#",
+    "owl": "http://www.w3.org/2002/07/owl#",
+}
+
+RDF_TYPE = "<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>"
+
+class RdfFormat(NamedTuple):
+    suffix: str
+    content_type: str
+    gzip: bool = False
+
+RDF_FORMATS: Dict[str, RdfFormat] = {
+    "turtle": RdfFormat(".ttl", "text/turtle; charset=utf-8"),
+    "turtle-gzip": RdfFormat(".ttl.gz", "text/turtle; charset=utf-8", gzip=True),
+    "ntriples": RdfFormat(".nt", "application/n-triples"),
+    "ntriples-gzip": RdfFormat(".nt.gz", "application/n-triples", gzip=True),
+    "nquads": RdfFormat(".nq", "application/n-quads"),
+    "nquads-gzip": RdfFormat(".nq.gz", "application/n-quads", gzip=True),
+    "thrift": RdfFormat(".trdf", "application/rdf+thrift"),
+}
+
+def format_for_path(path: Union[str, Path]) -> str:
+    """파일 이름의 확장자로 RDF 형식 이름 판단 (알 수 없으면 turtle)"""
+    name = Path(path).name.lower()
+    for fmt, spec in sorted(RDF_FORMATS.items(), key=lambda item: -len(item[1].suffix)):
+        if name.endswith(spec.suffix):
+            return fmt
+    return "turtle"
+
+_LITERAL_ESCAPES = {ord("\\"): "\\\\", ord('"'): '\\"', ord("\n"): "\\n", ord("\r"): "\\r", ord("\t"): "\\t",
+                    ord("\b"): "\\b", ord("\f"): "\\f"}
+_LITERAL_ESCAPES.update({c: f"\\u{c:04X}" for c in list(range(0x20)) + [0x7F] if c not in _LITERAL_ESCAPES})
+
+# IRIREF 금지 문자: 제어 문자/공백 및 <>"{}|^`\
+_IRI_ESCAPES = {c: f"%{c:02X}" for c in list(range(0x21)) + [ord(ch) for ch in '<>"{}|^`\\']}
+
+_LITERAL_NEEDS = re.compile("[" + re.escape("".join(map(chr, _LITERAL_ESCAPES))) + "]")
+_IRI_NEEDS = re.compile("[" + re.escape("".join(map(chr, _IRI_ESCAPES))) + "]")
+
+def escape_literal(value: object) -> str:
+    return str(value).translate(_LITERAL_ESCAPES)
+
+def escape_iri(value: object) -> str:
+    return str(value).translate(_IRI_ESCAPES)
+
+def literal(value: object, datatype: Optional[str] = None) -> str:
+    """'"값"' 또는 '"값"^^datatype' (datatype 은 prefixed name, 예: xsd:dateTime)"""
+    text = f'"{escape_literal(value)}"'
+    return f"{text}^^{datatype}" if datatype else text
+
+def decimal_literal(value: object) -> str:
+    """xsd:decimal 리터럴 - 숫자가 아니거나 NaN/inf 이면 0.0, 지수 표기 없이"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        number = 0.0
+    if not math.isfinite(number):
+        number = 0.0
+    text = repr(number)
+    if "e" in text or "E" in text:
+        text = f"{number:.20f}".rstrip("0")
+        text = text + "0" if text.endswith(".") else text
+    return f'"{text}"^^xsd:decimal'
+
+def _translate_column(values, table: Dict[int, str], needs: re.Pattern):
+    # 컬럼 전체를 한 번에 검사해 escape 할 문자가 없으면 원소별 translate 생략
+    text = values.astype(str)
+    if needs.search("".join(text.tolist())) is None:
+        return text
+    return text.str.translate(table)
+
+def literal_column(values, datatype: Optional[str] = None):
+    """pandas Series -> 직렬화된 리터럴 Series (값은 str() 변환 후 escape)"""
+    text = '"' + _translate_column(values, _LITERAL_ESCAPES, _LITERAL_NEEDS) + '"'
+    return text + f"^^{datatype}" if datatype else text
+
+def iri_column(values):
+    """pandas Series -> percent-encode 된 IRI 로컬 부분 Series"""
+    return _translate_column(values, _IRI_ESCAPES, _IRI_NEEDS)
+
+def digest_column(values, size: int = 8):
+    """문자열 Series -> blake2b hex digest Series (결정적 IRI 용 - 실행/환경과 무관하게 동일)"""
+    return values.astype(str).map(lambda v: hashlib.blake2b(v.encode("utf-8"), digest_size=size).hexdigest())
+
+def mapped_column(values, serialize):
+    """저카디널리티 컬럼 - 고유값만 serialize 후 매핑 (예: 신뢰도, 추출 방법)"""
+    values = values.astype(str)
+    return values.map({v: serialize(v) for v in values.unique()})
+
+class TurtleStreamWriter:
+    """
+    Turtle 스트리밍 writer - 주어(subject) 단위 블록을 버퍼에 쌓고 chunk_bytes 마다 sink 로 flush
+    sink 는 바이너리 write(bytes) 를 가진 파일/스트림
+    """
+
+    def __init__(self, sink: BinaryIO, prefixes: Optional[Dict[str, str]] = None,
+                 chunk_bytes: int = STREAM_CHUNK_BYTES, close_sink: bool = False):
+        self.sink = sink
+        self.chunk_bytes = chunk_bytes
+        self.close_sink = close_sink
+        self.triples = 0
+        self.bytes_written = 0
+        self._buffer = []
+        self._buffered = 0
+        self.prefixes = PREFIXES if prefixes is None else prefixes
+        self.write_header()
+
+    def write_header(self) -> None:
+        for name, iri in self.prefixes.items():
+            self.write(f"@prefix {name}: <{iri}> .\n")
+        self.write("\n")
+
+    def write(self, text: str) -> None:
+        """직렬화된 Turtle 텍스트를 그대로 기록"""
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.chunk_bytes:
+            self.flush()
+
+    def subject(self, subject: str, pairs: Iterable[Tuple[str, str]]) -> None:
+        """subject 와 (predicate, 직렬화된 object) 목록을 하나의 ';' 블록으로 기록"""
+        pairs = list(pairs)
+        if not pairs:
+            return
+        body = " ;\n    ".join(f"{p} {o}" for p, o in pairs)
+        self.write(f"{subject} {body} .\n\n")
+        self.triples += len(pairs)
+
+    def write_blocks(self, subjects, pairs: List[Tuple[str, Any]]) -> None:
+        """
+        벡터화 블록 기록 - subjects 와 object 컬럼(직렬화된 Series 또는 상수 문자열)을
+        pandas 문자열 연산으로 이어 붙여 subject() 와 같은 블록을 한 번에 기록
+        """
+        if not len(subjects) or not pairs:
+            return
+        blocks = subjects
+        for i, (predicate, objects) in enumerate(pairs):
+            separator = " " if i == 0 else " ;\n    "
+            blocks = blocks + f"{separator}{predicate} " + objects
+        self.write("".join((blocks + " .\n\n").tolist()))
+        self.triples += len(subjects) * len(pairs)
+
+    def flush(self) -> None:
+        if self._buffer:
+            data = "".join(self._buffer).encode("utf-8")
+            self.sink.write(data)
+            self.bytes_written += len(data)
+            self._buffer = []
+            self._buffered = 0
+
+    def close(self) -> None:
+        self.flush()
+        if self.close_sink:
+            self.sink.close()
+        elif hasattr(self.sink, "flush"):
+            self.sink.flush()
+
+    def __enter__(self) -> "TurtleStreamWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+class NTriplesStreamWriter(TurtleStreamWriter):
+    """
+    N-Triples 스트리밍 writer - TurtleStreamWriter 와 같은 입력(Turtle 항)을 받아
+    prefixed name 과 'a' 를 전체 IRI 로 펼쳐 한 줄에 트리플 하나씩 기록
+    """
+    line_end = " .\n"
+
+    def write_header(self) -> None:
+        pass  # N-Triples 에는 @prefix 가 없음
+
+    def expand(self, term: str) -> str:
+        """Turtle 항 하나를 N-Triples 항으로 (IRI/리터럴은 datatype 만 펼침)"""
+        if term == "a":
+            return RDF_TYPE
+        if term.startswith("<"):
+            return term
+        if term.startswith('"'):
+            quote = term.rfind('"')
+            suffix = term[quote + 1:]
+            if suffix.startswith("^^") and not suffix.startswith("^^<"):
+                return term[:quote + 1] + "^^" + self.expand(suffix[2:])
+            return term
+        prefix, _, local = term.partition(":")
+        return f"<{self.prefixes[prefix]}{local}>"
+
+    def _expand_column(self, objects):
+        # 컬럼은 같은 형태의 항으로 구성됨 - 첫 값의 datatype 접미사가 모두 같으면 한 번만 펼침
+        if isinstance(objects, str):
+            return self.expand(objects)
+        first = objects.iloc[0]
+        if first.startswith("<") or (first.startswith('"') and first.endswith('"')):
+            return objects
+        if first.startswith('"'):
+            suffix = first[first.rfind('"') + 1:]
+            if objects.str.endswith(suffix).all():
+                return objects.str.slice(0, -len(suffix)) + self.expand('""' + suffix)[2:]
+        return objects.map(self.expand)
+
+    def subject(self, subject: str, pairs: Iterable[Tuple[str, str]]) -> None:
+        s = self.expand(subject)
+        lines = [f"{s} {self.expand(p)} {self.expand(o)}{self.line_end}" for p, o in pairs]
+        self.write("".join(lines))
+        self.triples += len(lines)
+
+    def write_blocks(self, subjects, pairs: List[Tuple[str, Any]]) -> None:
+        """컬럼 단위 벡터화 기록 - predicate 마다 전체 행의 트리플 라인을 한 번에"""
+        if not len(subjects) or not pairs:
+            return
+        subjects = self._expand_column(subjects)
+        for predicate, objects in pairs:
+            lines = subjects + f" {self.expand(predicate)} " + self._expand_column(objects) + self.line_end
+            self.write("".join(lines.tolist()))
+        self.triples += len(subjects) * len(pairs)
+
+class NQuadsStreamWriter(NTriplesStreamWriter):
+    """N-Quads 스트리밍 writer - 현재 graph 를 각 라인에 붙임 (None = 기본 그래프)"""
+
+    def __init__(self, sink: BinaryIO, prefixes: Optional[Dict[str, str]] = None,
+                 chunk_bytes: int = STREAM_CHUNK_BYTES, close_sink: bool = False,
+                 graph: Optional[str] = None):
+        super().__init__(sink, prefixes, chunk_bytes, close_sink)
+        self.set_graph(graph)
+
+    def set_graph(self, graph: Optional[str]) -> None:
+        """이후 기록하는 트리플의 named graph 변경"""
+        self.graph = graph
+        self.line_end = f" <{escape_iri(graph)}> .\n" if graph else " .\n"
+
+def _require_writable(fmt: str) -> None:
+    if fmt == "thrift":
+        raise ValueError("RDF-Thrift output requires Jena (riot --output=RDF-THRIFT); "
+                         "write N-Triples and convert, or upload an existing .trdf file")
+
+def stream_writer(sink: BinaryIO, fmt: str = "turtle", prefixes: Optional[Dict[str, str]] = None,
+                  chunk_bytes: int = STREAM_CHUNK_BYTES, close_sink: bool = False,
+                  graph: Optional[str] = None) -> TurtleStreamWriter:
+    """형식에 맞는 writer 를 임의의 바이너리 sink 에 열기 (gzip 여부는 호출 측에서 처리)"""
+    _require_writable(fmt)
+    if fmt.startswith("nquads"):
+        return NQuadsStreamWriter(sink, prefixes, chunk_bytes, close_sink, graph=graph)
+    writer_class = NTriplesStreamWriter if fmt.startswith("ntriples") else TurtleStreamWriter
+    return writer_class(sink, prefixes, chunk_bytes, close_sink)
+
+def open_rdf(path: Union[str, Path], fmt: Optional[str] = None, prefixes: Optional[Dict[str, str]] = None,
+             chunk_bytes: int = STREAM_CHUNK_BYTES, graph: Optional[str] = None) -> TurtleStreamWriter:
+    """
+    형식(fmt 미지정 시 확장자)에 맞는 writer 를 파일에 열기 - close 시 파일도 닫음
+    *-gzip 형식은 gzip 스트림으로 압축하며 기록, graph 는 N-Quads 의 named graph
+    """
+    fmt = fmt or format_for_path(path)
+    _require_writable(fmt)
+    sink = gzip.open(path, "wb", compresslevel=6) if RDF_FORMATS[fmt].gzip else open(path, "wb")
+    return stream_writer(sink, fmt, prefixes, chunk_bytes, close_sink=True, graph=graph)
+
+def open_ttl(path: Union[str, Path], prefixes: Optional[Dict[str, str]] = None,
+             chunk_bytes: int = STREAM_CHUNK_BYTES) -> TurtleStreamWriter:
+    """Turtle 파일로 기록하는 writer (close 시 파일도 닫음)"""
+    return open_rdf(path, "turtle", prefixes, chunk_bytes)
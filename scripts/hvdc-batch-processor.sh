@@ -48,6 +48,8 @@ load_data() {
             curl -s -X POST -H "Content-Type: text/turtle" \
                  --data-binary "@$TTL_FILE" \
                  "$FUSEKI_URL/data?default"
+            # Invalidate cached query results for the reloaded default graph
+            python3 sparql_cache.py --bump "urn:x-arq:DefaultGraph" > /dev/null 2>&1 || true
             echo -e "${GREEN}✓ TTL data reloaded${NC}"
         else
             echo -e "${RED}✗ TTL file not found: $TTL_FILE${NC}"
@@ -82,10 +84,21 @@ execute_query() {
             ;;
     esac
     
-    # Execute query
-    if curl -s -H "Accept: $accept_header" \
-            --data-urlencode "query@$query_file" \
-            "$FUSEKI_URL/sparql" > "$output_file"; then
+    # Execute query (JSON goes through the graph-version-aware result cache)
+    if [ "$output_format" = "json" ] && command -v python3 > /dev/null; then
+        run_query() {
+            python3 sparql_cache.py --query-file "$query_file" \
+                --endpoint "$FUSEKI_URL/sparql" > "$output_file"
+        }
+    else
+        run_query() {
+            curl -s -H "Accept: $accept_header" \
+                 --data-urlencode "query@$query_file" \
+                 "$FUSEKI_URL/sparql" > "$output_file"
+        }
+    fi
+    
+    if run_query; then
         
         local file_size=$(du -h "$output_file" | cut -f1)
         echo -e "${GREEN}✓ Results saved: $output_file ($file_size)${NC}"
@@ -194,8 +207,9 @@ EOF
 # Main execution
 case "${1:-}" in
     "--help"|"-h")
-        echo "Usage: $0 [--reload] [--format json|csv|xml] [--report]"
+        echo "Usage: $0 [--reload|--bulk-reload] [--format json|csv|xml] [--report]"
         echo "  --reload: Reload TTL data before processing"
+        echo "  --bulk-reload: Rebuild the TDB2 database offline from TTL data (server must be stopped)"
         echo "  --format: Output format (default: json)"
         echo "  --report: Generate HTML report"
         exit 0
@@ -205,6 +219,18 @@ case "${1:-}" in
         load_data --reload
         shift
         ;;
+    "--bulk-reload")
+        # Full rebuild: tdb2.tdbloader into a fresh directory, then swap (no HTTP upload)
+        if [ ! -f "$TTL_FILE" ]; then
+            echo -e "${RED}✗ TTL file not found: $TTL_FILE${NC}"
+            exit 1
+        fi
+        echo -e "${YELLOW}Bulk loading TTL data offline...${NC}"
+        python3 tdb_bulk_load.py --default "$TTL_FILE" --fuseki-url "${FUSEKI_URL%/hvdc}"
+        echo -e "${GREEN}✓ TDB2 database rebuilt${NC}"
+        echo -e "${BLUE}Start server: ./start-hvdc-fuseki.sh${NC}"
+        exit 0
+        ;;
     *)
         check_fuseki
         ;;
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# sparql_cache.py
+"""
+HVDC SPARQL Result Cache
+Read-query results keyed by normalized query text + version of the graphs it touches.
+
+- Graph versions live in a small JSON file shared by every process
+  (hvdc_api, nlq_query_wrapper_flask, batch runner) and are bumped by
+  FusekiSwapManager after it writes a graph, so cached results never go stale.
+- In-memory LRU with byte-size accounting, optional on-disk tier.
+- TemplateResultCache: per-template caches keyed by bound parameters (NLQ dashboard questions).
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from audit_writer import file_lock
+
+GRAPH_VERSIONS_PATH = Path(os.environ.get("HVDC_GRAPH_VERSIONS", "artifacts/graph_versions.json"))
+DEFAULT_MAX_BYTES = int(float(os.environ.get("HVDC_SPARQL_CACHE_MB", "64")) * 1024 * 1024)
+DEFAULT_DISK_DIR = os.environ.get("HVDC_SPARQL_CACHE_DIR", "")
+DEFAULT_MAX_DISK_BYTES = int(float(os.environ.get("HVDC_SPARQL_CACHE_DISK_MB", "512")) * 1024 * 1024)
+DEFAULT_TEMPLATE_MAX_BYTES = int(float(os.environ.get("HVDC_SPARQL_TEMPLATE_CACHE_MB", "8")) * 1024 * 1024)
+
+# Literals and IRIs are kept verbatim; comments are dropped; whitespace runs collapse
+_TOKEN_RX = re.compile(
+    r'"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'|<[^<>\s]*>|#[^\n]*|\s+|[^\s"\'<#]+|.'
+)
+_GRAPH_IRI_RX = re.compile(r'\b(?:GRAPH|FROM\s+NAMED|FROM)\s*<([^<>\s]+)>', re.IGNORECASE)
+_GRAPH_VAR_RX = re.compile(r'\bGRAPH\s*[?$]', re.IGNORECASE)
+
+def normalize_query(query: str) -> str:
+    """Strip comments and collapse whitespace outside literals/IRIs"""
+    parts = []
+    for token in _TOKEN_RX.findall(query):
+        if token.startswith("#"):
+            continue
+        if token.isspace():
+            if parts and parts[-1] != " ":
+                parts.append(" ")
+            continue
+        parts.append(token)
+    return "".join(parts).strip()
+
+def graphs_in_query(query: str) -> Optional[Tuple[str, ...]]:
+    """
+    Named graphs the query reads.
+    None means the whole dataset (GRAPH ?g, default graph or no explicit graph).
+    """
+    if _GRAPH_VAR_RX.search(query):
+        return None
+    graphs = sorted(set(_GRAPH_IRI_RX.findall(query)))
+    return tuple(graphs) or None
+
+class GraphVersions:
+    """
+    Per-graph version counters persisted to JSON.
+    Reads are cached and refreshed only when the file changes - keyed on
+    (inode, mtime, size), since bump replaces the file through a new inode and
+    mtime alone can be coarser than two writes.
+    """
+    def __init__(self, path: Path = GRAPH_VERSIONS_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._stamp: Optional[Tuple[int, int, int]] = None
+        self._versions: Dict[str, int] = {}
+
+    def _stat(self) -> Tuple[int, int, int]:
+        st = self.path.stat()
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            try:
+                stamp = self._stat()
+            except OSError:
+                self._stamp, self._versions = None, {}
+                return {}
+            if stamp != self._stamp:
+                try:
+                    self._versions = json.loads(self.path.read_text(encoding="utf-8"))
+                    self._stamp = stamp
+                except (OSError, ValueError):
+                    pass  # 쓰는 중인 파일 - 이전 스냅샷 유지
+            return dict(self._versions)
+
+    def bump(self, graph_uris: Iterable[str]) -> Dict[str, int]:
+        """
+        Increment versions after the graphs were written (call after the write completes).
+        The read-modify-write holds <file>.lock so concurrent bumps from other processes
+        (deploy, CLI, bulk loader) never lose an increment.
+        """
+        with self._lock, file_lock(self.path):
+            try:
+                versions = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                versions = {}
+            for graph in graph_uris:
+                versions[graph] = int(versions.get(graph, 0)) + 1
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + f".{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(versions, sort_keys=True), encoding="utf-8")
+            tmp_path.replace(self.path)
+            self._versions = versions
+            self._stamp = self._stat()
+            return dict(versions)
+
+    def etag(self, graphs: Optional[Tuple[str, ...]]) -> str:
+        versions = self.snapshot()
+        if graphs is None:
+            scope = sorted(versions.items())
+        else:
+            scope = [(g, versions.get(g, 0)) for g in graphs]
+        return hashlib.sha256(json.dumps(scope).encode("utf-8")).hexdigest()[:16]
+
+class SparqlResultCache:
+    """
+    LRU result cache bounded by total JSON size in bytes, with optional disk tier.
+    """
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, disk_dir: Optional[str] = None,
+                 max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES,
+                 versions: Optional[GraphVersions] = None):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max(1, max_bytes // 4)
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.max_disk_bytes = max_disk_bytes
+        self.versions = versions or GraphVersions()
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[bytes, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._disk_puts = 0
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    def key_for(self, query: str) -> str:
+        normalized = normalize_query(query)
+        etag = self.versions.etag(graphs_in_query(normalized))
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:32]
+        return f"{digest}-{etag}"
+
+    def get(self, query: str, key: Optional[str] = None) -> Optional[Any]:
+        key = key or self.key_for(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1]
+        payload = self._disk_get(key)
+        if payload is not None:
+            value = json.loads(payload)
+            self._memory_put(key, payload, value)
+            with self._lock:
+                self.stats["disk_hits"] += 1
+            return value
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, query: str, value: Any, key: Optional[str] = None) -> None:
+        key = key or self.key_for(query)
+        payload = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self._memory_put(key, payload, value)
+        self._disk_put(key, payload)
+
+    def get_or_execute(self, query: str, execute_fn: Callable[[str], Any], key: Optional[str] = None) -> Any:
+        """
+        Return a cached result or run execute_fn; errors and empty results are not cached.
+        key overrides the query-text key (caller guarantees it identifies the query + graph versions).
+        """
+        cached = self.get(query, key)
+        if cached is not None:
+            return cached
+        result = execute_fn(query)
+        if result and not (isinstance(result, dict) and "error" in result):
+            self.put(query, result, key)
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "disk_dir": str(self.disk_dir) if self.disk_dir else None,
+                **self.stats
+            }
+
+    def _memory_put(self, key: str, payload: bytes, value: Any) -> None:
+        size = len(payload)
+        if size > self.max_entry_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[0])
+            self._entries[key] = (payload, value)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.stats["evictions"] += 1
+
+    def _disk_get(self, key: str) -> Optional[bytes]:
+        if not self.disk_dir:
+            return None
+        path = self.disk_dir / f"{key}.json"
+        try:
+            payload = path.read_bytes()
+        except OSError:
+            return None
+        os.utime(path, None)  # LRU 순서 유지용 mtime 갱신
+        return payload
+
+    def _disk_put(self, key: str, payload: bytes) -> None:
+        if not self.disk_dir:
+            return
+        path = self.disk_dir / f"{key}.json"
+        tmp_path = path.with_name(path.name + f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            tmp_path.write_bytes(payload)
+            tmp_path.replace(path)
+        except OSError:
+            return
+        self._disk_puts += 1
+        if self._disk_puts % 50 == 0:
+            self.prune_disk()
+
+    def prune_disk(self) -> int:
+        """Delete least-recently-used disk entries beyond max_disk_bytes"""
+        if not self.disk_dir:
+            return 0
+        files = []
+        for path in self.disk_dir.glob("*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+class TemplateResultCache:
+    """
+    One bounded in-memory result cache per query template (e.g. NLQ intent).
+    Entries are keyed by the bound parameters + versions of the template's graphs, so repeat
+    questions skip query normalization/hashing, and a heavy template only evicts its own results.
+    """
+    def __init__(self, max_bytes_per_template: int = DEFAULT_TEMPLATE_MAX_BYTES,
+                 versions: Optional[GraphVersions] = None):
+        self.max_bytes_per_template = max_bytes_per_template
+        self.versions = versions or GraphVersions()
+        self._lock = threading.Lock()
+        self._caches: Dict[str, SparqlResultCache] = {}
+
+    def cache_for(self, template_id: str) -> SparqlResultCache:
+        with self._lock:
+            cache = self._caches.get(template_id)
+            if cache is None:
+                cache = self._caches[template_id] = SparqlResultCache(self.max_bytes_per_template,
+                                                                      versions=self.versions)
+            return cache
+
+    def key_for(self, params: Dict[str, str], graphs: Optional[Tuple[str, ...]] = None) -> str:
+        digest = hashlib.sha256(json.dumps(sorted(params.items())).encode("utf-8")).hexdigest()[:32]
+        return f"{digest}-{self.versions.etag(graphs)}"
+
+    def get_or_execute(self, template_id: str, params: Dict[str, str], query: str,
+                       execute_fn: Callable[[str], Any], graphs: Optional[Tuple[str, ...]] = None) -> Any:
+        """query must be the template rendered with params (same params -> same query text)"""
+        return self.cache_for(template_id).get_or_execute(query, execute_fn, key=self.key_for(params, graphs))
+
+    def info(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            caches = dict(self._caches)
+        return {template_id: cache.info() for template_id, cache in sorted(caches.items())}
+
+_default_cache: Optional[SparqlResultCache] = None
+_default_lock = threading.Lock()
+
+def default_cache() -> SparqlResultCache:
+    """Process-wide cache configured from HVDC_SPARQL_CACHE_* environment variables"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = SparqlResultCache(disk_dir=DEFAULT_DISK_DIR or None)
+        return _default_cache
+
+def cached_query(query: str, execute_fn: Callable[[str], Any]) -> Any:
+    return default_cache().get_or_execute(query, execute_fn)
+
+def bump_graph_versions(graph_uris: Iterable[str]) -> Dict[str, int]:
+    return default_cache().versions.bump(graph_uris)
+
+# CLI interface (queries/*.rq batch runner)
+def main():
+    import argparse
+    import sys
+    import requests
+
+    parser = argparse.ArgumentParser(description="HVDC SPARQL result cache")
+    parser.add_argument("--query-file", type=str, help="Run one .rq file through the cache and print JSON")
+    parser.add_argument("--endpoint", type=str, default="http://localhost:3030/hvdc/sparql")
+    parser.add_argument("--cache-dir", type=str, default=DEFAULT_DISK_DIR or "artifacts/sparql_cache",
+                        help="On-disk tier (shared between runs)")
+    parser.add_argument("--bump", nargs="+", metavar="GRAPH_URI", help="Bump graph versions")
+    parser.add_argument("--info", action="store_true", help="Show graph versions")
+    args = parser.parse_args()
+
+    cache = SparqlResultCache(disk_dir=args.cache_dir)
+
+    if args.bump:
+        print(json.dumps(cache.versions.bump(args.bump), indent=2))
+    if args.info:
+        print(json.dumps(cache.versions.snapshot(), indent=2))
+    if args.query_file:
+        def execute(query: str) -> Dict[str, Any]:
+            resp = requests.post(args.endpoint, data={"query": query},
+                                 headers={"Accept": "application/sparql-results+json"}, timeout=60)
+            resp.raise_for_status()
+            return resp.json()
+
+        query = Path(args.query_file).read_text(encoding="utf-8")
+        try:
+            result = cache.get_or_execute(query, execute)
+        except Exception as e:
+            print(f"❌ Query failed: {e}", file=sys.stderr)
+            return 1
+        print(json.dumps(result, ensure_ascii=False))
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# sparql_guard.py
+"""
+HVDC SPARQL Cost Guard
+Keeps expensive read queries from stalling Fuseki for everyone else.
+
+- estimate_cost() scores a query from its text: triple patterns, unbound GRAPH variables,
+  all-variable (full scan) patterns, REGEX/CONTAINS-style string filters, OPTIONAL nesting,
+  sub-selects and a missing LIMIT.
+- guard_query() rewrites what it can (adds LIMIT) and rejects queries scoring >= COST_REJECT.
+- timeout_for() picks the server-side timeout (Fuseki "timeout" request parameter, seconds);
+  queries above COST_WARN get the shorter heavy-query timeout.
+- ClientLimiter caps concurrent queries per client; client_key() picks the key (remote address,
+  or the X-Client-Id header only when the request comes from a proxy in SPARQL_TRUSTED_PROXIES).
+"""
+
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+QUERY_TIMEOUT = float(os.environ.get("SPARQL_QUERY_TIMEOUT", "30"))
+HEAVY_QUERY_TIMEOUT = float(os.environ.get("SPARQL_HEAVY_QUERY_TIMEOUT", "10"))
+COST_WARN = int(os.environ.get("SPARQL_COST_WARN", "40"))
+COST_REJECT = int(os.environ.get("SPARQL_COST_REJECT", "100"))
+MAX_CONCURRENT_PER_CLIENT = int(os.environ.get("SPARQL_MAX_CONCURRENT_PER_CLIENT", "4"))
+# Comma-separated proxy addresses allowed to assert the client identity via X-Client-Id
+TRUSTED_PROXIES: FrozenSet[str] = frozenset(
+    p.strip() for p in os.environ.get("SPARQL_TRUSTED_PROXIES", "").split(",") if p.strip())
+
+WEIGHTS = {
+    "patterns": 1,
+    "unbound_graphs": 5,
+    "full_scans": 25,
+    "text_filters": 10,
+    "filtered_scans": 50,   # string filter evaluated over a full scan
+    "optionals": 2,
+    "subqueries": 5,
+    "no_limit": 10,
+}
+
+# Literals and IRIs are blanked before matching (keywords inside strings do not count)
+_STRING_RX = re.compile(r'"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'|<[^<>\s]*>|#[^\n]*')
+_VAR = r"[?$][A-Za-z0-9_]+"
+_NON_TRIPLE_RX = re.compile(
+    r"\b(?:SELECT\b[^{]*|(?:GROUP|ORDER)\s+BY\b[^{}]*|LIMIT\s+\d+|OFFSET\s+\d+|GRAPH\s+\S+|"
+    r"OPTIONAL|MINUS|UNION|WHERE|BIND|VALUES\s+\S+|FILTER|ASK)", re.IGNORECASE)
+_FULL_SCAN_RX = re.compile(rf"({_VAR})\s+({_VAR})\s+({_VAR})")
+_GRAPH_VAR_RX = re.compile(rf"\bGRAPH\s+{_VAR}", re.IGNORECASE)
+_TEXT_FILTER_RX = re.compile(r"\b(?:REGEX|CONTAINS|STRSTARTS|STRENDS|REPLACE)\s*\(", re.IGNORECASE)
+_FILTER_RX = re.compile(r"\bFILTER\s*\(", re.IGNORECASE)
+_PAREN_RX = re.compile(r"\(")
+_OPTIONAL_RX = re.compile(r"\bOPTIONAL\s*\{", re.IGNORECASE)
+_SELECT_RX = re.compile(r"\bSELECT\b", re.IGNORECASE)
+_LIMIT_RX = re.compile(r"\bLIMIT\s+(\d+)\s*(?:OFFSET\s+\d+\s*)?$", re.IGNORECASE)
+_WHERE_RX = re.compile(r"\bWHERE\s*\{|\{", re.IGNORECASE)
+
+class QueryCost(NamedTuple):
+    score: int
+    features: Dict[str, int]
+    reasons: List[str]
+
+class QueryRejected(Exception):
+    """Query cost >= COST_REJECT"""
+    def __init__(self, cost: QueryCost):
+        super().__init__(f"Query too expensive (cost {cost.score} >= {COST_REJECT}): {', '.join(cost.reasons)}")
+        self.cost = cost
+
+class TooManyQueries(Exception):
+    """Client already has MAX_CONCURRENT_PER_CLIENT queries running"""
+
+def _strip_groups(text: str, opener: re.Pattern) -> str:
+    """Remove every opener(...) expression (balanced parentheses)"""
+    out, pos = [], 0
+    for match in opener.finditer(text):
+        if match.start() < pos:
+            continue
+        out.append(text[pos:match.start()])
+        depth, i = 1, match.end()
+        while i < len(text) and depth:
+            depth += {"(": 1, ")": -1}.get(text[i], 0)
+            i += 1
+        pos = i
+    out.append(text[pos:])
+    return "".join(out)
+
+def _count_patterns(structural: str) -> int:
+    """Triple patterns: statements of 3+ terms between . { }, plus extra ; and , predicate/object lists"""
+    count = 0
+    for statement in re.split(r"[.{}]", _NON_TRIPLE_RX.sub(" ", _strip_groups(structural, _PAREN_RX))):
+        if len(statement.split()) >= 3:
+            count += 1 + statement.count(";") + statement.count(",")
+    return count
+
+def _optional_depth(text: str) -> int:
+    """Deepest OPTIONAL nesting (OPTIONAL inside OPTIONAL ...)"""
+    depth, stack = 0, []
+    for match in re.finditer(r"\bOPTIONAL\s*\{|\{|\}", text, re.IGNORECASE):
+        token = match.group(0)
+        if token == "}":
+            if stack:
+                stack.pop()
+        else:
+            stack.append(token != "{")
+            depth = max(depth, sum(stack))
+    return depth
+
+def estimate_cost(query: str) -> QueryCost:
+    """Static cost score of a SELECT/ASK query (higher = more expensive)"""
+    text = _STRING_RX.sub('""', query)
+    where = _WHERE_RX.search(text)
+    body = text[where.start():] if where else text
+    structural = _strip_groups(body, _FILTER_RX)
+
+    full_scans = 0
+    for match in _FULL_SCAN_RX.finditer(structural):
+        rest = structural[:match.start()] + structural[match.end():]
+        # joined on the subject or object elsewhere -> not a scan of every triple
+        if not any(re.search(rf"\{var}\b", rest) for var in (match.group(1), match.group(3))):
+            full_scans += 1
+
+    text_filters = len(_TEXT_FILTER_RX.findall(body))
+    limit = _LIMIT_RX.search(text.rstrip())
+    features = {
+        "patterns": _count_patterns(structural),
+        "unbound_graphs": len(_GRAPH_VAR_RX.findall(body)),
+        "full_scans": full_scans,
+        "text_filters": text_filters,
+        "filtered_scans": full_scans * text_filters,
+        "optionals": len(_OPTIONAL_RX.findall(body)),
+        "optional_depth": _optional_depth(body),
+        "subqueries": max(0, len(_SELECT_RX.findall(text)) - 1),
+        "no_limit": 0 if limit or not _SELECT_RX.search(text) else 1,
+    }
+    score = sum(WEIGHTS[name] * features[name] for name in WEIGHTS)
+    score += 3 * features["optional_depth"] ** 2
+    reasons = [f"{name}={value}" for name, value in features.items()
+               if value and (WEIGHTS.get(name, 3) * value >= 10 or name == "optional_depth" and value > 1)]
+    return QueryCost(score, features, reasons)
+
+def guard_query(query: str, max_rows: Optional[int] = None) -> Tuple[str, QueryCost]:
+    """
+    Rewrite (append LIMIT max_rows when missing) and score the query.
+    Raises QueryRejected when the (rewritten) query still costs >= COST_REJECT.
+    """
+    cost = estimate_cost(query)
+    if cost.features["no_limit"] and max_rows:
+        query = f"{query.rstrip()}\nLIMIT {max_rows}"
+        cost = estimate_cost(query)
+    if cost.score >= COST_REJECT:
+        raise QueryRejected(cost)
+    return query, cost
+
+def timeout_for(cost: QueryCost, timeout: float = QUERY_TIMEOUT) -> float:
+    """Server-side timeout in seconds (heavy queries are cut off sooner)"""
+    return min(timeout, HEAVY_QUERY_TIMEOUT) if cost.score >= COST_WARN else timeout
+
+def client_key(remote_addr: Optional[str], claimed_id: Optional[str] = None,
+               trusted_proxies: Optional[Iterable[str]] = None) -> str:
+    """
+    Limiter key for a request. The caller-supplied id is ignored unless the peer is an
+    allow-listed proxy (otherwise a new id per request would bypass the per-client limit).
+    """
+    trusted = TRUSTED_PROXIES if trusted_proxies is None else trusted_proxies
+    if claimed_id and remote_addr in trusted:
+        return f"id:{claimed_id}"
+    return remote_addr or "anonymous"
+
+class ClientLimiter:
+    """Non-blocking per-client concurrency limit (over-limit requests fail fast with TooManyQueries)"""
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT_PER_CLIENT):
+        self.max_concurrent = max_concurrent
+        self._lock = threading.Lock()
+        self._active: Dict[str, int] = {}
+
+    def acquire(self, client: str) -> None:
+        with self._lock:
+            running = self._active.get(client, 0)
+            if running >= self.max_concurrent:
+                raise TooManyQueries(f"{client} already has {running} queries running")
+            self._active[client] = running + 1
+
+    def release(self, client: str) -> None:
+        with self._lock:
+            running = self._active.get(client, 0) - 1
+            if running > 0:
+                self._active[client] = running
+            else:
+                self._active.pop(client, None)
+
+    @contextmanager
+    def slot(self, client: str) -> Iterator[None]:
+        self.acquire(client)
+        try:
+            yield
+        finally:
+            self.release(client)
+
+    def active(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._active)
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# sparql_stream.py
+"""
+HVDC SPARQL Result Streaming & Pagination
+Large SELECT results without loading the whole response into memory.
+
+- SelectStream reads application/sparql-results+json or text/tab-separated-values
+  incrementally and yields one SPARQL JSON binding per row (same shape as results.bindings[i]).
+  CSV results are not supported - they drop the term types (IRI vs literal, datatypes).
+- ndjson_lines() turns a stream into NDJSON (head line, then one row per line) for Flask
+  streaming responses.
+- page_query()/fetch_page() implement cursor pagination with LIMIT/OFFSET inside the query's
+  own LIMIT/OFFSET window; cursors are bound to the query text they were issued for.
+"""
+
+import base64
+import codecs
+import hashlib
+import json
+import os
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import requests
+
+from sparql_cache import normalize_query
+
+STREAM_CHUNK_BYTES = 64 * 1024
+DEFAULT_PAGE_SIZE = int(os.environ.get("SPARQL_PAGE_SIZE", "100"))
+
+ROW_FORMATS = {
+    "json": "application/sparql-results+json",
+    "tsv": "text/tab-separated-values",
+}
+
+XSD = "http://www.w3.org/2001/XMLSchema#"
+
+_VARS_RX = re.compile(r'"vars"\s*:\s*(\[[^\]]*\])')
+_BINDINGS_RX = re.compile(r'"bindings"\s*:\s*\[')
+_LITERAL_RX = re.compile(r'^"(.*)"(?:@([A-Za-z0-9\-]+)|\^\^<([^<>]*)>)?$', re.DOTALL)
+_ESCAPE_RX = re.compile(r'\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))', re.DOTALL)
+_ESCAPES = {"t": "\t", "n": "\n", "r": "\r", "b": "\b", "f": "\f", '"': '"', "'": "'", "\\": "\\"}
+_INTEGER_RX = re.compile(r"[+-]?\d+")
+_DECIMAL_RX = re.compile(r"[+-]?\d*\.\d+")
+_MODIFIERS_RX = re.compile(r"(?:\s*\b(?:LIMIT|OFFSET)\s+\d+)+\s*$", re.IGNORECASE)
+_MODIFIER_RX = re.compile(r"\b(LIMIT|OFFSET)\s+(\d+)", re.IGNORECASE)
+
+def iter_json_rows(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """
+    Incremental application/sparql-results+json parser.
+    Yields the head vars (list) first, then one binding dict per row; only the current
+    chunk and one row are held in memory.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buf, pos = "", 0
+
+    def more() -> bool:
+        nonlocal buf, pos
+        for chunk in chunks:
+            if chunk:
+                buf, pos = buf[pos:] + text.decode(chunk), 0
+                return True
+        return False
+
+    while True:
+        match = _BINDINGS_RX.search(buf)
+        if match:
+            break
+        if not more():
+            raise ValueError("SPARQL JSON results without bindings (not a SELECT result?)")
+    head = _VARS_RX.search(buf, 0, match.start())
+    yield json.loads(head.group(1)) if head else []
+    pos = match.end()
+
+    while True:
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+        if pos == len(buf):
+            if not more():
+                raise ValueError("Truncated SPARQL JSON results")
+            continue
+        if buf[pos] == "]":
+            return
+        try:
+            row, end = decoder.raw_decode(buf, pos)
+        except ValueError:
+            if not more():
+                raise ValueError("Truncated SPARQL JSON results")
+            continue
+        yield row
+        pos = end
+
+def _iter_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    text = codecs.getincrementaldecoder("utf-8")()
+    rest = ""
+    for chunk in chunks:
+        lines = (rest + text.decode(chunk)).split("\n")
+        rest = lines.pop()
+        yield from lines
+    rest += text.decode(b"", final=True)
+    if rest:
+        yield rest
+
+def _unescape(value: str) -> str:
+    def replace(match: re.Match) -> str:
+        code = match.group(1) or match.group(2)
+        if code:
+            return chr(int(code, 16))
+        return _ESCAPES.get(match.group(3), match.group(3))
+    return _ESCAPE_RX.sub(replace, value) if "\\" in value else value
+
+def parse_term(term: str) -> Dict[str, str]:
+    """SPARQL TSV (N-Triples/Turtle syntax) term -> SPARQL JSON binding"""
+    if term.startswith("<") and term.endswith(">"):
+        return {"type": "uri", "value": term[1:-1]}
+    if term.startswith("_:"):
+        return {"type": "bnode", "value": term[2:]}
+    match = _LITERAL_RX.match(term)
+    if match:
+        binding = {"type": "literal", "value": _unescape(match.group(1))}
+        if match.group(2):
+            binding["xml:lang"] = match.group(2)
+        elif match.group(3):
+            binding["datatype"] = match.group(3)
+        return binding
+    # Turtle shorthand numbers / booleans
+    if term in ("true", "false"):
+        datatype = "boolean"
+    elif _INTEGER_RX.fullmatch(term):
+        datatype = "integer"
+    elif _DECIMAL_RX.fullmatch(term):
+        datatype = "decimal"
+    else:
+        datatype = "double"
+    return {"type": "literal", "value": term, "datatype": XSD + datatype}
+
+def iter_tsv_rows(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """Incremental text/tab-separated-values parser (head vars first, then binding dicts)"""
+    lines = _iter_lines(chunks)
+    header = next(lines, "").rstrip("\r")
+    variables = [name.lstrip("?$") for name in header.split("\t") if name]
+    yield variables
+    for line in lines:
+        row = {}
+        for name, term in zip(variables, line.rstrip("\r").split("\t")):
+            if term:
+                row[name] = parse_term(term)
+        yield row
+
+PARSERS = {"json": iter_json_rows, "tsv": iter_tsv_rows}
+
+class SelectStream:
+    """
+    Rows of one SELECT read incrementally from a streamed HTTP response.
+    Iterate once; the connection is released when iteration ends or close() is called.
+    """
+    def __init__(self, response: requests.Response, fmt: str = "json"):
+        if fmt not in PARSERS:
+            raise ValueError(f"Unsupported streaming format '{fmt}' (choose from {', '.join(PARSERS)})")
+        self.response = response
+        self.fmt = fmt
+        self.rows = 0
+        self._rows = PARSERS[fmt](response.iter_content(STREAM_CHUNK_BYTES))
+        try:
+            self.vars: List[str] = next(self._rows)
+        except BaseException:
+            response.close()
+            raise
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        try:
+            for row in self._rows:
+                self.rows += 1
+                yield row
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self.response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def stream_select(url: str, query: str, fmt: str = "json", session: Optional[requests.Session] = None,
+                  timeout: float = 300, server_timeout: Optional[float] = None) -> SelectStream:
+    """
+    POST a SELECT and return its rows as a SelectStream (HTTP errors raise before any row).
+    server_timeout is sent as Fuseki's "timeout" parameter (seconds).
+    """
+    if fmt not in ROW_FORMATS:
+        raise ValueError(f"Unsupported streaming format '{fmt}' (choose from {', '.join(ROW_FORMATS)})")
+    data = {"query": query}
+    if server_timeout:
+        data["timeout"] = f"{server_timeout:g}"
+    response = (session or requests).post(url, data=data, headers={"Accept": ROW_FORMATS[fmt]},
+                                          stream=True, timeout=timeout)
+    try:
+        response.raise_for_status()
+    except requests.HTTPError:
+        response.close()
+        raise
+    return SelectStream(response, fmt)
+
+def ndjson_lines(stream: SelectStream) -> Iterator[str]:
+    """NDJSON body: {"head": {"vars": [...]}} then one binding per line; a failure ends with {"error": ...}"""
+    yield json.dumps({"head": {"vars": stream.vars}}) + "\n"
+    try:
+        for row in stream:
+            yield json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n"
+    except Exception as e:
+        yield json.dumps({"error": str(e), "rows": stream.rows}) + "\n"
+
+def page_query(query: str, offset: int, size: int) -> str:
+    """
+    Rows [offset, offset + size) of the query's own result window.
+    A trailing LIMIT/OFFSET of the query is folded in, so pages never go past the query's cap.
+    """
+    base_limit, base_offset = None, 0
+    modifiers = _MODIFIERS_RX.search(query)
+    if modifiers:
+        for keyword, value in _MODIFIER_RX.findall(modifiers.group(0)):
+            if keyword.upper() == "LIMIT":
+                base_limit = int(value)
+            else:
+                base_offset = int(value)
+        query = query[:modifiers.start()]
+    if base_limit is not None:
+        size = max(0, min(size, base_limit - offset))
+    return f"{query}\nLIMIT {size} OFFSET {base_offset + offset}"
+
+def _query_digest(query: str) -> str:
+    return hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()[:12]
+
+def encode_cursor(query: str, offset: int) -> str:
+    payload = json.dumps({"q": _query_digest(query), "o": offset}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, query: str) -> int:
+    """Offset encoded in the cursor; ValueError if malformed or issued for another query"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        offset = int(payload["o"])
+        digest = payload["q"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {e}") from None
+    if digest != _query_digest(query) or offset < 0:
+        raise ValueError("Cursor does not belong to this query")
+    return offset
+
+def fetch_page(query: str, execute_fn: Callable[[str], Dict[str, Any]], cursor: Optional[str] = None,
+               page_size: int = DEFAULT_PAGE_SIZE) -> Dict[str, Any]:
+    """
+    One page of a SELECT (one extra row is fetched to detect the next page).
+    Returns the SPARQL JSON result plus {"page": {"offset", "size", "next_cursor"}}.
+    """
+    offset = decode_cursor(cursor, query) if cursor else 0
+    result = execute_fn(page_query(query, offset, page_size + 1)) or {}
+    if "error" in result:
+        return result
+    bindings = result.get("results", {}).get("bindings", [])
+    next_cursor = encode_cursor(query, offset + page_size) if len(bindings) > page_size else None
+    return {**result, "results": {**result.get("results", {}), "bindings": bindings[:page_size]},
+            "page": {"offset": offset, "size": page_size, "next_cursor": next_cursor}}
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+HVDC Fuseki Offline Bulk Load (TDB2)
+Full rebuilds bypass the transactional HTTP upload path:
+1. Write every named graph into one N-Quads file (N-Triples sources are rewritten line by line,
+   blank-node labels prefixed per source)
+2. Run the bundled Jena tdb2.tdbloader into a fresh database directory while Fuseki is stopped
+3. Count triples per graph in the new database (tdb2.tdbquery)
+4. Swap the new directory into place (previous database kept as a backup)
+"""
+
+import argparse
+import csv
+import gzip
+import io
+import logging
+import os
+import shutil
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+from rdf_stream import escape_iri, format_for_path
+from sparql_cache import bump_graph_versions
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+FUSEKI_HOME = Path(os.environ.get("FUSEKI_HOME", "fuseki/apache-jena-fuseki-4.10.0"))
+TDB_DIR = FUSEKI_HOME / "data" / "tdb-hvdc"
+DEFAULT_GRAPH = "default"
+LOADERS = ("basic", "parallel", "phased", "sequential", "light")
+
+COUNT_QUERY = ("SELECT ?g (COUNT(*) AS ?n) WHERE { { GRAPH ?g { ?s ?p ?o } } UNION { ?s ?p ?o } } "
+               "GROUP BY ?g")
+
+def find_fuseki_jar(fuseki_home: Path = FUSEKI_HOME) -> Path:
+    """fuseki-server.jar (or jena-fuseki-server-*.jar), same lookup as the fuseki-server script"""
+    candidates = [fuseki_home / "fuseki-server.jar"] + sorted(fuseki_home.glob("jena-fuseki-server-*.jar"))
+    for jar in candidates:
+        if jar.exists():
+            return jar
+    raise FileNotFoundError(f"fuseki-server.jar not found in {fuseki_home}")
+
+def _open_rdf_input(path: Path) -> BinaryIO:
+    return gzip.open(path, "rb") if path.name.lower().endswith(".gz") else path.open("rb")
+
+_TERM_END = frozenset(b" \t\r\n<\"#")
+
+def _statement_body(line: bytes, bnode_prefix: bytes) -> Optional[bytes]:
+    """
+    One N-Triples/N-Quads line without its terminating "." (and trailing "# comment"),
+    blank-node labels prefixed; None for blank/comment lines.
+    """
+    if b"#" not in line and b"_:" not in line:
+        body = line.strip()  # fast path: nothing to rewrite
+    else:
+        body = _rewrite_terms(line, bnode_prefix)
+    if not body:
+        return None
+    if not body.endswith(b"."):
+        raise ValueError(f"N-Triples statement without terminating '.': {line!r}")
+    return body[:-1].rstrip()
+
+def _rewrite_terms(line: bytes, bnode_prefix: bytes) -> bytes:
+    """Copy IRIs and literals verbatim, rename _:x to _:<prefix>x and drop a trailing comment"""
+    out = bytearray()
+    i, n = 0, len(line)
+    while i < n:
+        c = line[i:i + 1]
+        if c == b"<":
+            end = line.index(b">", i) + 1
+            out += line[i:end]
+            i = end
+        elif c == b'"':
+            j = i + 1
+            while j < n and line[j:j + 1] != b'"':
+                j += 2 if line[j:j + 1] == b"\\" else 1
+            if j >= n:
+                raise ValueError(f"Unterminated literal in N-Triples line: {line!r}")
+            out += line[i:j + 1]
+            i = j + 1
+        elif line.startswith(b"_:", i):
+            j = i + 2
+            while j < n and line[j] not in _TERM_END:
+                j += 1
+            label = line[i + 2:j].rstrip(b".")  # labels never end in "."
+            out += b"_:" + bnode_prefix + label
+            i += 2 + len(label)
+        elif c == b"#":
+            break
+        else:
+            out += c
+            i += 1
+    return bytes(out).strip()
+
+def write_nquads(sources: Dict[str, Path], out_path: Path,
+                 quads: Iterable[Path] = ()) -> Tuple[Dict[str, int], List[Tuple[str, Path]]]:
+    """
+    Stream N-Triples sources into one N-Quads file, tagging each line with its graph
+    (the "default" key stays in the default graph); N-Quads sources are copied line by line.
+    Blank-node labels get a per-source prefix so equal labels in different files stay
+    different nodes.
+    Returns (lines written per graph, sources the loader must read directly - e.g. Turtle).
+    """
+    counts: Dict[str, int] = {}
+    direct: List[Tuple[str, Path]] = []
+    with out_path.open("wb") as out:
+        inputs = [(graph, Path(path)) for graph, path in sources.items()]
+        inputs += [(None, Path(path)) for path in quads]
+        for index, (graph, path) in enumerate(inputs):
+            if graph is not None and not format_for_path(path).startswith("ntriples"):
+                direct.append((graph, path))
+                continue
+            if graph is None or graph == DEFAULT_GRAPH:
+                suffix = b" .\n"
+            else:
+                suffix = f" <{escape_iri(graph)}> .\n".encode("utf-8")
+            prefix = f"s{index}x".encode("ascii")
+            written = 0
+            with _open_rdf_input(path) as f:
+                for line in f:
+                    body = _statement_body(line, prefix)
+                    if body is None:
+                        continue
+                    out.write(body + suffix)
+                    written += 1
+            if graph is not None:
+                counts[graph] = counts.get(graph, 0) + written
+    return counts, direct
+
+class TdbBulkLoader:
+    """Offline TDB2 rebuild for the HVDC Fuseki dataset"""
+
+    def __init__(self, fuseki_home: Path = FUSEKI_HOME, db_dir: Optional[Path] = None,
+                 java: str = "java", loader: str = "parallel",
+                 fuseki_url: str = "http://localhost:3030", java_opts: Optional[List[str]] = None):
+        if loader not in LOADERS:
+            raise ValueError(f"Unknown loader '{loader}' (choose from {', '.join(LOADERS)})")
+        self.fuseki_home = Path(fuseki_home)
+        self.db_dir = Path(db_dir) if db_dir else self.fuseki_home / "data" / "tdb-hvdc"
+        self.java = java
+        self.loader = loader
+        self.ping_url = f"{fuseki_url}/$/ping"
+        self.java_opts = java_opts or []
+
+    def server_running(self) -> bool:
+        """Fuseki must be stopped - TDB2 databases are single-process"""
+        try:
+            if requests.get(self.ping_url, timeout=2).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        return self._db_locked()
+
+    def _db_locked(self) -> bool:
+        """tdb.lock holds the PID of the process that has the database open"""
+        lock = self.db_dir / "tdb.lock"
+        try:
+            pid = int(lock.read_text().strip())
+        except (OSError, ValueError):
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            return True  # exists but not ours (PermissionError) or not checkable
+        return pid != os.getpid()
+
+    def _run(self, command: str, args: List[str]) -> subprocess.CompletedProcess:
+        cmd = [self.java, *self.java_opts, "-cp", str(find_fuseki_jar(self.fuseki_home)), command, *args]
+        logging.info(f"☕ {' '.join(cmd)}")
+        return subprocess.run(cmd, check=True, capture_output=True, text=True)
+
+    def count_graphs(self, loc: Path) -> Dict[str, int]:
+        """Triple count per graph in a TDB2 database ("default" = default graph)"""
+        result = self._run("tdb2.tdbquery", ["--loc", str(loc), "--results=CSV", COUNT_QUERY])
+        counts = {}
+        for row in csv.DictReader(io.StringIO(result.stdout)):
+            counts[row.get("g") or DEFAULT_GRAPH] = int(row["n"])
+        return counts
+
+    def swap(self, staging: Path, keep_backup: bool = True) -> Optional[Path]:
+        """Move the new database into place; the previous one becomes <db>.backup-<ts>"""
+        backup = None
+        if self.db_dir.exists():
+            backup = self.db_dir.with_name(f"{self.db_dir.name}.backup-{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+            os.replace(self.db_dir, backup)
+        try:
+            os.replace(staging, self.db_dir)
+        except OSError:
+            if backup:
+                os.replace(backup, self.db_dir)
+            raise
+        if backup and not keep_backup:
+            shutil.rmtree(backup)
+            backup = None
+        return backup
+
+    def load(self, sources: Dict[str, Path], quads: Iterable[Path] = (),
+             keep_backup: bool = True) -> Dict[str, Any]:
+        """
+        Rebuild the database from sources ({graph URI or "default": RDF file}) and quads files.
+        Turtle and other non line-based sources are passed to tdbloader directly with --graph.
+        """
+        result: Dict[str, Any] = {
+            "status": "FAILED",
+            "timestamp": datetime.now().isoformat(),
+            "db_dir": str(self.db_dir),
+            "loader": self.loader,
+            "timings_s": {}
+        }
+        if self.server_running():
+            result["error"] = "Fuseki is running or holds the database - stop it before an offline bulk load"
+            logging.error(f"❌ {result['error']}")
+            return result
+
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        staging = self.db_dir.with_name(f"{self.db_dir.name}.loading-{stamp}")
+        nquads = self.db_dir.with_name(f"{self.db_dir.name}.loading-{stamp}.nq")
+
+        def timed(step: str, func, *args):
+            start = time.perf_counter()
+            value = func(*args)
+            result["timings_s"][step] = round(time.perf_counter() - start, 3)
+            return value
+
+        try:
+            staging.parent.mkdir(parents=True, exist_ok=True)
+            exported, direct = timed("export", write_nquads, sources, nquads, list(quads))
+            result["exported_triples"] = exported
+            logging.info(f"📝 N-Quads written: {sum(exported.values()):,} triples "
+                         f"({nquads.stat().st_size:,} bytes)")
+
+            def run_loader() -> None:
+                self._run("tdb2.tdbloader", ["--loc", str(staging), f"--loader={self.loader}", str(nquads)])
+                for graph, path in direct:
+                    graph_arg = [] if graph == DEFAULT_GRAPH else [f"--graph={graph}"]
+                    self._run("tdb2.tdbloader", ["--loc", str(staging), f"--loader={self.loader}",
+                                                 *graph_arg, str(path)])
+            timed("load", run_loader)
+
+            counts = timed("count", self.count_graphs, staging)
+            result["graphs"] = counts
+            result["total_triples"] = sum(counts.values())
+
+            backup = timed("swap", self.swap, staging, keep_backup)
+            result["backup_dir"] = str(backup) if backup else None
+            result["status"] = "SUCCESS"
+            logging.info(f"✅ TDB2 rebuilt: {result['total_triples']:,} triples in {len(counts)} graphs "
+                         f"({sum(result['timings_s'].values()):.1f}s)")
+
+            # Cached SPARQL results for the reloaded graphs are stale
+            bump_graph_versions(["urn:x-arq:DefaultGraph" if g == DEFAULT_GRAPH else g for g in counts])
+        except subprocess.CalledProcessError as e:
+            result["error"] = f"{' '.join(e.cmd[-3:])} exited {e.returncode}: {(e.stderr or '').strip()[-500:]}"
+            logging.error(f"❌ Bulk load failed: {result['error']}")
+        except Exception as e:
+            result["error"] = str(e)
+            logging.error(f"❌ Bulk load failed: {e}")
+        finally:
+            nquads.unlink(missing_ok=True)
+            if staging.exists():
+                shutil.rmtree(staging, ignore_errors=True)
+        return result
+
+def _parse_graph_args(values: List[str]) -> Dict[str, Path]:
+    sources = {}
+    for value in values:
+        graph, sep, path = value.rpartition("=")
+        if not sep or not graph:
+            raise argparse.ArgumentTypeError(f"--graph expects URI=FILE, got '{value}'")
+        sources[graph] = Path(path)
+    return sources
+
+def main():
+    """CLI interface for offline bulk loads"""
+    parser = argparse.ArgumentParser(description="HVDC offline TDB2 bulk load (Fuseki must be stopped)")
+    parser.add_argument("--graph", action="append", default=[], metavar="URI=FILE",
+                       help="Load FILE into named graph URI (.nt/.nt.gz are merged into N-Quads)")
+    parser.add_argument("--default", type=str, help="RDF file for the default graph")
+    parser.add_argument("--quads", action="append", default=[], metavar="FILE",
+                       help="N-Quads file(s) loaded as-is")
+    parser.add_argument("--loader", choices=LOADERS, default="parallel", help="tdb2.tdbloader algorithm")
+    parser.add_argument("--fuseki-home", type=str, default=str(FUSEKI_HOME))
+    parser.add_argument("--db", type=str, default=None, help="TDB2 directory (default: <fuseki-home>/data/tdb-hvdc)")
+    parser.add_argument("--fuseki-url", type=str, default="http://localhost:3030")
+    parser.add_argument("--no-backup", action="store_true", help="Delete the previous database after the swap")
+    args = parser.parse_args()
+
+    sources = _parse_graph_args(args.graph)
+    if args.default:
+        sources[DEFAULT_GRAPH] = Path(args.default)
+    missing = [str(p) for p in list(sources.values()) + [Path(q) for q in args.quads] if not Path(p).exists()]
+    if missing or not (sources or args.quads):
+        print(f"❌ Nothing to load or files not found: {missing}")
+        return 1
+
+    loader = TdbBulkLoader(Path(args.fuseki_home), Path(args.db) if args.db else None,
+                           loader=args.loader, fuseki_url=args.fuseki_url)
+    result = loader.load(sources, args.quads, keep_backup=not args.no_backup)
+
+    print(f"📊 Bulk Load Result: {result['status']}")
+    for step, seconds in result["timings_s"].items():
+        print(f"  ⏱️  {step}: {seconds:.2f}s")
+    for graph, count in result.get("graphs", {}).items():
+        print(f"  📈 {graph}: {count:,} triples")
+    if result.get("backup_dir"):
+        print(f"  💾 Previous database: {result['backup_dir']}")
+    if result.get("error"):
+        print(f"  Error: {result['error']}")
+    return 0 if result["status"] == "SUCCESS" else 1
+
+if __name__ == "__main__":
+    exit(main())
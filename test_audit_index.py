@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+감사 로그 SQLite 인덱스 테스트 - 증분 수집, 시간 창/필터 집계, 로테이션 감지
+"""
+
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import audit_index
+from audit_index import AuditIndex
+from audit_logger import AUDIT_FIELDNAMES, _csv_line, get_audit_summary
+from audit_ndjson_and_hash import get_audit_stats
+
+
+def _ago(hours):
+    return (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
+
+
+def _csv_row(ts, action, actor, risk="LOW", tags=""):
+    return _csv_line([ts, action, actor, "{}", risk, tags, "s", "localhost", "0" * 16])
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    idx = AuditIndex(tmp_path / "audit_index.sqlite")
+    monkeypatch.setattr(audit_index, "_default_index", idx)
+    return idx
+
+
+@pytest.fixture
+def csv_log(tmp_path):
+    path = tmp_path / "audit_log.csv"
+    path.write_text(
+        _csv_line(AUDIT_FIELDNAMES)
+        + _csv_row(_ago(48), "ingest", "old_user", "HIGH", "FANR")
+        + _csv_row(_ago(2), "ingest", "alice", "HIGH", "FANR,MOIAT")
+        + _csv_row(_ago(1), "run_rules", "bob", "LOW", "MOIAT")
+        + _csv_row(_ago(0.5), "ingest", "bob", "CRITICAL", ""),
+        encoding="utf-8", newline="")
+    return path
+
+
+class TestAuditIndex:
+    """인덱스 수집/조회 테스트"""
+
+    def test_ingest_should_be_incremental(self, index, csv_log):
+        """두 번째 수집은 새로 추가된 라인만 처리해야 함"""
+        assert index.ingest(csv_log, "csv") == 4
+        assert index.ingest(csv_log, "csv") == 0
+
+        with csv_log.open("a", encoding="utf-8", newline="") as f:
+            f.write(_csv_row(_ago(0.1), "export", "carol"))
+            f.write('2025-01-01T00:00:00+00:00,partial')  # 기록 중인 라인
+        assert index.ingest(csv_log, "csv") == 1
+
+    def test_summary_should_cover_window_and_filters(self, index, csv_log):
+        """시간 창과 actor/action/risk_level/태그 필터가 적용되어야 함"""
+        summary = get_audit_summary(24, audit_file=csv_log)
+        assert summary["total_actions"] == 3
+        assert summary["risk_levels"] == {"LOW": 1, "MEDIUM": 0, "HIGH": 1, "CRITICAL": 1}
+        assert summary["top_actions"] == {"ingest": 2, "run_rules": 1}
+        assert summary["compliance_tags"] == {"MOIAT": 2, "FANR": 1}
+
+        assert get_audit_summary(24, actor="bob", audit_file=csv_log)["total_actions"] == 2
+        assert get_audit_summary(24, action="ingest", risk_level="high", audit_file=csv_log)["total_actions"] == 1
+        tagged = get_audit_summary(72, compliance_tag="FANR", audit_file=csv_log)
+        assert tagged["total_actions"] == 2
+        assert tagged["filters"] == {"compliance_tag": "FANR"}
+
+    def test_ndjson_stats_should_reset_on_rotation(self, index, tmp_path):
+        """파일이 교체되면 현재 파일 기준 통계만 보고해야 함"""
+        path = tmp_path / "audit.ndjson"
+        events = [{"ts": _ago(1), "action": "ingest", "actor": "alice", "severity": "INFO"},
+                  {"ts": _ago(0), "action": "deploy", "actor": "bob", "severity": "WARN"}]
+        path.write_text("".join(json.dumps(e) + "\n" for e in events) + "not json\n", encoding="utf-8")
+
+        stats = get_audit_stats(path)
+        assert stats["line_count"] == 3
+        assert stats["event_types"] == {"ingest": 1, "deploy": 1}
+        assert stats["time_range"]["latest"] == events[1]["ts"]
+
+        path.rename(tmp_path / "audit.rotated.ndjson")
+        path.write_text(json.dumps(events[0]) + "\n", encoding="utf-8")
+        assert get_audit_stats(path)["line_count"] == 1
+
+
+class TestCommitIndexing:
+    """writer 커밋 후 수집 테스트"""
+
+    def test_commit_hook_should_not_block_writer_thread(self, index, csv_log, monkeypatch):
+        """커밋 후 수집은 전용 스레드에서 - 호출자는 수집 완료를 기다리지 않아야 함"""
+        release = threading.Event()
+        ingest = index.ingest
+
+        def slow_ingest(path, fmt):
+            release.wait(5)
+            return ingest(path, fmt)
+
+        monkeypatch.setattr(index, "ingest", slow_ingest)
+        started = time.perf_counter()
+        audit_index.index_after_commit(csv_log, "csv")
+        assert time.perf_counter() - started < 1
+
+        release.set()
+        assert audit_index.wait_for_index(5)
+        assert index.pending_bytes(csv_log) == 0
+
+    def test_large_backlog_should_be_left_to_backfill(self, index, csv_log, monkeypatch):
+        """밀린 양이 스캔 임계값을 넘으면 커밋 후 수집은 건너뜀 (CLI/스캔 경로가 담당)"""
+        monkeypatch.setattr(audit_index, "SCAN_THRESHOLD", 10)
+        audit_index.index_after_commit(csv_log, "csv")
+        assert audit_index.wait_for_index(5)
+        assert index.pending_bytes(csv_log) == csv_log.stat().st_size
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+감사 로그 Merkle 체크포인트 테스트 - 증명 경로, 블록 봉인, 병렬/범위 검증, 변조 블록 위치
+"""
+
+import json
+
+import pytest
+
+import audit_logger
+import audit_merkle
+import audit_ndjson_and_hash as audit
+from audit_logger import AUDIT_FIELDNAMES, MerkleCsvSink, _csv_line, calculate_integrity_hash, verify_audit_integrity
+from audit_merkle import MerkleTree, leaf_hash, merkle_proof, merkle_root, verify_proof
+from audit_ndjson_and_hash import append_event, checkpoints_path_for, meta_path_for, verify_hash
+from audit_writer import AuditWriter, flush_audit
+
+
+def _ts(i):
+    return f"2025-01-01T00:{i // 60:02d}:{i % 60:02d}+00:00"
+
+
+@pytest.fixture
+def chained_log(tmp_path, monkeypatch):
+    """4 라인 블록 × 5 + 미봉인 꼬리 2 라인"""
+    monkeypatch.setattr(audit, "CHECKPOINT_EVERY", 4)
+    path = tmp_path / "audit.ndjson"
+    for i in range(22):
+        append_event({"event_type": "test", "seq": i, "ts": _ts(i)}, path=path, wait=True)
+    return path
+
+
+class TestMerkleTree:
+    """Merkle 트리 기본 연산 테스트"""
+
+    @pytest.mark.parametrize("size", [1, 2, 5, 8])
+    def test_proof_should_verify_every_leaf(self, size):
+        """모든 리프의 증명 경로가 root 로 검증되고 다른 리프로는 실패해야 함"""
+        leaves = [leaf_hash(f"line{i}\n".encode()) for i in range(size)]
+        root = merkle_root(leaves)
+        for i, leaf in enumerate(leaves):
+            proof = merkle_proof(leaves, i)
+            assert verify_proof(leaf, proof, root)
+            assert len(proof) <= size.bit_length()
+        assert not verify_proof(leaf_hash(b"forged\n"), merkle_proof(leaves, 0), root)
+
+    def test_tree_should_share_levels_between_proofs(self, monkeypatch):
+        """트리는 한 번만 구성 - 이후 증명은 내부 노드를 다시 해시하지 않아야 함"""
+        leaves = [leaf_hash(f"line{i}\n".encode()) for i in range(37)]
+        tree = MerkleTree(leaves)
+        assert tree.root == merkle_root(leaves)
+
+        calls = []
+        node_hash = audit_merkle.node_hash
+        monkeypatch.setattr(audit_merkle, "node_hash", lambda l, r: calls.append(1) or node_hash(l, r))
+        proofs = [tree.proof(i) for i in range(len(leaves))]
+        assert calls == []
+        monkeypatch.undo()
+        assert all(verify_proof(leaf, proof, tree.root) for leaf, proof in zip(leaves, proofs))
+
+
+class TestNdjsonCheckpoints:
+    """NDJSON 해시 체인 + Merkle 블록 검증 테스트"""
+
+    def test_blocks_should_be_sealed_with_chain_heads(self, chained_log):
+        """블록마다 root, 누적 root, 체인 head, 시간 범위가 기록되어야 함"""
+        entries = [json.loads(line) for line in checkpoints_path_for(chained_log).read_text().splitlines()]
+        assert [e["line"] for e in entries] == [4, 8, 12, 16, 20]
+        assert entries[1]["first_ts"] == _ts(4) and entries[1]["last_ts"] == _ts(7)
+
+        meta = json.loads(meta_path_for(chained_log).read_text())
+        assert meta["merkle_root"] == entries[-1]["root"]
+        assert meta["merkle_blocks"] == 5
+
+    def test_parallel_verify_should_locate_tampered_block(self, chained_log):
+        """병렬 전체 검증은 변조된 블록과 라인을 찾아야 함"""
+        assert verify_hash(chained_log, meta_path_for(chained_log), workers=2)["status"] == "SUCCESS"
+
+        lines = chained_log.read_text(encoding="utf-8").splitlines(keepends=True)
+        lines[9] = lines[9].replace('"seq":9', '"seq":8')
+        chained_log.write_text("".join(lines), encoding="utf-8")
+
+        result = verify_hash(chained_log, meta_path_for(chained_log), workers=2)
+        assert result["status"] == "COMPROMISED"
+        assert [b["block"] for b in result["bad_blocks"]] == [2]
+        assert result["first_invalid_line"] == 10
+
+    def test_range_verify_should_read_only_matching_blocks(self, chained_log):
+        """시간 범위 검증은 해당 블록만 검증하고 범위 밖 변조는 무시해야 함"""
+        lines = chained_log.read_text(encoding="utf-8").splitlines(keepends=True)
+        lines[0] = lines[0].replace('"seq":0', '"seq":5')
+        chained_log.write_text("".join(lines), encoding="utf-8")
+
+        result = verify_hash(chained_log, meta_path_for(chained_log), since=_ts(8), until=_ts(15), workers=1)
+        assert result["status"] == "SUCCESS"
+        assert result["blocks_verified"] == 2
+        assert result["lines_verified"] == 8
+
+        assert verify_hash(chained_log, meta_path_for(chained_log), until=_ts(3))["status"] == "COMPROMISED"
+
+
+class TestCsvCheckpoints:
+    """CSV 감사 로그 Merkle 검증 테스트"""
+
+    def test_csv_tampering_should_be_reported_per_row(self, tmp_path):
+        """봉인된 블록 안의 행 변조는 손상 블록 재검사로 행 단위 보고되어야 함"""
+        path = tmp_path / "audit_log.csv"
+        sink = MerkleCsvSink(path, header=_csv_line(AUDIT_FIELDNAMES))
+        sink.merkle.block_lines = 3
+        writer = AuditWriter(async_mode=False)
+        for i in range(7):
+            row = {"ts": _ts(i), "action": f"act{i}", "actor": "tester", "detail": "{}",
+                   "risk_level": "LOW", "compliance_tags": "", "session_id": "s", "source_ip": "localhost"}
+            row["integrity_hash"] = calculate_integrity_hash(row)
+            writer.submit(sink, _csv_line([row[k] for k in AUDIT_FIELDNAMES]))
+
+        result = verify_audit_integrity(path, workers=1)
+        assert result["status"] == "SUCCESS"
+        assert result["verified_entries"] == 7
+        assert result["blocks_verified"] == 2
+
+        path.write_bytes(path.read_bytes().replace(b"act4", b"act9"))
+        result = verify_audit_integrity(path, workers=1)
+        assert result["status"] == "COMPROMISED"
+        assert [b["block"] for b in result["bad_blocks"]] == [1]
+        assert [c["row"] for c in result["corrupted_details"]] == [6]
+        assert result["verified_entries"] == 6
+
+    def test_newline_in_field_should_not_split_record_across_blocks(self, tmp_path, monkeypatch):
+        """필드 안의 개행은 이스케이프되어 블록 경계가 레코드 중간에 생기지 않아야 함"""
+        path = tmp_path / "audit_log.csv"
+        sink = MerkleCsvSink(path, header=_csv_line(AUDIT_FIELDNAMES))
+        sink.merkle.block_lines = 4
+        monkeypatch.setattr(audit_logger, "_csv_sink", sink)
+        for i in range(3):
+            audit_logger.write_audit(f"act{i}", "tester", {"i": i})
+        row = audit_logger.write_audit("run_rules", "evil\nactor", {"note": "a\nb"})
+        audit_logger.write_audit("act4", "tester", {})
+        flush_audit()
+
+        assert row["actor"] == "evil\\nactor"
+        assert len(path.read_bytes().splitlines()) == 1 + 5
+        result = verify_audit_integrity(path, workers=1)
+        assert result["status"] == "SUCCESS"
+        assert result["verified_entries"] == 5
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+NDJSON 감사 로그 해시 체인 테스트 - 증분 메타, 변조 탐지, 체크포인트, 레거시 앵커
+"""
+
+import json
+
+import pytest
+
+import audit_ndjson_and_hash as audit
+from audit_ndjson_and_hash import (acknowledge_reanchor, append_event, checkpoints_path_for, meta_path_for,
+                                   rotate_audit_log, verify_hash, write_hash_meta)
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return tmp_path / "audit.ndjson"
+
+
+def _append(path, n, start=0):
+    for i in range(start, start + n):
+        append_event({"event_type": "test", "actor": f"user{i}", "seq": i}, path=path, wait=True)
+
+
+class TestHashChain:
+    """해시 체인 기본 동작 테스트"""
+
+    def test_events_should_be_chained_with_incremental_meta(self, log_path):
+        """각 이벤트는 prev_hash 로 연결되고 메타는 전체 재해시 없이 갱신되어야 함"""
+        _append(log_path, 5)
+
+        events = [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines()]
+        assert events[0]["prev_hash"] == audit.GENESIS_HASH
+        for prev, cur in zip(events, events[1:]):
+            assert cur["prev_hash"] == prev["hash"]
+
+        meta = json.loads(meta_path_for(log_path).read_text(encoding="utf-8"))
+        assert meta["chain_head"] == events[-1]["hash"]
+        assert meta["line_count"] == 5
+        assert meta["file_size_bytes"] == log_path.stat().st_size
+        assert verify_hash(log_path, meta_path_for(log_path))["status"] == "SUCCESS"
+
+    def test_tampered_entry_should_be_localized(self, log_path):
+        """중간 라인 변조 시 COMPROMISED 와 첫 위반 라인을 보고해야 함"""
+        _append(log_path, 5)
+        lines = log_path.read_text(encoding="utf-8").splitlines(keepends=True)
+        lines[2] = lines[2].replace('"user2"', '"userX"')
+        log_path.write_text("".join(lines), encoding="utf-8")
+
+        result = verify_hash(log_path, meta_path_for(log_path))
+        assert result["status"] == "COMPROMISED"
+        assert result["first_invalid_line"] == 3
+
+    def test_legacy_file_should_be_anchored_once(self, log_path):
+        """기존(체인 이전) 로그는 한 번 앵커링된 뒤 체인이 이어져야 함"""
+        log_path.write_text('{"event_type":"legacy","hash":null}\n', encoding="utf-8")
+        meta = write_hash_meta(log_path, meta_path_for(log_path))
+        assert meta["anchor"]["line_count"] == 1
+        _append(log_path, 2)
+        assert verify_hash(log_path, meta_path_for(log_path))["status"] == "SUCCESS"
+
+        content = log_path.read_text(encoding="utf-8").replace("legacy", "LEGACY")
+        log_path.write_text(content, encoding="utf-8")
+        assert verify_hash(log_path, meta_path_for(log_path))["status"] == "COMPROMISED"
+
+    def test_foreign_lines_should_be_folded_into_chain(self, log_path):
+        """writer 밖에서 추가된 라인은 다음 커밋 때 체인에 편입되어야 함"""
+        _append(log_path, 2)
+        with log_path.open("a", encoding="utf-8") as f:
+            f.write('{"event_type":"manual"}\n')
+        _append(log_path, 1, start=2)
+
+        meta = json.loads(meta_path_for(log_path).read_text(encoding="utf-8"))
+        assert meta["line_count"] == 4
+        assert meta["unchained_lines"] == 1
+        assert verify_hash(log_path, meta_path_for(log_path))["status"] == "SUCCESS"
+
+
+class TestReanchor:
+    """잘림/메타 손실 후 재앵커링은 확인 전까지 COMPROMISED 유지"""
+
+    def test_truncate_then_append_should_stay_compromised(self, log_path):
+        """로그를 자른 뒤 정상 append 가 있어도 verify 는 계속 COMPROMISED 여야 함"""
+        for i in range(250):
+            append_event({"event_type": "test", "actor": f"user{i}", "seq": i}, path=log_path)
+        audit.flush_audit()
+        lines = log_path.read_bytes().splitlines(keepends=True)
+        old_meta = json.loads(meta_path_for(log_path).read_text(encoding="utf-8"))
+        log_path.write_bytes(b"".join(lines[:190]))
+        assert verify_hash(log_path, meta_path_for(log_path))["status"] == "COMPROMISED"
+
+        _append(log_path, 1, start=250)
+        result = verify_hash(log_path, meta_path_for(log_path))
+        assert result["status"] == "COMPROMISED"
+        incident = result["reanchored"][0]
+        assert incident["reason"] == "truncated"
+        assert incident["previous_chain_head"] == old_meta["chain_head"]
+        assert incident["previous_line_count"] == 250 and incident["line_count"] == 190
+
+        meta = acknowledge_reanchor(log_path, note="restored from backup")
+        assert meta["acknowledged_reanchors"][0]["note"] == "restored from backup"
+        assert verify_hash(log_path, meta_path_for(log_path))["status"] == "SUCCESS"
+
+    def test_deleted_meta_should_be_marked_compromised(self, log_path):
+        """체인 기록이 있는 로그의 메타 삭제는 레거시 앵커링으로 취급하지 않아야 함"""
+        _append(log_path, 3)
+        meta_path_for(log_path).unlink()
+        _append(log_path, 1, start=3)
+
+        result = verify_hash(log_path, meta_path_for(log_path))
+        assert result["status"] == "COMPROMISED"
+        assert result["reanchored"][0]["reason"] == "meta_missing"
+
+    def test_incident_should_survive_rotation(self, log_path):
+        """미확인 재앵커링 기록은 로테이션 후에도 남아 있어야 함"""
+        _append(log_path, 4)
+        log_path.write_bytes(b"".join(log_path.read_bytes().splitlines(keepends=True)[:2]))
+        _append(log_path, 1, start=4)
+        rotate_audit_log(log_path, max_size_mb=0)
+        _append(log_path, 1, start=5)
+
+        assert verify_hash(log_path, meta_path_for(log_path))["status"] == "COMPROMISED"
+
+
+class TestCheckpointsAndRotation:
+    """체크포인트 검증과 로테이션 테스트"""
+
+    def test_verify_from_checkpoint_should_scan_only_tail(self, log_path, monkeypatch):
+        """체크포인트부터 검증하면 이후 라인만 읽어야 함"""
+        monkeypatch.setattr(audit, "CHECKPOINT_EVERY", 4)
+        _append(log_path, 10)
+        assert len(checkpoints_path_for(log_path).read_text().splitlines()) == 2
+
+        result = verify_hash(log_path, meta_path_for(log_path), checkpoint=-1)
+        assert result["status"] == "SUCCESS"
+        assert result["verified_from_line"] == 8
+        assert result["lines_verified"] == 2
+
+    def test_rotation_should_continue_chain_from_old_head(self, log_path):
+        """로테이션 후 새 로그의 genesis 는 이전 로그의 마지막 해시여야 함"""
+        _append(log_path, 3)
+        old_head = json.loads(meta_path_for(log_path).read_text(encoding="utf-8"))["chain_head"]
+
+        assert rotate_audit_log(log_path, max_size_mb=0)
+        _append(log_path, 1, start=3)
+
+        first = json.loads(log_path.read_text(encoding="utf-8").splitlines()[0])
+        assert first["prev_hash"] == old_head
+        assert verify_hash(log_path, meta_path_for(log_path))["status"] == "SUCCESS"
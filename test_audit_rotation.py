@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+감사 로그 세그먼트 로테이션 테스트 - 크기/일자 로테이션, 압축 봉인, 매니페스트 지연 순회
+"""
+
+import gzip
+import json
+import multiprocessing
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from audit_logger import (AUDIT_FIELDNAMES, MerkleCsvSink, _csv_line, calculate_integrity_hash,
+                          verify_audit_integrity)
+from audit_ndjson_and_hash import (_sink_for, append_event, get_audit_stats, meta_path_for,
+                                   verify_hash, verify_segments)
+from audit_rotation import RotationPolicy, SegmentRotator, manifest_path_for
+from audit_writer import AuditWriter
+
+
+def _resume_from_process(path, barrier):
+    """
+    워커 프로세스의 import 시점 resume_pending() 재현 (spawn 대상은 모듈 최상위 함수)
+    스레드 대신 직접 호출 - 봉인 중 예외가 종료 코드로 드러나도록
+    """
+    rotator = SegmentRotator(path, policy=RotationPolicy(compression="gzip"))
+    barrier.wait()
+    rotator.seal_pending()
+
+
+@pytest.fixture
+def rotating_log(tmp_path):
+    """약 3 이벤트마다 로테이션되는 NDJSON 로그"""
+    path = tmp_path / "audit.ndjson"
+    _sink_for(path).rotator.policy = RotationPolicy(max_bytes=500)
+    for i in range(10):
+        append_event({"event_type": "test", "action": "ingest", "seq": i}, path=path, wait=True)
+    _sink_for(path).rotator.wait()
+    return path
+
+
+class TestNdjsonRotation:
+    """NDJSON 로테이션 테스트"""
+
+    def test_segments_should_be_compressed_and_chained(self, rotating_log):
+        """닫힌 세그먼트는 압축/봉인되고 체인이 세그먼트를 넘어 이어져야 함"""
+        manifest = json.loads(manifest_path_for(rotating_log).read_text(encoding="utf-8"))
+        segments = manifest["segments"]
+        assert len(segments) >= 2
+        for entry in segments:
+            assert entry["state"] == "sealed"
+            assert (rotating_log.parent / entry["stored_as"]).exists()
+            assert not (rotating_log.parent / entry["file"]).exists()
+        assert rotating_log.stat().st_size < 500
+
+        assert verify_segments(rotating_log)["status"] == "SUCCESS"
+        assert verify_hash(rotating_log, meta_path_for(rotating_log))["status"] == "SUCCESS"
+
+        stats = get_audit_stats(rotating_log, include_segments=True)
+        assert stats["total_line_count"] == 10
+
+    def test_tampered_segment_should_be_detected(self, rotating_log):
+        """압축 세그먼트 내용이 바뀌면 검증이 실패해야 함"""
+        entry = json.loads(manifest_path_for(rotating_log).read_text(encoding="utf-8"))["segments"][0]
+        stored = rotating_log.parent / entry["stored_as"]
+        content = gzip.decompress(stored.read_bytes()).replace(b'"seq":0', b'"seq":7')
+        stored.write_bytes(gzip.compress(content))
+
+        result = verify_segments(rotating_log)
+        assert result["status"] == "COMPROMISED"
+        assert result["segments"][0]["status"] == "COMPROMISED"
+
+
+class TestConcurrentSeal:
+    """여러 프로세스가 같은 pending 세그먼트를 동시에 봉인하는 경우"""
+
+    def test_workers_resuming_same_segment_should_seal_once(self, tmp_path):
+        """동시 resume_pending() 후에도 세그먼트는 한 번만 봉인되고 매니페스트 항목은 유지되어야 함"""
+        path = tmp_path / "audit.ndjson"
+        rotator = SegmentRotator(path, policy=RotationPolicy(compression="gzip"))
+        content = b"".join(b'{"seq":%d,"pad":"%s"}\n' % (i, b"x" * 200) for i in range(20000))
+
+        def freeze(segment):
+            segment.write_bytes(content)
+            return {}
+        entry = rotator.rotate(freeze, background=False)
+        # 다른 프로세스가 압축 도중 종료된 상태 - 원본만 남은 pending 세그먼트
+        (tmp_path / (entry["file"] + ".gz")).unlink()
+        raw = tmp_path / entry["file"]
+        raw.write_bytes(content)
+        rotator._update(lambda m: m["segments"][0].update(state="pending"))
+
+        ctx = multiprocessing.get_context("spawn")
+        barrier = ctx.Barrier(4)
+        workers = [ctx.Process(target=_resume_from_process, args=(path, barrier)) for _ in range(4)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join(60)
+        assert all(w.exitcode == 0 for w in workers)
+
+        segments = rotator.segments()
+        assert len(segments) == 1 and segments[0]["state"] == "sealed"
+        assert not raw.exists()
+        assert gzip.decompress((tmp_path / segments[0]["stored_as"]).read_bytes()) == content
+        assert not list(tmp_path.glob("*.tmp"))
+
+
+class TestCsvRotation:
+    """CSV 일자 로테이션 테스트"""
+
+    def test_daily_rotation_should_start_new_file(self, tmp_path):
+        """UTC 날짜가 바뀌면 다음 배치 전에 세그먼트로 교체되어야 함"""
+        path = tmp_path / "audit_log.csv"
+        sink = MerkleCsvSink(path, header=_csv_line(AUDIT_FIELDNAMES))
+        sink.rotator.policy = RotationPolicy(daily=True)
+        writer = AuditWriter(async_mode=False)
+
+        def write(i):
+            row = {"ts": datetime.now(timezone.utc).isoformat(), "action": f"act{i}", "actor": "tester",
+                   "detail": "{}", "risk_level": "LOW", "compliance_tags": "", "session_id": "s",
+                   "source_ip": "localhost"}
+            row["integrity_hash"] = calculate_integrity_hash(row)
+            writer.submit(sink, _csv_line([row[k] for k in AUDIT_FIELDNAMES]))
+
+        write(0)
+        write(1)
+        yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+        sink.rotator._update(lambda m: m.update(active_since=yesterday))
+        write(2)
+        sink.rotator.wait()
+
+        assert len(sink.rotator.segments()) == 1
+        assert path.read_text(encoding="utf-8").count("\n") == 2  # 헤더 + 새 행
+        assert sum(1 for _ in sink.rotator.iter_lines()) == 5  # 헤더 2 + 행 3
+
+        result = verify_audit_integrity(path, workers=1, include_segments=True)
+        assert result["status"] == "SUCCESS"
+        assert result["segments"][0]["lines"] == 3
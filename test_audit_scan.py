@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+감사 로그 병렬 스캐너 테스트 - 개행 경계 청크 분할, 부분 집계 병합, 청크 단위 행 검증
+"""
+
+import pytest
+
+import audit_ndjson_and_hash as audit
+import audit_scan
+from audit_index import AuditIndex
+from audit_logger import AUDIT_FIELDNAMES, _csv_line, calculate_integrity_hash, verify_audit_integrity
+from audit_ndjson_and_hash import append_event, get_audit_stats
+from audit_scan import chunk_spans, ndjson_stats
+
+
+@pytest.fixture
+def ndjson_log(tmp_path):
+    path = tmp_path / "audit.ndjson"
+    for i in range(40):
+        append_event({"action": f"act{i % 3}", "actor": f"user{i % 2}", "severity": "info",
+                      "ts": f"2025-01-01T00:00:{i:02d}+00:00"}, path=path, wait=True)
+    return path
+
+
+class TestChunking:
+    """개행 경계 청크 분할 테스트"""
+
+    def test_spans_should_end_on_newlines(self, tmp_path):
+        """모든 청크는 개행에서 끝나고 기록 중인 마지막 라인은 제외되어야 함"""
+        path = tmp_path / "lines.txt"
+        data = b"".join(f"line-{i}\n".encode() for i in range(100)) + b"partial"
+        path.write_bytes(data)
+
+        spans = chunk_spans(path, chunk_bytes=64)
+        assert len(spans) > 5
+        assert spans[0][0] == 0 and spans[-1][1] == len(data) - len(b"partial")
+        for (_, end), (start, _) in zip(spans, spans[1:]):
+            assert end == start and data[end - 1:end] == b"\n"
+
+        assert chunk_spans(path, chunk_bytes=64, complete_only=False)[-1][1] == len(data)
+
+
+class TestParallelStats:
+    """청크 병렬 통계 테스트"""
+
+    def test_merged_stats_should_match_index(self, ndjson_log, tmp_path):
+        """청크별 부분 집계를 병합한 결과가 인덱스 집계와 같아야 함"""
+        scanned = ndjson_stats(ndjson_log, workers=2, chunk_bytes=512)
+        index = AuditIndex(tmp_path / "index.sqlite")
+        index.ingest(ndjson_log, "ndjson")
+        indexed = index.summarize(ndjson_log)
+
+        assert scanned["total"] == indexed["total"] == 40
+        for key in ("actions", "actors", "severities", "earliest", "latest"):
+            assert scanned[key] == indexed[key]
+
+    def test_stats_should_scan_when_index_lags(self, ndjson_log, monkeypatch):
+        """인덱스 미수집분이 임계값을 넘으면 파일을 직접 스캔해 같은 통계를 반환해야 함"""
+        indexed = get_audit_stats(ndjson_log)
+        monkeypatch.setattr(audit, "SCAN_THRESHOLD", -1)
+        monkeypatch.setattr(audit_scan, "CHUNK_BYTES", 512)
+        scanned = get_audit_stats(ndjson_log, workers=2)
+        assert scanned == indexed
+
+
+class TestChunkedCsvVerify:
+    """CSV 미봉인 구간 청크 검증 테스트"""
+
+    def test_corrupted_row_numbers_should_span_chunks(self, tmp_path, monkeypatch):
+        """체크포인트 없는 CSV 를 여러 청크로 나눠 검증해도 손상 행 번호가 정확해야 함"""
+        path = tmp_path / "legacy_audit.csv"
+        lines = [_csv_line(AUDIT_FIELDNAMES)]
+        for i in range(30):
+            row = {"ts": f"2025-01-01T00:00:{i:02d}+00:00", "action": f"act{i:02d}", "actor": "tester",
+                   "detail": "{}", "risk_level": "LOW", "compliance_tags": "", "session_id": "s",
+                   "source_ip": "localhost"}
+            row["integrity_hash"] = calculate_integrity_hash(row)
+            lines.append(_csv_line([row[k] for k in AUDIT_FIELDNAMES]))
+        path.write_bytes("".join(lines).replace("act25", "act99").encode("utf-8"))
+        monkeypatch.setattr(audit_scan, "CHUNK_BYTES", 300)
+
+        result = verify_audit_integrity(path, workers=2)
+        assert result["status"] == "COMPROMISED"
+        assert result["verified_entries"] == 29
+        assert [c["row"] for c in result["corrupted_details"]] == [27]  # 헤더 = 1행
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+감사 로그 백그라운드 writer 테스트 - group commit, flush, backpressure
+"""
+
+import multiprocessing
+import threading
+
+import pytest
+
+import audit_writer
+from audit_writer import AuditWriter, AuditWriterFailed, LineFileSink
+
+
+def _append_from_process(path, worker_id, count):
+    """별도 프로세스에서 같은 파일에 배치 기록 (spawn 대상은 모듈 최상위 함수)"""
+    writer = AuditWriter(batch_size=7)
+    sink = LineFileSink(path, header="worker,seq\n")
+    for i in range(count):
+        writer.submit(sink, f"{worker_id},{i}\n")
+    writer.close()
+
+
+@pytest.fixture
+def writer():
+    w = AuditWriter(flush_interval=0.02, batch_size=64, max_queue=8)
+    yield w
+    w.close()
+
+
+class TestAuditWriter:
+    """group commit writer 테스트"""
+
+    def test_records_should_be_group_committed_in_order(self, writer, tmp_path):
+        """여러 레코드가 순서대로, 적은 수의 배치로 기록되어야 함"""
+        sink = LineFileSink(tmp_path / "audit.ndjson")
+        for i in range(50):
+            writer.submit(sink, f"{i}\n")
+        writer.flush()
+
+        lines = (tmp_path / "audit.ndjson").read_text(encoding="utf-8").splitlines()
+        assert lines == [str(i) for i in range(50)]
+        assert writer.stats["batches"] < 50
+
+    def test_csv_header_should_be_written_once(self, writer, tmp_path):
+        """CSV 헤더는 빈 파일에 한 번만 기록되어야 함"""
+        sink = LineFileSink(tmp_path / "audit.csv", header="ts,action\n")
+        writer.submit(sink, "1,a\n")
+        writer.flush()
+        writer.submit(sink, "2,b\n", wait=True)
+
+        assert (tmp_path / "audit.csv").read_text(encoding="utf-8") == "ts,action\n1,a\n2,b\n"
+
+    def test_wait_should_propagate_write_failures(self, writer, tmp_path):
+        """wait=True 제출은 기록 실패를 호출자에게 전파해야 함"""
+        class BrokenSink(LineFileSink):
+            def write_batch(self, records, fsync):
+                raise OSError("disk full")
+
+        with pytest.raises(OSError):
+            writer.submit(BrokenSink(tmp_path / "x"), "line\n", wait=True)
+
+    def test_transient_failure_should_be_retried(self, writer, tmp_path):
+        """한 번 실패한 배치는 재시도로 기록되어야 함 (기다리지 않는 제출도 유실 없음)"""
+        class FlakySink(LineFileSink):
+            failures = 1
+
+            def write_batch(self, records, fsync):
+                if self.failures:
+                    self.failures -= 1
+                    raise OSError("temporary I/O error")
+                super().write_batch(records, fsync)
+
+        writer.submit(FlakySink(tmp_path / "flaky.ndjson"), "line\n")
+        writer.flush()
+
+        assert (tmp_path / "flaky.ndjson").read_text(encoding="utf-8") == "line\n"
+        assert writer.stats["errors"] == 1 and not writer.failed
+
+    def test_persistent_failure_should_hold_records_and_reject_submits(self, writer, tmp_path, monkeypatch):
+        """재시도가 모두 실패하면 레코드를 보류하고 이후 제출은 거부, recover() 후 순서대로 기록"""
+        monkeypatch.setattr(audit_writer, "RETRY_BACKOFF", 0.001)
+
+        class DownSink(LineFileSink):
+            down = True
+
+            def write_batch(self, records, fsync):
+                if self.down:
+                    raise OSError("disk full")
+                super().write_batch(records, fsync)
+
+        sink = DownSink(tmp_path / "down.ndjson")
+        writer.submit(sink, "1\n")
+        for _ in range(500):
+            if writer.failed:
+                break
+            threading.Event().wait(0.01)
+        assert writer.failed and writer.stats["held"] == 1
+        with pytest.raises(AuditWriterFailed):
+            writer.submit(sink, "2\n")
+
+        sink.down = False
+        writer.recover()
+        writer.submit(sink, "2\n", wait=True)
+        assert (tmp_path / "down.ndjson").read_text(encoding="utf-8") == "1\n2\n"
+        assert not writer.failed and writer.stats["held"] == 0
+
+    def test_full_queue_should_apply_backpressure(self, tmp_path):
+        """큐가 가득 차면 제출자가 writer 가 비울 때까지 대기해야 함"""
+        gate = threading.Event()
+
+        class SlowSink(LineFileSink):
+            def write_batch(self, records, fsync):
+                gate.wait(5)
+                super().write_batch(records, fsync)
+
+        writer = AuditWriter(flush_interval=0.0, batch_size=1, max_queue=2)
+        sink = SlowSink(tmp_path / "slow.ndjson")
+        done = threading.Event()
+
+        def produce():
+            for i in range(6):
+                writer.submit(sink, f"{i}\n")
+            done.set()
+
+        threading.Thread(target=produce, daemon=True).start()
+        assert not done.wait(0.2)  # writer 가 막혀 있는 동안 제출자도 대기
+        gate.set()
+        assert done.wait(5)
+        writer.close()
+        assert len((tmp_path / "slow.ndjson").read_text().splitlines()) == 6
+
+    def test_sync_mode_should_write_inline(self, tmp_path):
+        """HVDC_AUDIT_ASYNC=0 에 해당하는 동기 모드는 즉시 기록해야 함"""
+        writer = AuditWriter(async_mode=False)
+        writer.submit(LineFileSink(tmp_path / "sync.ndjson"), "x\n")
+        assert (tmp_path / "sync.ndjson").read_text() == "x\n"
+
+
+class TestCrossProcessAppend:
+    """다중 프로세스(gunicorn worker) 동시 기록 테스트"""
+
+    def test_concurrent_processes_should_not_interleave(self, tmp_path):
+        """여러 프로세스가 동시에 기록해도 헤더 1회, 라인 손실/섞임이 없어야 함"""
+        path = tmp_path / "audit.csv"
+        ctx = multiprocessing.get_context("spawn")
+        procs = [ctx.Process(target=_append_from_process, args=(str(path), n, 50)) for n in range(4)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join(timeout=60)
+            assert p.exitcode == 0
+
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert lines[0] == "worker,seq"
+        assert lines.count("worker,seq") == 1
+        rows = [tuple(map(int, line.split(","))) for line in lines[1:]]
+        assert sorted(rows) == [(n, i) for n in range(4) for i in range(50)]
+        for n in range(4):
+            assert [i for w, i in rows if w == n] == list(range(50))
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+FusekiSwapManager 단위 테스트 - Fuseki 없이 HTTP 호출을 Mock으로 대체
+"""
+
+import gzip
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+
+from fuseki_swap_verify import FusekiSwapManager, UPLOAD_STATE_SUFFIX
+
+
+def _response(status_code: int = 200, payload=None) -> Mock:
+    response = Mock()
+    response.status_code = status_code
+    response.text = ""
+    response.json.return_value = payload or {}
+    return response
+
+
+@pytest.fixture
+def manager():
+    return FusekiSwapManager()
+
+
+@pytest.fixture
+def nt_file(tmp_path):
+    """10개 트리플짜리 N-Triples 파일"""
+    path = tmp_path / "sample.nt"
+    lines = [f'<http://ex/s{i}> <http://ex/p> "v{i}" .' for i in range(10)]
+    path.write_text("# header\n" + "\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+class TestStreamingUpload:
+    """대용량 TTL/N-Triples 스트리밍 업로드 테스트"""
+
+    def test_ntriples_should_be_posted_in_batches(self, manager, nt_file):
+        """N-Triples 파일은 batch_size 단위로 나뉘어 POST 되어야 함"""
+        with patch("fuseki_swap_verify.requests.post", return_value=_response(204)) as post:
+            ok = manager.upload_ttl_file_to_graph(nt_file, manager.staging_graph, batch_size=4)
+
+        assert ok
+        # DROP 1회 + 배치 3회 (4 + 4 + 2)
+        batch_calls = [c for c in post.call_args_list if c.args[0].startswith(manager.data_url)]
+        assert len(batch_calls) == 3
+        assert batch_calls[-1].kwargs["data"].count(b"\n") == 2
+        assert not nt_file.with_name(nt_file.name + UPLOAD_STATE_SUFFIX).exists()
+
+    def test_failed_upload_should_resume_from_last_batch(self, manager, nt_file):
+        """실패한 업로드는 마지막 성공 배치 이후부터 재개되어야 함"""
+        responses = [_response(204), _response(204), _response(500)]
+        with patch("fuseki_swap_verify.requests.post", side_effect=responses):
+            assert not manager.upload_ttl_file_to_graph(nt_file, manager.staging_graph, batch_size=4)
+
+        state_path = nt_file.with_name(nt_file.name + UPLOAD_STATE_SUFFIX)
+        assert json.loads(state_path.read_text())["completed"] == [0]
+
+        with patch("fuseki_swap_verify.requests.post", return_value=_response(204)) as post:
+            assert manager.upload_ttl_file_to_graph(nt_file, manager.staging_graph, batch_size=4)
+
+        # 재개 시 DROP 없이 남은 배치 2개만 전송
+        assert post.call_count == 2
+        assert not state_path.exists()
+
+    def test_parallel_upload_should_send_every_batch(self, manager, nt_file):
+        """병렬 업로드도 모든 배치를 한 번씩 전송해야 함"""
+        with patch("fuseki_swap_verify.requests.post", return_value=_response(204)) as post:
+            assert manager.upload_ttl_file_to_graph(nt_file, manager.staging_graph,
+                                                    batch_size=3, workers=3)
+
+        payloads = [c.kwargs["data"] for c in post.call_args_list if c.args[0].startswith(manager.data_url)]
+        assert sum(p.count(b"\n") for p in payloads) == 10
+
+    def test_blank_nodes_should_not_be_split_across_batches(self, manager, tmp_path):
+        """빈 노드(_:x)가 있는 N-Triples는 배치로 나누지 않고 한 번에 PUT 되어야 함"""
+        nt = tmp_path / "blank.nt"
+        lines = [f'_:b0 <http://ex/p{i}> "v{i}" .' for i in range(6)] + ['<http://ex/s> <http://ex/q> _:b0 .']
+        nt.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        bodies = []
+
+        def consume(url, data, headers, timeout):
+            bodies.append(b"".join(data))
+            return _response(201)
+
+        with patch("fuseki_swap_verify.requests.post", return_value=_response(204)) as post, \
+             patch("fuseki_swap_verify.requests.put", side_effect=consume):
+            assert manager.upload_ttl_file_to_graph(nt, manager.staging_graph, batch_size=2)
+
+        post.assert_not_called()
+        assert bodies == [nt.read_bytes()]
+
+    def test_turtle_should_be_streamed_as_generator(self, manager, tmp_path):
+        """Turtle 파일은 메모리에 올리지 않고 generator 본문으로 PUT 되어야 함"""
+        ttl = tmp_path / "sample.ttl"
+        ttl.write_text("@prefix ex: <http://ex/> .\nex:a ex:b ex:c .\n", encoding="utf-8")
+        progress = []
+
+        def consume(url, data, headers, timeout):
+            assert not isinstance(data, (bytes, str))
+            b"".join(data)
+            return _response(201)
+
+        with patch("fuseki_swap_verify.requests.put", side_effect=consume):
+            assert manager.upload_ttl_file_to_graph(ttl, manager.staging_graph,
+                                                    progress=lambda done, total: progress.append(done))
+
+        assert progress[-1] == ttl.stat().st_size
+
+
+class TestCompressedUpload:
+    """N-Triples/gzip 업로드 형식 테스트"""
+
+    def test_compressed_batches_should_be_gzip_encoded(self, manager, nt_file):
+        """compress 옵션의 배치는 gzip 본문과 Content-Encoding 헤더로 전송되어야 함"""
+        with patch("fuseki_swap_verify.requests.post", return_value=_response(204)) as post:
+            assert manager.upload_ttl_file_to_graph(nt_file, manager.staging_graph, batch_size=4, compress=True)
+
+        batch_calls = [c for c in post.call_args_list if c.args[0].startswith(manager.data_url)]
+        assert all(c.kwargs["headers"]["Content-Encoding"] == "gzip" for c in batch_calls)
+        assert sum(gzip.decompress(c.kwargs["data"]).count(b"\n") for c in batch_calls) == 10
+
+    def test_gzip_file_should_stream_as_is(self, manager, tmp_path):
+        """.nt.gz 파일은 다시 압축하지 않고 N-Triples + Content-Encoding: gzip 으로 PUT 되어야 함"""
+        path = tmp_path / "sample.nt.gz"
+        path.write_bytes(gzip.compress(b'<http://ex/s> <http://ex/p> "v" .\n'))
+        sent = {}
+
+        def consume(url, data, headers, timeout):
+            sent["body"], sent["headers"] = b"".join(data), headers
+            return _response(201)
+
+        with patch("fuseki_swap_verify.requests.put", side_effect=consume):
+            assert manager.upload_ttl_file_to_graph(path, manager.staging_graph)
+
+        assert sent["headers"] == {"Content-Type": "application/n-triples", "Content-Encoding": "gzip"}
+        assert sent["body"] == path.read_bytes()
+
+    def test_turtle_should_be_gzipped_on_the_fly(self, manager, tmp_path):
+        """compress 옵션의 Turtle 스트림은 전송 중에 gzip 으로 압축되어야 함"""
+        ttl = tmp_path / "sample.ttl"
+        ttl.write_text("@prefix ex: <http://ex/> .\nex:a ex:b ex:c .\n", encoding="utf-8")
+        sent = {}
+
+        def consume(url, data, headers, timeout):
+            sent["body"], sent["headers"] = b"".join(data), headers
+            return _response(201)
+
+        with patch("fuseki_swap_verify.requests.put", side_effect=consume):
+            assert manager.upload_ttl_file_to_graph(ttl, manager.staging_graph, compress=True)
+
+        assert sent["headers"]["Content-Encoding"] == "gzip"
+        assert gzip.decompress(sent["body"]) == ttl.read_bytes()
+
+
+def _aggregate_result(row: dict) -> dict:
+    return {"results": {"bindings": [{k: {"value": str(v)} for k, v in row.items()}]}}
+
+
+AGGREGATE_ROW = {"triples": 120, "Case": 3, "CargoItem": 5, "Invoice": 2, "HSCode": 1,
+                 "total": 3, "valid": 3, "cases": 3, "cargoItems": 5}
+
+
+class TestValidationBundle:
+    """집계 쿼리 기반 스테이징 검증 테스트"""
+
+    def test_bundle_should_validate_in_single_query(self, manager):
+        """bundle 모드는 한 번의 집계 쿼리로 모든 검사를 수행해야 함"""
+        with patch.object(manager, "execute_sparql_query",
+                          return_value=_aggregate_result(AGGREGATE_ROW)) as query:
+            result = manager.validate_staging_data(bundle=True)
+
+        assert query.call_count == 1
+        assert result["overall_status"] == "PASS"
+        assert result["checks"]["triple_count"]["count"] == 120
+        assert result["checks"]["required_classes"]["missing_classes"] == []
+        assert result["checks"]["hvdc_format"]["valid_codes"] == 3
+        assert "bundle" in result["timings_ms"]
+
+    def test_concurrent_checks_should_report_per_check_timing(self, manager):
+        """기본 모드는 검사별 쿼리를 병렬 실행하고 검사별 시간을 보고해야 함"""
+        with patch.object(manager, "execute_sparql_query",
+                          return_value=_aggregate_result(AGGREGATE_ROW)) as query:
+            result = manager.validate_staging_data()
+
+        assert query.call_count == 4
+        assert set(result["timings_ms"]) == set(result["checks"])
+
+    def test_cached_staging_count_should_not_be_recounted(self, manager):
+        """배포 중 캐시된 스테이징 트리플 수는 다시 계산하지 않아야 함"""
+        manager._count_cache = {manager.staging_graph: 42}
+        with patch.object(manager, "execute_sparql_query",
+                          return_value=_aggregate_result(AGGREGATE_ROW)) as query:
+            result = manager.validate_staging_data()
+            assert manager.get_triple_count(manager.staging_graph) == 42
+
+        assert query.call_count == 3
+        assert result["checks"]["triple_count"]["count"] == 42
+
+
+class TestPerGraphOperations:
+    """그래프별 통계/백업 병렬화 테스트"""
+
+    def test_graph_counts_should_use_single_group_by_query(self, manager):
+        """그래프별 트리플 수는 GROUP BY 쿼리 한 번으로 조회해야 함"""
+        graphs = [manager.staging_graph] + manager.production_graphs
+        result = {"results": {"bindings": [
+            {"g": {"value": manager.production_graphs[0]}, "n": {"value": "10"}},
+            {"g": {"value": manager.production_graphs[1]}, "n": {"value": "7"}},
+        ]}}
+        with patch.object(manager, "execute_sparql_query", return_value=result) as query:
+            counts = manager.get_graph_counts(graphs)
+
+        assert query.call_count == 1
+        assert "GROUP BY ?g" in query.call_args.args[0]
+        assert counts[manager.production_graphs[0]] == 10
+        assert counts[manager.staging_graph] == 0
+
+    def test_graph_counts_should_report_errors_per_graph(self, manager):
+        """쿼리 실패 시 모든 그래프를 -1로 보고해야 함"""
+        with patch.object(manager, "execute_sparql_query", return_value={"error": "HTTP 500"}):
+            counts = manager.get_graph_counts(manager.production_graphs)
+
+        assert set(counts.values()) == {-1}
+
+    def test_backup_should_copy_every_production_graph(self, manager):
+        """백업은 모든 운영 그래프를 복사해야 하며 하나라도 실패하면 실패해야 함"""
+        with patch.object(manager, "execute_sparql_update", return_value=True) as update, \
+             patch.object(manager, "get_triple_count", return_value=100):
+            assert manager.create_backup()
+
+        copied = [c.args[0] for c in update.call_args_list if "INSERT" in c.args[0]]
+        assert len(copied) == len(manager.production_graphs)
+
+        def fail_dsv(query):
+            return "graph/DSV>" not in query or "INSERT" not in query
+
+        with patch.object(manager, "execute_sparql_update", side_effect=fail_dsv), \
+             patch.object(manager, "get_triple_count", return_value=100):
+            assert not manager.create_backup()
+
+
+class TestGraphVersionPublishing:
+    """배포 후 SPARQL 캐시용 그래프 버전 갱신 테스트"""
+
+    def test_written_graphs_should_be_bumped_once(self, manager):
+        """쓰기가 발생한 그래프만 한 번씩 버전이 올라가야 함"""
+        with patch.object(manager, "execute_sparql_update", return_value=True), \
+             patch.object(manager, "get_triple_count", return_value=5), \
+             patch("fuseki_swap_verify.bump_graph_versions", return_value={}) as bump:
+            manager.swap_to_production(manager.production_graphs[0])
+            manager.clear_staging()
+            manager.publish_graph_changes()
+            manager.publish_graph_changes()
+
+        bump.assert_called_once_with(sorted([manager.production_graphs[0], manager.staging_graph]))
@@ -98,6 +98,43 @@ class TestEvidenceEndpoint:
         assert 'traces' in data
         assert 'triples' in data
 
+    def test_evidence_ndjson_should_release_slot_when_stream_setup_fails(self, client, monkeypatch):
+        """스트림 준비 중 예외가 나도 동시 실행 슬롯을 반환해야 함"""
+        import hvdc_api
+        from types import SimpleNamespace
+
+        def broken_stream(*args, **kwargs):
+            raise ValueError("SPARQL results without bindings")
+
+        monkeypatch.setattr(hvdc_api, "engine", SimpleNamespace(sparql_url="http://fuseki.invalid/hvdc/sparql"))
+        monkeypatch.setattr(hvdc_api, "stream_select", broken_stream)
+
+        with pytest.raises(ValueError):
+            client.get('/evidence/TEST_CASE_001?format=ndjson')
+
+        assert hvdc_api.sparql_limiter.active() == {}
+
+    def test_evidence_pages_should_have_stable_order(self, client, monkeypatch):
+        """페이지 조회 쿼리는 ORDER BY 뒤에 LIMIT/OFFSET 이 붙어야 함"""
+        import hvdc_api
+        from types import SimpleNamespace
+
+        queries = []
+
+        def query_fuseki(query, timeout=None):
+            queries.append(query)
+            return {"head": {"vars": ["s", "p", "o"]}, "results": {"bindings": []}}
+
+        monkeypatch.setattr(hvdc_api, "engine", SimpleNamespace(query_fuseki=query_fuseki))
+        monkeypatch.setattr(hvdc_api, "cached_query", lambda query, execute: execute(query))
+
+        response = client.get('/evidence/TEST_CASE_001?page_size=2')
+
+        assert response.status_code == 200
+        assert "error" not in response.get_json()["triples"]
+        body = " ".join(queries[0].split())
+        assert body.endswith("ORDER BY ?s ?p ?o LIMIT 3 OFFSET 0")
+
 class TestRulesEndpoint:
     """비즈니스 룰 실행 엔드포인트 테스트"""
     
@@ -180,6 +217,107 @@ class TestNLQEndpoint:
         assert 'error' in data
         assert 'unsupported NLQ' in data['error']
 
+class TestFusekiStatsCache:
+    """/fuseki/stats 캐시 테스트"""
+    
+    def test_stats_cache_should_serve_stale_value_while_revalidating(self):
+        """만료된 통계는 즉시 반환되고 백그라운드에서 갱신되어야 함"""
+        import threading
+        from hvdc_api import StatsCache
+        
+        release = threading.Event()
+        calls = []
+        
+        def loader():
+            calls.append(1)
+            if len(calls) > 1:
+                release.wait(5)
+            return {"total_triples": len(calls)}
+        
+        cache = StatsCache(loader, ttl=60)
+        assert cache.get()[0] == {"total_triples": 1}
+        
+        cache.invalidate()
+        value, info = cache.get()
+        assert value == {"total_triples": 1}  # 갱신 중에도 블로킹 없이 기존 값
+        assert info["stale"] is True
+        
+        release.set()
+        for _ in range(100):
+            if cache.get()[0]["total_triples"] == 2:
+                break
+            threading.Event().wait(0.01)
+        assert cache.get()[0] == {"total_triples": 2}
+        assert len(calls) == 2
+    
+    def test_graph_version_bump_from_other_process_should_expire_stats(self, tmp_path):
+        """다른 프로세스의 그래프 버전 증가(공유 파일)도 통계를 stale 로 만들어야 함"""
+        import threading
+        from hvdc_api import StatsCache
+        from sparql_cache import GraphVersions
+        
+        calls = []
+        
+        def loader():
+            calls.append(1)
+            return {"total_triples": len(calls)}
+        
+        cache = StatsCache(loader, ttl=60, versions=GraphVersions(tmp_path / "graph_versions.json"))
+        assert cache.get() == ({"total_triples": 1}, {"age_seconds": 0.0, "stale": False})
+        assert cache.get()[1]["stale"] is False
+        
+        # 배포한 워커의 GraphVersions 인스턴스 (같은 파일, 다른 캐시)
+        GraphVersions(tmp_path / "graph_versions.json").bump(["http://samsung.com/graph/EXTRACTED"])
+        assert cache.get()[1]["stale"] is True
+        for _ in range(100):
+            if cache.get()[0]["total_triples"] == 2:
+                break
+            threading.Event().wait(0.01)
+        assert cache.get()[0] == {"total_triples": 2}
+        assert cache.get()[1]["stale"] is False
+    
+    def test_concurrent_cold_requests_should_share_one_load(self, tmp_path):
+        """콜드 캐시에 동시 요청이 몰려도 로드는 한 번만 실행되어야 함"""
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        from hvdc_api import StatsCache
+        from sparql_cache import GraphVersions
+        
+        release = threading.Event()
+        calls = []
+        
+        def loader():
+            calls.append(1)
+            release.wait(5)
+            return {"total_triples": 42}
+        
+        cache = StatsCache(loader, ttl=60, versions=GraphVersions(tmp_path / "graph_versions.json"))
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            futures = [pool.submit(cache.get) for _ in range(8)]
+            threading.Event().wait(0.1)
+            release.set()
+            results = [f.result(5)[0] for f in futures]
+        
+        assert results == [{"total_triples": 42}] * 8
+        assert len(calls) == 1
+    
+    def test_fuseki_stats_should_return_503_when_fuseki_down(self, client):
+        """Fuseki가 내려가 있으면 503을 반환해야 함"""
+        import hvdc_api
+        from hvdc_api import StatsCache, FusekiUnavailable
+        
+        def loader():
+            raise FusekiUnavailable("Fuseki server not available")
+        
+        original = hvdc_api.fuseki_stats_cache
+        hvdc_api.fuseki_stats_cache = StatsCache(loader, ttl=60)
+        try:
+            response = client.get('/fuseki/stats')
+        finally:
+            hvdc_api.fuseki_stats_cache = original
+        
+        assert response.status_code == 503
+
 class TestBusinessRules:
     """비즈니스 룰 로직 테스트"""
     
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+파이프라인 통합/검증 테스트 - 추출 → 직렬화 → 배치 업로드, 그래프 범위 집계 검증 (Fuseki/추출기는 mock)
+"""
+
+import importlib.util
+import json
+from unittest.mock import Mock
+
+import pandas as pd
+import pytest
+
+EXTRACTED_IRI = "http://localhost:3030/hvdc/extracted"  # ?graph=extracted 를 Fuseki 가 해석한 IRI
+
+
+@pytest.fixture(scope="module")
+def demo():
+    spec = importlib.util.spec_from_file_location("hvdc_integration_demo", "hvdc-integration-demo.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def frame(source, n):
+    return pd.DataFrame({"HVDC_CODE": [f"HVDC-ADOPT-{source}-{i % 4:04d}" for i in range(n)],
+                         "SOURCE_FILE": [f"{source}.xlsx"] * n, "SHEET_NAME": ["S1"] * n,
+                         "ROW_INDEX": list(range(n)), "EXTRACT_METHOD": ["regex"] * n, "CONF": [0.9] * n,
+                         "LOGICAL_SOURCE": [source] * n})
+
+
+class FakeSession:
+    """엔진 공유 세션 대체 - POST 본문 기록, fail_at 번째 요청부터 500"""
+
+    def __init__(self, fail_at=None):
+        self.posts = []
+        self.fail_at = fail_at
+
+    def post(self, url, data, headers):
+        self.posts.append((url, data, headers))
+        failed = self.fail_at is not None and len(self.posts) >= self.fail_at
+        return Mock(status_code=500 if failed else 201, text="boom")
+
+
+@pytest.fixture
+def engine(demo, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    frames = {"OFCO": frame("OFCO", 7), "DSV": frame("DSV", 5), "PKGS": pd.DataFrame()}
+    monkeypatch.setattr(demo, "hvdc_one_line", lambda pattern: frames[pattern])
+    monkeypatch.setattr(demo, "FRAME_BATCH_ROWS", 3)
+    monkeypatch.setattr(demo, "bump_graph_versions", Mock())
+    engine = demo.HVDCIntegrationEngine(rdf_format="ntriples")
+    monkeypatch.setattr(engine, "check_fuseki_health", lambda: True)
+    monkeypatch.setattr(engine, "validate_integration", lambda *args, **kwargs: {})
+    return engine
+
+
+class TestPipelinedIntegration:
+    """파이프라인 모드 테스트"""
+
+    PATHS = {"OFCO": "OFCO", "DSV": "DSV", "PKGS": "PKGS"}
+
+    def test_pipeline_should_upload_each_batch_and_match_sequential_output(self, demo, engine):
+        """배치마다 POST, 업로드 본문 = 기록 파일, 트리플 수는 순차 모드와 동일"""
+        engine.session = session = FakeSession()
+        result = engine.run_full_integration(self.PATHS, pipelined=True)
+
+        assert result["upload_success"] is True
+        assert len(session.posts) == 3 + 2  # OFCO 7행 / DSV 5행, 배치 3행
+        # 예전 업로드 대상 그대로 (운영 그래프 http://samsung.com/graph/EXTRACTED 가 아님)
+        assert all(url.endswith("/hvdc/data?graph=extracted") for url, _, _ in session.posts)
+        assert session.posts[0][2]["Content-Type"] == "application/n-triples"
+        with open(result["ttl_filename"], "rb") as f:
+            assert f.read() == b"".join(data for _, data, _ in session.posts)
+
+        sequential = engine.write_rdf("sequential.nt", set(result["hvdc_codes"]), result["extraction_results"])
+        stages = result["pipeline"]["stages"]
+        assert result["triple_count"] == stages["upload"]["triples"] == sequential
+        assert stages["extract"]["rows"] == 12 and stages["serialize"]["items"] == 5
+        assert all(stats["busy_s"] >= 0 for stats in stages.values())
+        assert "rows_per_s" in stages["extract"] and "triples_per_s" in stages["upload"]
+        demo.bump_graph_versions.assert_called_once_with([EXTRACTED_IRI])
+
+    def test_upload_failure_should_stop_pipeline_and_roll_back_index(self, demo, engine, tmp_path):
+        """업로드 실패 시 이후 배치는 보내지 않고, IRI 인덱스는 반영하지 않아야 함"""
+        engine.iri_index = demo.IriIndex(tmp_path / "iri.sqlite", scope="hvdc/test")
+        engine.session = session = FakeSession(fail_at=1)
+        result = engine.run_full_integration(self.PATHS, pipelined=True)
+
+        assert result["upload_success"] is False
+        assert len(session.posts) == 1
+        assert result["pipeline"]["errors"] == ["upload: 500 - boom"]
+        assert len(engine.iri_index) == 0
+        demo.bump_graph_versions.assert_not_called()
+
+    def test_serializer_failure_should_not_block_extractor(self, demo, engine, monkeypatch):
+        """직렬화 실패 후에도 추출 단계가 큐에 막히지 않고 실행이 끝나야 함 (소스 수 > 큐 크기)"""
+        import threading
+        monkeypatch.setattr(demo, "hvdc_one_line", lambda pattern: frame(pattern, 2))
+        def fail_slowly(*args):
+            threading.Event().wait(0.2)  # 그 사이 추출 단계가 큐를 가득 채움
+            raise ValueError("bad code")
+        monkeypatch.setattr(engine, "write_case_triples", fail_slowly)
+        engine.session = session = FakeSession()
+        paths = {f"SRC{i}": f"SRC{i}" for i in range(3 * demo.PIPELINE_QUEUE_SIZE)}
+        result = {}
+        runner = threading.Thread(target=lambda: result.update(engine.run_full_integration(paths, pipelined=True)),
+                                  daemon=True)
+        runner.start()
+        runner.join(10)
+
+        assert not runner.is_alive()
+        assert result["upload_success"] is False
+        assert result["pipeline"]["errors"] == ["serialize: bad code"]
+        assert session.posts == []
+
+    def test_sequential_upload_should_bump_extracted_graph_version(self, demo, engine):
+        """순차 모드 업로드 성공 후 extracted 그래프 버전 증가 (캐시된 /evidence, /nlq 무효화)"""
+        engine.session = FakeSession()
+        result = engine.run_full_integration(self.PATHS)
+
+        assert result["upload_success"] is True
+        demo.bump_graph_versions.assert_called_once_with([EXTRACTED_IRI])
+
+    def test_partial_pipeline_upload_should_still_bump_graph_version(self, demo, engine):
+        """일부 배치가 이미 올라간 뒤 실패해도 그래프 내용이 바뀌었으므로 버전 증가"""
+        engine.session = FakeSession(fail_at=2)
+        result = engine.run_full_integration(self.PATHS, pipelined=True)
+
+        assert result["upload_success"] is False
+        demo.bump_graph_versions.assert_called_once_with([EXTRACTED_IRI])
+
+
+class TestValidation:
+    """검증 쿼리 테스트 (공유 세션 mock)"""
+
+    @staticmethod
+    def respond(payload):
+        return Mock(status_code=200, json=Mock(return_value=payload), text=json.dumps(payload))
+
+    def test_validation_should_run_one_scoped_count_query_and_code_list(self, demo):
+        """카운트는 대상 그래프 범위의 집계 쿼리 1개, CODE 목록과 함께 2개 요청"""
+        queries = []
+
+        def post(url, data, headers):
+            queries.append(data["query"])
+            if "COUNT" in data["query"]:
+                return self.respond({"results": {"bindings": [{
+                    "total_triples": {"value": "120"}, "case_count": {"value": "4"},
+                    "data_source_count": {"value": "12"}}]}})
+            return self.respond({"results": {"bindings": [{"code": {"value": "HVDC-ADOPT-0001"}}]}})
+        engine = demo.HVDCIntegrationEngine()
+        engine.session = Mock(post=Mock(side_effect=post))
+
+        result = engine.validate_integration()
+
+        assert len(queries) == 2
+        count_query = next(q for q in queries if "COUNT" in q)
+        assert count_query.count(f"GRAPH <{EXTRACTED_IRI}>") == 3
+        assert result["total_triples"] == 120 and result["case_count"] == 4
+        assert result["data_source_count"] == 12
+        assert result["hvdc_codes"] == ["HVDC-ADOPT-0001"]
+
+    def test_stats_only_should_not_run_queries(self, demo):
+        """stats_only 는 /$/stats 만 조회"""
+        stats = {"datasets": {"/hvdc": {"Requests": 10, "RequestsGood": 9, "RequestsBad": 1,
+                                        "endpoints": {"sparql": {"Requests": 7}, "data": {"Requests": 3}}}}}
+        engine = demo.HVDCIntegrationEngine()
+        engine.session = Mock(get=Mock(return_value=self.respond(stats)), post=Mock())
+
+        result = engine.validate_integration(stats_only=True)
+
+        engine.session.post.assert_not_called()
+        assert engine.session.get.call_args[0][0].endswith("/$/stats/hvdc")
+        assert result == {"mode": "stats", "requests": 10, "requests_good": 9, "requests_bad": 1,
+                          "endpoints": {"sparql": 7, "data": 3}}
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+NLQ Flask 래퍼 테스트 - ASK preflight 캐시, 템플릿 결과 캐시, 페이지네이션/NDJSON, 동시성 제한 (Fuseki 호출은 기록용 함수로 대체)
+"""
+
+import io
+import json
+
+import pytest
+import requests
+
+import nlq_query_wrapper_flask as wrapper
+from sparql_cache import GraphVersions, TemplateResultCache
+from sparql_stream import SelectStream
+
+NLQ = {"q": "Show invoices where BOE != CIPL for SHPT NO 0049"}
+
+
+@pytest.fixture
+def versions(tmp_path):
+    return GraphVersions(tmp_path / "graph_versions.json")
+
+
+@pytest.fixture
+def calls(monkeypatch, versions):
+    """Fuseki 대신 쿼리를 기록하고 ASK 는 true, SELECT 는 행 1개 반환"""
+    sent = []
+
+    def post(query, timeout=None):
+        sent.append(query)
+        if "ASK" in query:
+            return {"boolean": True}
+        return {"results": {"bindings": [{"invoiceNo": {"type": "literal", "value": "0049-1"}}]}}
+
+    monkeypatch.setattr(wrapper, "_post_sparql", post)
+    monkeypatch.setattr(wrapper, "template_cache", TemplateResultCache(versions=versions))
+    monkeypatch.setattr(wrapper, "_preflight_ok", {})
+    return sent
+
+
+@pytest.fixture
+def client():
+    wrapper.app.config["TESTING"] = True
+    with wrapper.app.test_client() as client:
+        yield client
+
+
+class TestPreflight:
+    """ASK preflight 테스트"""
+
+    def test_preflight_should_ask_the_core_pattern(self, calls, client):
+        """preflight 는 템플릿의 핵심 BGP 로 ASK 해야 함 (전체 데이터셋 ?s ?p ?o 아님)"""
+        assert client.post("/nlq-query", json=NLQ).status_code == 200
+        ask = calls[0]
+        assert "ASK { GRAPH ?g { ?invoice a ex:Invoice ; ex:invoiceNumber ?invoiceNo . } }" in ask
+        assert "?s ?p ?o" not in ask
+
+    def test_cached_positive_should_skip_preflight(self, calls, client):
+        """같은 intent 의 두 번째 요청은 ASK 없이 SELECT 1회 (파라미터가 달라도)"""
+        client.post("/nlq-query", json=NLQ)
+        client.post("/nlq-query", json={"q": "BOE vs CIPL mismatch for SHPT NO 0050"})
+        assert [("ASK" in q) for q in calls] == [True, False, False]
+
+        client.post("/nlq-query", json=NLQ)  # 템플릿 결과 캐시 - 추가 호출 없음
+        assert len(calls) == 3
+
+    def test_graph_version_bump_should_rerun_preflight(self, calls, client, versions):
+        """그래프 버전이 바뀌면 preflight 를 다시 실행해야 함"""
+        client.post("/nlq-query", json=NLQ)
+        versions.bump(["http://samsung.com/graph/EXTRACTED"])
+        client.post("/nlq-query", json=NLQ)
+        assert sum("ASK" in q for q in calls) == 2
+
+    def test_negative_preflight_should_not_be_cached(self, calls, client, monkeypatch):
+        """데이터가 없으면 422, 음성 결과는 캐시하지 않음"""
+        monkeypatch.setattr(wrapper, "_post_sparql", lambda q, timeout=None: calls.append(q) or {"boolean": False})
+        assert client.post("/nlq-query", json=NLQ).status_code == 422
+        assert client.post("/nlq-query", json=NLQ).status_code == 422
+        assert len(calls) == 2
+
+
+class TestPagingAndStreaming:
+    """커서 페이지네이션 + NDJSON 스트리밍 테스트"""
+
+    def test_page_should_return_next_cursor(self, calls, client, monkeypatch):
+        """page_size 만큼 행과 다음 페이지 커서, 잘못된 커서는 400"""
+        rows = [{"invoiceNo": {"type": "literal", "value": str(i)}} for i in range(5)]
+        monkeypatch.setattr(wrapper, "_post_sparql", lambda q, timeout=None: calls.append(q) or (
+            {"boolean": True} if "ASK" in q else {"results": {"bindings": rows[:3]}}))
+
+        data = client.post("/nlq-query", json={**NLQ, "page_size": 2}).get_json()["data"]
+        assert len(data["results"]["bindings"]) == 2
+        assert calls[-1].rstrip().endswith("LIMIT 3 OFFSET 0")
+        assert data["page"]["next_cursor"]
+
+        client.post("/nlq-query", json={**NLQ, "page_size": 2, "cursor": data["page"]["next_cursor"]})
+        assert calls[-1].rstrip().endswith("LIMIT 3 OFFSET 2")
+        assert client.post("/nlq-query", json={**NLQ, "cursor": "bogus"}).status_code == 400
+
+    def test_stream_should_forward_rows_as_ndjson(self, calls, client, monkeypatch):
+        """stream=true 면 application/x-ndjson 으로 head + 행 단위 전송"""
+        body = json.dumps({"head": {"vars": ["invoiceNo"]}, "results": {"bindings": [
+            {"invoiceNo": {"type": "literal", "value": str(i)}} for i in range(3)]}}).encode("utf-8")
+
+        def stream(query, timeout):
+            response = requests.Response()
+            response.status_code, response.raw = 200, io.BytesIO(body)
+            return SelectStream(response)
+
+        monkeypatch.setattr(wrapper, "stream_sparql", stream)
+        resp = client.post("/nlq-query", json={**NLQ, "stream": True})
+        assert resp.mimetype == "application/x-ndjson"
+        lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+        assert lines[0] == {"head": {"vars": ["invoiceNo"]}}
+        assert [row["invoiceNo"]["value"] for row in lines[1:]] == ["0", "1", "2"]
+
+    def test_client_over_limit_should_get_429(self, calls, client, monkeypatch):
+        """클라이언트별 동시 쿼리 한도를 넘으면 429, 슬롯은 요청 후 반환"""
+        monkeypatch.setattr(wrapper, "limiter", wrapper.ClientLimiter(max_concurrent=1))
+        wrapper.limiter.acquire("127.0.0.1")
+        assert client.post("/nlq-query", json=NLQ).status_code == 429
+        # 신뢰 프록시가 아니면 X-Client-Id 를 바꿔도 같은 클라이언트 (주소 기준)
+        assert client.post("/nlq-query", json=NLQ, headers={"X-Client-Id": "other"}).status_code == 429
+        assert wrapper.limiter.active() == {"127.0.0.1": 1}
+
+    def test_trusted_proxy_should_key_limit_on_client_id(self, calls, client, monkeypatch):
+        """SPARQL_TRUSTED_PROXIES 의 프록시 뒤에서는 X-Client-Id 별로 한도 적용"""
+        monkeypatch.setattr(wrapper, "limiter", wrapper.ClientLimiter(max_concurrent=1))
+        monkeypatch.setattr("sparql_guard.TRUSTED_PROXIES", frozenset({"127.0.0.1"}))
+        wrapper.limiter.acquire("id:dashboard")
+        assert client.post("/nlq-query", json=NLQ, headers={"X-Client-Id": "dashboard"}).status_code == 429
+        assert client.post("/nlq-query", json=NLQ, headers={"X-Client-Id": "other"}).status_code == 200
+        assert wrapper.limiter.active() == {"id:dashboard": 1}
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+NLQ 의도 분류/템플릿 테스트 - 기존 키워드 규칙 호환, 동의어/복수형/오타, 배치 API, VALUES 바인딩
+"""
+
+import pytest
+
+from nlq_to_sparql import (SPARQL_TEMPLATES, IntentMatcher, TemplateRegistry, core_pattern, detect_intent,
+                           detect_intents, extract_parameters, generate_sparql, validate_sparql)
+
+
+class TestIntentMatcher:
+    """컴파일된 의도 분류기 테스트"""
+
+    @pytest.mark.parametrize("nlq,intent", [
+        ("Show invoices where BOE != CIPL for SHPT NO 0049", "boe_cipl_mismatch"),
+        ("List all HVDC codes", "list_hvdc_codes"),
+        ("Invoice risk analysis", "invoice_risk_analysis"),
+        ("show high-risk invoice", "invoice_risk_analysis"),
+        ("Container stowage analysis for heavy cargo", "container_stowage_analysis"),
+        ("Cost deviation analysis", "cost_analysis"),
+        ("HS Code risk analysis for controlled items", "hs_code_risk"),
+        ("hello world", "unknown"),
+    ])
+    def test_existing_queries_should_keep_their_intent(self, nlq, intent):
+        """기존 substring 규칙으로 분류되던 질의는 같은 의도"""
+        assert detect_intent(nlq) == intent
+
+    @pytest.mark.parametrize("nlq,intent", [
+        ("BOE vs CIPL discrepancies for shipment 12", "boe_cipl_mismatch"),
+        ("invocie problems this week", "invoice_risk_analysis"),
+        ("contaner presure check", "container_stowage_analysis"),
+        ("price varaince report", "cost_analysis"),
+        ("restricted hs-code list", "hs_code_risk"),
+    ])
+    def test_synonyms_and_typos_should_match(self, nlq, intent):
+        """동의어, 복수형, 한 글자 오타/자리바꿈은 같은 의도로 분류"""
+        assert detect_intent(nlq) == intent
+
+    def test_short_words_should_not_be_fuzzy_matched(self):
+        """짧은 토큰은 정확히 일치해야 함 (most -> cost 오분류 방지)"""
+        assert detect_intent("most analysis") == "unknown"
+
+    def test_exact_mode_should_work_without_fuzzy(self):
+        """rapidfuzz 없이도(fuzzy=False) 정확/동의어 일치는 동작"""
+        matcher = IntentMatcher(fuzzy=False)
+        assert matcher.classify("invoice alerts") == "invoice_risk_analysis"
+        assert matcher.classify("invocie alerts") == "unknown"
+
+    def test_batch_should_match_single_detection(self):
+        """detect_intents 는 질의별 detect_intent 와 같은 결과 (중복 질의 포함)"""
+        queries = ["List all HVDC codes", "cost alert", "List all HVDC codes", "??", "BOE != CIPL"]
+        assert detect_intents(queries) == [detect_intent(q) for q in queries]
+        assert detect_intents([]) == []
+
+    def test_parameters_should_be_extracted(self):
+        """SHPT/Case/Invoice 파라미터 추출"""
+        params = extract_parameters("BOE != CIPL for SHPT NO. 0049 case HVDC-ADOPT-0001 invoice INV_7")
+        assert params == {"shpt_no": "0049", "case_id": "HVDC-ADOPT-0001", "invoice_no": "INV_7"}
+
+
+class TestTemplateRegistry:
+    """컴파일된 SPARQL 템플릿 + VALUES 바인딩 + 렌더 캐시 테스트"""
+
+    def test_parameters_should_be_bound_through_values(self):
+        """파라미터는 VALUES 행의 escape 된 리터럴로만 들어가야 함"""
+        result = generate_sparql("Show invoices where BOE != CIPL for SHPT NO 0049")
+        assert 'VALUES ?shptNo { "0049" }' in result["sparql"]
+        assert "FILTER(CONTAINS(STR(?invoiceNo), ?shptNo))" in result["sparql"]
+        assert result["params"] == {"shpt_no": "0049"}
+        assert result["graphs"] is None  # GRAPH ?g - 전체 데이터셋
+
+        injected = SPARQL_TEMPLATES.render("boe_cipl_mismatch", {"shpt_no": '1" } } DROP ALL #'})
+        assert 'VALUES ?shptNo { "1\\" } } DROP ALL #" }' in injected["sparql"]
+
+    def test_unbound_parameters_should_leave_no_clause(self):
+        """파라미터가 없거나 템플릿에 없는 파라미터는 쿼리/캐시 키에 영향이 없어야 함"""
+        plain = generate_sparql("Show invoices where BOE != CIPL")
+        assert "VALUES" not in plain["sparql"] and "?shptNo" not in plain["sparql"]
+        codes = SPARQL_TEMPLATES.render("list_hvdc_codes", {"case_id": "X1"})
+        assert codes["params"] == {}
+        assert validate_sparql(codes["sparql"])["valid"]
+
+    def test_render_should_be_cached_per_parameter_tuple(self):
+        """같은 (intent, 파라미터) 는 렌더 캐시에서 같은 쿼리 문자열을 돌려줘야 함"""
+        registry = TemplateRegistry(SPARQL_TEMPLATES.templates.values())
+        first = registry.render("boe_cipl_mismatch", {"shpt_no": "0050"})
+        second = registry.render("boe_cipl_mismatch", {"shpt_no": "0050", "invoice_no": "X"})
+        assert first["sparql"] is second["sparql"]
+        assert registry.cache_info().hits == 1
+        assert registry.render("no_such_intent", {}) is None
+
+    def test_ask_should_use_core_pattern_only(self):
+        """ASK preflight 는 OPTIONAL/BIND/FILTER/서브쿼리 앞의 트리플 패턴만 사용"""
+        ask = SPARQL_TEMPLATES.render("hs_code_risk", {})["ask"]
+        assert ask.startswith("PREFIX ex:") and "PREFIX rdfs:" in ask
+        assert ask.rstrip().endswith("ex:vatRate ?vatRate . } }")
+        assert "SELECT" not in ask and "FILTER" not in ask
+        assert core_pattern(SPARQL_TEMPLATES.templates["boe_cipl_mismatch"].body) == \
+            "?invoice a ex:Invoice ; ex:invoiceNumber ?invoiceNo ."
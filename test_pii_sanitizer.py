@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+공용 PII 마스킹 테스트 - 경로별 치환 토큰, 단일 패스 결과 동등성, 빠른 경로
+"""
+
+import re
+
+import pytest
+
+from audit_logger import sanitize_sensitive_data
+from audit_ndjson_and_hash import sanitize_event
+from pii_sanitizer import PII_PATTERNS, csv_sanitizer
+
+SAMPLES = [
+    "card 1234-5678-9012-3456 used",
+    "ssn 123-45-6789 on file",
+    "contact ops@samsung.com now",
+    "PASSWORD: hunter2 leaked",
+    "api_key=abc123 and api-key: xyz",
+    "HVDC-ADOPT-SCT-0001 qty 12 at 2025-01-01",
+]
+
+
+def _legacy_csv(text):
+    for pattern in PII_PATTERNS.values():
+        text = re.sub(pattern, '[REDACTED]', text, flags=re.IGNORECASE)
+    return text
+
+
+class TestPiiSanitizer:
+    """마스킹 규칙 테스트"""
+
+    @pytest.mark.parametrize("text", SAMPLES)
+    def test_single_pass_should_match_sequential_substitution(self, text):
+        """단일 alternation 결과가 패턴별 순차 치환과 같아야 함"""
+        assert csv_sanitizer.sanitize_string(text) == _legacy_csv(text)
+
+    def test_each_path_should_keep_its_tokens(self):
+        """CSV 는 [REDACTED] + SSN, NDJSON 은 유형별 토큰이고 SSN 은 유지해야 함"""
+        detail = {"card": "1234 5678 9012 3456", "ssn": "123-45-6789",
+                  "nested": [{"mail": "a.b@c.io"}, "password=secret"], "count": 3}
+
+        assert sanitize_sensitive_data(detail) == {
+            "card": "[REDACTED]", "ssn": "[REDACTED]",
+            "nested": [{"mail": "[REDACTED]"}, "[REDACTED]"], "count": 3}
+        assert sanitize_event(detail) == {
+            "card": "[CARD_REDACTED]", "ssn": "123-45-6789",
+            "nested": [{"mail": "[EMAIL_REDACTED]"}, "password=[REDACTED]"], "count": 3}
+
+    def test_fast_path_should_return_untouched_strings(self):
+        """숫자/@/키워드가 없는 문자열은 그대로(같은 객체) 반환해야 함"""
+        text = "validation passed for staging graph"
+        assert csv_sanitizer.sanitize_string(text) is text
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+RDF 노드 IRI 인덱스 테스트 - claim/commit/rollback, scope 분리
+"""
+
+import pandas as pd
+import pytest
+
+from rdf_iri_index import IriIndex
+
+
+@pytest.fixture
+def db(tmp_path):
+    return tmp_path / "iri_index.sqlite"
+
+
+class TestIriIndex:
+    """IRI 인덱스 테스트"""
+
+    def test_claim_should_mark_only_first_occurrence_of_new_iris(self, db):
+        """배치 안 중복과 이미 claim 한 IRI 는 False"""
+        index = IriIndex(db)
+        first = index.claim_new(pd.Series(["<a>", "<b>", "<a>"], index=[7, 8, 9]))
+        assert first.tolist() == [True, True, False]
+        assert first.index.tolist() == [7, 8, 9]
+        assert index.claim_new(pd.Series(["<b>", "<c>"])).tolist() == [False, True]
+
+    def test_only_committed_iris_should_persist(self, db):
+        """commit 전 claim 은 다른 연결에 보이지 않고, rollback 하면 다시 새 IRI"""
+        index = IriIndex(db)
+        index.claim_new(pd.Series(["<a>", "<b>"]))
+        assert len(IriIndex(db)) == 0
+        assert index.commit() == 2
+
+        index.claim_new(pd.Series(["<c>"]))
+        index.rollback()
+        other = IriIndex(db)
+        assert other.claim_new(pd.Series(["<a>", "<b>", "<c>"])).tolist() == [False, False, True]
+
+    def test_scopes_should_be_independent(self, db):
+        """scope(그래프) 별로 따로 관리, clear 는 해당 scope 만 삭제"""
+        graph_a = IriIndex(db, scope="hvdc/a")
+        graph_a.claim_new(pd.Series(["<a>"]))
+        graph_a.commit()
+
+        graph_b = IriIndex(db, scope="hvdc/b")
+        assert graph_b.claim_new(pd.Series(["<a>"])).tolist() == [True]
+        graph_b.commit()
+
+        assert graph_a.clear() == 1
+        assert len(graph_a) == 0 and len(graph_b) == 1
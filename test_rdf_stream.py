@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+스트리밍 TTL 직렬화 테스트 - 리터럴/IRI escape, 청크 flush, 통합 엔진 파일 기록
+"""
+
+import gzip
+import importlib.util
+import io
+
+import pandas as pd
+import pytest
+
+from rdf_stream import TurtleStreamWriter, decimal_literal, escape_iri, format_for_path, literal, open_rdf
+
+
+@pytest.fixture(scope="module")
+def demo():
+    spec = importlib.util.spec_from_file_location("hvdc_integration_demo", "hvdc-integration-demo.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def engine(demo):
+    return demo.HVDCIntegrationEngine()
+
+
+class TestEscaping:
+    """리터럴/IRI escape 테스트"""
+
+    def test_literal_should_escape_quotes_and_controls(self):
+        """따옴표, 역슬래시, 개행, 제어 문자는 escape 되어야 함"""
+        assert literal('say "hi"\\\n\t\x01') == '"say \\"hi\\"\\\\\\n\\t\\u0001"'
+        assert literal("2025-01-01T00:00:00", "xsd:dateTime") == '"2025-01-01T00:00:00"^^xsd:dateTime'
+        assert literal("한글 라벨") == '"한글 라벨"'
+
+    def test_iri_should_percent_encode_forbidden_chars(self):
+        """IRIREF 에 허용되지 않는 문자는 percent-encode 되어야 함"""
+        assert escape_iri('a b<c>"{x}|^`\\') == "a%20b%3Cc%3E%22%7Bx%7D%7C%5E%60%5C"
+        assert escape_iri("HVDC_ADOPT_0001") == "HVDC_ADOPT_0001"
+
+    @pytest.mark.parametrize("value,expected", [(0.95, "0.95"), (1e-7, "0.0000001"), ("n/a", "0.0"),
+                                                (float("nan"), "0.0"), (3, "3.0")])
+    def test_decimal_literal_should_be_plain_decimal(self, value, expected):
+        """xsd:decimal 은 지수 표기 없는 숫자여야 함"""
+        assert decimal_literal(value) == f'"{expected}"^^xsd:decimal'
+
+
+class TestStreamWriter:
+    """청크 단위 스트리밍 writer 테스트"""
+
+    def test_writer_should_flush_in_bounded_chunks(self):
+        """버퍼가 chunk_bytes 를 넘을 때마다 sink 로 flush 되어야 함"""
+        writes = []
+
+        class Sink(io.BytesIO):
+            def write(self, data):
+                writes.append(len(data))
+                return super().write(data)
+
+        sink = Sink()
+        with TurtleStreamWriter(sink, chunk_bytes=256) as writer:
+            for i in range(100):
+                writer.subject(f"<ex:S/{i}>", [("a", "ex:Thing"), ("rdfs:label", literal(f"item {i}"))])
+
+        assert writer.triples == 200
+        assert len(writes) > 10
+        assert max(writes) < 256 + 100  # 한 블록 이상 쌓이지 않음
+        assert sink.getvalue().decode("utf-8").count(" .\n") == 100 + 4  # 주어 블록 + @prefix
+
+
+class TestEngineSerialization:
+    """HVDCIntegrationEngine TTL 파일 기록 테스트"""
+
+    def test_write_ttl_should_stream_cases_and_links(self, engine, tmp_path):
+        """Case/소스 링크 트리플이 escape 된 채로 파일에 기록되어야 함"""
+        df = pd.DataFrame({"HVDC_CODE": ["HVDC-ADOPT-SCT-0001", 'HVDC "X"'],
+                           "SOURCE_FILE": ["C:\\data\\ofco.xlsx", "line\nbreak.xlsx"],
+                           "EXTRACT_METHOD": ["regex", "fuzzy"], "CONF": [0.95, 0.5],
+                           "LOGICAL_SOURCE": ["OFCO", "OFCO"]})
+        path = tmp_path / "out.ttl"
+        triples = engine.write_ttl(path, set(df["HVDC_CODE"]), {"OFCO": df})
+
+        text = path.read_text(encoding="utf-8")
+        assert triples == 5 + 2 * 5 + 4 + 2 * 7  # 스키마 + Case + 스키마 + 링크
+        assert text.startswith("@prefix ex: <http://samsung.com/project-logistics#> .")
+        assert '<ex:Case/HVDC_%22X%22> a ex:Case' in text
+        assert 'ex:caseNumber "HVDC \\"X\\""' in text
+        assert 'ex:sourceFile "C:/data/ofco.xlsx"' in text
+        assert 'ex:sourceFile "line\\nbreak.xlsx"' in text
+
+    def test_vectorized_batches_should_match_row_blocks(self, demo, engine, monkeypatch):
+        """배치 경계와 무관하게 행 단위 subject() 와 같은 블록, 추출 시각은 배치당 1개"""
+        monkeypatch.setattr(demo, "FRAME_BATCH_ROWS", 3)
+        df = pd.DataFrame({"HVDC_CODE": [f"HVDC-ADOPT-{i:04d}" for i in range(7)] + [None],
+                           "SOURCE_FILE": [f"dir\\f{i}.xlsx" for i in range(8)],
+                           "EXTRACT_METHOD": ["regex"] * 8, "CONF": [0.9] * 7 + [float("nan")]})
+        links = engine.generate_source_link_triples({"DSV": df})
+        assert links.count("a ex:DataSource ;") == 7  # HVDC_CODE 없는 행 제외
+
+        uri = engine._source_uris("DSV", df.iloc[[4]])[0].iloc[0]
+        expected = io.BytesIO()
+        with TurtleStreamWriter(expected, prefixes={}) as writer:
+            writer.subject(uri, [
+                ("a", "ex:DataSource"), ("rdfs:label", literal("DSV extraction 4")),
+                ("ex:belongsToCase", "<ex:Case/HVDC_ADOPT_0004>"), ("ex:sourceFile", literal("dir/f4.xlsx")),
+                ("ex:extractMethod", literal("regex")), ("ex:confidence", decimal_literal(0.9)),
+                ("ex:logicalSource", literal(""))])
+        assert expected.getvalue().decode("utf-8").strip() in links
+
+        cases = engine.generate_case_triples(set(df["HVDC_CODE"].dropna()))
+        stamps = {line for line in cases.splitlines() if "ex:extractedDate" in line}
+        assert cases.count("a ex:Case ;") == 7
+        assert len(stamps) <= 3
+
+
+class TestDeterministicIri:
+    """결정적 DataSource IRI + IRI 인덱스 중복 제거 테스트"""
+
+    @staticmethod
+    def frame(index):
+        return pd.DataFrame({"HVDC_CODE": ["HVDC-ADOPT-SCT-0001", "HVDC-ADOPT-SCT-0001", "HVDC-ADOPT-SCT-0002"],
+                             "SOURCE_FILE": ["C:\\data\\ofco.xlsx"] * 3, "SHEET_NAME": ["Jan", "Feb", "Jan"],
+                             "ROW_INDEX": [3, 3, None], "EXTRACT_METHOD": ["regex"] * 3, "CONF": [0.9] * 3,
+                             "LOGICAL_SOURCE": ["OFCO"] * 3}, index=index)
+
+    def test_source_iri_should_not_depend_on_frame_index(self, engine):
+        """같은 (소스, 파일, 시트, 행, 코드) 는 DataFrame 인덱스와 무관하게 같은 IRI"""
+        first, rows = engine._source_uris("OFCO", self.frame([0, 1, 2]))
+        again, _ = engine._source_uris("OFCO", self.frame([10, 11, 12]))
+        assert first.tolist() == again.tolist()
+        assert first.nunique() == 3
+        assert first.iloc[0].startswith("<ex:DataSource/OFCO_") and first.iloc[0].endswith(">")
+        assert rows.tolist() == ["3", "3", ""]
+
+    def test_repeat_ingest_should_emit_no_new_nodes(self, demo, tmp_path):
+        """인덱스 commit 후 같은 추출 결과를 다시 기록하면 Case/DataSource 블록이 없어야 함"""
+        index = demo.IriIndex(tmp_path / "iri.sqlite", scope="hvdc/test")
+        engine = demo.HVDCIntegrationEngine(iri_index=index)
+        df = self.frame([0, 1, 2])
+
+        first = engine.write_rdf(tmp_path / "first.nt", set(df["HVDC_CODE"]), {"OFCO": df})
+        index.commit()
+        second = engine.write_rdf(tmp_path / "second.nt", set(df["HVDC_CODE"]), {"OFCO": self.frame([5, 6, 7])})
+
+        schema = 5 + 4
+        assert first == schema + 2 * 5 + 3 * 7
+        assert second == schema
+        assert (index.claimed, index.skipped) == (5, 5)
+        assert len(index) == 5
+
+
+class TestNTriplesOutput:
+    """N-Triples / gzip N-Triples 출력 테스트"""
+
+    @pytest.mark.parametrize("name,fmt", [("a.ttl", "turtle"), ("a.nt", "ntriples"), ("A.NT.GZ", "ntriples-gzip"),
+                                          ("a.ttl.gz", "turtle-gzip"), ("a.trdf", "thrift"), ("a.rdf", "turtle")])
+    def test_format_should_follow_suffix(self, name, fmt):
+        assert format_for_path(name) == fmt
+
+    def test_ntriples_should_expand_terms_one_per_line(self, engine, tmp_path):
+        """N-Triples 는 prefixed name 없이 한 줄에 트리플 하나, gzip 본은 같은 내용이어야 함"""
+        df = pd.DataFrame({"HVDC_CODE": ["HVDC-ADOPT-SCT-0001", "HVDC-ADOPT-SCT-0002"],
+                           "SOURCE_FILE": ["a.xlsx", "b.xlsx"], "EXTRACT_METHOD": ["regex", "regex"],
+                           "CONF": [0.95, 0.5], "LOGICAL_SOURCE": ["OFCO", "OFCO"]})
+        codes = set(df["HVDC_CODE"])
+        triples = engine.write_rdf(tmp_path / "out.nt", codes, {"OFCO": df})
+        engine.write_rdf(tmp_path / "out.nt.gz", codes, {"OFCO": df})
+
+        lines = (tmp_path / "out.nt").read_text(encoding="utf-8").splitlines()
+        assert len(lines) == triples
+        assert all(line.startswith("<") and line.endswith(" .") for line in lines)
+        uri = engine._source_uris("OFCO", df.iloc[[1]])[0].iloc[0]
+        assert (f"{uri} <http://samsung.com/project-logistics#confidence> "
+                '"0.5"^^<http://www.w3.org/2001/XMLSchema#decimal> .') in lines
+        assert ("<ex:Case/HVDC_ADOPT_SCT_0001> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> "
+                "<http://samsung.com/project-logistics#Case> .") in lines
+        assert sum("extractedDate" in line for line in lines) == 2
+
+        unzipped = gzip.decompress((tmp_path / "out.nt.gz").read_bytes()).decode("utf-8").splitlines()
+        strip_dates = lambda rows: [r for r in rows if "extractedDate" not in r]  # noqa: E731
+        assert strip_dates(unzipped) == strip_dates(lines)
+
+    def test_thrift_output_should_be_rejected(self, tmp_path):
+        """RDF-Thrift 는 생성하지 않고 명확한 오류를 내야 함"""
+        with pytest.raises(ValueError, match="RDF-Thrift"):
+            open_rdf(tmp_path / "out.trdf")
+
+    def test_nquads_should_tag_lines_with_graph(self, engine, tmp_path):
+        """N-Quads 는 N-Triples 줄 끝에 그래프 IRI 가 붙어야 함"""
+        df = pd.DataFrame({"HVDC_CODE": ["HVDC-ADOPT-SCT-0001"], "SOURCE_FILE": ["a.xlsx"],
+                           "EXTRACT_METHOD": ["regex"], "CONF": [0.95], "LOGICAL_SOURCE": ["OFCO"]})
+        with open_rdf(tmp_path / "out.nq", graph="http://samsung.com/graph/OFCO") as writer:
+            engine.write_case_triples(writer, set(df["HVDC_CODE"]))
+            writer.set_graph(None)
+            engine.write_source_link_triples(writer, {"OFCO": df})
+
+        lines = (tmp_path / "out.nq").read_text(encoding="utf-8").splitlines()
+        tagged = [line for line in lines if line.endswith(" <http://samsung.com/graph/OFCO> .")]
+        assert len(lines) == writer.triples
+        assert len(lines) - len(tagged) == 4 + 7  # 기본 그래프: 링크 스키마 + 링크 1행
+        assert format_for_path("out.nq.gz") == "nquads-gzip"
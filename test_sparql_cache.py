@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+SPARQL 결과 캐시 테스트 - 정규화 키, 그래프 버전 무효화, LRU 바이트 한도, 디스크 계층
+"""
+
+import multiprocessing
+import os
+
+import pytest
+
+from sparql_cache import GraphVersions, SparqlResultCache, TemplateResultCache, graphs_in_query, normalize_query
+
+QUERY = """
+PREFIX ex: <http://samsung.com/project-logistics#>
+SELECT ?case WHERE {
+  GRAPH <http://samsung.com/graph/EXTRACTED> {
+    ?case a ex:Case .   # 케이스만
+    FILTER(CONTAINS(STR(?case), "A  B"))
+  }
+} LIMIT 10
+"""
+
+
+def _bump_from_process(path, count):
+    """별도 프로세스에서 같은 그래프 버전을 반복 증가 (spawn 대상은 모듈 최상위 함수)"""
+    versions = GraphVersions(path)
+    for _ in range(count):
+        versions.bump(["http://samsung.com/graph/EXTRACTED"])
+
+
+@pytest.fixture
+def versions(tmp_path):
+    return GraphVersions(tmp_path / "graph_versions.json")
+
+
+class TestQueryNormalization:
+    """쿼리 정규화 테스트"""
+
+    def test_normalize_should_ignore_comments_and_whitespace_but_keep_literals(self):
+        """주석/공백은 무시하되 리터럴과 IRI의 '#'은 보존해야 함"""
+        compact = ' '.join(QUERY.replace("# 케이스만", "").split()).replace('"A B"', '"A  B"')
+        assert normalize_query(QUERY) == normalize_query(compact)
+        assert '"A  B"' in normalize_query(QUERY)
+        assert "<http://samsung.com/project-logistics#>" in normalize_query(QUERY)
+
+    def test_graphs_in_query_should_detect_scope(self):
+        """명시 그래프는 해당 그래프만, GRAPH ?g는 전체 데이터셋으로 판단해야 함"""
+        assert graphs_in_query(QUERY) == ("http://samsung.com/graph/EXTRACTED",)
+        assert graphs_in_query("SELECT * WHERE { GRAPH ?g { ?s ?p ?o } }") is None
+
+
+class TestSparqlResultCache:
+    """결과 캐시 동작 테스트"""
+
+    def test_repeat_query_should_hit_cache_until_graph_version_bumps(self, versions):
+        """그래프 버전이 바뀌기 전까지는 캐시, 바뀌면 재실행해야 함"""
+        cache = SparqlResultCache(versions=versions)
+        calls = []
+
+        def execute(query):
+            calls.append(query)
+            return {"results": {"bindings": [{"n": len(calls)}]}}
+
+        first = cache.get_or_execute(QUERY, execute)
+        assert cache.get_or_execute("  " + QUERY, execute) == first
+        assert len(calls) == 1
+
+        versions.bump(["http://samsung.com/graph/OFCO"])  # 다른 그래프 - 영향 없음
+        cache.get_or_execute(QUERY, execute)
+        assert len(calls) == 1
+
+        versions.bump(["http://samsung.com/graph/EXTRACTED"])
+        cache.get_or_execute(QUERY, execute)
+        assert len(calls) == 2
+
+    def test_errors_should_not_be_cached(self, versions):
+        """에러/빈 결과는 캐시하지 않아야 함"""
+        cache = SparqlResultCache(versions=versions)
+        cache.get_or_execute(QUERY, lambda q: {"error": "HTTP 500"})
+        assert cache.get(QUERY) is None
+
+    def test_lru_should_respect_byte_budget(self, versions):
+        """총 바이트 한도를 넘으면 가장 오래된 항목부터 제거해야 함"""
+        cache = SparqlResultCache(max_bytes=400, versions=versions)
+        for i in range(10):
+            cache.put(f"SELECT * WHERE {{ ?s ?p {i} }}", {"rows": "x" * 50})
+
+        info = cache.info()
+        assert info["bytes"] <= 400
+        assert info["evictions"] > 0
+        assert cache.get("SELECT * WHERE { ?s ?p 9 }") is not None
+        assert cache.get("SELECT * WHERE { ?s ?p 0 }") is None
+
+    def test_disk_tier_should_survive_new_process(self, versions, tmp_path):
+        """디스크 계층은 새 캐시 인스턴스(프로세스)에서도 재사용되어야 함"""
+        disk = tmp_path / "cache"
+        SparqlResultCache(disk_dir=str(disk), versions=versions).put(QUERY, {"boolean": True})
+
+        fresh = SparqlResultCache(disk_dir=str(disk), versions=GraphVersions(versions.path))
+        assert fresh.get(QUERY) == {"boolean": True}
+        assert fresh.info()["disk_hits"] == 1
+
+
+class TestCrossProcessBump:
+    """다중 프로세스 버전 증가 테스트"""
+
+    def test_concurrent_bumps_should_not_lose_increments(self, tmp_path):
+        """여러 프로세스가 동시에 bump 해도 증가분이 모두 반영되어야 함"""
+        path = tmp_path / "graph_versions.json"
+        ctx = multiprocessing.get_context("spawn")
+        procs = [ctx.Process(target=_bump_from_process, args=(str(path), 25)) for _ in range(4)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join(timeout=60)
+            assert p.exitcode == 0
+
+        assert GraphVersions(path).snapshot() == {"http://samsung.com/graph/EXTRACTED": 100}
+
+    def test_snapshot_should_see_bump_within_same_mtime(self, tmp_path):
+        """mtime 해상도 안에서 다른 프로세스가 bump 해도 새 버전을 읽어야 함"""
+        path = tmp_path / "graph_versions.json"
+        reader, writer = GraphVersions(path), GraphVersions(path)
+        writer.bump(["http://samsung.com/graph/EXTRACTED"])
+        assert reader.snapshot() == {"http://samsung.com/graph/EXTRACTED": 1}
+
+        before = path.stat()
+        writer.bump(["http://samsung.com/graph/EXTRACTED"])
+        os.utime(path, ns=(before.st_atime_ns, before.st_mtime_ns))  # 거친 mtime 흉내
+
+        assert reader.snapshot() == {"http://samsung.com/graph/EXTRACTED": 2}
+
+
+class TestTemplateResultCache:
+    """템플릿별 결과 캐시 테스트"""
+
+    def test_same_parameters_should_hit_until_graph_version_bumps(self, versions):
+        """같은 템플릿+파라미터는 캐시, 템플릿 그래프 버전이 바뀌면 재실행해야 함"""
+        cache = TemplateResultCache(versions=versions)
+        calls = []
+
+        def execute(query):
+            calls.append(query)
+            return {"results": {"bindings": [{"n": len(calls)}]}}
+
+        graphs = ("http://samsung.com/graph/EXTRACTED",)
+        first = cache.get_or_execute("boe_cipl_mismatch", {"shpt_no": "0049"}, QUERY, execute, graphs)
+        assert cache.get_or_execute("boe_cipl_mismatch", {"shpt_no": "0049"}, QUERY, execute, graphs) == first
+        cache.get_or_execute("boe_cipl_mismatch", {"shpt_no": "0050"}, QUERY, execute, graphs)
+        assert len(calls) == 2
+
+        versions.bump(list(graphs))
+        cache.get_or_execute("boe_cipl_mismatch", {"shpt_no": "0049"}, QUERY, execute, graphs)
+        assert len(calls) == 3
+        assert cache.info()["boe_cipl_mismatch"]["hits"] == 1
+
+    def test_templates_should_have_separate_budgets(self, versions):
+        """무거운 템플릿은 자기 항목만 밀어내야 함"""
+        cache = TemplateResultCache(max_bytes_per_template=400, versions=versions)
+        cache.get_or_execute("dashboard", {}, QUERY, lambda q: {"rows": "x" * 50})
+        for i in range(10):
+            cache.get_or_execute("heavy", {"i": str(i)}, QUERY, lambda q: {"rows": "y" * 50})
+
+        info = cache.info()
+        assert info["heavy"]["evictions"] > 0
+        assert info["dashboard"]["entries"] == 1
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+SPARQL 비용 가드 테스트 - 비용 점수, LIMIT 재작성/거부, 서버측 타임아웃, 클라이언트별 동시성 제한
+"""
+
+import pytest
+
+from nlq_to_sparql import SPARQL_TEMPLATES, validate_sparql
+from sparql_guard import (COST_REJECT, COST_WARN, HEAVY_QUERY_TIMEOUT, ClientLimiter, QueryRejected,
+                          TooManyQueries, client_key, estimate_cost, guard_query, timeout_for)
+
+SCAN_QUERY = 'SELECT ?s ?p ?o WHERE { GRAPH ?g { ?s ?p ?o . FILTER(CONTAINS(STR(?s), "OFCO")) } }'
+
+
+class TestCostEstimate:
+    """정적 비용 추정 테스트"""
+
+    def test_unbounded_filtered_scan_should_be_rejected(self):
+        """GRAPH ?g 전체 스캔 + CONTAINS 필터 + LIMIT 없음은 거부 수준"""
+        cost = estimate_cost(SCAN_QUERY)
+        assert cost.features["full_scans"] == 1 and cost.features["filtered_scans"] == 1
+        assert cost.score >= COST_REJECT
+        with pytest.raises(QueryRejected, match="filtered_scans=1"):
+            guard_query(SCAN_QUERY)
+
+    def test_joined_pattern_should_not_count_as_scan(self):
+        """?s 가 다른 패턴에 묶인 ?s ?p ?o 는 전체 스캔이 아님"""
+        cost = estimate_cost('SELECT ?s ?p ?o WHERE { GRAPH ?g { ?s ex:logicalSource "OFCO" . ?s ?p ?o } }')
+        assert cost.features["full_scans"] == 0
+        assert cost.features["patterns"] == 2
+        assert cost.score < COST_WARN
+
+    def test_keywords_inside_literals_should_be_ignored(self):
+        """리터럴/IRI 안의 키워드는 점수에 영향 없음"""
+        cost = estimate_cost('SELECT ?s WHERE { ?s ex:note "OPTIONAL { REGEX( SELECT" } LIMIT 5')
+        assert cost.features["optionals"] == cost.features["text_filters"] == cost.features["subqueries"] == 0
+
+    def test_nested_optionals_should_cost_more(self):
+        """OPTIONAL 중첩 깊이는 제곱으로 가중"""
+        flat = estimate_cost("SELECT * { ?a ex:p ?b OPTIONAL { ?b ex:q ?c } OPTIONAL { ?b ex:r ?d } } LIMIT 1")
+        nested = estimate_cost("SELECT * { ?a ex:p ?b OPTIONAL { ?b ex:q ?c OPTIONAL { ?c ex:r ?d } } } LIMIT 1")
+        assert (flat.features["optional_depth"], nested.features["optional_depth"]) == (1, 2)
+        assert nested.score > flat.score
+
+    @pytest.mark.parametrize("intent", sorted(SPARQL_TEMPLATES.templates))
+    def test_nlq_templates_should_stay_below_warning(self, intent):
+        """NLQ 템플릿과 preflight ASK 는 경고 수준 미만"""
+        template = SPARQL_TEMPLATES.templates[intent]
+        assert estimate_cost(template.render(())).score < COST_WARN
+        assert estimate_cost(template.ask).score < COST_WARN
+        assert validate_sparql(template.render(()))["valid"]
+
+
+class TestGuard:
+    """재작성/타임아웃/동시성 제한 테스트"""
+
+    def test_missing_limit_should_be_added(self):
+        """LIMIT 없는 쿼리는 max_rows 로 재작성 후 점수 계산"""
+        query, cost = guard_query("SELECT ?s WHERE { ?s a ex:Case }", max_rows=1000)
+        assert query.endswith("\nLIMIT 1000")
+        assert cost.features["no_limit"] == 0
+
+    def test_heavy_queries_should_get_short_timeout(self):
+        """경고 수준 이상은 짧은 서버측 타임아웃"""
+        _, cost = guard_query(SCAN_QUERY + " LIMIT 500")
+        assert COST_WARN <= cost.score < COST_REJECT
+        assert timeout_for(cost, 30) == min(30, HEAVY_QUERY_TIMEOUT)
+        assert timeout_for(estimate_cost("ASK { ?s a ex:Case }"), 30) == 30
+
+    def test_limiter_should_cap_each_client_separately(self):
+        """클라이언트별 한도 초과는 즉시 실패, 다른 클라이언트는 영향 없음"""
+        limiter = ClientLimiter(max_concurrent=2)
+        limiter.acquire("a")
+        with limiter.slot("a"):
+            with pytest.raises(TooManyQueries):
+                limiter.acquire("a")
+            with limiter.slot("b"):
+                assert limiter.active() == {"a": 2, "b": 1}
+        limiter.release("a")
+        assert limiter.active() == {}
+
+    def test_client_id_header_should_be_trusted_only_from_allowed_proxies(self):
+        """직접 접속한 호출자의 X-Client-Id 는 무시 (매 요청 새 id 로 한도 우회 방지)"""
+        assert client_key("10.0.0.5", "dashboard", trusted_proxies=()) == "10.0.0.5"
+        assert client_key("10.0.0.5", "other", trusted_proxies=()) == "10.0.0.5"
+        assert client_key("10.0.0.1", "dashboard", trusted_proxies={"10.0.0.1"}) == "id:dashboard"
+        assert client_key("10.0.0.1", None, trusted_proxies={"10.0.0.1"}) == "10.0.0.1"
+        assert client_key(None) == "anonymous"
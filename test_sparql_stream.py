@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+SPARQL 결과 스트리밍/페이지네이션 테스트 - 증분 JSON/TSV 파싱, NDJSON, LIMIT/OFFSET 커서
+"""
+
+import json
+
+import pytest
+
+from sparql_stream import (SelectStream, decode_cursor, encode_cursor, fetch_page, iter_json_rows, iter_tsv_rows,
+                           ndjson_lines, page_query, parse_term)
+
+RESULT = {
+    "head": {"vars": ["s", "label"]},
+    "results": {"bindings": [
+        {"s": {"type": "uri", "value": f"http://ex/{i}"},
+         "label": {"type": "literal", "value": f'행 {i} "q" ]}}', "xml:lang": "ko"}}
+        for i in range(50)
+    ]}
+}
+
+
+class FakeResponse:
+    """requests.Response 의 iter_content/close 만 가진 응답 (청크 크기 고정)"""
+
+    def __init__(self, body: bytes, chunk: int = 7):
+        self.body = body
+        self.chunk = chunk
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), self.chunk):
+            yield self.body[start:start + self.chunk]
+
+    def close(self):
+        self.closed = True
+
+
+def chunked(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestIncrementalParsing:
+    """증분 파서 테스트"""
+
+    @pytest.mark.parametrize("size", [1, 5, 64, 1 << 20])
+    def test_json_rows_should_match_full_parse_for_any_chunking(self, size):
+        """청크 경계(UTF-8 멀티바이트 포함)와 무관하게 전체 파싱과 같은 행"""
+        body = json.dumps(RESULT, ensure_ascii=False, indent=1).encode("utf-8")
+        rows = iter_json_rows(chunked(body, size))
+        assert next(rows) == ["s", "label"]
+        assert list(rows) == RESULT["results"]["bindings"]
+
+    def test_json_without_bindings_should_fail(self):
+        """ASK 결과 등 bindings 가 없으면 명확한 오류"""
+        with pytest.raises(ValueError, match="without bindings"):
+            next(iter_json_rows([b'{"head": {}, "boolean": true}']))
+
+    def test_truncated_json_should_fail(self):
+        """응답이 중간에 끊기면 조용히 끝나지 않고 오류"""
+        body = json.dumps(RESULT).encode("utf-8")[:-40]
+        with pytest.raises(ValueError, match="Truncated"):
+            list(iter_json_rows(chunked(body, 16)))
+
+    def test_tsv_rows_should_keep_term_types(self):
+        """TSV 항목은 IRI/리터럴/언어/데이터타입/빈 노드/미바인딩을 구분해야 함"""
+        body = ('?s\t?o\t?n\n'
+                '<http://ex/1>\t"a\\tb \\"q\\" \\u00e9"@en\t12\n'
+                '_:b0\t"2025-01-01"^^<http://www.w3.org/2001/XMLSchema#date>\t\n'
+                '<http://ex/2>\t"한글"\t1.5').encode("utf-8")
+        rows = iter_tsv_rows(chunked(body, 3))
+        assert next(rows) == ["s", "o", "n"]
+        first, second, third = list(rows)
+        assert first["o"] == {"type": "literal", "value": 'a\tb "q" é', "xml:lang": "en"}
+        assert first["n"]["datatype"].endswith("#integer")
+        assert second["s"] == {"type": "bnode", "value": "b0"}
+        assert second["o"]["datatype"].endswith("#date") and "n" not in second
+        assert third["o"] == {"type": "literal", "value": "한글"}
+        assert parse_term("1.5e3")["datatype"].endswith("#double")
+
+    def test_ndjson_should_stream_head_then_rows_and_close(self):
+        """NDJSON 은 head 한 줄 + 행마다 한 줄, 다 읽으면 연결을 닫아야 함"""
+        response = FakeResponse(json.dumps(RESULT).encode("utf-8"))
+        stream = SelectStream(response)
+        lines = [json.loads(line) for line in ndjson_lines(stream)]
+        assert lines[0] == {"head": {"vars": ["s", "label"]}}
+        assert lines[1:] == RESULT["results"]["bindings"]
+        assert stream.rows == 50 and response.closed
+
+
+class TestPagination:
+    """LIMIT/OFFSET 커서 페이지네이션 테스트"""
+
+    QUERY = "SELECT ?s WHERE { ?s ?p ?o } ORDER BY ?s LIMIT 25"
+
+    def test_page_query_should_stay_inside_query_limit(self):
+        """쿼리 자체 LIMIT/OFFSET 범위를 넘지 않아야 함"""
+        assert page_query(self.QUERY, 20, 10).endswith("ORDER BY ?s\nLIMIT 5 OFFSET 20")
+        assert page_query("SELECT * { ?s ?p ?o } OFFSET 3 LIMIT 10", 4, 2).endswith("\nLIMIT 2 OFFSET 7")
+        assert page_query("SELECT * { { SELECT ?s { ?s ?p ?o } LIMIT 5 } }", 0, 2).endswith("} }\nLIMIT 2 OFFSET 0")
+
+    def test_cursor_should_be_bound_to_query(self):
+        """다른 쿼리의 커서나 손상된 커서는 거부"""
+        cursor = encode_cursor(self.QUERY, 10)
+        assert decode_cursor(cursor, "  " + self.QUERY) == 10
+        with pytest.raises(ValueError):
+            decode_cursor(cursor, "SELECT ?x WHERE { ?x ?p ?o }")
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor", self.QUERY)
+
+    def test_fetch_page_should_walk_all_rows(self):
+        """next_cursor 를 따라가면 LIMIT 까지 모든 행을 한 번씩 받아야 함"""
+        rows = [{"s": {"type": "uri", "value": f"http://ex/{i}"}} for i in range(40)]
+
+        def execute(query):
+            limit, offset = (int(v) for v in query.rsplit("LIMIT ", 1)[1].split(" OFFSET "))
+            return {"head": {"vars": ["s"]}, "results": {"bindings": rows[offset:offset + limit]}}
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            page = fetch_page(self.QUERY, execute, cursor, page_size=10)
+            seen.extend(page["results"]["bindings"])
+            pages += 1
+            cursor = page["page"]["next_cursor"]
+            if not cursor:
+                break
+        assert seen == rows[:25]
+        assert pages == 3
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+오프라인 TDB2 벌크 로드 테스트 - N-Quads 변환, 서버 실행 중 거부, 디렉터리 교체/롤백
+(java 실행은 subprocess.run 을 mock 으로 대체)
+"""
+
+import gzip
+import subprocess
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+
+import tdb_bulk_load
+from tdb_bulk_load import TdbBulkLoader, write_nquads
+
+
+@pytest.fixture
+def fuseki_home(tmp_path):
+    home = tmp_path / "fuseki"
+    (home / "data" / "tdb-hvdc").mkdir(parents=True)
+    (home / "data" / "tdb-hvdc" / "Data-0001").write_text("old")
+    (home / "fuseki-server.jar").write_bytes(b"")
+    return home
+
+
+@pytest.fixture
+def server_down():
+    with patch.object(tdb_bulk_load.requests, "get", side_effect=requests.ConnectionError()):
+        yield
+
+
+def fake_java(counts_csv="g,n\n,2\nhttp://samsung.com/graph/OFCO,3\n", fail_on=None):
+    """tdbloader 는 --loc 디렉터리 생성, tdbquery 는 CSV 반환"""
+    calls = []
+
+    def run(cmd, **kwargs):
+        calls.append(cmd)
+        command = cmd[cmd.index("-cp") + 2]
+        if command == fail_on:
+            raise subprocess.CalledProcessError(1, cmd, stderr="parse error")
+        loc = cmd[cmd.index("--loc") + 1]
+        if command == "tdb2.tdbloader":
+            (tdb_bulk_load.Path(loc) / "Data-0001").mkdir(parents=True, exist_ok=True)
+            return Mock(stdout="")
+        return Mock(stdout=counts_csv)
+    run.calls = calls
+    return run
+
+
+class TestNQuadsExport:
+    """N-Triples -> N-Quads 변환 테스트"""
+
+    def test_ntriples_sources_should_be_tagged_with_graph(self, tmp_path):
+        """.nt/.nt.gz 줄에 그래프 IRI 가 붙고, Turtle 은 로더 직접 입력으로 남아야 함"""
+        (tmp_path / "a.nt").write_text("# comment\n<s:1> <p:1> \"x .\" .\n\n<s:2> <p:1> <o:1>.\n")
+        (tmp_path / "b.nt.gz").write_bytes(gzip.compress(b"<s:3> <p:1> <o:2> .\n"))
+        (tmp_path / "c.ttl").write_text("@prefix ex: <ex:> .\n")
+        (tmp_path / "d.nq").write_text("<s:4> <p:1> <o:3> <g:x> .\n")
+
+        out = tmp_path / "all.nq"
+        counts, direct = write_nquads({"http://g/A": tmp_path / "a.nt", "default": tmp_path / "b.nt.gz",
+                                       "http://g/C": tmp_path / "c.ttl"}, out, [tmp_path / "d.nq"])
+
+        assert counts == {"http://g/A": 2, "default": 1}
+        assert direct == [("http://g/C", tmp_path / "c.ttl")]
+        assert out.read_text().splitlines() == [
+            '<s:1> <p:1> "x ." <http://g/A> .',
+            "<s:2> <p:1> <o:1> <http://g/A> .",
+            "<s:3> <p:1> <o:2> .",
+            "<s:4> <p:1> <o:3> <g:x> .",
+        ]
+
+    def test_blank_nodes_should_stay_distinct_per_source(self, tmp_path):
+        """소스가 다르면 같은 _:x 라벨도 다른 노드로 남고, 줄 끝 주석은 제거되어야 함"""
+        (tmp_path / "a.nt").write_text('_:b1 <p:1> "a # not a comment" . # trailing\n'
+                                       '<s:1> <p:2> _:b1.\n')
+        (tmp_path / "b.nt").write_text("_:b1 <p:1> <o:1> .\n")
+        (tmp_path / "c.nq").write_text("_:b1 <p:1> <o:2> <g:x> . # copied\n")
+
+        out = tmp_path / "all.nq"
+        counts, _ = write_nquads({"http://g/A": tmp_path / "a.nt", "http://g/B": tmp_path / "b.nt"},
+                                 out, [tmp_path / "c.nq"])
+
+        assert counts == {"http://g/A": 2, "http://g/B": 1}
+        assert out.read_text().splitlines() == [
+            '_:s0xb1 <p:1> "a # not a comment" <http://g/A> .',
+            "<s:1> <p:2> _:s0xb1 <http://g/A> .",
+            "_:s1xb1 <p:1> <o:1> <http://g/B> .",
+            "_:s2xb1 <p:1> <o:2> <g:x> .",
+        ]
+
+
+class TestBulkLoad:
+    """tdbloader 실행 + 디렉터리 교체 테스트"""
+
+    def test_load_should_refuse_while_server_is_running(self, fuseki_home):
+        """Fuseki 가 응답하면 로더를 실행하지 않아야 함"""
+        with patch.object(tdb_bulk_load.requests, "get", return_value=Mock(status_code=200)), \
+             patch.object(tdb_bulk_load.subprocess, "run") as run:
+            result = TdbBulkLoader(fuseki_home).load({"default": fuseki_home / "x.nt"})
+        assert result["status"] == "FAILED"
+        assert "stop it" in result["error"]
+        run.assert_not_called()
+
+    def test_load_should_swap_database_and_report_counts(self, fuseki_home, tmp_path, server_down, monkeypatch):
+        """새 디렉터리로 교체, 기존 DB 는 backup, 그래프별 트리플 수와 단계별 시간 보고"""
+        monkeypatch.setattr(tdb_bulk_load, "bump_graph_versions", bumped := Mock())
+        (tmp_path / "a.nt").write_text("<s:1> <p:1> <o:1> .\n")
+        (tmp_path / "b.ttl").write_text("<s:1> <p:1> <o:1> .\n")
+        java = fake_java()
+        with patch.object(tdb_bulk_load.subprocess, "run", side_effect=java):
+            result = TdbBulkLoader(fuseki_home, loader="phased").load(
+                {"http://samsung.com/graph/OFCO": tmp_path / "a.nt", "default": tmp_path / "b.ttl"})
+
+        db = fuseki_home / "data" / "tdb-hvdc"
+        assert result["status"] == "SUCCESS"
+        assert result["graphs"] == {"default": 2, "http://samsung.com/graph/OFCO": 3}
+        assert result["total_triples"] == 5
+        assert set(result["timings_s"]) == {"export", "load", "count", "swap"}
+        assert (db / "Data-0001").is_dir()
+        assert (tdb_bulk_load.Path(result["backup_dir"]) / "Data-0001").read_text() == "old"
+        assert [p.name for p in (fuseki_home / "data").iterdir() if ".loading-" in p.name] == []
+
+        loads = [cmd for cmd in java.calls if "tdb2.tdbloader" in cmd]
+        assert "--loader=phased" in loads[0] and loads[0][-1].endswith(".nq")
+        assert loads[1][-1].endswith("b.ttl") and not any(a.startswith("--graph") for a in loads[1])
+        bumped.assert_called_once_with(["urn:x-arq:DefaultGraph", "http://samsung.com/graph/OFCO"])
+
+    def test_loader_failure_should_keep_existing_database(self, fuseki_home, tmp_path, server_down):
+        """tdbloader 실패 시 기존 DB 유지, 임시 디렉터리/N-Quads 정리"""
+        (tmp_path / "a.nt").write_text("<s:1> <p:1> <o:1> .\n")
+        with patch.object(tdb_bulk_load.subprocess, "run", side_effect=fake_java(fail_on="tdb2.tdbloader")):
+            result = TdbBulkLoader(fuseki_home).load({"default": tmp_path / "a.nt"})
+
+        assert result["status"] == "FAILED"
+        assert "parse error" in result["error"]
+        assert (fuseki_home / "data" / "tdb-hvdc" / "Data-0001").read_text() == "old"
+        assert [p.name for p in (fuseki_home / "data").iterdir()] == ["tdb-hvdc"]
+
+    def test_swap_should_roll_back_when_rename_fails(self, fuseki_home, monkeypatch):
+        """새 DB 이동이 실패하면 backup 을 원래 위치로 되돌려야 함"""
+        loader = TdbBulkLoader(fuseki_home)
+        real_replace = tdb_bulk_load.os.replace
+
+        def replace(src, dst):
+            if ".loading-" in str(src):
+                raise OSError("disk full")
+            real_replace(src, dst)
+        monkeypatch.setattr(tdb_bulk_load.os, "replace", replace)
+
+        with pytest.raises(OSError):
+            loader.swap(fuseki_home / "data" / "tdb-hvdc.loading-x")
+        assert (fuseki_home / "data" / "tdb-hvdc" / "Data-0001").read_text() == "old"